@@ -117,6 +117,14 @@ def process_args():
         action='store_true',
         help="debug outputs from frida script")
 
+    parser.add_argument(
+        "-pr",
+        "--profile-rpc",
+        nargs='?',
+        const='dwarf-rpc-profile.json',
+        metavar='FILE',
+        help="record api and agent messages timings, written as json to FILE on exit")
+
     parser.add_argument('any', nargs='?', default='', help='path/pid/package')
     parser.add_argument('args', nargs='*', default=[''], help='arguments')
 
@@ -1436,6 +1436,72 @@ var Api = /*#__PURE__*/function () {
   }
 
   (0, _createClass2["default"])(Api, null, [{
+    key: "_batch",
+    value: function _batch(calls) {
+      var _this = this;
+
+      if (utils_1.Utils.isString(calls)) {
+        calls = JSON.parse(calls);
+      }
+
+      var blobs = [];
+      var results = calls.map(function (call) {
+        var apiFunction = call[0];
+        var apiArguments = call[1];
+
+        if (!utils_1.Utils.isDefined(apiArguments)) {
+          apiArguments = [];
+        }
+
+        if (!utils_1.Utils.isDefined(Api[apiFunction])) {
+          return {
+            'error': apiFunction + ' is not a valid api'
+          };
+        }
+
+        try {
+          var result = Api[apiFunction].apply(_this, apiArguments);
+
+          if (result instanceof ArrayBuffer) {
+            blobs.push(result);
+            return {
+              'bytes': result.byteLength
+            };
+          }
+
+          return {
+            'result': result
+          };
+        } catch (e) {
+          return {
+            'error': e.toString()
+          };
+        }
+      });
+
+      if (blobs.length === 0) {
+        return results;
+      }
+
+      // bytes go raw through the binary channel:
+      // [results json length, u32 le][results json, utf8][bytes of the results, in order]
+      var header = (0, _stringify["default"])(results);
+      var headerLength = unescape(encodeURIComponent(header)).length;
+      var size = 4 + headerLength;
+      blobs.forEach(function (blob) {
+        size += blob.byteLength;
+      });
+      var packed = new Uint8Array(size);
+      new DataView(packed.buffer).setUint32(0, headerLength, true);
+      packed.set(new Uint8Array(Memory.allocUtf8String(header).readByteArray(headerLength)), 4);
+      var offset = 4 + headerLength;
+      blobs.forEach(function (blob) {
+        packed.set(new Uint8Array(blob), offset);
+        offset += blob.byteLength;
+      });
+      return packed.buffer;
+    }
+  }, {
     key: "_internalMemoryScan",
     value: function _internalMemoryScan(start, size, pattern) {
       if (size > 4096) {
@@ -1444,6 +1510,7 @@ var Api = /*#__PURE__*/function () {
         var end = _start + size;
         var result = [];
         var _break = false;
+        var overlap = Api._patternLength(pattern) - 1;
 
         while (true) {
           var s = 4096;
@@ -1453,13 +1520,16 @@ var Api = /*#__PURE__*/function () {
             _break = true;
           }
 
-          result = result.concat(Memory.scanSync(start, s, pattern));
+          // matches crossing into the next slice are found by this one, skip them there
+          result = result.concat(Memory.scanSync(start, Math.min(s + overlap, end - _start), pattern).filter(function (match) {
+            return match.address.compare(start.add(s)) < 0;
+          }));
 
           if (_break || result.length >= 100) {
             break;
           }
 
-          start = start.add(size);
+          start = start.add(s);
           _start += s;
         }
 
@@ -1523,20 +1593,20 @@ var Api = /*#__PURE__*/function () {
       }
 
       if (useCache && logic_java_1.LogicJava !== null && logic_java_1.LogicJava.javaClasses.length > 0) {
-        dwarf_1.Dwarf.loggedSend("enumerate_java_classes_start:::");
+        dwarf_1.Dwarf.loggedSend('enumerate_java_classes_start');
 
         for (var i = 0; i < logic_java_1.LogicJava.javaClasses.length; i++) {
-          send("enumerate_java_classes_match:::" + logic_java_1.LogicJava.javaClasses[i]);
+          dwarf_1.Dwarf.batchedSend('enumerate_java_classes_match', logic_java_1.LogicJava.javaClasses[i]);
         }
 
-        dwarf_1.Dwarf.loggedSend("enumerate_java_classes_complete:::");
+        dwarf_1.Dwarf.loggedSend('enumerate_java_classes_complete');
       } else {
         if (logic_java_1.LogicJava !== null) {
           logic_java_1.LogicJava.javaClasses = [];
         }
 
         Java.performNow(function () {
-          dwarf_1.Dwarf.loggedSend("enumerate_java_classes_start:::");
+          dwarf_1.Dwarf.loggedSend('enumerate_java_classes_start');
 
           try {
             var mainLoader = Java.classFactory.loader;
@@ -1550,13 +1620,13 @@ var Api = /*#__PURE__*/function () {
                     logic_java_1.LogicJava.javaClasses.push(className);
                   }
 
-                  send("enumerate_java_classes_match:::" + className);
+                  dwarf_1.Dwarf.batchedSend('enumerate_java_classes_match', className);
                 },
                 onComplete: function onComplete() {
                   n++;
 
                   if (n === ldr.length) {
-                    dwarf_1.Dwarf.loggedSend("enumerate_java_classes_complete:::");
+                    dwarf_1.Dwarf.loggedSend('enumerate_java_classes_complete');
                   }
                 }
               });
@@ -1564,7 +1634,7 @@ var Api = /*#__PURE__*/function () {
             Java.classFactory.loader = mainLoader;
           } catch (e) {
             utils_1.Utils.logErr("enumerateJavaClasses", e);
-            dwarf_1.Dwarf.loggedSend("enumerate_java_classes_complete:::");
+            dwarf_1.Dwarf.loggedSend('enumerate_java_classes_complete');
           }
         });
       }
@@ -1583,7 +1653,10 @@ var Api = /*#__PURE__*/function () {
               parsedMethods.push(method.toString().replace(className + ".", "TOKEN").match(/\sTOKEN(.*)\(/)[1]);
             });
             var result = utils_1.Utils.uniqueBy(parsedMethods);
-            dwarf_1.Dwarf.loggedSend("enumerate_java_methods_complete:::" + className + ":::" + (0, _stringify["default"])(result));
+            dwarf_1.Dwarf.loggedSend('enumerate_java_methods_complete', {
+              'className': className,
+              'methods': result
+            });
           } catch (e) {
             utils_1.Utils.logErr("classMethods", e);
           }
@@ -1597,12 +1670,14 @@ var Api = /*#__PURE__*/function () {
       var names = modules.map(function (m) {
         return m.name;
       });
-      dwarf_1.Dwarf.loggedSend("enumerate_objc_modules:::" + (0, _stringify["default"])(names));
+      dwarf_1.Dwarf.loggedSend('enumerate_objc_modules', {
+        'modules': names
+      });
     }
   }, {
     key: "enumerateObjCClasses",
     value: function enumerateObjCClasses(moduleName) {
-      dwarf_1.Dwarf.loggedSend("enumerate_objc_classes_start:::");
+      dwarf_1.Dwarf.loggedSend('enumerate_objc_classes_start');
 
       try {
         ObjC.enumerateLoadedClasses({
@@ -1615,29 +1690,29 @@ var Api = /*#__PURE__*/function () {
               logic_objc_1.LogicObjC.objcClasses.push(className);
             }
 
-            send("enumerate_objc_classes_match:::" + className);
+            dwarf_1.Dwarf.batchedSend('enumerate_objc_classes_match', className);
           },
           onComplete: function onComplete() {
-            send("enumerate_objc_classes_complete:::");
+            dwarf_1.Dwarf.loggedSend('enumerate_objc_classes_complete');
           }
         });
       } catch (e) {
         utils_1.Utils.logErr("enumerateObjCClasses", e);
-        dwarf_1.Dwarf.loggedSend("enumerate_objc_classes_complete:::");
+        dwarf_1.Dwarf.loggedSend('enumerate_objc_classes_complete');
       }
     }
   }, {
     key: "enumerateObjCMethods",
     value: function enumerateObjCMethods(className) {
       if (ObjC.available) {
-        dwarf_1.Dwarf.loggedSend("enumerate_objc_methods_start:::");
+        dwarf_1.Dwarf.loggedSend('enumerate_objc_methods_start');
         var that = this;
         var clazz = ObjC.classes[className];
         var methods = clazz.$ownMethods;
         methods.forEach(function (method) {
-          send("enumerate_objc_methods_match:::" + method);
+          dwarf_1.Dwarf.batchedSend('enumerate_objc_methods_match', method);
         });
-        dwarf_1.Dwarf.loggedSend("enumerate_objc_methods_complete:::");
+        dwarf_1.Dwarf.loggedSend('enumerate_objc_methods_complete');
       }
     }
   }, {
@@ -1844,6 +1919,11 @@ var Api = /*#__PURE__*/function () {
 
       return [-1, p];
     }
+  }, {
+    key: "getBreakpointStats",
+    value: function getBreakpointStats(address_or_class) {
+      return logic_breakpoint_1.LogicBreakpoint.getBreakpointStats(address_or_class);
+    }
   }, {
     key: "getDebugSymbols",
     value: function getDebugSymbols(ptrs) {
@@ -1930,8 +2010,8 @@ var Api = /*#__PURE__*/function () {
 
           if (utils_1.Utils.isDefined(elfFile)) {
             if (isUICall) {
-              send({
-                elf_info: elfFile
+              dwarf_1.Dwarf.loggedSend('elf_info', {
+                'elf_info': elfFile
               });
             }
 
@@ -2076,7 +2156,9 @@ var Api = /*#__PURE__*/function () {
             });
           }
 
-          dwarf_1.Dwarf.loggedSend("log:::" + message);
+          dwarf_1.Dwarf.loggedSend('log', {
+            'message': message
+          });
         } else {
           console.log(message, optionalParams);
         }
@@ -2093,7 +2175,9 @@ var Api = /*#__PURE__*/function () {
         utils_1.Utils.logErr("memoryScan", e);
       }
 
-      dwarf_1.Dwarf.loggedSend("memoryscan_result:::" + (0, _stringify["default"])(result));
+      dwarf_1.Dwarf.loggedSend('memoryscan_result', {
+        'result': result
+      });
     }
   }, {
     key: "memoryScanList",
@@ -2113,7 +2197,154 @@ var Api = /*#__PURE__*/function () {
         }
       }
 
-      dwarf_1.Dwarf.loggedSend("memoryscan_result:::" + (0, _stringify["default"])(result));
+      dwarf_1.Dwarf.loggedSend('memoryscan_result', {
+        'result': result
+      });
+    }
+  }, {
+    key: "_patternLength",
+    value: function _patternLength(pattern) {
+      // bytes of a frida pattern, the mask after ':' has the same length
+      return pattern.split(':')[0].split(' ').filter(function (token) {
+        return token.length > 0;
+      }).length;
+    }
+  }, {
+    key: "memorySearch",
+    value: function memorySearch(id, ranges, pattern, limit) {
+      // scans the ranges in chunks with Memory.scan and returns right away.
+      // matches are streamed as batched memorysearch_match, then memorysearch_progress after each chunk
+      // and memorysearch_complete once done, cancelled or when limit (0 for none) is reached
+      var search = {
+        'id': id,
+        'ranges': ranges,
+        'pattern': pattern,
+        'limit': limit || 0,
+        'overlap': Api._patternLength(pattern) - 1,
+        'range': 0,
+        'offset': 0,
+        // a chunk failing on unmapped pages is scanned again in smaller chunks up to retryEnd
+        'retryEnd': 0,
+        'retryChunk': 0,
+        // last match of the current range, the ones before are found again by a retry
+        'last': null,
+        'matches': 0,
+        'cancelled': false
+      };
+      Api.memorySearches[id] = search;
+      Api._memorySearchNext(search);
+      return id;
+    }
+  }, {
+    key: "cancelMemorySearch",
+    value: function cancelMemorySearch(id) {
+      var search = Api.memorySearches[id];
+
+      if (utils_1.Utils.isDefined(search)) {
+        search.cancelled = true;
+        return true;
+      }
+
+      return false;
+    }
+  }, {
+    key: "_memorySearchNext",
+    value: function _memorySearchNext(search) {
+      var limited = search.limit > 0 && search.matches >= search.limit;
+
+      while (search.range < search.ranges.length && search.offset >= search.ranges[search.range]['size']) {
+        search.range++;
+        search.offset = 0;
+        search.retryEnd = 0;
+        search.last = null;
+      }
+
+      if (search.cancelled || limited || search.range >= search.ranges.length) {
+        delete Api.memorySearches[search.id];
+        dwarf_1.Dwarf.loggedSend('memorysearch_complete', {
+          'id': search.id,
+          'matches': search.matches,
+          'cancelled': search.cancelled,
+          'limited': limited
+        });
+        return;
+      }
+
+      var range = search.ranges[search.range];
+      var rangeIndex = search.range;
+      var size = range['size'];
+      var chunk = search.offset < search.retryEnd ? search.retryChunk : Api.MEMORY_SEARCH_CHUNK;
+      chunk = Math.min(chunk, size - search.offset);
+      var start = ptr(range['start']).add(search.offset);
+      var chunkEnd = start.add(chunk);
+
+      var done = false;
+
+      var next = function next(failed) {
+        if (done) {
+          return;
+        }
+
+        done = true;
+
+        if (failed === true && chunk > Process.pageSize) {
+          search.retryEnd = search.offset + chunk;
+          search.retryChunk = Math.max(Process.pageSize, Math.floor(chunk / Api.MEMORY_SEARCH_SPLIT / Process.pageSize) * Process.pageSize);
+          Api._memorySearchNext(search);
+          return;
+        }
+
+        search.offset += chunk;
+        dwarf_1.Dwarf.loggedSend('memorysearch_progress', {
+          'id': search.id,
+          'range': rangeIndex,
+          'done': search.offset,
+          'size': size,
+          'matches': search.matches
+        });
+        Api._memorySearchNext(search);
+      };
+
+      try {
+        // a match starting here may end in the next chunk
+        Memory.scan(start, Math.min(chunk + search.overlap, size - search.offset), search.pattern, {
+          onMatch: function onMatch(address) {
+            if (search.cancelled) {
+              return 'stop';
+            }
+
+            if (address.compare(chunkEnd) >= 0) {
+              // found again by the next chunk
+              return;
+            }
+
+            if (search.last !== null && address.compare(search.last) <= 0) {
+              // already sent before a retry
+              return;
+            }
+
+            search.last = address;
+            search.matches++;
+            dwarf_1.Dwarf.batchedSend('memorysearch_match', {
+              'id': search.id,
+              'range': rangeIndex,
+              'address': address.toString()
+            });
+
+            if (search.limit > 0 && search.matches >= search.limit) {
+              return 'stop';
+            }
+          },
+          onError: function onError(reason) {
+            // unreadable pages, scan around them
+            next(true);
+          },
+          onComplete: next
+        });
+      } catch (e) {
+        utils_1.Utils.logErr("memorySearch", e);
+        next(true);
+      }
     }
   }, {
     key: "putBreakpoint",
@@ -2275,7 +2506,9 @@ var Api = /*#__PURE__*/function () {
   }, {
     key: "releaseFromJs",
     value: function releaseFromJs(tid) {
-      dwarf_1.Dwarf.loggedSend("release_js:::" + tid);
+      dwarf_1.Dwarf.loggedSend('release_js', {
+        'tid': tid
+      });
     }
   }, {
     key: "removeBreakpoint",
@@ -2288,7 +2521,10 @@ var Api = /*#__PURE__*/function () {
       var ret = logic_java_1.LogicJava.removeModuleInitializationBreakpoint(moduleName);
 
       if (ret) {
-        dwarf_1.Dwarf.loggedSend("breakpoint_deleted:::java_class_initialization:::" + moduleName);
+        dwarf_1.Dwarf.loggedSend('breakpoint_deleted', {
+          'kind': 'java_class_initialization',
+          'target': moduleName
+        });
       }
 
       return ret;
@@ -2299,7 +2535,10 @@ var Api = /*#__PURE__*/function () {
       var ret = logic_initialization_1.LogicInitialization.removeModuleInitializationBreakpoint(moduleName);
 
       if (ret) {
-        dwarf_1.Dwarf.loggedSend("breakpoint_deleted:::module_initialization:::" + moduleName);
+        dwarf_1.Dwarf.loggedSend('breakpoint_deleted', {
+          'kind': 'module_initialization',
+          'target': moduleName
+        });
       }
 
       return ret;
@@ -2323,7 +2562,7 @@ var Api = /*#__PURE__*/function () {
     value: function resume() {
       if (!dwarf_1.Dwarf.PROC_RESUMED) {
         dwarf_1.Dwarf.PROC_RESUMED = true;
-        dwarf_1.Dwarf.loggedSend("resume:::0");
+        dwarf_1.Dwarf.loggedSend('resume');
       } else {
         console.log("Error: Process already resumed");
       }
@@ -2341,13 +2580,18 @@ var Api = /*#__PURE__*/function () {
       }
 
       if (data.constructor.name === "ArrayBuffer") {
-        dwarf_1.Dwarf.loggedSend("set_data:::" + key, data);
+        dwarf_1.Dwarf.loggedSend('set_data', {
+          'key': key
+        }, data);
       } else {
         if ((0, _typeof2["default"])(data) === "object") {
           data = (0, _stringify["default"])(data, null, 4);
         }
 
-        dwarf_1.Dwarf.loggedSend("set_data:::" + key + ":::" + data);
+        dwarf_1.Dwarf.loggedSend('set_data', {
+          'key': key,
+          'data': '' + data
+        });
       }
     }
   }, {
@@ -2381,13 +2625,19 @@ var Api = /*#__PURE__*/function () {
     key: "updateModules",
     value: function updateModules() {
       var modules = Api.enumerateModules();
-      dwarf_1.Dwarf.loggedSend("update_modules:::" + Process.getCurrentThreadId() + ":::" + (0, _stringify["default"])(modules));
+      dwarf_1.Dwarf.loggedSend('update_modules', {
+        'tid': Process.getCurrentThreadId(),
+        'modules': modules
+      });
     }
   }, {
     key: "updateRanges",
     value: function updateRanges() {
       try {
-        dwarf_1.Dwarf.loggedSend("update_ranges:::" + Process.getCurrentThreadId() + ":::" + (0, _stringify["default"])(Process.enumerateRanges("---")));
+        dwarf_1.Dwarf.loggedSend('update_ranges', {
+          'tid': Process.getCurrentThreadId(),
+          'ranges': Process.enumerateRanges("---")
+        });
       } catch (e) {
         utils_1.Utils.logErr("updateRanges", e);
       }
@@ -2396,7 +2646,10 @@ var Api = /*#__PURE__*/function () {
     key: "updateSearchableRanges",
     value: function updateSearchableRanges() {
       try {
-        dwarf_1.Dwarf.loggedSend("update_searchable_ranges:::" + Process.getCurrentThreadId() + ":::" + (0, _stringify["default"])(Process.enumerateRanges("r--")));
+        dwarf_1.Dwarf.loggedSend('update_searchable_ranges', {
+          'tid': Process.getCurrentThreadId(),
+          'ranges': Process.enumerateRanges("r--")
+        });
       } catch (e) {
         utils_1.Utils.logErr("updateSearchableRanges", e);
       }
@@ -2435,6 +2688,10 @@ var Api = /*#__PURE__*/function () {
   return Api;
 }();
 
+Api.MEMORY_SEARCH_CHUNK = 4 * 1024 * 1024;
+Api.MEMORY_SEARCH_SPLIT = 16;
+Api.memorySearches = {};
+
 exports.Api = Api;
 
 },{"./dwarf":103,"./elf_file":104,"./fs":105,"./logic_breakpoint":108,"./logic_initialization":109,"./logic_java":110,"./logic_objc":111,"./logic_stalker":112,"./logic_watchpoint":113,"./thread_wrapper":117,"./utils":118,"./watchpoint":119,"@babel/runtime-corejs2/core-js/json/stringify":3,"@babel/runtime-corejs2/core-js/object/define-property":5,"@babel/runtime-corejs2/core-js/parse-int":8,"@babel/runtime-corejs2/helpers/classCallCheck":11,"@babel/runtime-corejs2/helpers/createClass":12,"@babel/runtime-corejs2/helpers/interopRequireDefault":13,"@babel/runtime-corejs2/helpers/typeof":14}],102:[function(require,module,exports){
@@ -2454,6 +2711,12 @@ exports.Breakpoint = void 0;
 var Breakpoint = function Breakpoint(target) {
   (0, _classCallCheck2["default"])(this, Breakpoint);
   this.target = target;
+  this.condition = null; // compiled once when the condition is set, called on every hit
+
+  this.conditionFunction = null;
+  this.conditionError = null;
+  this.hits = 0;
+  this.skips = 0;
 };
 
 exports.Breakpoint = Breakpoint;
@@ -2603,7 +2866,12 @@ var Dwarf = function () {
             }
 
             data['backtrace'] = {
-              'bt': api_1.Api.backtrace(context),
+              // symbols are resolved on the host, the agent is asked only for the ones it misses
+              'bt': Thread.backtrace(context, Backtracer.ACCURATE).map(function (address) {
+                return {
+                  'address': address
+                };
+              }),
               'type': 'native'
             };
             data['is_java'] = false;
@@ -2667,7 +2935,7 @@ var Dwarf = function () {
           utils_1.Utils.logDebug('[' + tid + '] sendInfos - dispatching infos');
         }
 
-        Dwarf.loggedSend('set_context:::' + (0, _stringify["default"])(data));
+        Dwarf.loggedSend('set_context', data);
       }
     }, {
       key: "handleException",
@@ -2703,19 +2971,93 @@ var Dwarf = function () {
         var watchpoint = logic_watchpoint_1.LogicWatchpoint.handleException(exception);
         return watchpoint !== null;
       }
+    }, {
+      key: "batchedSend",
+      value: function batchedSend(type, item, size) {
+        var batch = Dwarf.sendBatches[type];
+
+        if (!utils_1.Utils.isDefined(batch)) {
+          batch = Dwarf.sendBatches[type] = {
+            'items': [],
+            'bytes': 0
+          };
+          Dwarf.pendingBatches++;
+        }
+
+        batch.items.push(item);
+
+        if (!utils_1.Utils.isDefined(size)) {
+          size = 0;
+
+          if (typeof item === 'string') {
+            size = item.length;
+          } else {
+            for (var key in item) {
+              if (typeof item[key] === 'string') {
+                size += item[key].length;
+              }
+            }
+          }
+        }
+
+        batch.bytes += size;
+
+        if (batch.items.length >= Dwarf.SEND_BATCH_MAX_COUNT || batch.bytes >= Dwarf.SEND_BATCH_MAX_BYTES) {
+          Dwarf.flushBatchedSends();
+        } else if (Dwarf.sendBatchTimer === null) {
+          Dwarf.sendBatchTimer = setTimeout(Dwarf.flushBatchedSends, Dwarf.SEND_BATCH_INTERVAL);
+        }
+      }
+    }, {
+      key: "flushBatchedSends",
+      value: function flushBatchedSends() {
+        if (Dwarf.sendBatchTimer !== null) {
+          clearTimeout(Dwarf.sendBatchTimer);
+          Dwarf.sendBatchTimer = null;
+        }
+
+        var batches = Dwarf.sendBatches;
+        Dwarf.sendBatches = {};
+        Dwarf.pendingBatches = 0;
+
+        for (var type in batches) {
+          Dwarf.loggedSend(type, {
+            'items': batches[type].items
+          });
+        }
+      }
     }, {
       key: "loggedSend",
-      value: function loggedSend(w, p) {
+      value: function loggedSend(type, message, data) {
+        if (Dwarf.pendingBatches > 0) {
+          // anything batched so far must reach the host before this one
+          Dwarf.flushBatchedSends();
+        }
+
+        if (!utils_1.Utils.isDefined(message)) {
+          message = {};
+        }
+
+        message['v'] = Dwarf.MESSAGE_VERSION;
+        message['type'] = type;
+
         if (Dwarf.DEBUG) {
-          console.log('[' + Process.getCurrentThreadId() + '] send | ' + w);
+          console.log('[' + Process.getCurrentThreadId() + '] send | ' + type);
         }
 
-        return send(w, p);
+        return send(message, data);
       }
     }]);
     return Dwarf;
   }();
 
+  Dwarf.MESSAGE_VERSION = 1;
+  Dwarf.SEND_BATCH_MAX_COUNT = 500;
+  Dwarf.SEND_BATCH_MAX_BYTES = 64 * 1024;
+  Dwarf.SEND_BATCH_INTERVAL = 50;
+  Dwarf.sendBatches = {};
+  Dwarf.pendingBatches = 0;
+  Dwarf.sendBatchTimer = null;
   Dwarf.PROC_RESUMED = false;
   Dwarf.threadContexts = {};
   Dwarf.modulesBlacklist = [];
@@ -3415,10 +3757,6 @@ var _interopRequireDefault = require("@babel/runtime-corejs2/helpers/interopRequ
 
 var _getOwnPropertyNames = _interopRequireDefault(require("@babel/runtime-corejs2/core-js/object/get-own-property-names"));
 
-var _now = _interopRequireDefault(require("@babel/runtime-corejs2/core-js/date/now"));
-
-var _keys = _interopRequireDefault(require("@babel/runtime-corejs2/core-js/object/keys"));
-
 var _defineProperty = _interopRequireDefault(require("@babel/runtime-corejs2/core-js/object/define-property"));
 
 (0, _defineProperty["default"])(exports, "__esModule", {
@@ -3429,8 +3767,6 @@ var api_1 = require("./api");
 
 var dwarf_1 = require("./dwarf");
 
-var thread_api_1 = require("./thread_api");
-
 var utils_1 = require("./utils");
 
 var isDefined = utils_1.Utils.isDefined;
@@ -3465,41 +3801,6 @@ rpc.exports = {
       apiArguments = [];
     }
 
-    if ((0, _keys["default"])(dwarf_1.Dwarf.threadContexts).length > 0) {
-      var threadContext = dwarf_1.Dwarf.threadContexts[tid];
-
-      if (utils_1.Utils.isDefined(threadContext)) {
-        var threadApi = new thread_api_1.ThreadApi(apiFunction, apiArguments);
-        threadContext.apiQueue.push(threadApi);
-        var start = (0, _now["default"])();
-
-        while (!threadApi.consumed) {
-          Thread.sleep(0.5);
-
-          if (dwarf_1.Dwarf.DEBUG) {
-            utils_1.Utils.logDebug('[' + tid + '] RPC-API: ' + apiFunction + ' waiting for api result');
-          }
-
-          if ((0, _now["default"])() - start > 3 * 1000) {
-            threadApi.result = '';
-            break;
-          }
-        }
-
-        var ret = threadApi.result;
-
-        if (!isDefined(ret)) {
-          ret = '';
-        }
-
-        if (dwarf_1.Dwarf.DEBUG) {
-          utils_1.Utils.logDebug('[' + tid + '] RPC-API: ' + apiFunction + ' api result: ' + ret);
-        }
-
-        return ret;
-      }
-    }
-
     return api_1.Api[apiFunction].apply(this, apiArguments);
   },
   init: function init(breakStart, debug, spawned, isUi) {
@@ -3525,7 +3826,7 @@ rpc.exports = {
 };
 
 }).call(this,typeof global !== "undefined" ? global : typeof self !== "undefined" ? self : typeof window !== "undefined" ? window : {})
-},{"./api":101,"./dwarf":103,"./elf_file":104,"./thread_api":115,"./utils":118,"@babel/runtime-corejs2/core-js/date/now":1,"@babel/runtime-corejs2/core-js/object/define-property":5,"@babel/runtime-corejs2/core-js/object/get-own-property-names":6,"@babel/runtime-corejs2/core-js/object/keys":7,"@babel/runtime-corejs2/helpers/interopRequireDefault":13}],107:[function(require,module,exports){
+},{"./api":101,"./dwarf":103,"./elf_file":104,"./utils":118,"@babel/runtime-corejs2/core-js/object/define-property":5,"@babel/runtime-corejs2/core-js/object/get-own-property-names":6,"@babel/runtime-corejs2/helpers/interopRequireDefault":13}],107:[function(require,module,exports){
 (function (global){
 "use strict";
 
@@ -3574,7 +3875,10 @@ var DwarfInterceptor = /*#__PURE__*/function () {
               utils_1.Utils.logDebug('[' + tid + '] setting context ' + prop.toString() + ': ' + value);
             }
 
-            send('set_context_value:::' + prop.toString() + ':::' + value);
+            dwarf_1.Dwarf.loggedSend('set_context_value', {
+              'property': prop.toString(),
+              'value': '' + value
+            });
             object[prop] = value;
             return true;
           }
@@ -3649,6 +3953,8 @@ exports.DwarfInterceptor = DwarfInterceptor;
 
 var _interopRequireDefault = require("@babel/runtime-corejs2/helpers/interopRequireDefault");
 
+var _stringify = _interopRequireDefault(require("@babel/runtime-corejs2/core-js/json/stringify"));
+
 var _classCallCheck2 = _interopRequireDefault(require("@babel/runtime-corejs2/helpers/classCallCheck"));
 
 var _createClass2 = _interopRequireDefault(require("@babel/runtime-corejs2/helpers/createClass"));
@@ -3672,6 +3978,8 @@ var logic_objc_1 = require("./logic_objc");
 
 var logic_stalker_1 = require("./logic_stalker");
 
+var thread_api_1 = require("./thread_api");
+
 var thread_context_1 = require("./thread_context");
 
 var utils_1 = require("./utils");
@@ -3684,7 +3992,7 @@ var LogicBreakpoint = function () {
 
     (0, _createClass2["default"])(LogicBreakpoint, null, [{
       key: "breakpoint",
-      value: function breakpoint(reason, address_or_class, context, java_handle, condition) {
+      value: function breakpoint(reason, address_or_class, context, java_handle) {
         var tid = Process.getCurrentThreadId();
 
         if (!utils_1.Utils.isDefined(reason)) {
@@ -3703,17 +4011,6 @@ var LogicBreakpoint = function () {
           dwarf_1.Dwarf.threadContexts[tid] = threadContext;
         }
 
-        if (utils_1.Utils.isDefined(condition)) {
-          if (typeof condition === "string") {
-            condition = new Function(condition);
-          }
-
-          if ((typeof condition === "function") && !condition.call(threadContext)) {
-            delete dwarf_1.Dwarf.threadContexts[tid];
-            return;
-          }
-        }
-
         if (!utils_1.Utils.isDefined(threadContext) || !threadContext.preventSleep) {
           if (dwarf_1.Dwarf.DEBUG) {
             utils_1.Utils.logDebug('[' + tid + '] break ' + address_or_class + ' - dispatching context info');
@@ -3731,7 +4028,10 @@ var LogicBreakpoint = function () {
             utils_1.Utils.logDebug('[' + tid + '] ThreadContext has been released');
           }
 
-          dwarf_1.Dwarf.loggedSend('release:::' + tid + ':::' + reason);
+          dwarf_1.Dwarf.loggedSend('release', {
+            'tid': tid,
+            'reason': reason
+          });
         }
       }
     }, {
@@ -3743,66 +4043,201 @@ var LogicBreakpoint = function () {
           utils_1.Utils.logDebug('[' + tid + '] looping api');
         }
 
-        var op = recv('' + tid, function () {});
-        op.wait();
         var threadContext = dwarf_1.Dwarf.threadContexts[tid];
 
-        if (utils_1.Utils.isDefined(threadContext)) {
-          while (threadContext.apiQueue.length === 0) {
-            if (dwarf_1.Dwarf.DEBUG) {
-              utils_1.Utils.logDebug('[' + tid + '] waiting api queue to be populated');
+        if (!utils_1.Utils.isDefined(threadContext)) {
+          return;
+        }
+
+        var release = false;
+
+        while (!release) {
+          // api requests are posted by the host with the thread id as type.
+          // a request without api is just a wake up
+          var op = recv('' + tid, function (message) {
+            if (utils_1.Utils.isDefined(message.api)) {
+              threadContext.apiQueue.push(new thread_api_1.ThreadApi(message.api, message.args, message.id));
             }
+          });
+          op.wait();
+          var threadApi = threadContext.apiQueue.shift();
 
-            Thread.sleep(0.2);
+          if (!utils_1.Utils.isDefined(threadApi)) {
+            continue;
           }
 
-          var release = false;
+          if (dwarf_1.Dwarf.DEBUG) {
+            utils_1.Utils.logDebug('[' + tid + '] executing ' + threadApi.apiFunction);
+          }
 
-          while (threadContext.apiQueue.length > 0) {
-            var threadApi = threadContext.apiQueue.shift();
+          try {
+            if (utils_1.Utils.isDefined(api_1.Api[threadApi.apiFunction])) {
+              threadApi.result = api_1.Api[threadApi.apiFunction].apply(that, threadApi.apiArguments);
+            } else {
+              threadApi.result = null;
+            }
+          } catch (e) {
+            threadApi.result = null;
 
             if (dwarf_1.Dwarf.DEBUG) {
-              utils_1.Utils.logDebug('[' + tid + '] executing ' + threadApi.apiFunction);
+              utils_1.Utils.logDebug('[' + tid + '] error executing ' + threadApi.apiFunction + ':\n' + e);
             }
+          }
 
-            try {
-              if (utils_1.Utils.isDefined(api_1.Api[threadApi.apiFunction])) {
-                threadApi.result = api_1.Api[threadApi.apiFunction].apply(that, threadApi.apiArguments);
-              } else {
-                threadApi.result = null;
-              }
-            } catch (e) {
-              threadApi.result = null;
+          threadApi.consumed = true;
+          LogicBreakpoint.sendApiResult(threadApi);
+          var stalkerInfo = logic_stalker_1.LogicStalker.stalkerInfoMap[tid];
 
-              if (dwarf_1.Dwarf.DEBUG) {
-                utils_1.Utils.logDebug('[' + tid + '] error executing ' + threadApi.apiFunction + ':\n' + e);
-              }
+          if (threadApi.apiFunction === '_step') {
+            if (!utils_1.Utils.isDefined(stalkerInfo)) {
+              logic_stalker_1.LogicStalker.stalk(tid);
             }
 
-            threadApi.consumed = true;
-            var stalkerInfo = logic_stalker_1.LogicStalker.stalkerInfoMap[tid];
+            release = true;
+          } else if (threadApi.apiFunction === 'release') {
+            if (utils_1.Utils.isDefined(stalkerInfo)) {
+              stalkerInfo.terminated = true;
+            }
 
-            if (threadApi.apiFunction === '_step') {
-              if (!utils_1.Utils.isDefined(stalkerInfo)) {
-                logic_stalker_1.LogicStalker.stalk(tid);
-              }
+            release = true;
+          }
+        }
 
-              release = true;
-              break;
-            } else if (threadApi.apiFunction === 'release') {
-              if (utils_1.Utils.isDefined(stalkerInfo)) {
-                stalkerInfo.terminated = true;
-              }
+        threadContext.apiQueue = [];
+      }
+    }, {
+      key: "sendApiResult",
+      value: function sendApiResult(threadApi) {
+        var ret = threadApi.result;
 
-              release = true;
-              break;
-            }
+        if (!utils_1.Utils.isDefined(ret)) {
+          ret = '';
+        }
+
+        if (dwarf_1.Dwarf.DEBUG) {
+          utils_1.Utils.logDebug('[' + Process.getCurrentThreadId() + '] api result: ' + ret);
+        }
+
+        if (ret instanceof ArrayBuffer) {
+          dwarf_1.Dwarf.loggedSend('api_result', {
+            'id': threadApi.id
+          }, ret);
+        } else {
+          dwarf_1.Dwarf.loggedSend('api_result', {
+            'id': threadApi.id,
+            'result': ret
+          });
+        }
+      }
+    }, {
+      key: "shouldBreak",
+      value: function shouldBreak(breakpoint, target, context) {
+        // called from the hooks before anything else, a false condition costs just the call
+        breakpoint.hits++;
+
+        if (breakpoint.conditionFunction === null) {
+          return true;
+        }
+
+        var tid = Process.getCurrentThreadId();
+        var threadContext = dwarf_1.Dwarf.threadContexts[tid];
+
+        if (!utils_1.Utils.isDefined(threadContext)) {
+          threadContext = new thread_context_1.ThreadContext(tid);
+          threadContext.context = context;
+        }
+
+        try {
+          if (breakpoint.conditionFunction.call(threadContext)) {
+            return true;
+          }
+        } catch (e) {
+          // report the first failure only, a hot breakpoint would flood the host
+          if (breakpoint.conditionError === null) {
+            breakpoint.conditionError = e.toString();
+            dwarf_1.Dwarf.loggedSend('breakpoint_condition_error', {
+              'target': target.toString(),
+              'condition': breakpoint.condition.toString(),
+              'error': e.toString()
+            });
           }
+        }
+
+        breakpoint.skips++;
+        return false;
+      }
+    }, {
+      key: "setCondition",
+      value: function setCondition(breakpoint, target, condition) {
+        var conditionFunction = null;
 
-          if (!release) {
-            LogicBreakpoint.loopApi(that);
+        if (!utils_1.Utils.isDefined(condition) || condition === '') {
+          condition = null;
+        } else if (typeof condition === 'function') {
+          conditionFunction = condition;
+        } else {
+          try {
+            conditionFunction = new Function(condition);
+          } catch (e) {
+            dwarf_1.Dwarf.loggedSend('breakpoint_condition_error', {
+              'target': target.toString(),
+              'condition': condition.toString(),
+              'error': e.toString()
+            });
+            return false;
           }
         }
+
+        breakpoint.condition = condition;
+        breakpoint.conditionFunction = conditionFunction;
+        breakpoint.conditionError = null;
+        return true;
+      }
+    }, {
+      key: "findBreakpoint",
+      value: function findBreakpoint(target) {
+        if (typeof target === 'number') {
+          target = ptr(target);
+        }
+
+        target = target.toString();
+
+        if (utils_1.Utils.isDefined(LogicBreakpoint.breakpoints[target])) {
+          return LogicBreakpoint.breakpoints[target];
+        }
+
+        if (utils_1.Utils.isDefined(logic_java_1.LogicJava.breakpoints[target])) {
+          return logic_java_1.LogicJava.breakpoints[target];
+        }
+
+        if (utils_1.Utils.isDefined(logic_objc_1.LogicObjC.breakpoints[target])) {
+          return logic_objc_1.LogicObjC.breakpoints[target];
+        }
+
+        return null;
+      }
+    }, {
+      key: "getBreakpointStats",
+      value: function getBreakpointStats(target) {
+        var stats = function stats(breakpoint) {
+          return {
+            'hits': breakpoint.hits,
+            'skips': breakpoint.skips
+          };
+        };
+
+        if (utils_1.Utils.isDefined(target)) {
+          var breakpoint = LogicBreakpoint.findBreakpoint(target);
+          return breakpoint === null ? null : stats(breakpoint);
+        }
+
+        var ret = {};
+        [LogicBreakpoint.breakpoints, logic_java_1.LogicJava.breakpoints, logic_objc_1.LogicObjC.breakpoints].forEach(function (breakpoints) {
+          for (var key in breakpoints) {
+            ret[key] = stats(breakpoints[key]);
+          }
+        });
+        return ret;
       }
     }, {
       key: "putBreakpoint",
@@ -3811,18 +4246,26 @@ var LogicBreakpoint = function () {
           if (target.startsWith('0x')) {
             target = ptr(target);
           } else if (target.indexOf('.') >= 0 && logic_java_1.LogicJava.available) {
+            // the condition is compiled, and its errors reported, by the type specific putBreakpoint
             var added = logic_java_1.LogicJava.putBreakpoint(target, condition);
 
             if (added) {
-              dwarf_1.Dwarf.loggedSend('breakpoint_java_callback:::' + target + ':::' + (utils_1.Utils.isDefined(condition) ? condition.toString() : ''));
+              dwarf_1.Dwarf.loggedSend('breakpoint_java_callback', {
+                'target': target,
+                'condition': utils_1.Utils.isDefined(condition) ? condition.toString() : ''
+              });
             }
 
             return added;
           } else if (target.indexOf('.') >= 0 && logic_objc_1.LogicObjC.available) {
+            // the condition is compiled, and its errors reported, by the type specific putBreakpoint
             var _added = logic_objc_1.LogicObjC.putBreakpoint(target, condition);
 
             if (_added) {
-              dwarf_1.Dwarf.loggedSend('breakpoint_objc_callback:::' + target + ':::' + (utils_1.Utils.isDefined(condition) ? condition.toString() : ''));
+              dwarf_1.Dwarf.loggedSend('breakpoint_objc_callback', {
+                'target': target,
+                'condition': utils_1.Utils.isDefined(condition) ? condition.toString() : ''
+              });
             }
 
             return _added;
@@ -3840,14 +4283,16 @@ var LogicBreakpoint = function () {
           target = target;
           var breakpoint = new breakpoint_1.Breakpoint(target);
 
-          if (!utils_1.Utils.isDefined(condition)) {
-            condition = null;
+          if (!LogicBreakpoint.setCondition(breakpoint, target, condition)) {
+            return false;
           }
 
-          breakpoint.condition = condition;
           LogicBreakpoint.breakpoints[target.toString()] = breakpoint;
           LogicBreakpoint.putNativeBreakpoint(breakpoint);
-          dwarf_1.Dwarf.loggedSend('breakpoint_native_callback:::' + breakpoint.target.toString() + ':::' + (utils_1.Utils.isDefined(breakpoint.condition) ? breakpoint.condition.toString() : ''));
+          dwarf_1.Dwarf.loggedSend('breakpoint_native_callback', {
+            'target': breakpoint.target.toString(),
+            'condition': breakpoint.condition !== null ? breakpoint.condition.toString() : ''
+          });
           return true;
         }
 
@@ -3857,9 +4302,13 @@ var LogicBreakpoint = function () {
       key: "putNativeBreakpoint",
       value: function putNativeBreakpoint(breakpoint) {
         breakpoint.interceptor = Interceptor.attach(breakpoint.target, function () {
+          if (!LogicBreakpoint.shouldBreak(breakpoint, this.context.pc, this.context)) {
+            return;
+          }
+
           breakpoint.interceptor.detach();
           Interceptor['flush']();
-          LogicBreakpoint.breakpoint(LogicBreakpoint.REASON_BREAKPOINT, this.context.pc, this.context, null, breakpoint.condition);
+          LogicBreakpoint.breakpoint(LogicBreakpoint.REASON_BREAKPOINT, this.context.pc, this.context, null);
 
           if (typeof LogicBreakpoint.breakpoints[breakpoint.target.toString()] !== 'undefined') {
             LogicBreakpoint.putNativeBreakpoint(breakpoint);
@@ -3877,7 +4326,10 @@ var LogicBreakpoint = function () {
             var removed = logic_java_1.LogicJava.removeBreakpoint(target);
 
             if (removed) {
-              dwarf_1.Dwarf.loggedSend('breakpoint_deleted:::java:::' + target);
+              dwarf_1.Dwarf.loggedSend('breakpoint_deleted', {
+                'kind': 'java',
+                'target': target
+              });
             }
 
             return removed;
@@ -3885,7 +4337,10 @@ var LogicBreakpoint = function () {
             var _removed = logic_objc_1.LogicObjC.removeBreakpoint(target);
 
             if (_removed) {
-              dwarf_1.Dwarf.loggedSend('breakpoint_deleted:::objc:::' + target);
+              dwarf_1.Dwarf.loggedSend('breakpoint_deleted', {
+                'kind': 'objc',
+                'target': target
+              });
             }
 
             return _removed;
@@ -3903,7 +4358,10 @@ var LogicBreakpoint = function () {
           }
 
           delete LogicBreakpoint.breakpoints[target.toString()];
-          dwarf_1.Dwarf.loggedSend('breakpoint_deleted:::native:::' + target.toString());
+          dwarf_1.Dwarf.loggedSend('breakpoint_deleted', {
+            'kind': 'native',
+            'target': target.toString()
+          });
           return true;
         }
 
@@ -3920,15 +4378,15 @@ var LogicBreakpoint = function () {
           target = ptr(target);
         }
 
-        var breakpoint = LogicBreakpoint.breakpoints[target.toString()];
+        var breakpoint = LogicBreakpoint.findBreakpoint(target);
 
-        if (!utils_1.Utils.isDefined(breakpoint)) {
+        if (breakpoint === null) {
           console.log(target + ' is not in breakpoint list');
           return false;
         }
 
-        breakpoint.condition = condition;
-        return true;
+        // on compile errors the previous condition stays in place
+        return LogicBreakpoint.setCondition(breakpoint, target, condition);
       }
     }]);
     return LogicBreakpoint;
@@ -3945,7 +4403,7 @@ var LogicBreakpoint = function () {
 
 exports.LogicBreakpoint = LogicBreakpoint;
 
-},{"./api":101,"./breakpoint":102,"./dwarf":103,"./logic_java":110,"./logic_objc":111,"./logic_stalker":112,"./thread_context":116,"./utils":118,"@babel/runtime-corejs2/core-js/object/define-property":5,"@babel/runtime-corejs2/helpers/classCallCheck":11,"@babel/runtime-corejs2/helpers/createClass":12,"@babel/runtime-corejs2/helpers/interopRequireDefault":13}],109:[function(require,module,exports){
+},{"./api":101,"./breakpoint":102,"./dwarf":103,"./logic_java":110,"./logic_objc":111,"./logic_stalker":112,"./thread_api":115,"./thread_context":116,"./utils":118,"@babel/runtime-corejs2/core-js/json/stringify":3,"@babel/runtime-corejs2/core-js/object/define-property":5,"@babel/runtime-corejs2/helpers/classCallCheck":11,"@babel/runtime-corejs2/helpers/createClass":12,"@babel/runtime-corejs2/helpers/interopRequireDefault":13}],109:[function(require,module,exports){
 "use strict";
 
 var _interopRequireDefault = require("@babel/runtime-corejs2/helpers/interopRequireDefault");
@@ -4002,7 +4460,10 @@ var LogicInitialization = function () {
 
         var moduleInfo = api_1.Api.enumerateModuleInfo(module);
         var tid = Process.getCurrentThreadId();
-        dwarf_1.Dwarf.loggedSend('module_initialized:::' + tid + ':::' + (0, _stringify["default"])(moduleInfo));
+        dwarf_1.Dwarf.batchedSend('module_initialized', {
+          'tid': tid,
+          'module': moduleInfo
+        });
         var modIndex = (0, _keys["default"])(LogicInitialization.nativeModuleInitializationCallbacks).find(function (ownModuleName) {
           if (ownModuleName === moduleName) {
             return moduleName;
@@ -4015,11 +4476,12 @@ var LogicInitialization = function () {
           if (utils_1.Utils.isDefined(userCallback)) {
             userCallback.call(this);
           } else {
-            dwarf_1.Dwarf.loggedSend("breakpoint_module_initialization_callback:::" + tid + ':::' + (0, _stringify["default"])({
+            dwarf_1.Dwarf.loggedSend('breakpoint_module_initialization_callback', {
+              'tid': tid,
               'module': moduleInfo['name'],
               'moduleBase': moduleInfo['base'],
               'moduleEntry': moduleInfo['entry']
-            }));
+            });
             logic_breakpoint_1.LogicBreakpoint.breakpoint(logic_breakpoint_1.LogicBreakpoint.REASON_BREAKPOINT_INITIALIZATION, this['context'].pc, this['context']);
           }
         }
@@ -4229,7 +4691,9 @@ var LogicInitialization = function () {
         var applied = LogicInitialization.hookModuleInitialization(moduleName, null);
 
         if (applied) {
-          dwarf_1.Dwarf.loggedSend('module_initialization_callback:::' + moduleName);
+          dwarf_1.Dwarf.loggedSend('module_initialization_callback', {
+            'module': moduleName
+          });
         }
 
         return applied;
@@ -4528,14 +4992,20 @@ var LogicJava = function () {
           overload.implementation = function (clazz, resolve) {
             if (LogicJava.javaClasses.indexOf(clazz) === -1) {
               LogicJava.javaClasses.push(clazz);
-              dwarf_1.Dwarf.loggedSend('class_loader_loading_class:::' + Process.getCurrentThreadId() + ':::' + clazz);
+              dwarf_1.Dwarf.loggedSend('class_loader_loading_class', {
+                'tid': Process.getCurrentThreadId(),
+                'className': clazz
+              });
               var userCallback = LogicJava.javaClassLoaderCallbacks[clazz];
 
               if (typeof userCallback !== 'undefined') {
                 if (userCallback !== null) {
                   userCallback.call(this, clazz);
                 } else {
-                  dwarf_1.Dwarf.loggedSend("java_class_initialization_callback:::" + clazz + ':::' + Process.getCurrentThreadId());
+                  dwarf_1.Dwarf.loggedSend('breakpoint_java_class_initialization_callback', {
+                    'className': clazz,
+                    'tid': Process.getCurrentThreadId()
+                  });
                   logic_breakpoint_1.LogicBreakpoint.breakpoint(logic_breakpoint_1.LogicBreakpoint.REASON_BREAKPOINT, clazz, {}, this);
                 }
               }
@@ -4547,7 +5017,7 @@ var LogicJava = function () {
       }
     }, {
       key: "jvmBreakpoint",
-      value: function jvmBreakpoint(className, method, args, types, condition) {
+      value: function jvmBreakpoint(className, method, args, types, breakpoint) {
         var classMethod = className + '.' + method;
         var newArgs = {};
 
@@ -4576,7 +5046,11 @@ var LogicJava = function () {
           };
         }
 
-        logic_breakpoint_1.LogicBreakpoint.breakpoint(logic_breakpoint_1.LogicBreakpoint.REASON_BREAKPOINT, classMethod, newArgs, this, condition);
+        if (!logic_breakpoint_1.LogicBreakpoint.shouldBreak(breakpoint, classMethod, newArgs)) {
+          return;
+        }
+
+        logic_breakpoint_1.LogicBreakpoint.breakpoint(logic_breakpoint_1.LogicBreakpoint.REASON_BREAKPOINT, classMethod, newArgs, this);
       }
     }, {
       key: "jvmExplorer",
@@ -4749,21 +5223,20 @@ var LogicJava = function () {
 
         var breakpoint = new breakpoint_1.Breakpoint(target);
 
-        if (!utils_1.Utils.isDefined(condition)) {
-          condition = null;
+        if (!logic_breakpoint_1.LogicBreakpoint.setCondition(breakpoint, target, condition)) {
+          return false;
         }
 
-        breakpoint.condition = condition;
         LogicJava.breakpoints[target] = breakpoint;
         var result = false;
 
         if (target.endsWith('.$init')) {
           result = LogicJava.hook(target, '$init', function () {
-            LogicJava.jvmBreakpoint(this.className, this.method, arguments, this.overload.argumentTypes, condition);
+            LogicJava.jvmBreakpoint(this.className, this.method, arguments, this.overload.argumentTypes, breakpoint);
           });
         } else {
           result = LogicJava.hookJavaMethod(target, function () {
-            LogicJava.jvmBreakpoint(this.className, this.method, arguments, this.overload.argumentTypes, condition);
+            LogicJava.jvmBreakpoint(this.className, this.method, arguments, this.overload.argumentTypes, breakpoint);
           });
         }
 
@@ -4775,7 +5248,9 @@ var LogicJava = function () {
         var applied = LogicJava.hookClassLoaderClassInitialization(className, null);
 
         if (applied) {
-          dwarf_1.Dwarf.loggedSend('java_class_initialization_callback:::' + className);
+          dwarf_1.Dwarf.loggedSend('java_class_initialization_callback', {
+            'className': className
+          });
         }
 
         return applied;
@@ -4863,7 +5338,11 @@ var LogicJava = function () {
           };
 
           if (uiCallback) {
-            dwarf_1.Dwarf.loggedSend('java_trace:::enter:::' + classMethod + ':::' + (0, _stringify["default"])(arguments));
+            dwarf_1.Dwarf.batchedSend('java_trace', {
+              'event': 'enter',
+              'method': classMethod,
+              'data': (0, _stringify["default"])(arguments)
+            });
           } else {
             if (utils_1.Utils.isDefined(callback['onEnter'])) {
               callback['onEnter'].apply(thatObject, arguments);
@@ -4885,7 +5364,11 @@ var LogicJava = function () {
               traceRet = "";
             }
 
-            dwarf_1.Dwarf.loggedSend('java_trace:::leave:::' + classMethod + ':::' + traceRet);
+            dwarf_1.Dwarf.batchedSend('java_trace', {
+              'event': 'leave',
+              'method': classMethod,
+              'data': '' + traceRet
+            });
           } else {
             if (utils_1.Utils.isDefined(callback['onLeave'])) {
               var tempRet = callback['onLeave'].apply(thatObject, ret);
@@ -4951,28 +5434,38 @@ var LogicObjC = function () {
     (0, _createClass2["default"])(LogicObjC, null, [{
       key: "applyTracerImplementation",
       value: function applyTracerImplementation(attach, callback) {
-        dwarf_1.Dwarf.loggedSend('Not implemented');
+        dwarf_1.Dwarf.loggedSend('log', {
+          'message': 'Not implemented'
+        });
       }
     }, {
       key: "backtrace",
       value: function backtrace() {
-        dwarf_1.Dwarf.loggedSend('Not implemented');
+        dwarf_1.Dwarf.loggedSend('log', {
+          'message': 'Not implemented'
+        });
       }
     }, {
       key: "getApplicationContext",
       value: function getApplicationContext() {
-        dwarf_1.Dwarf.loggedSend('Not implemented');
+        dwarf_1.Dwarf.loggedSend('log', {
+          'message': 'Not implemented'
+        });
       }
     }, {
       key: "hookAllObjCMethods",
       value: function hookAllObjCMethods(className, implementation) {
-        dwarf_1.Dwarf.loggedSend('Not implemented');
+        dwarf_1.Dwarf.loggedSend('log', {
+          'message': 'Not implemented'
+        });
         return false;
       }
     }, {
       key: "hookClassLoaderClassInitialization",
       value: function hookClassLoaderClassInitialization(clazz, callback) {
-        dwarf_1.Dwarf.loggedSend('Not implemented');
+        dwarf_1.Dwarf.loggedSend('log', {
+          'message': 'Not implemented'
+        });
         return false;
       }
     }, {
@@ -5057,17 +5550,23 @@ var LogicObjC = function () {
     }, {
       key: "init",
       value: function init() {
-        dwarf_1.Dwarf.loggedSend('Not implemented');
+        dwarf_1.Dwarf.loggedSend('log', {
+          'message': 'Not implemented'
+        });
       }
     }, {
       key: "jvmBreakpoint",
-      value: function jvmBreakpoint(className, method, args, types, condition) {
-        dwarf_1.Dwarf.loggedSend('Not implemented');
+      value: function jvmBreakpoint(className, method, args, types, breakpoint) {
+        dwarf_1.Dwarf.loggedSend('log', {
+          'message': 'Not implemented'
+        });
       }
     }, {
       key: "jvmExplorer",
       value: function jvmExplorer(what) {
-        dwarf_1.Dwarf.loggedSend('Not implemented');
+        dwarf_1.Dwarf.loggedSend('log', {
+          'message': 'Not implemented'
+        });
       }
     }, {
       key: "putBreakpoint",
@@ -5080,11 +5579,10 @@ var LogicObjC = function () {
         var targetAddress = ptr(ObjC.classes[parts[0]][parts[1]].implementation.toString());
         var breakpoint = new breakpoint_1.Breakpoint(targetAddress);
 
-        if (!utils_1.Utils.isDefined(condition)) {
-          condition = null;
+        if (!logic_breakpoint_1.LogicBreakpoint.setCondition(breakpoint, target, condition)) {
+          return false;
         }
 
-        breakpoint.condition = condition;
         LogicObjC.breakpoints[target] = breakpoint;
         return LogicObjC.putObjCBreakpoint(breakpoint, target);
       }
@@ -5092,9 +5590,13 @@ var LogicObjC = function () {
       key: "putObjCBreakpoint",
       value: function putObjCBreakpoint(breakpoint, target) {
         breakpoint.interceptor = Interceptor.attach(breakpoint.target, function () {
+          if (!logic_breakpoint_1.LogicBreakpoint.shouldBreak(breakpoint, target, this.context)) {
+            return;
+          }
+
           breakpoint.interceptor.detach();
           Interceptor['flush']();
-          logic_breakpoint_1.LogicBreakpoint.breakpoint(logic_breakpoint_1.LogicBreakpoint.REASON_BREAKPOINT, this.context.pc, this.context, null, breakpoint.condition);
+          logic_breakpoint_1.LogicBreakpoint.breakpoint(logic_breakpoint_1.LogicBreakpoint.REASON_BREAKPOINT, this.context.pc, this.context, null);
 
           if (typeof LogicObjC.breakpoints[target] !== 'undefined') {
             LogicObjC.putObjCBreakpoint(breakpoint, target);
@@ -5105,7 +5607,9 @@ var LogicObjC = function () {
     }, {
       key: "putObjCClassInitializationBreakpoint",
       value: function putObjCClassInitializationBreakpoint(className) {
-        dwarf_1.Dwarf.loggedSend('Not implemented');
+        dwarf_1.Dwarf.loggedSend('log', {
+          'message': 'Not implemented'
+        });
         return false;
       }
     }, {
@@ -5128,30 +5632,40 @@ var LogicObjC = function () {
     }, {
       key: "removeModuleInitializationBreakpoint",
       value: function removeModuleInitializationBreakpoint(clazz) {
-        dwarf_1.Dwarf.loggedSend('Not implemented');
+        dwarf_1.Dwarf.loggedSend('log', {
+          'message': 'Not implemented'
+        });
       }
     }, {
       key: "restartApplication",
       value: function restartApplication() {
-        dwarf_1.Dwarf.loggedSend('Not implemented');
+        dwarf_1.Dwarf.loggedSend('log', {
+          'message': 'Not implemented'
+        });
         return false;
       }
     }, {
       key: "startTrace",
       value: function startTrace(classes, callback) {
-        dwarf_1.Dwarf.loggedSend('Not implemented');
+        dwarf_1.Dwarf.loggedSend('log', {
+          'message': 'Not implemented'
+        });
         return false;
       }
     }, {
       key: "stopTrace",
       value: function stopTrace() {
-        dwarf_1.Dwarf.loggedSend('Not implemented');
+        dwarf_1.Dwarf.loggedSend('log', {
+          'message': 'Not implemented'
+        });
         return false;
       }
     }, {
       key: "traceImplementation",
       value: function traceImplementation(callback, className, method) {
-        dwarf_1.Dwarf.loggedSend('Not implemented');
+        dwarf_1.Dwarf.loggedSend('log', {
+          'message': 'Not implemented'
+        });
       }
     }]);
     return LogicObjC;
@@ -5611,19 +6125,31 @@ var LogicWatchpoint = function () {
               if (utils_1.Utils.isDefined(operation)) {
                 if (watchpoint.flags & watchpoint_1.MEMORY_ACCESS_READ && operation === 'read') {
                   watchpoint.restore();
-                  dwarf_1.Dwarf.loggedSend('watchpoint:::' + (0, _stringify["default"])(exception) + ':::' + tid);
+                  dwarf_1.Dwarf.loggedSend('watchpoint', {
+                    'tid': tid,
+                    'exception': exception
+                  });
                 } else if (watchpoint.flags & watchpoint_1.MEMORY_ACCESS_WRITE && operation === 'write') {
                   watchpoint.restore();
-                  dwarf_1.Dwarf.loggedSend('watchpoint:::' + (0, _stringify["default"])(exception) + ':::' + tid);
+                  dwarf_1.Dwarf.loggedSend('watchpoint', {
+                    'tid': tid,
+                    'exception': exception
+                  });
                 } else if (watchpoint.flags & watchpoint_1.MEMORY_ACCESS_EXECUTE && operation === 'execute') {
                   watchpoint.restore();
-                  dwarf_1.Dwarf.loggedSend('watchpoint:::' + (0, _stringify["default"])(exception) + ':::' + tid);
+                  dwarf_1.Dwarf.loggedSend('watchpoint', {
+                    'tid': tid,
+                    'exception': exception
+                  });
                 } else {
                   watchpoint = null;
                 }
               } else {
                 watchpoint.restore();
-                dwarf_1.Dwarf.loggedSend('watchpoint:::' + (0, _stringify["default"])(exception) + ':::' + tid);
+                dwarf_1.Dwarf.loggedSend('watchpoint', {
+                  'tid': tid,
+                  'exception': exception
+                });
               }
             } else {
               watchpoint = null;
@@ -5672,13 +6198,22 @@ var LogicWatchpoint = function () {
 
             if (watchpoint.flags & watchpoint_1.MEMORY_ACCESS_READ && operation === 'read') {
               MemoryAccessMonitor.disable();
-              dwarf_1.Dwarf.loggedSend('watchpoint:::' + (0, _stringify["default"])(returnval) + ':::' + tid);
+              dwarf_1.Dwarf.loggedSend('watchpoint', {
+                'tid': tid,
+                'exception': returnval
+              });
             } else if (watchpoint.flags & watchpoint_1.MEMORY_ACCESS_WRITE && operation === 'write') {
               MemoryAccessMonitor.disable();
-              dwarf_1.Dwarf.loggedSend('watchpoint:::' + (0, _stringify["default"])(returnval) + ':::' + tid);
+              dwarf_1.Dwarf.loggedSend('watchpoint', {
+                'tid': tid,
+                'exception': returnval
+              });
             } else if (watchpoint.flags & watchpoint_1.MEMORY_ACCESS_EXECUTE && operation === 'execute') {
               MemoryAccessMonitor.disable();
-              dwarf_1.Dwarf.loggedSend('watchpoint:::' + (0, _stringify["default"])(returnval) + ':::' + tid);
+              dwarf_1.Dwarf.loggedSend('watchpoint', {
+                'tid': tid,
+                'exception': returnval
+              });
             } else {
               watchpoint = null;
             }
@@ -5733,7 +6268,11 @@ var LogicWatchpoint = function () {
 
           watchpoint = new watchpoint_1.Watchpoint(memPtr, flags, rangeDetails.protection, callback);
           LogicWatchpoint.memoryWatchpoints[memPtr.toString()] = watchpoint;
-          dwarf_1.Dwarf.loggedSend('watchpoint_added:::' + memPtr.toString() + ':::' + flags + ':::' + (0, _stringify["default"])(watchpoint.debugSymbol));
+          dwarf_1.Dwarf.loggedSend('watchpoint_added', {
+            'address': memPtr.toString(),
+            'flags': flags,
+            'debugSymbol': watchpoint.debugSymbol
+          });
 
           if (Process.platform === 'windows') {
             LogicWatchpoint.attachMemoryAccessMonitor();
@@ -5775,7 +6314,9 @@ var LogicWatchpoint = function () {
           LogicWatchpoint.attachMemoryAccessMonitor();
         }
 
-        dwarf_1.Dwarf.loggedSend('watchpoint_removed:::' + memPtr.toString());
+        dwarf_1.Dwarf.loggedSend('watchpoint_removed', {
+          'address': memPtr.toString()
+        });
         return true;
       }
     }]);
@@ -5831,8 +6372,9 @@ var _defineProperty = _interopRequireDefault(require("@babel/runtime-corejs2/cor
 });
 exports.ThreadApi = void 0;
 
-var ThreadApi = function ThreadApi(apiFunction, apiArguments) {
+var ThreadApi = function ThreadApi(apiFunction, apiArguments, id) {
   (0, _classCallCheck2["default"])(this, ThreadApi);
+  this.id = id;
   this.result = null;
   this.consumed = false;
   this.apiFunction = apiFunction;
@@ -5914,7 +6456,10 @@ var ThreadWrapper = function () {
             return 0;
           }, 'int', []));
           Interceptor.attach(ThreadWrapper.pthreadCreateAddress, function (args) {
-            dwarf_1.Dwarf.loggedSend('new_thread:::' + Process.getCurrentThreadId() + ':::' + args[2]);
+            dwarf_1.Dwarf.loggedSend('new_thread', {
+              'tid': Process.getCurrentThreadId(),
+              'target': args[2].toString()
+            });
 
             if (ThreadWrapper.onCreateCallback !== null && typeof ThreadWrapper.onCreateCallback === 'function') {
               ThreadWrapper.onCreateCallback(args[2]);
@@ -16,12 +16,16 @@
 """
 import logging
 import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 import frida
 import json
 
-from PyQt5.QtCore import QObject, pyqtSignal
-from PyQt5.QtWidgets import QFileDialog, QApplication
+from PyQt5.QtCore import QObject, pyqtSignal, Qt, QTimer
+from PyQt5.QtWidgets import QFileDialog, QMessageBox, QProgressDialog
 from dwarf_debugger.lib.types.module_info import ModuleInfo
 
 from frida.core import Session
@@ -33,8 +37,12 @@ from dwarf_debugger.lib.disassembler import Disassembler
 from dwarf_debugger.lib.types.breakpoint import Breakpoint, BREAKPOINT_NATIVE, BREAKPOINT_JAVA, \
     BREAKPOINT_INITIALIZATION, BREAKPOINT_OBJC
 from dwarf_debugger.lib.types.watchpoint import Watchpoint
-from dwarf_debugger.lib.io import IO
+from dwarf_debugger.lib.io import IO, Dumper
+from dwarf_debugger.lib.snapshot import Snapshotter
+from dwarf_debugger.lib.profiler import RpcProfiler
 from dwarf_debugger.lib.kernel import Kernel
+from dwarf_debugger.lib.rpc import ApiFuture
+from dwarf_debugger.lib.symbols import SymbolResolver
 
 from dwarf_debugger.ui.dialogs.dialog_input import InputDialog
 
@@ -50,6 +58,21 @@ class Dwarf(QObject):
         """ Raised when dwarfscript not found
         """
 
+    # seconds to wait for a breakpointed thread to answer an api request
+    THREAD_API_TIMEOUT = 3
+    # seconds before a breakpointed thread which did not answer yet is woken up once more
+    THREAD_API_REPOST_DELAY = 0.005
+    # version of the agent messages envelope, must match Dwarf.MESSAGE_VERSION in core.js
+    MESSAGE_VERSION = 1
+    # seconds the ui thread may spend on queued agent messages before giving control back to the event loop
+    MESSAGE_DRAIN_BUDGET = 0.01
+    # threads running dwarf_api_async calls, more than one keeps several requests in flight
+    RPC_WORKERS = 4
+    # default seconds before an async api call is reported as failed
+    RPC_TIMEOUT = 30
+    # bytes which may be rewritten by the interceptor when a native breakpoint is put or removed
+    BREAKPOINT_PATCH_SIZE = 32
+
     # ************************************************************************
     # **************************** Signals ***********************************
     # ************************************************************************
@@ -66,6 +89,8 @@ class Dwarf(QObject):
     onAddModuleInitializationBreakpoint = pyqtSignal(Breakpoint, name='onAddModuleInitializationBreakpoint')
     onAddJavaClassInitializationBreakpoint = pyqtSignal(Breakpoint, name='onAddJavaClassInitializationBreakpoint')
     onDeleteBreakpoint = pyqtSignal(list, name='onDeleteBreakpoint')
+    # [target, condition, error] - the condition failed to compile or threw on a hit
+    onBreakpointConditionError = pyqtSignal(list, name='onBreakpointConditionError')
     onHitModuleInitializationBreakpoint = pyqtSignal(list, name='onHitModuleInitializationBreakpoint')
     onHitJavaClassInitializationBreakpoint = pyqtSignal(str, name='onHitJavaClassInitializationBreakpoint')
     # watchpoint related
@@ -83,15 +108,15 @@ class Dwarf(QObject):
     onApplyContext = pyqtSignal(dict, name='onApplyContext')
     # java
     onEnumerateJavaClassesStart = pyqtSignal(name='onEnumerateJavaClassesStart')
-    onEnumerateJavaClassesMatch = pyqtSignal(str, name='onEnumerateJavaClassesMatch')
+    onEnumerateJavaClassesMatch = pyqtSignal(list, name='onEnumerateJavaClassesMatch')
     onEnumerateJavaClassesComplete = pyqtSignal(name='onEnumerateJavaClassesComplete')
     onEnumerateJavaMethodsComplete = pyqtSignal(list, name='onEnumerateJavaMethodsComplete')
     # objc
     onEnumerateObjCModules = pyqtSignal(list, name='onEnumerateObjCModules')
     onEnumerateObjCClassesStart = pyqtSignal(name='onEnumerateObjCClassesStart')
     onEnumerateObjCMethodsStart = pyqtSignal(name='onEnumerateObjCMethodsStart')
-    onEnumerateObjCClassesMatch = pyqtSignal(str, name='onEnumerateObjCClassesMatch')
-    onEnumerateObjCMethodsMatch = pyqtSignal(str, name='onEnumerateObjCMethodsMatch')
+    onEnumerateObjCClassesMatch = pyqtSignal(list, name='onEnumerateObjCClassesMatch')
+    onEnumerateObjCMethodsMatch = pyqtSignal(list, name='onEnumerateObjCMethodsMatch')
     onEnumerateObjCClassesComplete = pyqtSignal(name='onEnumerateObjCClassesComplete')
     onEnumerateObjCMethodsComplete = pyqtSignal(name='onEnumerateObjCMethodsComplete')
     # trace
@@ -101,13 +126,25 @@ class Dwarf(QObject):
     onBackTrace = pyqtSignal(dict, name='onBackTrace')
 
     onMemoryScanResult = pyqtSignal(list, name='onMemoryScanResult')
+    # search id, [{'range': index, 'address': hex}]
+    onMemorySearchMatches = pyqtSignal(int, list, name='onMemorySearchMatches')
+    # search id, {'range', 'done', 'size', 'matches'}
+    onMemorySearchProgress = pyqtSignal(int, dict, name='onMemorySearchProgress')
+    # search id, {'matches', 'cancelled', 'limited'}
+    onMemorySearchComplete = pyqtSignal(int, dict, name='onMemorySearchComplete')
 
     onContextChanged = pyqtSignal(str, str, name='onContextChanged')
 
-    onReceiveCmd = pyqtSignal(list, name="onReceiveCmd")
+    # [message, data] of every agent message, the payload of the dwarf ones is the envelope dict, see PLUGINS.md
+    onReceiveMessage = pyqtSignal(object, name='onReceiveMessage')
+    # same with the dwarf envelopes turned back into the 'type:::json' strings plugins used to parse
+    onReceiveCmd = pyqtSignal(object, name="onReceiveCmd")
 
     onModuleLoaded = pyqtSignal(list, name='onModuleLoaded')
 
+    # internal, wakes up the ui thread when agent messages are waiting in the queue
+    _onMessagesQueued = pyqtSignal(name='_onMessagesQueued')
+
     # ************************************************************************
     # **************************** Init **************************************
     # ************************************************************************
@@ -156,16 +193,94 @@ class Dwarf(QObject):
         self.context_tid = 0
         self._platform = ''
 
+        # api requests posted to breakpointed threads and waiting for a result
+        self._thread_api_lock = threading.Lock()
+        self._thread_api_id = 0
+        self._thread_api_requests = {}
+
+        self._memory_search_id = 0
+
+        self._snapshotter = None
+
+        # async api calls
+        self._rpc_executor = None
+        self._api_futures = set()
+        self._api_futures_lock = threading.Lock()
+
+        # agent messages are queued by the frida thread and drained in batches by the ui thread
+        self._message_queue = deque()
+        self._message_queue_lock = threading.Lock()
+        self._message_drain_scheduled = False
+        self.message_drain_budget = Dwarf.MESSAGE_DRAIN_BUDGET
+        # message type -> [count, seconds spent in the handler]
+        self._message_stats = {}
+        # rpc profiling, None unless enabled so the hot paths only pay an attribute check
+        self._profiler = None
+        self._onMessagesQueued.connect(self._drain_messages, Qt.QueuedConnection)
+
+        # agent messages are dispatched by the type of their envelope
+        self._message_handlers = {
+            'backtrace': self._on_backtrace_message,
+            'class_loader_loading_class': self._on_class_loader_loading_class_message,
+            'enumerate_java_classes_start': self._on_enumerate_java_classes_start_message,
+            'enumerate_java_classes_match': self._on_enumerate_java_classes_match_message,
+            'enumerate_java_classes_complete': self._on_enumerate_java_classes_complete_message,
+            'enumerate_java_methods_complete': self._on_enumerate_java_methods_complete_message,
+            'enumerate_objc_modules': self._on_enumerate_objc_modules_message,
+            'enumerate_objc_classes_start': self._on_enumerate_objc_classes_start_message,
+            'enumerate_objc_classes_match': self._on_enumerate_objc_classes_match_message,
+            'enumerate_objc_classes_complete': self._on_enumerate_objc_classes_complete_message,
+            'enumerate_objc_methods_start': self._on_enumerate_objc_methods_start_message,
+            'enumerate_objc_methods_match': self._on_enumerate_objc_methods_match_message,
+            'enumerate_objc_methods_complete': self._on_enumerate_objc_methods_complete_message,
+            'ftrace': self._on_ftrace_message,
+            'enable_kernel': self._on_enable_kernel_message,
+            'breakpoint_java_callback': self._on_breakpoint_java_callback_message,
+            'breakpoint_objc_callback': self._on_breakpoint_objc_callback_message,
+            'java_class_initialization_callback': self._on_java_class_initialization_callback_message,
+            'breakpoint_native_callback': self._on_breakpoint_native_callback_message,
+            'module_initialization_callback': self._on_module_initialization_callback_message,
+            'breakpoint_deleted': self._on_breakpoint_deleted_message,
+            'breakpoint_condition_error': self._on_breakpoint_condition_error_message,
+            'breakpoint_java_class_initialization_callback': self._on_breakpoint_java_class_initialization_callback_message,
+            'java_trace': self._on_java_trace_message,
+            'log': self._on_log_message,
+            'breakpoint_module_initialization_callback': self._on_breakpoint_module_initialization_callback_message,
+            'module_initialized': self._on_module_initialized_message,
+            'new_thread': self._on_new_thread_message,
+            'release': self._on_release_message,
+            'resume': self._on_resume_message,
+            'release_js': self._on_release_js_message,
+            'set_context': self._on_set_context_message,
+            'set_context_value': self._on_set_context_value_message,
+            'set_data': self._on_set_data_message,
+            'update_modules': self._on_update_modules_message,
+            'update_ranges': self._on_update_ranges_message,
+            'update_searchable_ranges': self._on_update_searchable_ranges_message,
+            'watchpoint': self._on_watchpoint_message,
+            'watchpoint_added': self._on_watchpoint_added_message,
+            'watchpoint_removed': self._on_watchpoint_removed_message,
+            'memoryscan_result': self._on_memoryscan_result_message,
+            'memorysearch_match': self._on_memorysearch_match_message,
+            'memorysearch_progress': self._on_memorysearch_progress_message,
+            'memorysearch_complete': self._on_memorysearch_complete_message
+        }
+
         # connect to self
         self.onApplyContext.connect(self._on_apply_context)
         self.onRequestJsThreadResume.connect(self._on_request_resume_from_js)
 
+        # symbols of addresses, host side first
+        self.symbols = SymbolResolver(self)
+
         # disassembler
         self.disassembler = Disassembler(self)
 
     def reinitialize(self):
         self.database = Database()
         self.io = IO(self)
+        self.symbols.reset()
+        self.disassembler.reset_cache()
 
         self._pid = 0
         self._package = None
@@ -191,6 +306,13 @@ class Dwarf(QObject):
 
         self.context_tid = 0
 
+        self._release_thread_api_requests()
+        self._cancel_api_futures()
+
+        # whatever is still queued belongs to the old script
+        with self._message_queue_lock:
+            self._message_queue.clear()
+
     # ************************************************************************
     # **************************** Properties ********************************
     # ************************************************************************
@@ -251,6 +373,59 @@ class Dwarf(QObject):
     # ************************************************************************
     # **************************** Functions *********************************
     # ************************************************************************
+    def register_message_handler(self, message_type, handler):
+        """ route agent messages with the given envelope type to handler(payload, data)
+
+        handlers run on the ui thread. registering an existing type replaces its handler
+        """
+        self._message_handlers[message_type] = handler
+
+    def unregister_message_handler(self, message_type):
+        self._message_handlers.pop(message_type, None)
+
+    def message_stats(self):
+        """ per message type counters: {type: {'count': n, 'time': seconds spent in the handler}}
+        """
+        return {message_type: {'count': stats[0], 'time': stats[1]}
+                for message_type, stats in self._message_stats.items()}
+
+    def reset_message_stats(self):
+        self._message_stats = {}
+
+    @property
+    def profiler(self):
+        return self._profiler
+
+    def enable_profiling(self, profiler=None):
+        """ start recording api latencies and payloads and agent messages rates and handler times
+
+        pass a RpcProfiler to keep collecting into it (i.e. across sessions). returns the profiler in use
+        """
+        if profiler is None:
+            profiler = self._profiler or RpcProfiler()
+        self._profiler = profiler
+        return profiler
+
+    def disable_profiling(self):
+        self._profiler = None
+
+    def profile_report(self):
+        """ see RpcProfiler.report, None when profiling is disabled
+        """
+        if self._profiler is None:
+            return None
+        return self._profiler.report()
+
+    def dump_profile(self, file_path):
+        if self._profiler is None:
+            return False
+        try:
+            self._profiler.dump(file_path)
+        except (IOError, OSError) as e:
+            self.log_event('failed to write rpc profile: %s' % str(e))
+            return False
+        return True
+
     def is_address_watched(self, ptr):
         ptr = utils.parse_ptr(ptr)
         if hex(ptr) in self.watchpoints:
@@ -359,10 +534,12 @@ class Dwarf(QObject):
             # resume immediately
             self.resume_proc()
 
+            # plugins agents and user script goes in a single round trip
+            calls = []
             for plugin in self._app_window.plugin_manager.plugins:
                 plugin_instance = self._app_window.plugin_manager.plugins[plugin]
                 try:
-                    self.dwarf_api('evaluateFunction', plugin_instance.__get_agent__())
+                    calls.append(('evaluateFunction', plugin_instance.__get_agent__()))
                 except Exception as e:
                     pass
 
@@ -371,7 +548,10 @@ class Dwarf(QObject):
                     with open(script, 'r') as script_file:
                         user_script = script_file.read()
 
-                    self.dwarf_api('evaluateFunction', user_script)
+                    calls.append(('evaluateFunction', user_script))
+
+            if calls:
+                self.dwarf_api_batch(calls)
 
             self.onScriptLoaded.emit()
 
@@ -447,7 +627,11 @@ class Dwarf(QObject):
                 return
         return self.dwarf_api('addWatchpoint', ptr)
 
-    def dump_memory(self, file_path=None, ptr=0, length=0):
+    def dump_memory(self, file_path=None, ptr=0, length=0, resume=None):
+        """ streams the memory to file_path with a progress dialog, returns the Dumper or None
+
+        resume: continue a partial dump of the same memory left in file_path, asks when None
+        """
         if ptr == 0:
             ptr, inp = InputDialog.input_pointer(self._app_window)
         if ptr > 0:
@@ -468,10 +652,69 @@ class Dwarf(QObject):
                 if len(r) == 0 or len(r[0]) == 0:
                     return
                 file_path = r[0]
-            data = self.read_memory(ptr, length)
-            if data is not None and len(data) > 1:
-                with open(file_path, 'wb') as f:
-                    f.write(data[1])
+
+            if resume is None:
+                resume = Dumper.can_resume(file_path, ptr, length) and QMessageBox.question(
+                    self._app_window, 'Dump', 'Resume the partial dump in %s?' % file_path,
+                    QMessageBox.Yes | QMessageBox.No) == QMessageBox.Yes
+
+            dumper = self.io.dump(ptr, length, file_path, resume=resume)
+            progress = self._progress_dialog('Dump', 'Dumping 0x%x' % ptr, dumper)
+            dumper.onFinished.connect(lambda path, holes: self._on_dump_finished(progress, ptr, length, path, holes))
+            return dumper
+
+    def snapshot(self, file_path=None, parent=None, compress=True):
+        """ captures all the readable ranges in a snapshot container with a progress dialog, returns the Snapshotter
+
+        parent: path of a previous snapshot, only the pages not found in it are stored
+        """
+        if file_path is None:
+            r = QFileDialog.getSaveFileName(self._app_window, caption='Save snapshot to file',
+                                            filter='Dwarf snapshot (*.dwsnap)')
+            if len(r) == 0 or len(r[0]) == 0:
+                return None
+            file_path = r[0]
+
+        snapshotter = Snapshotter(self, file_path, parent=parent, compress=compress)
+        progress = self._progress_dialog('Snapshot', 'Capturing the readable ranges', snapshotter)
+        snapshotter.onFinished.connect(lambda path, stats: self._on_snapshot_finished(progress, path, stats))
+        # keep it alive while running
+        self._snapshotter = snapshotter
+        snapshotter.finished.connect(lambda: setattr(self, '_snapshotter', None))
+        snapshotter.start()
+        return snapshotter
+
+    def _progress_dialog(self, title, label, worker):
+        """ cancellable progress of a Dumper or a Snapshotter
+        """
+        progress = QProgressDialog(label, 'Cancel', 0, 1000, self._app_window)
+        progress.setWindowTitle(title)
+        progress.setAutoClose(True)
+        progress.canceled.connect(worker.cancel)
+        worker.onProgress.connect(lambda done, total, rate: self._on_transfer_progress(progress, done, total, rate))
+        worker.onError.connect(lambda error: (progress.close(), self.log_event(error)))
+        return progress
+
+    def _on_transfer_progress(self, progress, written, total, rate):
+        if progress.wasCanceled():
+            return
+        progress.setLabelText('{0} / {1} MB - {2:.1f} MB/s'.format(
+            written >> 20, total >> 20, rate / (1024 * 1024)))
+        progress.setValue(int(written * 1000 / total))
+
+    def _on_dump_finished(self, progress, ptr, length, file_path, holes):
+        progress.close()
+        if holes:
+            self.log_event('dumped 0x%x (%d bytes) to %s, %d bytes unreadable, see %s' % (
+                ptr, length, file_path, sum(hole[1] for hole in holes), file_path + Dumper.INDEX_SUFFIX))
+        else:
+            self.log_event('dumped 0x%x (%d bytes) to %s' % (ptr, length, file_path))
+
+    def _on_snapshot_finished(self, progress, file_path, stats):
+        progress.close()
+        self.log_event('snapshot saved to %s: %d pages, %d unreadable, %d stored (%d bytes), %d deduplicated, '
+                       '%d from parent' % (file_path, stats['pages'], stats['unreadable'], stats['stored'],
+                                           stats['bytes'], stats['deduplicated'], stats['from_parent']))
 
     def dwarf_api(self, api, args=None, tid=0):
         if self.pid and self._pid == 0 or self.process is None:
@@ -490,20 +733,168 @@ class Dwarf(QObject):
         if self._script is None:
             return None
         try:
-            if tid == 0:
-                for tid in list(self.contexts.keys()):
-                    self._script.post({"type": tid})
-                    if is_releasing:
-                        self._script.exports.api(int(tid), api, [int(tid)])
-                if is_releasing:
-                    return None
-            else:
-                self._script.post({"type": str(tid)})
-            return self._script.exports.api(tid, api, args)
+            return self._call_api(api, args, tid)
         except Exception as e:
             self.log_event(str(e))
             return None
 
+    def _call_api(self, api, args, tid):
+        profiler = self._profiler
+        if profiler is None:
+            return self._route_api(api, args, tid)
+
+        start = time.perf_counter()
+        try:
+            result = self._route_api(api, args, tid)
+        except Exception:
+            profiler.record_api(api, time.perf_counter() - start, args, None, failed=True)
+            raise
+        profiler.record_api(api, time.perf_counter() - start, args, result)
+        return result
+
+    def _route_api(self, api, args, tid):
+        if tid == 0:
+            if api == 'release':
+                for context_tid in list(self.contexts.keys()):
+                    self._thread_api(context_tid, api, [int(context_tid)])
+                return None
+        elif str(tid) in self.contexts:
+            # the thread is parked in the agent api loop
+            return self._thread_api(tid, api, args)
+        return self._script.exports.api(tid, api, args)
+
+    def dwarf_api_async(self, api, args=None, tid=0, timeout=None):
+        """ same as dwarf_api, but runs on the rpc workers and returns an ApiFuture right away
+
+        future.finished(result) / future.failed(error) are delivered on the calling thread.
+        the target thread is resolved now, so a later context switch won't redirect the call
+        """
+        if api != 'release' and tid == 0:
+            tid = self.context_tid
+
+        if args is not None and not isinstance(args, list):
+            args = [args]
+
+        def call():
+            if self._script is None:
+                raise Exception('%s: no script loaded' % api)
+            return self._call_api(api, args, tid)
+
+        return self.run_async(call, name=api, timeout=timeout)
+
+    def run_async(self, fn, *args, name=None, timeout=None):
+        """ runs fn(*args) on the rpc workers, usually something doing several dwarf_api calls.
+
+        returns an ApiFuture resolved with the return value of fn, or failed with the exception it raised
+        """
+        if timeout is None:
+            timeout = Dwarf.RPC_TIMEOUT
+
+        future = ApiFuture(name or getattr(fn, '__name__', 'call'), timeout=timeout,
+                           on_done=self._on_api_future_done)
+        with self._api_futures_lock:
+            self._api_futures.add(future)
+            if self._rpc_executor is None:
+                self._rpc_executor = ThreadPoolExecutor(max_workers=Dwarf.RPC_WORKERS,
+                                                        thread_name_prefix='dwarf-rpc')
+
+        def work():
+            if future.done():
+                # cancelled or timed out while waiting in the queue
+                return
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:  # pylint: disable=broad-except
+                self.log_event('%s: %s' % (future.name, str(e)))
+                future.set_error(e)
+
+        future.set_task(self._rpc_executor.submit(work))
+        return future
+
+    def _on_api_future_done(self, future):
+        with self._api_futures_lock:
+            self._api_futures.discard(future)
+
+    def _cancel_api_futures(self):
+        with self._api_futures_lock:
+            futures = list(self._api_futures)
+        for future in futures:
+            future.cancel()
+
+    def dwarf_api_batch(self, calls, tid=0):
+        """ run a list of (api, args) in the agent with a single round trip
+
+        returns the list of results in the same order. calls which failed are logged and give None
+        """
+        batch = []
+        for api, args in calls:
+            if args is not None and not isinstance(args, list):
+                args = [args]
+            batch.append([api, args])
+
+        results = self.dwarf_api('_batch', [batch], tid=tid)
+        if not results:
+            return [None] * len(batch)
+
+        blob = None
+        if isinstance(results, bytes):
+            # some results are bytes, they follow the results json. see Api._batch
+            header_length = int.from_bytes(results[:4], 'little')
+            blob = memoryview(results)[4 + header_length:]
+            results = json.loads(results[4:4 + header_length].decode('utf8'))
+
+        ret = []
+        offset = 0
+        for i, result in enumerate(results):
+            if 'error' in result:
+                self.log_event('%s: %s' % (batch[i][0], result['error']))
+                ret.append(None)
+            elif 'bytes' in result:
+                ret.append(bytes(blob[offset:offset + result['bytes']]))
+                offset += result['bytes']
+            else:
+                ret.append(result.get('result', None))
+        return ret
+
+    def _thread_api(self, tid, api, args):
+        """ post an api request to a breakpointed thread and wait for the result message
+        """
+        request = [threading.Event(), '', str(tid)]
+        with self._thread_api_lock:
+            self._thread_api_id += 1
+            request_id = self._thread_api_id
+            self._thread_api_requests[request_id] = request
+
+        self._script.post({'type': str(tid), 'id': request_id, 'api': api, 'args': args})
+
+        if not request[0].wait(self.THREAD_API_REPOST_DELAY):
+            # frida can wake the thread before running the recv callback, it then goes back to sleep with the
+            # request queued. once the callback ran, a single wake up is enough
+            self._script.post({'type': str(tid)})
+            if not request[0].wait(max(0, self.THREAD_API_TIMEOUT - self.THREAD_API_REPOST_DELAY)):
+                with self._thread_api_lock:
+                    self._thread_api_requests.pop(request_id, None)
+                self.log_event('api %s timed out @thread := %s' % (api, str(tid)))
+        return request[1]
+
+    def _release_thread_api_requests(self, tid=None):
+        """ wake up the requests still waiting on a thread which is gone
+        """
+        with self._thread_api_lock:
+            for request_id in list(self._thread_api_requests.keys()):
+                request = self._thread_api_requests[request_id]
+                if tid is None or request[2] == tid:
+                    del self._thread_api_requests[request_id]
+                    request[0].set()
+
+    def _on_thread_api_result(self, request_id, result, data):
+        with self._thread_api_lock:
+            request = self._thread_api_requests.pop(request_id, None)
+        if request is None:
+            return
+        request[1] = data if data is not None else result
+        request[0].set()
+
     def breakpoint_java(self, input_=None, pending_args=None):
         if input_ is None or not isinstance(input_, str):
             accept, input_ = InputDialog.input(
@@ -533,6 +924,16 @@ class Dwarf(QObject):
         if ptr > 0:
             self.dwarf_api('putBreakpoint', ptr)
 
+    def breakpoint_stats(self, target=None):
+        """ hits and skips counted by the agent: {'hits': n, 'skips': n}
+
+        skips are the hits on which the condition was false. without target returns {target: stats}
+        for all native, java and objc breakpoints. None if the target has no breakpoint
+        """
+        if isinstance(target, int):
+            target = hex(target)
+        return self.dwarf_api('getBreakpointStats', target)
+
     def breakpoint_module_initialization(self, input_=None):
         if input_ is None or not isinstance(input_, str):
             accept, input_ = InputDialog.input(self._app_window, hint='insert module name', placeholder='libtarget.so')
@@ -572,8 +973,10 @@ class Dwarf(QObject):
     def read_memory_async(self, ptr, length, callback):
         """
         def callback(ptr, data):
+
+        returns the ApiFuture of the read
         """
-        self.io.read_async(ptr, length, callback)
+        return self.io.read_async(ptr, length, callback)
 
     def read_range(self, ptr):
         return self.io.read_range(ptr)
@@ -581,8 +984,11 @@ class Dwarf(QObject):
     def read_range_async(self, ptr, callback):
         """
         def callback(base, data, offset):
+
+        data is None when the read failed. returns the ApiFuture of the read, also when joining a read
+        of the same range already running
         """
-        self.io.read_range_async(ptr, callback)
+        return self.io.read_range_async(ptr, callback)
 
     def remove_watchpoint(self, ptr):
         return self.dwarf_api('removeWatchpoint', ptr)
@@ -599,6 +1005,24 @@ class Dwarf(QObject):
         pattern = ' '.join([pattern[i:i + 2] for i in range(0, len(pattern), 2)])
         self.dwarf_api('memoryScanList', [json.dumps(ranges_list), pattern])
 
+    def memory_search(self, ranges, pattern, limit=0):
+        """ starts a search of the hex pattern in ranges ([(start, size)]) and returns its id, None if it failed
+
+        matches stream through onMemorySearchMatches, then onMemorySearchProgress after each chunk
+        and onMemorySearchComplete. limit: matches after which the search stops, 0 for none
+        """
+        pattern = ' '.join([pattern[i:i + 2] for i in range(0, len(pattern), 2)])
+        ranges = [{'start': hex(utils.parse_ptr(start)), 'size': int(size)} for start, size in ranges]
+        with self._thread_api_lock:
+            self._memory_search_id += 1
+            search_id = self._memory_search_id
+        return self.dwarf_api('memorySearch', [search_id, ranges, pattern, limit])
+
+    def cancel_memory_search(self, search_id):
+        """ matches already found are still delivered, followed by onMemorySearchComplete
+        """
+        return self.dwarf_api('cancelMemorySearch', search_id)
+
     # ************************************************************************
     # **************************** Handlers **********************************
     # ************************************************************************
@@ -611,198 +1035,331 @@ class Dwarf(QObject):
         self.onScriptDestroyed.emit()
 
     def _on_message(self, message, data):
-        QApplication.processEvents()
+        # runs on the frida thread
         if 'payload' not in message:
             print('payload: ' + str(message))
             return
-        self.onReceiveCmd.emit([message, data])
 
-        what = message['payload']
-        parts = what.split(':::')
-        if len(parts) < 2:
+        payload = message['payload']
+        if isinstance(payload, dict) and payload.get('v') == Dwarf.MESSAGE_VERSION:
+            message_type = payload.get('type')
+            if self._profiler is not None:
+                self._profiler.record_message(message_type, payload, data)
+            if message_type == 'api_result':
+                # someone is blocked waiting for this one
+                self._on_thread_api_result(payload['id'], payload.get('result'), data)
+                return
+            elif message_type == 'release':
+                # same for any api still waiting on the released thread
+                self._release_thread_api_requests(str(payload['tid']))
+
+        with self._message_queue_lock:
+            self._message_queue.append((message, data, time.perf_counter() if self._profiler is not None else 0))
+            if self._message_drain_scheduled:
+                return
+            self._message_drain_scheduled = True
+        self._onMessagesQueued.emit()
+
+    def _drain_messages(self):
+        # runs on the ui thread, until the queue is empty or the time budget is over
+        deadline = time.perf_counter() + self.message_drain_budget
+        while True:
+            with self._message_queue_lock:
+                if not self._message_queue:
+                    self._message_drain_scheduled = False
+                    return
+                message, data, queued = self._message_queue.popleft()
+
+            self._dispatch_message(message, data, queued)
+
+            if time.perf_counter() >= deadline:
+                # leave room to paint and handle input, then go on with the next batch
+                QTimer.singleShot(0, self._drain_messages)
+                return
+
+    def _dispatch_message(self, message, data, queued=0):
+        self.onReceiveMessage.emit([message, data])
+
+        payload = message['payload']
+        if not isinstance(payload, dict) or payload.get('v') != Dwarf.MESSAGE_VERSION:
+            self.onReceiveCmd.emit([message, data])
             return
+        if self.receivers(self.onReceiveCmd):
+            self.onReceiveCmd.emit([self.legacy_message(message), data])
 
-        cmd = parts[0]
-        if cmd == 'api_ping_timeout':
-            self._script.post({"type": str(parts[1])})
-        elif cmd == 'backtrace':
-            self.onBackTrace.emit(json.loads(parts[1]))
-        elif cmd == 'class_loader_loading_class':
-            str_fmt = ('@thread {0} loading class := {1}'.format(parts[1], parts[2]))
-            self.log_event(str_fmt)
-        elif cmd == 'enumerate_java_classes_start':
-            self.onEnumerateJavaClassesStart.emit()
-        elif cmd == 'enumerate_java_classes_match':
-            self.onEnumerateJavaClassesMatch.emit(parts[1])
-        elif cmd == 'enumerate_java_classes_complete':
-            self.onEnumerateJavaClassesComplete.emit()
-        elif cmd == 'enumerate_java_methods_complete':
-            self.onEnumerateJavaMethodsComplete.emit([parts[1], json.loads(parts[2])])
-        elif cmd == 'enumerate_objc_modules':
-            modules = json.loads(parts[1])
-            self.onEnumerateObjCModules.emit(modules)
-        elif cmd == 'enumerate_objc_classes_start':
-            self.onEnumerateObjCClassesStart.emit()
-        elif cmd == 'enumerate_objc_classes_match':
-            self.onEnumerateObjCClassesMatch.emit(parts[1])
-        elif cmd == 'enumerate_objc_classes_complete':
-            self.onEnumerateObjCClassesComplete.emit()
-        elif cmd == 'enumerate_objc_methods_start':
-            self.onEnumerateObjCMethodsStart.emit()
-        elif cmd == 'enumerate_objc_methods_match':
-            self.onEnumerateObjCMethodsMatch.emit(parts[1])
-        elif cmd == 'enumerate_objc_methods_complete':
-            self.onEnumerateObjCMethodsComplete.emit()
-        elif cmd == 'ftrace':
-            if self.app.get_ftrace_panel() is not None:
-                self.app.get_ftrace_panel().append_data(parts[1])
-        elif cmd == 'enable_kernel':
-            self._app_window.get_menu().enable_kernel_menu()
-        elif cmd == 'breakpoint_java_callback':
-            b = Breakpoint(BREAKPOINT_JAVA)
-            b.set_target(parts[1])
-            if len(parts) > 2:
-                b.set_condition(parts[2])
-            self.java_breakpoints[parts[1]] = b
-            self.onAddJavaBreakpoint.emit(b)
-        elif cmd == 'breakpoint_objc_callback':
-            b = Breakpoint(BREAKPOINT_OBJC)
-            # WORKAROUND: Some ObjC Methods have multiple ':' in name. Restoring ':::':
-            target = ":::".join(parts[1:-1])
-            b.set_target(target)
-            if parts[-1] != '':
-                b.set_condition(parts[-1])
-            self.objc_breakpoints[target] = b
-            self.onAddObjCBreakpoint.emit(b)
-        elif cmd == 'java_class_initialization_callback':
-            b = Breakpoint(BREAKPOINT_INITIALIZATION)
-            b.set_target(parts[1])
-            b.set_debug_symbol(parts[1])
-            self.java_class_initialization_breakpoints[parts[1]] = b
-            self.onAddJavaClassInitializationBreakpoint.emit(b)
-        elif cmd == 'breakpoint_native_callback':
-            b = Breakpoint(BREAKPOINT_NATIVE)
-            b.set_target(int(parts[1], 16))
-            if len(parts) > 2:
-                b.set_condition(parts[2])
-            self.breakpoints[b.get_target()] = b
-            self.onAddNativeBreakpoint.emit(b)
-        elif cmd == 'module_initialization_callback':
-            b = Breakpoint(BREAKPOINT_INITIALIZATION)
-            b.set_target(parts[1])
-            self.module_initialization_breakpoints[parts[1]] = b
-            self.onAddModuleInitializationBreakpoint.emit(b)
-        elif cmd == 'breakpoint_deleted':
-            if parts[1] == 'java':
-                self.java_breakpoints.pop(parts[2])
-            elif parts[1] == 'objc':
-                self.objc_breakpoints.pop(":::".join(parts[2:]))
-            elif parts[1] == 'module_initialization':
-                if parts[2] in self.module_initialization_breakpoints:
-                    self.module_initialization_breakpoints.pop(parts[2])
-            elif parts[1] == 'java_class_initialization':
-                if parts[2] in self.java_class_initialization_breakpoints:
-                    self.java_class_initialization_breakpoints.pop(parts[2])
-            else:
-                self.breakpoints.pop(utils.parse_ptr(parts[2]))
-            self.onDeleteBreakpoint.emit(parts)
-        elif cmd == 'breakpoint_java_class_initialization_callback':
-            str_fmt = ('Breakpoint java class initialization {0} @thread := {1}'.format(parts[1], parts[2]))
-            self.log_event(str_fmt)
-            self.onHitJavaClassInitializationBreakpoint.emit(parts[1])
-        elif cmd == 'java_trace':
-            self.onJavaTraceEvent.emit(parts)
-        elif cmd == 'log':
-            self.log(parts[1])
-        elif cmd == 'breakpoint_module_initialization_callback':
-            data = json.loads(parts[2])
-            str_fmt = ('Breakpoint module initialization {0} @thread := {1}'.format(data['module'], parts[1]))
-            self.log_event(str_fmt)
-            self.onHitModuleInitializationBreakpoint.emit([parts[1], data])
-        elif cmd == 'module_initialized':
-            module = json.loads(parts[2])
-            if module is not None:
-                str_fmt = ('@thread {0} loading module := {1}'.format(parts[1], module['name']))
-                self.log_event(str_fmt)
-
-                module_info = ModuleInfo.build_module_info_with_data(module)
-                self.database.put_module_info(module_info.base, module_info)
-
-                self.onModuleLoaded.emit([module])
-        elif cmd == 'new_thread':
-            str_fmt = ('@thread {0} starting new thread with target fn := {1}'.format(parts[1], parts[2]))
-            self.log_event(str_fmt)
-        elif cmd == 'release':
-            reason = 0
-            if len(parts) > 1:
-                reason = int(parts[2])
-            p = 'releasing' if reason != 3 else 'stepping'
-            str_fmt = (p + ' := {0}'.format(parts[1]))
+        message_type = payload.get('type')
+        stats = self._message_stats.get(message_type)
+        if stats is None:
+            stats = self._message_stats[message_type] = [0, 0.0]
+        stats[0] += 1
+
+        handler = self._message_handlers.get(message_type)
+        if handler is None:
+            return
+
+        start = time.perf_counter()
+        try:
+            handler(payload, data)
+        except Exception as e:
+            logger.exception('failed to handle %s message', message_type)
+            self.log_event('failed to handle %s message: %s' % (message_type, str(e)))
+        end = time.perf_counter()
+        stats[1] += end - start
+
+        if self._profiler is not None and queued:
+            self._profiler.record_handler(message_type, end - start, start - queued)
+
+    @staticmethod
+    def legacy_message(message):
+        """ the message with its envelope payload as the 'type:::json' string sent before the envelopes,
+        json of the other keys of the envelope
+        """
+        payload = dict(message['payload'])
+        payload.pop('v', None)
+        message_type = payload.pop('type', '')
+        legacy = dict(message)
+        legacy['payload'] = message_type + ':::' + json.dumps(payload)
+        return legacy
+
+    def _on_backtrace_message(self, payload, data):
+        self.onBackTrace.emit(payload['backtrace'])
+
+    def _on_class_loader_loading_class_message(self, payload, data):
+        str_fmt = ('@thread {0} loading class := {1}'.format(payload['tid'], payload['className']))
+        self.log_event(str_fmt)
+
+    def _on_enumerate_java_classes_start_message(self, payload, data):
+        self.onEnumerateJavaClassesStart.emit()
+
+    def _on_enumerate_java_classes_match_message(self, payload, data):
+        self.onEnumerateJavaClassesMatch.emit(payload['items'])
+
+    def _on_enumerate_java_classes_complete_message(self, payload, data):
+        self.onEnumerateJavaClassesComplete.emit()
+
+    def _on_enumerate_java_methods_complete_message(self, payload, data):
+        self.onEnumerateJavaMethodsComplete.emit([payload['className'], payload['methods']])
+
+    def _on_enumerate_objc_modules_message(self, payload, data):
+        self.onEnumerateObjCModules.emit(payload['modules'])
+
+    def _on_enumerate_objc_classes_start_message(self, payload, data):
+        self.onEnumerateObjCClassesStart.emit()
+
+    def _on_enumerate_objc_classes_match_message(self, payload, data):
+        self.onEnumerateObjCClassesMatch.emit(payload['items'])
+
+    def _on_enumerate_objc_classes_complete_message(self, payload, data):
+        self.onEnumerateObjCClassesComplete.emit()
+
+    def _on_enumerate_objc_methods_start_message(self, payload, data):
+        self.onEnumerateObjCMethodsStart.emit()
+
+    def _on_enumerate_objc_methods_match_message(self, payload, data):
+        self.onEnumerateObjCMethodsMatch.emit(payload['items'])
+
+    def _on_enumerate_objc_methods_complete_message(self, payload, data):
+        self.onEnumerateObjCMethodsComplete.emit()
+
+    def _on_ftrace_message(self, payload, data):
+        if self.app.get_ftrace_panel() is not None:
+            self.app.get_ftrace_panel().append_data(payload['data'])
+
+    def _on_enable_kernel_message(self, payload, data):
+        self._app_window.get_menu().enable_kernel_menu()
+
+    def _on_breakpoint_java_callback_message(self, payload, data):
+        b = Breakpoint(BREAKPOINT_JAVA)
+        b.set_target(payload['target'])
+        if payload['condition']:
+            b.set_condition(payload['condition'])
+        self.java_breakpoints[payload['target']] = b
+        self.onAddJavaBreakpoint.emit(b)
+
+    def _on_breakpoint_objc_callback_message(self, payload, data):
+        b = Breakpoint(BREAKPOINT_OBJC)
+        b.set_target(payload['target'])
+        if payload['condition']:
+            b.set_condition(payload['condition'])
+        self.objc_breakpoints[payload['target']] = b
+        self.onAddObjCBreakpoint.emit(b)
+
+    def _on_java_class_initialization_callback_message(self, payload, data):
+        b = Breakpoint(BREAKPOINT_INITIALIZATION)
+        b.set_target(payload['className'])
+        b.set_debug_symbol(payload['className'])
+        self.java_class_initialization_breakpoints[payload['className']] = b
+        self.onAddJavaClassInitializationBreakpoint.emit(b)
+
+    def _on_breakpoint_native_callback_message(self, payload, data):
+        b = Breakpoint(BREAKPOINT_NATIVE)
+        b.set_target(int(payload['target'], 16))
+        if payload['condition']:
+            b.set_condition(payload['condition'])
+        # the interceptor patched the code
+        self.io.invalidate(b.get_target(), Dwarf.BREAKPOINT_PATCH_SIZE)
+        self.breakpoints[b.get_target()] = b
+        self.onAddNativeBreakpoint.emit(b)
+
+    def _on_module_initialization_callback_message(self, payload, data):
+        b = Breakpoint(BREAKPOINT_INITIALIZATION)
+        b.set_target(payload['module'])
+        self.module_initialization_breakpoints[payload['module']] = b
+        self.onAddModuleInitializationBreakpoint.emit(b)
+
+    def _on_breakpoint_deleted_message(self, payload, data):
+        kind = payload['kind']
+        target = payload['target']
+        if kind == 'java':
+            self.java_breakpoints.pop(target)
+        elif kind == 'objc':
+            self.objc_breakpoints.pop(target)
+        elif kind == 'module_initialization':
+            if target in self.module_initialization_breakpoints:
+                self.module_initialization_breakpoints.pop(target)
+        elif kind == 'java_class_initialization':
+            if target in self.java_class_initialization_breakpoints:
+                self.java_class_initialization_breakpoints.pop(target)
+        else:
+            self.breakpoints.pop(utils.parse_ptr(target))
+            self.io.invalidate(target, Dwarf.BREAKPOINT_PATCH_SIZE)
+        self.onDeleteBreakpoint.emit(['breakpoint_deleted', kind, target])
+
+    def _on_breakpoint_condition_error_message(self, payload, data):
+        self.log_event('breakpoint %s - condition error: %s' % (payload['target'], payload['error']))
+        self.onBreakpointConditionError.emit([payload['target'], payload['condition'], payload['error']])
+
+    def _on_breakpoint_java_class_initialization_callback_message(self, payload, data):
+        str_fmt = ('Breakpoint java class initialization {0} @thread := {1}'.format(
+            payload['className'], payload['tid']))
+        self.log_event(str_fmt)
+        self.onHitJavaClassInitializationBreakpoint.emit(payload['className'])
+
+    def _on_java_trace_message(self, payload, data):
+        # list of {'event', 'method', 'data'}
+        self.onJavaTraceEvent.emit(payload['items'])
+
+    def _on_log_message(self, payload, data):
+        self.log(payload['message'])
+
+    def _on_breakpoint_module_initialization_callback_message(self, payload, data):
+        tid = str(payload['tid'])
+        str_fmt = ('Breakpoint module initialization {0} @thread := {1}'.format(payload['module'], tid))
+        self.log_event(str_fmt)
+        self.onHitModuleInitializationBreakpoint.emit([tid, {
+            'module': payload['module'],
+            'moduleBase': payload['moduleBase'],
+            'moduleEntry': payload['moduleEntry']
+        }])
+
+    def _on_module_initialized_message(self, payload, data):
+        modules = []
+        for item in payload['items']:
+            module = item['module']
+            if module is None:
+                continue
+
+            str_fmt = ('@thread {0} loading module := {1}'.format(item['tid'], module['name']))
             self.log_event(str_fmt)
-            if parts[1] in self.contexts:
-                del self.contexts[parts[1]]
-            self.onThreadResumed.emit(int(parts[1]))
-        elif cmd == 'resume':
-            if not self.resumed:
-                self.resume_proc()
-        elif cmd == 'release_js':
-            # releasing the thread must be done by calling py funct dwarf_api('release')
-            # there are cases in which we want to release the thread from a js api so we need to call this
-            self.onRequestJsThreadResume.emit(int(parts[1]))
-        elif cmd == 'set_context':
-            # data = json.loads(parts[1])
-            # WORKAROUND: Some ObjC Methods have multiple ':' in name. Restoring ':::'
-            data = json.loads(":::".join(parts[1:]))
-            if 'modules' in data:
-                self.onSetModules.emit(data['modules'])
-            if 'ranges' in data:
-                self.onSetRanges.emit(data['ranges'])
-            if 'backtrace' in data:
-                self.onBackTrace.emit(data['backtrace'])
-
-            self.onApplyContext.emit(data)
-        elif cmd == 'set_context_value':
-            context_property = parts[1]
-            value = parts[2]
-            self.onContextChanged.emit(str(context_property), value)
-        elif cmd == 'set_data':
-            if data is not None:
-                self.onSetData.emit(['raw', parts[1], data])
-            else:
-                self.onSetData.emit(['plain', parts[1], str(parts[2])])
-        elif cmd == 'unhandled_exception':
-            # todo
-            pass
-        elif cmd == 'update_modules':
-            modules = json.loads(parts[2])
-            self.onSetModules.emit(modules)
-        elif cmd == 'update_ranges':
-            self.onSetRanges.emit(json.loads(parts[2]))
-        elif cmd == 'update_searchable_ranges':
-            self.onSearchableRanges.emit(json.loads(parts[2]))
-        elif cmd == 'watchpoint':
-            exception = json.loads(parts[1])
-            self.log_event('watchpoint hit op %s address %s @thread := %s' %
-                           (exception['memory']['operation'], exception['memory']['address'], parts[2]))
-        elif cmd == 'watchpoint_added':
-            ptr = utils.parse_ptr(parts[1])
-            hex_ptr = hex(ptr)
-            flags = int(parts[2])
-
-            w = Watchpoint(ptr, flags)
-            w.set_debug_symbol(json.loads(parts[3]))
-            self.watchpoints[hex_ptr] = w
-
-            self.onWatchpointAdded.emit(w)
-        elif cmd == 'watchpoint_removed':
-            hex_ptr = hex(utils.parse_ptr(parts[1]))
-            self.watchpoints.pop(hex_ptr)
-            self.onWatchpointRemoved.emit(hex_ptr)
-        elif cmd == 'memoryscan_result':
-            if parts[1] == '':
-                self.onMemoryScanResult.emit([])
-            else:
-                self.onMemoryScanResult.emit(json.loads(parts[1]))
+
+            module_info = ModuleInfo.build_module_info_with_data(module)
+            self.database.put_module_info(module_info.base, module_info)
+            modules.append(module)
+
+        if modules:
+            self.onModuleLoaded.emit(modules)
+
+    def _on_new_thread_message(self, payload, data):
+        str_fmt = ('@thread {0} starting new thread with target fn := {1}'.format(payload['tid'], payload['target']))
+        self.log_event(str_fmt)
+
+    def _on_release_message(self, payload, data):
+        tid = str(payload['tid'])
+        reason = payload.get('reason', 0)
+        p = 'releasing' if reason != 3 else 'stepping'
+        str_fmt = (p + ' := {0}'.format(tid))
+        self.log_event(str_fmt)
+        if tid in self.contexts:
+            del self.contexts[tid]
+        self.onThreadResumed.emit(int(tid))
+
+    def _on_resume_message(self, payload, data):
+        if not self.resumed:
+            self.resume_proc()
+
+    def _on_release_js_message(self, payload, data):
+        # releasing the thread must be done by calling py funct dwarf_api('release')
+        # there are cases in which we want to release the thread from a js api so we need to call this
+        self.onRequestJsThreadResume.emit(int(payload['tid']))
+
+    def _on_set_context_message(self, payload, data):
+        if 'modules' in payload:
+            self.database.sync_modules(payload['modules'])
+            self.onSetModules.emit(payload['modules'])
+        if 'ranges' in payload:
+            self.database.set_ranges(payload['ranges'])
+            self.onSetRanges.emit(payload['ranges'])
+        if 'backtrace' in payload:
+            self.onBackTrace.emit(payload['backtrace'])
+
+        self.onApplyContext.emit(payload)
+
+    def _on_set_context_value_message(self, payload, data):
+        self.onContextChanged.emit(str(payload['property']), payload['value'])
+
+    def _on_set_data_message(self, payload, data):
+        if data is not None:
+            self.onSetData.emit(['raw', payload['key'], data])
+        else:
+            self.onSetData.emit(['plain', payload['key'], str(payload['data'])])
+
+    def _on_update_modules_message(self, payload, data):
+        self.database.sync_modules(payload['modules'])
+        self.onSetModules.emit(payload['modules'])
+
+    def _on_update_ranges_message(self, payload, data):
+        self.database.set_ranges(payload['ranges'])
+        self.onSetRanges.emit(payload['ranges'])
+
+    def _on_update_searchable_ranges_message(self, payload, data):
+        self.onSearchableRanges.emit(payload['ranges'])
+
+    def _on_watchpoint_message(self, payload, data):
+        exception = payload['exception']
+        self.log_event('watchpoint hit op %s address %s @thread := %s' %
+                       (exception['memory']['operation'], exception['memory']['address'], payload['tid']))
+
+    def _on_watchpoint_added_message(self, payload, data):
+        ptr = utils.parse_ptr(payload['address'])
+        hex_ptr = hex(ptr)
+        flags = int(payload['flags'])
+
+        w = Watchpoint(ptr, flags)
+        w.set_debug_symbol(payload['debugSymbol'])
+        self.watchpoints[hex_ptr] = w
+
+        self.onWatchpointAdded.emit(w)
+
+    def _on_watchpoint_removed_message(self, payload, data):
+        hex_ptr = hex(utils.parse_ptr(payload['address']))
+        self.watchpoints.pop(hex_ptr)
+        self.onWatchpointRemoved.emit(hex_ptr)
+
+    def _on_memoryscan_result_message(self, payload, data):
+        self.onMemoryScanResult.emit(payload['result'] or [])
+
+    def _on_memorysearch_match_message(self, payload, data):
+        matches = {}
+        for item in payload['items']:
+            matches.setdefault(item['id'], []).append(item)
+        for search_id, items in matches.items():
+            self.onMemorySearchMatches.emit(search_id, items)
+
+    def _on_memorysearch_progress_message(self, payload, data):
+        self.onMemorySearchProgress.emit(payload['id'], payload)
+
+    def _on_memorysearch_complete_message(self, payload, data):
+        self.onMemorySearchComplete.emit(payload['id'], payload)
 
     def _on_apply_context(self, context_data):
         reason = context_data['reason']
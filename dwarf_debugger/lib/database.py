@@ -16,35 +16,185 @@
 """
 
 
+import bisect
+import threading
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from dwarf_debugger.lib import utils
+from dwarf_debugger.lib.types.module_info import ModuleInfo
+
+
+class IntervalIndex(object):
+    """ Non overlapping [start, end) intervals of the address space sorted by start, each holding a value
+
+        the interval containing an address is found with bisect. adding an interval drops the ones it overlaps,
+        a module loaded where another one was unloaded replaces it
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._starts = []
+        self._ends = []
+        self._values = []
+        # numpy copies of the bounds for the bulk queries, rebuilt after a change
+        self._arrays = None
+
+    def __len__(self):
+        return len(self._starts)
+
+    def values(self):
+        """ the values, sorted by start
+        """
+        with self._lock:
+            return list(self._values)
+
+    def clear(self):
+        with self._lock:
+            self._starts, self._ends, self._values = [], [], []
+            self._arrays = None
+
+    def add(self, start, size, value):
+        """ adds [start, start + size), returns the values of the intervals it replaced
+        """
+        end = start + max(size, 1)
+        with self._lock:
+            first = bisect.bisect_right(self._starts, start)
+            if first and self._ends[first - 1] > start:
+                first -= 1
+            last = bisect.bisect_left(self._starts, end)
+            replaced = self._values[first:last]
+            self._starts[first:last] = [start]
+            self._ends[first:last] = [end]
+            self._values[first:last] = [value]
+            self._arrays = None
+        return replaced
+
+    def remove(self, start):
+        """ drops the interval starting at start, returns its value
+        """
+        with self._lock:
+            index = bisect.bisect_left(self._starts, start)
+            if index == len(self._starts) or self._starts[index] != start:
+                return None
+            del self._starts[index]
+            del self._ends[index]
+            self._arrays = None
+            return self._values.pop(index)
+
+    def find(self, address):
+        """ value of the interval containing address, None when there isn't one
+        """
+        with self._lock:
+            index = bisect.bisect_right(self._starts, address) - 1
+            if index >= 0 and address < self._ends[index]:
+                return self._values[index]
+        return None
+
+    def indices(self, addresses):
+        """ position of the interval containing each address in values(), -1 when there isn't one.
+        a numpy array when numpy is around
+        """
+        with self._lock:
+            if numpy is None:
+                ret = []
+                for address in addresses:
+                    index = bisect.bisect_right(self._starts, address) - 1
+                    ret.append(index if index >= 0 and address < self._ends[index] else -1)
+                return ret
+
+            if self._arrays is None:
+                self._arrays = (numpy.array(self._starts, dtype=numpy.uint64),
+                                numpy.array(self._ends, dtype=numpy.uint64))
+            starts, ends = self._arrays
+        addresses = numpy.asarray(addresses, dtype=numpy.uint64)
+        index = numpy.searchsorted(starts, addresses, side='right') - 1
+        inside = (index >= 0) & (addresses < ends[numpy.maximum(index, 0)]) if len(ends) else index >= 0
+        return numpy.where(inside, index, -1)
+
+    def find_many(self, addresses):
+        """ values of the intervals containing each address, None for the ones outside
+        """
+        values = self.values()
+        indices = self.indices(addresses)
+        if numpy is not None:
+            indices = indices.tolist()
+        return [values[index] if index >= 0 else None for index in indices]
+
+
 class Database:
     """ DwarfDatabase
+
+        modules and ranges are kept in IntervalIndex by address, the module infos in modules_info by base
     """
 
     def __init__(self):
         super().__init__()
+        # base -> ModuleInfo
         self.modules_info = {}
+        self.modules = IntervalIndex()
+        # ranges last enumerated by the agent
+        self.ranges = IntervalIndex()
 
     def get_module_info(self, address):
-        address = self.sanify_address(address)
+        address = utils.parse_ptr(address)
         if address:
-            try:
-                address = int(address, 16)
-            except ValueError:
-                return None
-
-            for module_info in self.modules_info:
-                _module = self.modules_info[module_info]
-                if _module:
-                    if _module.base <= address <= _module.base + _module.size:
-                        return _module
-
+            return self.modules.find(address)
         return None
 
+    def get_modules_info(self, addresses):
+        """ ModuleInfo containing each address, None for the ones out of the modules
+        """
+        return self.modules.find_many([utils.parse_ptr(address) for address in addresses])
+
     def put_module_info(self, address, module_info):
-        address = self.sanify_address(address)
+        address = utils.parse_ptr(address)
+        if module_info:
+            # the modules unloaded from there
+            for replaced in self.modules.add(address, module_info.size, module_info):
+                if replaced.base != address:
+                    self.modules_info.pop(replaced.base, None)
         self.modules_info[address] = module_info
         return module_info
 
+    def remove_module_info(self, address):
+        """ a module was unloaded
+        """
+        address = utils.parse_ptr(address)
+        self.modules.remove(address)
+        return self.modules_info.pop(address, None)
+
+    def sync_modules(self, modules):
+        """ modules enumerated by the agent: the ones not known yet are added, the ones missing were unloaded
+        """
+        bases = set()
+        for module in modules:
+            if not module or 'base' not in module:
+                continue
+            base = utils.parse_ptr(module['base'])
+            bases.add(base)
+            module_info = self.modules_info.get(base)
+            if module_info is None or module_info.name != module['name']:
+                self.put_module_info(base, ModuleInfo.build_module_info_with_data(module))
+        for base in [base for base in list(self.modules_info) if base not in bases]:
+            self.remove_module_info(base)
+
+    def get_range(self, address):
+        """ range containing address, as enumerated by the agent
+        """
+        return self.ranges.find(utils.parse_ptr(address))
+
+    def get_ranges(self, addresses):
+        return self.ranges.find_many([utils.parse_ptr(address) for address in addresses])
+
+    def set_ranges(self, ranges):
+        self.ranges.clear()
+        for _range in ranges:
+            self.ranges.add(utils.parse_ptr(_range['base']), int(_range['size']), _range)
+
     @staticmethod
     def sanify_address(address):
         hex_adr = address
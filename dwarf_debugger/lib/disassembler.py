@@ -1,76 +1,387 @@
-import json
+import bisect
+import hashlib
+import threading
+from collections import OrderedDict
 
 from capstone import *
 from capstone.arm64_const import *
-from PyQt5.QtCore import QThread, pyqtSignal
 
+from dwarf_debugger.lib import utils
+from dwarf_debugger.lib.prefs import Prefs
+from dwarf_debugger.lib.symbols import symbol_text
 from dwarf_debugger.lib.types.instruction import Instruction
 
 
-class DisassembleThread(QThread):
-    onFinished = pyqtSignal(list, name='onFinished')
-    onError = pyqtSignal(str, name='onError')
+class DisassemblyCache(object):
+    """ LRU of the LinearDisassembly of the ranges shown, going back through the history finds the instructions
+    decoded and the bytes loaded. bounded by a byte budget, see LinearDisassembly.approximate_size
 
-    def __init__(self, dwarf, arch, mode, base, data, offset, num_instructions=0):
-        super().__init__()
-        self._dwarf = dwarf
-        self._base = base
-        self._data = data
-        self._offset = offset
-        self._capstone = None
+        models are keyed by (arch, mode, base, size, content). content is the hash of the bytes, or the
+        writability of a PagedMemory: that one follows the memory itself. a write reported by the page cache
+        drops the models overlapping it
+    """
+    # default budget, can be changed with the dwarf_disassembly_cache_size preference
+    BUDGET = 32 * 1024 * 1024
 
-        try:
-            self._capstone = Cs(arch, mode)
-            self._capstone.detail = True
-        except CsError:
-            return
+    def __init__(self, budget=BUDGET):
+        self.budget = budget
+
+        self._lock = threading.Lock()
+        # key -> LinearDisassembly
+        self._models = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def size(self):
+        """ approximate bytes held by the models, they grow while being looked at
+        """
+        with self._lock:
+            return sum(model.approximate_size for model in self._models.values())
 
-        self._num_instructions = num_instructions
-        self._max_instruction = 1024
+    def __contains__(self, model):
+        with self._lock:
+            return any(cached is model for cached in self._models.values())
 
-        self._counter = 0
-        self._instructions = []
+    @staticmethod
+    def key(arch, mode, base, data):
+        if hasattr(data, 'is_loaded'):
+            content = ('paged', data.writable)
+        else:
+            content = hashlib.blake2b(bytes(data), digest_size=16).digest()
+        return arch, mode, base, len(data), content
 
-        self._debug_symbols = []
-        self._debug_symbols_indexes = []
+    def get(self, key):
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                self.misses += 1
+                return None
+            self._models.move_to_end(key)
+            self.hits += 1
+            return model
 
-    def run(self):
-        if not self._capstone:
+    def put(self, key, model):
+        """ caches model, evicting the least recently used ones until the others fit in the budget
+        """
+        with self._lock:
+            self._models[key] = model
+            self._models.move_to_end(key)
+            size = sum(cached.approximate_size for cached in self._models.values())
+            evicted = []
+            while size > self.budget and len(self._models) > 1:
+                evicted.append(self._models.popitem(last=False)[1])
+                size -= evicted[-1].approximate_size
+            self.evictions += len(evicted)
+        # the one shown is the most recent, never evicted
+        for model in evicted:
+            model.close()
+
+    def invalidate(self, ptr=None, length=0, writable_only=False):
+        """ page cache listener: drops the models overlapping [ptr, ptr + length), everything when ptr is None.
+        the models dropped aren't closed, the view closes the one it shows when it moves away.
+        code isn't writable, nothing to do when only writable pages went away
+        """
+        if writable_only:
             return
+        with self._lock:
+            if ptr is None:
+                self._models.clear()
+                return
+            end = ptr + max(length, 1)
+            for key in [key for key, model in self._models.items() if model.base < end and ptr < model.end]:
+                del self._models[key]
 
-        for cap_inst in self._capstone.disasm(self._data[self._offset:], self._base + self._offset):
-            self._counter += 1
 
-            if 0 < self._num_instructions < self._counter:
-                break
+class LinearDisassembly(object):
+    """ Instructions of a whole range, decoded on demand around the lines being looked at
+
+        data is bytes like or a PagedMemory, only loaded bytes are decoded. going forward is a linear sweep,
+        going backward sweeps again from the closest resynchronisation point before the address: the start of
+        the range, a known function, a call target or an address jumped to. with none close enough, the sweep
+        restarts a few bytes earlier until it lands on the address. the longest bytes and mnemonic grow with
+        the instructions decoded
+    """
+    # decoded instructions kept, the least recently shown are dropped first
+    MAX_INSTRUCTIONS = 16384
+    # instruction -> previous one, found by the sweeps. cleared when full
+    MAX_LINKS = 65536
+    # farthest a resynchronisation point is used before the bytes swept backward
+    SYNC_DISTANCE = 4096
+    # bytes swept at least before the address, x86 decoding needs a few instructions to fall back in step
+    BACKOFF_WINDOW = 256
+    # starts tried, one byte apart, when there is no resynchronisation point
+    BACKOFF_TRIES = 16
+    # bytes swept to find the instruction covering an address without a resynchronisation point
+    ALIGN_WINDOW = 64
+    # rough bytes held by a decoded instruction and by a link between two, see approximate_size
+    INSTRUCTION_BYTES = 400
+    LINK_BYTES = 64
+
+    def __init__(self, dwarf, arch, mode, base, data, sync_points=()):
+        self.dwarf = dwarf
+        self.arch = arch
+        self.mode = mode
+        self.base = base
+        self.data = data
+        self.size = len(data)
+
+        # no details, the instructions decode the ones they need
+        self._capstone_lite = Cs(arch, mode)
+        self._capstone_lite.skipdata = True
+
+        if arch == CS_ARCH_X86:
+            self._alignment, self._max_size = 1, 15
+        elif arch == CS_ARCH_ARM and mode & CS_MODE_THUMB:
+            self._alignment, self._max_size = 2, 4
+        else:
+            self._alignment, self._max_size = 4, 4
+
+        # address -> Instruction
+        self._instructions = OrderedDict()
+        # address -> address of the instruction before
+        self._previous = {}
+        self._sync = [base]
+        for address in sync_points:
+            self.add_sync_point(address)
+        # branch targets whose symbol was asked already
+        self._requested = set()
+
+        self.longest_bytes = 0
+        self.longest_mnemonic = 0
+
+        if hasattr(data, 'pagesLoaded'):
+            # what was decoded there was cut by missing bytes, or the memory was reloaded
+            data.pagesLoaded.connect(self._on_pages_loaded)
+
+    @property
+    def end(self):
+        return self.base + self.size
+
+    def __contains__(self, address):
+        return self.base <= address < self.end
+
+    @property
+    def approximate_size(self):
+        """ bytes held by the instructions decoded, the links found and the bytes of the range loaded
+        """
+        if hasattr(self.data, 'loaded_size'):
+            data_size = self.data.loaded_size
+        else:
+            data_size = self.size
+        return len(self._instructions) * self.INSTRUCTION_BYTES + len(self._previous) * self.LINK_BYTES + data_size
+
+    def add_sync_point(self, address):
+        """ address is known to start an instruction
+        """
+        address = utils.parse_ptr(address)
+        if address in self:
+            index = bisect.bisect_left(self._sync, address)
+            if index == len(self._sync) or self._sync[index] != address:
+                self._sync.insert(index, address)
+
+    def _read(self, address, length):
+        """ loaded bytes from address on, at most length, and whether they stop before the end of the range
+        """
+        offset = address - self.base
+        length = max(0, min(length, self.size - offset))
+        loaded = length
+        if hasattr(self.data, 'is_loaded'):
+            chunk_size = self.data.CHUNK_SIZE
+            loaded = 0
+            while loaded < length:
+                step = min(length - loaded, chunk_size - (offset + loaded) % chunk_size)
+                if not self.data.is_loaded(offset + loaded, step):
+                    self.data.prefetch(offset + loaded, length - loaded)
+                    break
+                loaded += step
+        return bytes(self.data[offset:offset + loaded]), loaded < length
 
-            dwarf_instruction = Instruction(self._dwarf, cap_inst)
-            if dwarf_instruction.is_jump and dwarf_instruction.jump_address:
-                self._debug_symbols.append(dwarf_instruction.jump_address)
-                self._debug_symbols_indexes.append(str(len(self._instructions)))
-            elif dwarf_instruction.is_call and dwarf_instruction.call_address:
-                self._debug_symbols.append(dwarf_instruction.call_address)
-                self._debug_symbols_indexes.append(str(len(self._instructions)))
-
-            if self._num_instructions < 1:
-                if cap_inst.group(CS_GRP_RET) or cap_inst.group(ARM64_GRP_RET) or \
-                        self._counter > self._max_instruction:
+    def lines(self, address, count):
+        """ up to count instructions from address on, fewer at the end of the range or of the loaded bytes
+        """
+        ret = []
+        while len(ret) < count and address in self:
+            instruction = self._instructions.get(address)
+            if instruction is None:
+                decoded = self._decode(address, count - len(ret))
+                if not decoded:
                     break
+                ret.extend(decoded)
+                address = decoded[-1].address + decoded[-1].size
+                continue
+            self._instructions.move_to_end(address)
+            ret.append(instruction)
+            address += instruction.size
+        return ret
 
-            self._instructions.append(dwarf_instruction)
+    def _decode(self, address, count):
+        data, cut = self._read(address, count * self._max_size)
+        loaded_end = address + len(data)
 
-        if self._debug_symbols:
-            symbols = self._dwarf.dwarf_api('getDebugSymbols', json.dumps(self._debug_symbols))
-            if symbols:
-                for i in range(len(symbols)):
-                    symbol = symbols[i]
-                    instruction = self._instructions[int(self._debug_symbols_indexes[i])]
-                    instruction.symbol_name = symbol['name']
-                    instruction.symbol_module = '-'
-                    if 'moduleName' in symbol:
-                        instruction.symbol_module = symbol['moduleName']
+        ret = []
+        for lite in self._capstone_lite.disasm_lite(data, address, count):
+            # the last bytes loaded could be the head of a longer instruction
+            if cut and lite[0] + self._max_size > loaded_end:
+                break
+            offset = lite[0] - address
+            instruction = Instruction.from_lite(self.dwarf, lite, data[offset:offset + lite[1]],
+                                                arch=self.arch, mode=self.mode)
+            self._add(instruction)
+            ret.append(instruction)
+        return ret
+
+    def _add(self, instruction):
+        self._instructions[instruction.address] = instruction
+        while len(self._instructions) > self.MAX_INSTRUCTIONS:
+            self._instructions.popitem(last=False)
+        self._link(instruction.address, instruction.address + instruction.size)
+
+        if len(instruction.bytes) > self.longest_bytes:
+            self.longest_bytes = len(instruction.bytes)
+        if len(instruction.mnemonic) > self.longest_mnemonic:
+            self.longest_mnemonic = len(instruction.mnemonic)
+
+        if instruction.call_address:
+            self.add_sync_point(instruction.call_address)
+        target = instruction.jump_address or instruction.call_address
+        if target:
+            symbol = self.dwarf.symbols.resolve(target)
+            if symbol is not None:
+                instruction.symbol_name, instruction.symbol_module = symbol_text(symbol), symbol[1]
+
+    def _link(self, previous, address):
+        if len(self._previous) >= self.MAX_LINKS:
+            self._previous.clear()
+        self._previous[address] = previous
+
+    def _sweep(self, start, end):
+        """ starts of the instructions from start up to end and whether one of them starts on end.
+        nothing when the bytes aren't loaded yet
+        """
+        data, _ = self._read(start, end - start + self._max_size)
+        if len(data) < end - start:
+            return [], False
+        starts = []
+        position = start
+        for address, size, _, _ in self._capstone_lite.disasm_lite(data, start):
+            if address >= end:
+                return starts, address == end
+            starts.append(address)
+            position = address + size
+        return starts, position == end
+
+    def _starts_before(self, address, count):
+        """ starts of the instructions before address, count or more unless a resynchronisation point is closer
+        """
+        if self._alignment == self._max_size:
+            first = max(self.base, address - count * self._alignment)
+            return list(range(first, address, self._alignment))
+
+        window = max(self.base, address - max(count * self._max_size, self.BACKOFF_WINDOW))
+        candidates = []
+        index = bisect.bisect_left(self._sync, address) - 1
+        if index >= 0 and self._sync[index] >= window - self.SYNC_DISTANCE:
+            candidates.append(self._sync[index])
+        candidates.extend(range(window, min(window + self.BACKOFF_TRIES, address)))
+
+        fallback = None
+        for start in candidates:
+            starts, landed = self._sweep(start, address)
+            if not starts:
+                continue
+            if landed:
+                for previous, next_address in zip(starts, starts[1:] + [address]):
+                    self._link(previous, next_address)
+                return starts
+            if fallback is None:
+                fallback = starts
+        # no sweep lands on address, it's shown after the instruction overlapping it
+        return fallback or []
+
+    def previous(self, address, count):
+        """ address of the instruction count lines before address, or of the first one of the range
+        """
+        while count > 0 and address > self.base:
+            previous = self._previous.get(address)
+            if previous is not None:
+                address = previous
+                count -= 1
+                continue
+            starts = self._starts_before(address, count)
+            if not starts:
+                break
+            if len(starts) >= count:
+                return starts[-count]
+            count -= len(starts)
+            address = starts[0]
+        return address
 
-        self.onFinished.emit(self._instructions)
+    def align(self, address):
+        """ start of the instruction covering address
+        """
+        address = min(max(address, self.base), self.end - 1)
+        if self._alignment == self._max_size:
+            return address - (address - self.base) % self._alignment
+        if address in self._instructions or address in self._previous:
+            return address
+
+        index = bisect.bisect_right(self._sync, address) - 1
+        start = self._sync[index]
+        if start < address - self.SYNC_DISTANCE:
+            start = max(self.base, address - self.ALIGN_WINDOW)
+        starts, _ = self._sweep(start, address + 1)
+        return starts[-1] if starts else address
+
+    def missing_symbols(self, instructions):
+        """ branch targets of the instructions without a symbol, which weren't asked yet
+        """
+        ret = []
+        for instruction in instructions:
+            target = instruction.jump_address or instruction.call_address
+            if target and instruction.symbol_name is None and target not in self._requested:
+                self._requested.add(target)
+                ret.append(target)
+        return ret
+
+    def put_symbols(self, symbols, requested=()):
+        """ applies {target: symbol} of SymbolResolver.symbolize to the instructions decoded. the requested
+        targets left unanswered, the agent failed, are asked again by the next missing_symbols
+        """
+        for target in requested:
+            if target not in symbols:
+                self._requested.discard(target)
+        for instruction in self._instructions.values():
+            symbol = symbols.get(instruction.jump_address or instruction.call_address)
+            if symbol is not None:
+                instruction.symbol_name, instruction.symbol_module = symbol_text(symbol), symbol[1]
+
+    def _on_pages_loaded(self, offset, length):
+        self.invalidate(self.base + offset, length)
+
+    def close(self):
+        """ drops the instructions and the bytes loaded
+        """
+        self.invalidate()
+        if hasattr(self.data, 'pagesLoaded'):
+            self.data.pagesLoaded.disconnect(self._on_pages_loaded)
+            self.data.close()
+
+    def invalidate(self, address=None, length=0):
+        """ forgets what was decoded over [address, address + length), everything when address is None
+        """
+        if address is None:
+            self._instructions.clear()
+            self._previous.clear()
+            return
+        end = address + max(length, 1)
+        for key in [key for key, instruction in self._instructions.items()
+                    if key < end and address < key + instruction.size]:
+            del self._instructions[key]
+        for key in [key for key, previous in self._previous.items() if previous < end and address < key]:
+            del self._previous[key]
 
 
 class Disassembler:
@@ -79,8 +390,8 @@ class Disassembler:
 
         self.dwarf.onApplyContext.connect(self.on_arch_changed)
 
-        self._capstone = None
-        self._disasm_thread = None
+        self.cache = DisassemblyCache(budget=Prefs().get('dwarf_disassembly_cache_size', DisassemblyCache.BUDGET))
+        self.dwarf.io.cache.add_listener(self.cache.invalidate)
 
         self.capstone_arch = CS_ARCH_X86
         self.capstone_mode = CS_MODE_32
@@ -89,11 +400,35 @@ class Disassembler:
 
         self.on_arch_changed()
 
-    def disasm(self, base, data, offset, callback, num_instructions=0):
-        self._disasm_thread = DisassembleThread(
-            self.dwarf, self.capstone_arch, self.capstone_mode, base, data, offset, num_instructions=num_instructions)
-        self._disasm_thread.onFinished.connect(callback)
-        self._disasm_thread.start(QThread.HighestPriority)
+    def linear(self, base, data, sync_points=()):
+        """ LinearDisassembly of data, a PagedMemory or the bytes of [base, base + len(data)). the functions
+        known in its module are resynchronisation points. the one cached for the same range is given back,
+        data is then unused
+        """
+        key = DisassemblyCache.key(self.capstone_arch, self.capstone_mode, base, data)
+        model = self.cache.get(key)
+        if model is not None:
+            for address in sync_points:
+                model.add_sync_point(address)
+            return model
+
+        sync_points = list(sync_points)
+        module_info = self.dwarf.database.get_module_info(base)
+        if module_info is not None:
+            sync_points.extend(function.address for function in module_info.functions)
+        try:
+            model = LinearDisassembly(self.dwarf, self.capstone_arch, self.capstone_mode, base, data,
+                                      sync_points=sync_points)
+        except CsError:
+            return None
+        self.cache.put(key, model)
+        return model
+
+    def reset_cache(self):
+        """ drops what was cached, for a new target. follows the page cache of its io
+        """
+        self.cache.invalidate()
+        self.dwarf.io.cache.add_listener(self.cache.invalidate)
 
     def on_arch_changed(self):
         if self.dwarf.arch == 'arm64':
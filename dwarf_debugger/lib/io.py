@@ -1,28 +1,133 @@
-from PyQt5.QtCore import QThread, pyqtSignal
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
 from dwarf_debugger.lib import utils
+from dwarf_debugger.lib.rpc import ApiFuture
+from dwarf_debugger.lib.prefs import Prefs
 
 
-class Reader(QThread):
-    ioReaderFinish = pyqtSignal(list, name='ioReaderFinish')
+class PageCache(object):
+    """ LRU of fixed size memory pages, bounded by a byte budget
 
-    def __init__(self, io, ptr, length):
-        super().__init__()
+        pages are keyed by their address and remember if they belong to a writable range,
+        so that only those have to be dropped when the target runs again
+    """
+    PAGE_SIZE = 0x1000
+    # default budget, can be changed with the dwarf_memory_cache_size preference
+    BUDGET = 64 * 1024 * 1024
+
+    def __init__(self, budget=BUDGET, page_size=PAGE_SIZE):
+        self.page_size = page_size
+        self.budget = budget
+
+        self._lock = threading.Lock()
+        # page address -> [data, writable]
+        self._pages = OrderedDict()
+        self._size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._listeners = []
+
+    def add_listener(self, listener):
+        """ listener(ptr, length, writable_only) is called after invalidate, ptr is None when it dropped everything
+        """
+        self._listeners.append(listener)
+
+    def page_address(self, ptr):
+        return ptr - ptr % self.page_size
+
+    def get(self, first, last):
+        """ cached pages in [first, last], as {address: data}
+        """
+        ret = {}
+        with self._lock:
+            for address in range(first, last + 1, self.page_size):
+                page = self._pages.get(address)
+                if page is None:
+                    self.misses += 1
+                    continue
+                self.hits += 1
+                self._pages.move_to_end(address)
+                ret[address] = page[0]
+        return ret
 
+    def put(self, address, data, writable=True):
+        """ store data read at the page aligned address, split in pages. returns {address: data} of the pages
+        """
+        ret = {}
+        with self._lock:
+            for offset in range(0, len(data), self.page_size):
+                page_data = data[offset:offset + self.page_size]
+                ret[address + offset] = page_data
+                page = self._pages.pop(address + offset, None)
+                if page is not None:
+                    self._size -= len(page[0])
+                self._pages[address + offset] = [page_data, writable]
+                self._size += len(page_data)
+
+            while self._size > self.budget and self._pages:
+                _, page = self._pages.popitem(last=False)
+                self._size -= len(page[0])
+                self.evictions += 1
+        return ret
+
+    def invalidate(self, ptr=None, length=0, writable_only=False):
+        """ drop the pages overlapping [ptr, ptr + length), everything when ptr is None
+        """
+        with self._lock:
+            if ptr is None:
+                addresses = [address for address, page in self._pages.items() if page[1] or not writable_only]
+            else:
+                first = self.page_address(ptr)
+                last = self.page_address(ptr + max(length, 1) - 1)
+                addresses = [address for address in range(first, last + 1, self.page_size)
+                             if address in self._pages and (self._pages[address][1] or not writable_only)]
+            for address in addresses:
+                self._size -= len(self._pages.pop(address)[0])
+        for listener in self._listeners:
+            listener(ptr, length, writable_only)
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+            self._size = 0
+        for listener in self._listeners:
+            listener(None, 0, False)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'pages': len(self._pages),
+                'size': self._size,
+                'budget': self.budget
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = self.evictions = 0
+
+
+class Reader(object):
+    """ One read of [ptr, ptr + length) through the page cache of io, done on the calling thread
+    """
+
+    def __init__(self, io, ptr, length):
         self.io = io
         self.dwarf = io.dwarf
         self.ptr = ptr
         self.length = length
-
-    def run(self):
-        ptr = self.ptr
-        base = 0
-
-        if self.length > 0:
-            data = self.read_data()
-        else:
-            base, data = self.read_range_data()
-
-        self.ioReaderFinish.emit([ptr, data, base])
+        # (address, length) which couldn't be read by the last read_data, zero filled in its result
+        self.holes = []
 
     def read_range_data(self):
         data = bytes()
@@ -34,69 +139,386 @@ class Reader(QThread):
                     base = utils.parse_ptr(_range['base'])
                     self.ptr = base
                     self.length = _range['size']
-                    hex_base = hex(base)
-                    if hex_base in self.io.range_cache:
-                        data = self.io.range_cache[hex_base]
-                    else:
-                        data = self.read_data()
-                        if data:
-                            self.io.range_cache[hex_base] = data
+                    data = self.read_data(writable=_range['protection'][1] == 'w')
         except Exception as e:
             print('IO - failed to read data')
             raise e
         return base, data
 
-    def read_data(self):
-        if self.length > 1024 * 1024:
-            position = 0
-            next_size = 1024 * 1024
-            data = bytearray()
+    def read_data(self, writable=True):
+        """ read length bytes at ptr, going to the target only for the pages missing in the cache
+
+        writable tells if the range can change while the target runs. when unknown pages are
+        assumed to be writable and dropped on resume
+        """
+        self.holes = []
+        if self.length <= 0:
+            return bytes()
+
+        cache = self.io.cache
+        if self.length > cache.budget // 2:
+            # the pages would only push each other out, read straight into a single buffer
+            data = self._fetch(self.ptr, self.length)
+            return data if data is not None else bytes()
+
+        first = cache.page_address(self.ptr)
+        last = cache.page_address(self.ptr + self.length - 1)
+        pages = cache.get(first, last)
+
+        address = first
+        while address <= last:
+            if address in pages:
+                address += cache.page_size
+                continue
+
+            # read contiguous missing pages at once
+            run = address
+            while address <= last and address not in pages:
+                address += cache.page_size
+            holes = len(self.holes)
+            data = self._fetch(run, address - run)
+            if data is None:
+                data = bytes(address - run)
+            pages.update(cache.put(run, data, writable))
+            for hole_address, hole_length in self.holes[holes:]:
+                cache.invalidate(hole_address, hole_length)
+
+        if self.holes and self._unreadable() == self.length:
+            return bytes()
+
+        if first == last:
+            data = pages[first]
+        else:
+            data = b''.join([pages[address] for address in range(first, last + 1, cache.page_size)])
+        offset = self.ptr - first
+        return data[offset:offset + self.length]
+
+    def _unreadable(self):
+        end = self.ptr + self.length
+        return sum(max(0, min(end, address + length) - max(self.ptr, address)) for address, length in self.holes)
+
+    def _fetch(self, ptr, length):
+        """ bytes at [ptr, ptr + length), unreadable parts are zero filled and listed in self.holes
+        """
+        read = ChunkedRead(self.dwarf, ptr, length, workers=self.io.read_workers)
+        read.run()
+        self.holes.extend([(ptr + offset, length) for offset, length in read.holes])
+        if read.unreadable == length:
+            return None
+        return read.buffer
+
+
+class ChunkedRead(object):
+    """ Reads [ptr, ptr + length) straight into a preallocated buffer, keeping several readBytes in flight
+
+        the chunk size follows the measured round trips. chunks which can't be read are split down to pages
+        and what is left unreadable is zero filled and reported in holes as sorted (offset, length)
+    """
+    PAGE_SIZE = 0x1000
+    MIN_CHUNK = 256 * 1024
+    MAX_CHUNK = 8 * 1024 * 1024
+    # round trip aimed for, long enough to amortize the rpc overhead and short enough to keep all workers busy
+    TARGET_TIME = 0.05
+    # parts a failing chunk is split in
+    SPLIT = 16
+
+    def __init__(self, dwarf, ptr, length, workers=4, chunk_size=1024 * 1024):
+        self.dwarf = dwarf
+        self.ptr = ptr
+        self.length = length
+        self.workers = max(1, workers)
+        self.chunk_size = max(self.MIN_CHUNK, min(chunk_size, self.MAX_CHUNK))
+
+        self.buffer = bytearray(length)
+        self.view = memoryview(self.buffer)
+        self.holes = []
+
+        self._lock = threading.Condition()
+        self._position = 0
+        # failed chunks split in smaller parts, served before moving on
+        self._retry = []
+        self._in_flight = 0
+
+    @property
+    def unreadable(self):
+        return sum(length for _, length in self.holes)
+
+    def run(self):
+        workers = min(self.workers, -(-self.length // self.chunk_size))
+        if workers <= 1:
+            self._work()
+        else:
+            threads = [threading.Thread(target=self._work, name='dwarf-reader') for _ in range(workers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        holes = []
+        for offset, length in sorted(self.holes):
+            if holes and holes[-1][0] + holes[-1][1] == offset:
+                holes[-1] = (holes[-1][0], holes[-1][1] + length)
+            else:
+                holes.append((offset, length))
+        self.holes = holes
+        return self
+
+    def _next(self):
+        with self._lock:
             while True:
-                try:
-                    data += self.dwarf.dwarf_api('readBytes', [self.ptr + position, next_size])
-                except:
-                    return None
-                position += next_size
-                diff = self.length - position
-                if diff > 1024 * 1024:
-                    next_size = 1024 * 1024
-                elif diff > 0:
-                    next_size = diff
+                if self._retry:
+                    job = self._retry.pop()
+                elif self._position < self.length:
+                    size = min(self.chunk_size, self.length - self._position)
+                    job = (self._position, size)
+                    self._position += size
+                elif self._in_flight > 0:
+                    # a running chunk may still fail and be split
+                    self._lock.wait()
+                    continue
                 else:
-                    break
-            ret = bytes(data)
-            del data
-            return ret
-        else:
-            r = self.dwarf.dwarf_api('readBytes', [self.ptr, self.length])
-            if not r:
-                r = bytes()
-            return r
+                    return None
+                self._in_flight += 1
+                return job
+
+    def _work(self):
+        while True:
+            job = self._next()
+            if job is None:
+                return
+            try:
+                self._read(*job)
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                    self._lock.notify_all()
+
+    def _read(self, offset, length):
+        start = time.perf_counter()
+        data = self.dwarf.dwarf_api('readBytes', [self.ptr + offset, length])
+        if data and len(data) == length:
+            self.view[offset:offset + length] = data
+            self._tune(length, time.perf_counter() - start)
+            return
+
+        parts = self._split(offset, length)
+        with self._lock:
+            if parts is None:
+                self.holes.append((offset, length))
+            else:
+                # popped from the end, keep them in address order
+                self._retry.extend(reversed(parts))
+
+    def _split(self, offset, length):
+        """ page aligned parts of a chunk which failed, None when it's a page already
+        """
+        address = self.ptr + offset
+        first_page = address - address % self.PAGE_SIZE
+        pages = -(-(address + length - first_page) // self.PAGE_SIZE)
+        if pages <= 1:
+            return None
+
+        step = -(-pages // self.SPLIT) * self.PAGE_SIZE
+        parts = []
+        end = offset + length
+        boundary = first_page + step
+        while offset < end:
+            part_end = min(end, boundary - self.ptr)
+            parts.append((offset, part_end - offset))
+            offset = part_end
+            boundary += step
+        return parts
+
+    def _tune(self, length, elapsed):
+        if length < self.chunk_size:
+            return
+        with self._lock:
+            if elapsed < self.TARGET_TIME / 2 and self.chunk_size < self.MAX_CHUNK:
+                self.chunk_size *= 2
+            elif elapsed > self.TARGET_TIME * 2 and self.chunk_size > self.MIN_CHUNK:
+                self.chunk_size //= 2
+
+
+class Dumper(QThread):
+    """ Streams [ptr, ptr + length) to a file, chunk by chunk
+
+        progress goes to <file_path>.idx, a json sidecar also listing the (offset, length) which couldn't be read
+        (zero filled in the dump). an interrupted dump can be resumed from it, the sidecar is removed once
+        the dump is complete without holes
+    """
+    onProgress = pyqtSignal(int, int, float, name='onProgress')
+    onFinished = pyqtSignal(str, list, name='onFinished')
+    onError = pyqtSignal(str, name='onError')
+
+    CHUNK_SIZE = 8 * 1024 * 1024
+    INDEX_SUFFIX = '.idx'
+
+    def __init__(self, io, ptr, length, file_path, resume=False):
+        super().__init__()
+
+        self.io = io
+        self.dwarf = io.dwarf
+        self.ptr = ptr
+        self.length = length
+        self.file_path = file_path
+        self.index_path = file_path + Dumper.INDEX_SUFFIX
+        self.resume = resume
+
+        self.written = 0
+        self.holes = []
+        self.cancelled = False
+
+    @staticmethod
+    def read_index(file_path):
+        """ the sidecar of a dump, None if there is none
+        """
+        try:
+            with open(file_path + Dumper.INDEX_SUFFIX, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def can_resume(file_path, ptr, length):
+        index = Dumper.read_index(file_path)
+        return index is not None and not index['complete'] and index['base'] == hex(ptr) and \
+            index['length'] == length and os.path.exists(file_path)
+
+    def cancel(self):
+        """ stops after the chunk being read, what is written so far can be resumed
+        """
+        self.cancelled = True
+
+    def run(self):
+        mode = 'wb'
+        if self.resume and Dumper.can_resume(self.file_path, self.ptr, self.length):
+            index = Dumper.read_index(self.file_path)
+            self.written = min(index['written'], os.path.getsize(self.file_path))
+            self.holes = [tuple(hole) for hole in index['holes'] if hole[0] < self.written]
+            mode = 'r+b'
+
+        try:
+            with open(self.file_path, mode) as f:
+                f.truncate(self.written)
+                f.seek(self.written)
+
+                start = time.time()
+                resumed_from = self.written
+                while self.written < self.length and not self.cancelled:
+                    length = min(Dumper.CHUNK_SIZE, self.length - self.written)
+                    read = ChunkedRead(self.dwarf, self.ptr + self.written, length, workers=self.io.read_workers)
+                    read.run()
+                    f.write(read.view)
+                    self.holes.extend([(self.written + offset, hole) for offset, hole in read.holes])
+                    self.written += length
+
+                    self._save_index(complete=False)
+                    elapsed = time.time() - start
+                    self.onProgress.emit(self.written, self.length,
+                                         (self.written - resumed_from) / elapsed if elapsed > 0 else 0.0)
+
+            if self.cancelled:
+                return
+
+            if self.holes:
+                self._save_index(complete=True)
+            elif os.path.exists(self.index_path):
+                os.remove(self.index_path)
+        except OSError as e:
+            self.onError.emit('unable to dump to %s: %s' % (self.file_path, str(e)))
+            return
+
+        self.onFinished.emit(self.file_path, self.holes)
+
+    def _save_index(self, complete):
+        with open(self.index_path, 'w') as f:
+            json.dump({
+                'base': hex(self.ptr),
+                'length': self.length,
+                'written': self.written,
+                'complete': complete,
+                'holes': self.holes
+            }, f)
 
 
 class IO:
+    READ_WORKERS = 4
+
     def __init__(self, dwarf):
         self.dwarf = dwarf
         self.refs = {}
 
-        self.range_cache = {}
+        # range base -> _RangeRead, see read_range_async
+        self._range_reads = {}
+        self._range_reads_lock = threading.Lock()
+        # futures of the requests which joined a range read, kept alive until delivered
+        self._range_joiners = set()
+
+        prefs = Prefs()
+        self.cache = PageCache(budget=prefs.get('dwarf_memory_cache_size', PageCache.BUDGET))
+        # readBytes kept in flight by large reads
+        self.read_workers = prefs.get('dwarf_read_workers', IO.READ_WORKERS)
 
-        self.dwarf.onThreadResumed.connect(self.clear_cache)
+        self.dwarf.onThreadResumed.connect(self._on_thread_resumed)
+
+    def _on_thread_resumed(self):
+        # code and other read only pages are still good
+        self.cache.invalidate(writable_only=True)
 
     def clear_cache(self):
-        self.range_cache = {}
+        self.cache.clear()
+
+    def invalidate(self, ptr, length=1):
+        """ forget the cached pages overlapping [ptr, ptr + length), i.e. after writing to them
+        """
+        self.cache.invalidate(utils.parse_ptr(ptr), length)
+
+    def cached_read_size(self, extra=0):
+        """ largest page multiple which, read with extra bytes past it, still goes through the page cache
+        """
+        page_size = self.cache.page_size
+        return max(page_size, (self.cache.budget // 2 - extra) // page_size * page_size)
+
+    def cache_stats(self):
+        """ page cache counters: hits and misses are in pages, size and budget in bytes
+        """
+        return self.cache.stats()
 
-    def read(self, ptr, length):
+    def read(self, ptr, length, writable=True):
         ptr = utils.parse_ptr(ptr)
         reader = Reader(self, ptr, length)
-        return ptr, reader.read_data()
+        return ptr, reader.read_data(writable=writable)
 
-    def read_async(self, ptr, length, callback):
+    def read_sparse(self, ptr, length):
+        """ memoryview over length bytes at ptr and the sorted (offset, length) of the holes which couldn't be read.
+        holes are zero filled, nothing is copied once read
+        """
         ptr = utils.parse_ptr(ptr)
         reader = Reader(self, ptr, length)
-        reader.ioReaderFinish.connect(lambda x: self._on_io_reader_finish(x[0], x[1], callback))
-        self.refs[hex(ptr)] = reader
-        reader.start()
+        data = reader.read_data()
+        if len(data) != length:
+            return memoryview(bytes()), [(0, length)]
+        holes = [(max(address, ptr) - ptr, min(address + size, ptr + length) - max(address, ptr))
+                 for address, size in reader.holes]
+        return memoryview(data), sorted(hole for hole in holes if hole[1] > 0)
+
+    def dump(self, ptr, length, file_path, resume=False):
+        """ starts and returns a Dumper streaming [ptr, ptr + length) to file_path
+        """
+        ptr = utils.parse_ptr(ptr)
+        dumper = Dumper(self, ptr, length, file_path, resume=resume)
+        dumper.finished.connect(lambda: self.refs.pop(file_path, None))
+        self.refs[file_path] = dumper
+        dumper.start()
+        return dumper
+
+    def read_async(self, ptr, length, callback):
+        """ reads on the rpc workers, callback(ptr, data) is called on the calling thread
+        """
+        ptr = utils.parse_ptr(ptr)
+        # big reads on slow links can take longer than the rpc timeout
+        future = self.dwarf.run_async(self.read, ptr, length, name='readBytes', timeout=0)
+        future.finished.connect(lambda result: callback(*result))
+        return future
 
     def read_range(self, ptr):
         ptr = utils.parse_ptr(ptr)
@@ -105,21 +527,293 @@ class IO:
         return base, data, ptr - base
 
     def read_range_async(self, ptr, callback):
+        """ reads the range holding ptr on the rpc workers, callback(base, data, offset) is called on the calling thread.
+        data is None when the range can't be read or the read failed
+
+        requests falling in a range already being read share its data, each callback gets its own offset.
+        returns an ApiFuture resolved with (base, data, offset) either way
+        """
         ptr = utils.parse_ptr(ptr)
 
-        if hex(ptr) in self.refs:
-            # already reading this range
+        with self._range_reads_lock:
+            for read in self._range_reads.values():
+                if read.base <= ptr < read.base + read.size:
+                    # resolved by the worker reading the range
+                    future = ApiFuture('readRange', on_done=self._range_joiners.discard)
+                    self._range_joiners.add(future)
+                    read.waiters.append((ptr, future))
+                    break
+            else:
+                future = self.dwarf.run_async(self._read_range_shared, ptr, name='readRange', timeout=0)
+        future.finished.connect(lambda result: callback(*result))
+        future.failed.connect(lambda error: callback(0, None, ptr))
+        return future
+
+    def _read_range_shared(self, ptr):
+        """ (base, data, offset), the read is done once per range base whatever the number of requests
+        """
+        _range = self.dwarf.dwarf_api('getRange', ptr)
+        if not _range or _range['protection'][0] != 'r':
+            return 0, None, ptr
+
+        base = utils.parse_ptr(_range['base'])
+        with self._range_reads_lock:
+            read = self._range_reads.get(base)
+            owner = read is None
+            if owner:
+                read = self._range_reads[base] = _RangeRead(base, _range['size'])
+
+        if not owner:
+            # requested before the range was known, wait for the one already reading it
+            read.done.wait()
+            if read.error is not None:
+                raise Exception('failed to read range 0x%x' % base)
+            return base, read.data, ptr - base
+
+        error = None
+        try:
+            reader = Reader(self, base, _range['size'])
+            # None when nothing could be read, as for the ranges which aren't readable
+            read.data = reader.read_data(writable=_range['protection'][1] == 'w') or None
+        except Exception as e:
+            error = read.error = e
+            raise
+        finally:
+            with self._range_reads_lock:
+                del self._range_reads[base]
+            read.done.set()
+            # nobody can join anymore
+            for waiter_ptr, waiter in read.waiters:
+                if error is None:
+                    waiter.set_result((base, read.data, waiter_ptr - base))
+                else:
+                    waiter.set_error(error)
+        return base, read.data, ptr - base
+
+
+class _RangeRead(object):
+    """ a range being read by read_range_async
+    """
+    __slots__ = ('base', 'size', 'data', 'error', 'done', 'waiters')
+
+    def __init__(self, base, size):
+        self.base = base
+        self.size = size
+        self.data = None
+        self.error = None
+        self.done = threading.Event()
+        # (ptr, ApiFuture) which joined while reading
+        self.waiters = []
+
+
+class PagedMemory(QObject):
+    """ Bytes like view of a memory range which loads only the chunks being looked at
+
+        len() is the size of the whole range. indexing and slicing never block: chunks not loaded yet
+        read as zeros and get requested on the rpc workers, pagesLoaded(offset, length) is emitted once they arrive.
+        use is_loaded() to tell real data from placeholders
+    """
+    pagesLoaded = pyqtSignal(int, int, name='pagesLoaded')
+
+    CHUNK_SIZE = 64 * 1024
+    # chunks kept around, the least recently used are dropped first
+    MAX_CHUNKS = 256
+    # seconds before a chunk whose read failed is requested again
+    RETRY_DELAY = 1.0
+
+    def __init__(self, io, base, size, writable=True):
+        super(PagedMemory, self).__init__()
+        self._io = io
+        self._dwarf = io.dwarf
+        self.base = base
+        self.size = size
+        self.writable = writable
+
+        # chunk index -> bytearray, or None if the agent reported it unreadable
+        self._chunks = OrderedDict()
+        # chunk index -> ApiFuture
+        self._pending = {}
+        # chunk index -> time its read failed, asked again after RETRY_DELAY
+        self._failed = {}
+
+        self._dwarf.onThreadResumed.connect(self._on_thread_resumed)
+
+    def __len__(self):
+        return self.size
+
+    def __bool__(self):
+        return True
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(self.size)
+            if step != 1:
+                return bytes(self._read(start, stop - start))[::step]
+            return bytes(self._read(start, stop - start))
+
+        if item < 0:
+            item += self.size
+        if not 0 <= item < self.size:
+            raise IndexError('PagedMemory index out of range')
+        return self._read(item, 1)[0]
+
+    def _read(self, offset, length):
+        if length <= 0:
+            return bytearray()
+
+        ret = bytearray(length)
+        first = offset // self.CHUNK_SIZE
+        last = (offset + length - 1) // self.CHUNK_SIZE
+        for index in range(first, last + 1):
+            chunk = self._chunk(index)
+            if not chunk:
+                continue
+            chunk_start = index * self.CHUNK_SIZE
+            start = max(offset, chunk_start)
+            end = min(offset + length, chunk_start + len(chunk))
+            if start < end:
+                ret[start - offset:end - offset] = chunk[start - chunk_start:end - chunk_start]
+        return ret
+
+    def _chunk(self, index):
+        if index in self._chunks:
+            self._chunks.move_to_end(index)
+            return self._chunks[index]
+        self._request(index)
+        return None
+
+    @property
+    def loaded_size(self):
+        """ bytes of the chunks held
+        """
+        return sum(len(chunk) for chunk in self._chunks.values() if chunk)
+
+    def is_loaded(self, offset, length=1):
+        first = offset // self.CHUNK_SIZE
+        last = (offset + max(length, 1) - 1) // self.CHUNK_SIZE
+        for index in range(first, last + 1):
+            if not self._chunks.get(index):
+                return False
+        return True
+
+    def read(self, offset, length):
+        """ bytes of [offset, offset + length), the chunks not loaded yet are read now, blocking.
+        None when some of them can't be read
+        """
+        offset = max(0, offset)
+        length = min(length, self.size - offset)
+        if length <= 0:
+            return bytes()
+
+        ret = bytearray(length)
+        for index in range(offset // self.CHUNK_SIZE, (offset + length - 1) // self.CHUNK_SIZE + 1):
+            chunk_start = index * self.CHUNK_SIZE
+            chunk = self._chunks.get(index)
+            if not chunk:
+                try:
+                    _, data = self._io.read(self.base + chunk_start,
+                                            min(self.CHUNK_SIZE, self.size - chunk_start), self.writable)
+                except Exception:
+                    return None
+                if not data:
+                    return None
+                pending = self._pending.pop(index, None)
+                if pending is not None:
+                    pending.cancel()
+                self._failed.pop(index, None)
+                chunk = self._store(index, data)
+            start = max(offset, chunk_start)
+            end = min(offset + length, chunk_start + len(chunk))
+            ret[start - offset:end - offset] = chunk[start - chunk_start:end - chunk_start]
+        return bytes(ret)
+
+    def prefetch(self, offset, length):
+        """ request the chunks covering [offset, offset + length) which are not loaded yet
+        """
+        offset = max(0, offset)
+        length = min(length, self.size - offset)
+        if length <= 0:
             return
 
-        reader = Reader(self, ptr, 0)
-        reader.ioReaderFinish.connect(lambda x: self._on_io_reader_range_finish(x[0], x[1], x[2], callback))
-        self.refs[hex(ptr)] = reader
-        reader.start()
+        for index in range(offset // self.CHUNK_SIZE, (offset + length - 1) // self.CHUNK_SIZE + 1):
+            if index in self._chunks:
+                self._chunks.move_to_end(index)
+            else:
+                self._request(index)
+
+    def write(self, offset, data):
+        """ update the local copy after the memory has been written
+        """
+        for i, byte in enumerate(data):
+            chunk = self._chunks.get((offset + i) // self.CHUNK_SIZE)
+            if chunk:
+                chunk[(offset + i) % self.CHUNK_SIZE] = byte
+
+    def invalidate(self):
+        self._cancel_pending()
+        self._chunks.clear()
+        self._failed.clear()
+        self.pagesLoaded.emit(0, self.size)
+
+    def close(self):
+        self._cancel_pending()
+        self._chunks.clear()
+        self._failed.clear()
+        try:
+            self._dwarf.onThreadResumed.disconnect(self._on_thread_resumed)
+        except TypeError:
+            pass
+
+    def _request(self, index):
+        if index in self._pending:
+            return
+        failed = self._failed.get(index)
+        if failed is not None:
+            if time.monotonic() - failed < self.RETRY_DELAY:
+                return
+            del self._failed[index]
+
+        offset = index * self.CHUNK_SIZE
+        length = min(self.CHUNK_SIZE, self.size - offset)
+        if length <= 0:
+            return
+
+        future = self._dwarf.run_async(self._io.read, self.base + offset, length, self.writable,
+                                       name='readBytes')
+        future.finished.connect(lambda result, index=index: self._on_chunk(index, result))
+        future.failed.connect(lambda error, index=index: self._on_chunk_failed(index))
+        self._pending[index] = future
+
+    def _on_chunk(self, index, result):
+        if self._pending.pop(index, None) is None:
+            # dropped meanwhile
+            return
+
+        # an empty read is the agent telling the chunk can't be read
+        data = result[1] if result else None
+        self._store(index, data)
+
+    def _on_chunk_failed(self, index):
+        # the read itself failed, nothing is known about the chunk: not cached, asked again later
+        if self._pending.pop(index, None) is not None:
+            self._failed[index] = time.monotonic()
+
+    def _store(self, index, data):
+        chunk = self._chunks[index] = bytearray(data) if data else None
+        self._chunks.move_to_end(index)
+        while len(self._chunks) > self.MAX_CHUNKS:
+            self._chunks.popitem(last=False)
+
+        offset = index * self.CHUNK_SIZE
+        self.pagesLoaded.emit(offset, min(self.CHUNK_SIZE, self.size - offset))
+        return chunk
 
-    def _on_io_reader_finish(self, ptr, data, callback):
-        del self.refs[hex(ptr)]
-        callback(ptr, data)
+    def _cancel_pending(self):
+        pending = list(self._pending.values())
+        self._pending.clear()
+        for future in pending:
+            future.cancel()
 
-    def _on_io_reader_range_finish(self, ptr, data, base, callback):
-        del self.refs[hex(ptr)]
-        callback(base, data, ptr - base)
+    def _on_thread_resumed(self):
+        if self.writable:
+            self.invalidate()
@@ -0,0 +1,266 @@
+"""
+    Dwarf - Copyright (C) 2018-2022 Giovanni Rocca (iGio90)
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from dwarf_debugger.lib import utils
+
+
+def numpy_available():
+    return numpy is not None
+
+
+class ScanCancelled(Exception):
+    """ Exception
+    """
+
+
+class PointerIndex(object):
+    """ Reverse references of the scanned ranges: every aligned pointer sized value pointing into them,
+    sorted by value
+
+        the ranges are streamed CHUNK_SIZE bytes at a time, only the pointers found are kept
+    """
+    CHUNK_SIZE = 8 * 1024 * 1024
+
+    def __init__(self, pointer_size=8, max_offset=0):
+        if numpy is None:
+            raise ImportError('the pointer scanner needs numpy')
+
+        self.pointer_size = pointer_size
+        self.dtype = numpy.dtype('<u8' if pointer_size == 8 else '<u4')
+        # values up to max_offset before a range count as pointers into it, the chains add the offset
+        self.max_offset = max_offset
+        self.ranges = []
+        # where the pointers are, sorted by the value they hold
+        self.values = numpy.empty(0, dtype=numpy.uint64)
+        self.addresses = numpy.empty(0, dtype=numpy.uint64)
+
+        self.cancelled = False
+
+    def __len__(self):
+        return len(self.values)
+
+    def cancel(self):
+        self.cancelled = True
+
+    def build(self, read, ranges, targets=None, progress=None):
+        """ indexes the ranges [(base, size)] read with read(address, length) -> (data, holes),
+        IO.read_sparse or Snapshot.read_sparse. values pointing into the targets [(base, size)] are kept,
+        by default the ranges themselves. progress(done, total) is called after each chunk
+        """
+        self.cancelled = False
+        self.ranges = sorted((utils.parse_ptr(base), size) for base, size in ranges)
+        if targets is None:
+            targets = self.ranges
+        targets = sorted((utils.parse_ptr(base), size) for base, size in targets)
+        starts = numpy.array([base for base, _ in targets], dtype=numpy.uint64)
+        ends = numpy.array([base + size for base, size in targets], dtype=numpy.uint64)
+        # a value max_offset before a range can still reach it
+        max_offset = numpy.uint64(self.max_offset)
+        starts = numpy.maximum(starts, max_offset) - max_offset
+
+        total = sum(size for _, size in self.ranges)
+        done = 0
+        values = []
+        addresses = []
+        for base, size in self.ranges:
+            first = -base % self.pointer_size
+            for offset in range(first, size, self.CHUNK_SIZE):
+                if self.cancelled:
+                    raise ScanCancelled('scan cancelled')
+                length = min(self.CHUNK_SIZE, size - offset)
+                length -= length % self.pointer_size
+                if length <= 0:
+                    break
+                data, holes = read(base + offset, length)
+                chunk = numpy.frombuffer(data, dtype=self.dtype, count=length // self.pointer_size)
+                chunk = chunk.astype(numpy.uint64, copy=False)
+
+                # pointing into one of the ranges
+                index = numpy.searchsorted(starts, chunk, side='right') - 1
+                mask = (index >= 0) & (chunk < ends[numpy.maximum(index, 0)])
+                for hole, hole_length in holes:
+                    mask[hole // self.pointer_size:-(-(hole + hole_length) // self.pointer_size)] = False
+                positions = numpy.flatnonzero(mask)
+                values.append(chunk[positions])
+                addresses.append(numpy.uint64(base + offset) + positions.astype(numpy.uint64) * self.pointer_size)
+
+                done += length
+                if progress is not None:
+                    progress(done, total)
+
+        if values:
+            values = numpy.concatenate(values)
+            addresses = numpy.concatenate(addresses)
+            order = numpy.argsort(values, kind='stable')
+            self.values = values[order]
+            self.addresses = addresses[order]
+        return len(self)
+
+    def references(self, low, high):
+        """ (addresses, values) of the pointers holding a value in [low, high]
+        """
+        start = numpy.searchsorted(self.values, low, side='left')
+        end = numpy.searchsorted(self.values, high, side='right')
+        return self.addresses[start:end], self.values[start:end]
+
+
+class PointerScanner(object):
+    """ Pointer chains leading to an address or a range, found level by level on a PointerIndex
+
+        level 1 are the pointers at most max_offset before the target or into it, level n the ones at most
+        max_offset before a pointer of level n - 1. a pointer is kept at the first level it shows up, which breaks the cycles of lists
+        and trees. the chains starting in a module are the ones which survive a restart
+    """
+    # pointers kept per level, the next levels grow from these
+    MAX_LEVEL_SIZE = 1000000
+
+    def __init__(self, dwarf, index):
+        self.dwarf = dwarf
+        self.index = index
+        self.target = (0, 0)
+        # per level: addresses of the pointers, values and index of the pointer of the level below they reach
+        self.levels = []
+        self.truncated = False
+
+        self._modules_loaded = False
+
+    def scan(self, target, target_size=1, depth=1, max_offset=0):
+        """ finds the chains up to depth pointers long reaching [target, target + target_size),
+        returns the number of pointers found
+        """
+        target = utils.parse_ptr(target)
+        self.target = (target, max(1, target_size))
+        self.levels = []
+        self.truncated = False
+
+        low = numpy.array([target], dtype=numpy.uint64)
+        high = numpy.array([target + self.target[1] - 1], dtype=numpy.uint64)
+        seen = numpy.empty(0, dtype=numpy.uint64)
+        for _ in range(depth):
+            addresses, values, parents = self._references(low, high, max_offset)
+            if not len(addresses):
+                break
+
+            # first level a pointer shows up at only
+            addresses, first = numpy.unique(addresses, return_index=True)
+            values = values[first]
+            parents = parents[first]
+            if len(seen):
+                fresh = ~numpy.isin(addresses, seen, assume_unique=True)
+                addresses, values, parents = addresses[fresh], values[fresh], parents[fresh]
+                if not len(addresses):
+                    # only cycles back to the levels below
+                    break
+            if len(addresses) > self.MAX_LEVEL_SIZE:
+                addresses = addresses[:self.MAX_LEVEL_SIZE]
+                values = values[:self.MAX_LEVEL_SIZE]
+                parents = parents[:self.MAX_LEVEL_SIZE]
+                self.truncated = True
+
+            self.levels.append((addresses, values, parents))
+            seen = numpy.union1d(seen, addresses)
+            low = high = addresses
+        return sum(len(level[0]) for level in self.levels)
+
+    def _references(self, low, high, max_offset):
+        """ pointers holding a value in [low - max_offset, high] for any of the intervals,
+        with the index of the interval
+        """
+        values = self.index.values
+        max_offset = numpy.uint64(max_offset)
+        starts = numpy.searchsorted(values, numpy.maximum(low, max_offset) - max_offset, side='left')
+        ends = numpy.searchsorted(values, high, side='right')
+        counts = ends - starts
+        total = int(counts.sum())
+        if not total:
+            empty = numpy.empty(0, dtype=numpy.uint64)
+            return empty, empty, numpy.empty(0, dtype=numpy.int64)
+
+        parents = numpy.repeat(numpy.arange(len(low)), counts)
+        # position of each match in the index: start of its interval plus its rank in it
+        positions = numpy.arange(total) - numpy.repeat(numpy.cumsum(counts) - counts, counts) + starts[parents]
+        return self.index.addresses[positions], values[positions], parents
+
+    def _load_modules(self):
+        """ brings the modules of the database up to date
+        """
+        modules = self.dwarf.dwarf_api('enumerateModules')
+        if modules:
+            self.dwarf.database.sync_modules(modules)
+        self._modules_loaded = True
+
+    def _in_modules(self, addresses):
+        return self.dwarf.database.modules.indices(addresses) >= 0
+
+    def results(self, static_only=True, count=1000):
+        """ [(level, index)] of the chain heads, the ones in a module only when static_only.
+        shorter chains come first
+        """
+        if static_only and not self._modules_loaded:
+            self._load_modules()
+
+        ret = []
+        for level, (addresses, _, _) in enumerate(self.levels):
+            if static_only:
+                indices = numpy.flatnonzero(self._in_modules(addresses))
+            else:
+                indices = numpy.arange(len(addresses))
+            ret.extend((level, index) for index in indices[:count - len(ret)].tolist())
+            if len(ret) >= count:
+                break
+        return ret
+
+    def chain(self, level, index):
+        """ [(address, offset)] from the head at level to the pointer into the target: reading address
+        and adding offset gives the address of the next one, the last gives the target
+        """
+        ret = []
+        while level >= 0:
+            addresses, values, parents = self.levels[level]
+            address = int(addresses[index])
+            value = int(values[index])
+            parent = int(parents[index])
+            if level:
+                pointed = int(self.levels[level - 1][0][parent])
+            else:
+                pointed = self.target[0]
+            ret.append((address, pointed - value))
+            index = parent
+            level -= 1
+        return ret
+
+    def describe(self, level, index):
+        """ the chain as module+offset and the offsets added after each read: [[libc.so+0x1f00]+0x10]+0x8
+        """
+        chain = self.chain(level, index)
+        head = chain[0][0]
+        module_info = self.dwarf.database.get_module_info(head)
+        if module_info is not None:
+            text = '{0}+0x{1:x}'.format(module_info.name, head - module_info.base)
+        else:
+            text = '0x{0:x}'.format(head)
+        for _, offset in chain:
+            text = '[' + text + ']'
+            if offset > 0:
+                text += '+0x{0:x}'.format(offset)
+            elif offset < 0:
+                text += '-0x{0:x}'.format(-offset)
+        return text
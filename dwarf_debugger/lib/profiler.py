@@ -0,0 +1,269 @@
+"""
+    Dwarf - Copyright (C) 2018-2022 Giovanni Rocca (iGio90)
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+import json
+import threading
+import time
+from collections import deque
+
+
+def payload_size(payload):
+    """ rough size in bytes of what goes through the rpc channel
+    """
+    if payload is None:
+        return 0
+    if isinstance(payload, (bytes, bytearray, memoryview)):
+        return len(payload)
+    if isinstance(payload, str):
+        return len(payload)
+    try:
+        return len(json.dumps(payload, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+def percentile(sorted_samples, pct):
+    if not sorted_samples:
+        return 0.0
+    index = int(round(pct / 100.0 * (len(sorted_samples) - 1)))
+    return sorted_samples[index]
+
+
+class _ApiStats(object):
+    __slots__ = ('count', 'errors', 'total_time', 'max_time', 'samples', 'args_bytes', 'result_bytes')
+
+    def __init__(self, max_samples):
+        self.count = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        # latest latencies only, enough for the percentiles without growing forever
+        self.samples = deque(maxlen=max_samples)
+        self.args_bytes = 0
+        self.result_bytes = 0
+
+
+class _MessageStats(object):
+    __slots__ = ('count', 'bytes', 'handler_time', 'max_handler_time', 'queue_time', 'first', 'last')
+
+    def __init__(self):
+        self.count = 0
+        self.bytes = 0
+        self.handler_time = 0.0
+        self.max_handler_time = 0.0
+        # seconds between the frida thread queuing the message and the ui thread picking it up
+        self.queue_time = 0.0
+        self.first = 0.0
+        self.last = 0.0
+
+
+class RpcProfiler(object):
+    """ Collects api round trips and agent messages, see Dwarf.enable_profiling
+
+        record_* are called from the ui, frida and rpc worker threads
+    """
+    # latency samples kept per api
+    MAX_SAMPLES = 4096
+
+    def __init__(self, max_samples=MAX_SAMPLES):
+        self._max_samples = max_samples
+        self._lock = threading.Lock()
+        self._apis = {}
+        self._messages = {}
+        self._started = time.time()
+
+    def reset(self):
+        with self._lock:
+            self._apis = {}
+            self._messages = {}
+            self._started = time.time()
+
+    def record_api(self, api, elapsed, args, result, failed=False):
+        args_bytes = payload_size(args)
+        result_bytes = payload_size(result)
+        with self._lock:
+            stats = self._apis.get(api)
+            if stats is None:
+                stats = self._apis[api] = _ApiStats(self._max_samples)
+            stats.count += 1
+            if failed:
+                stats.errors += 1
+            stats.total_time += elapsed
+            if elapsed > stats.max_time:
+                stats.max_time = elapsed
+            stats.samples.append(elapsed)
+            stats.args_bytes += args_bytes
+            stats.result_bytes += result_bytes
+
+    def record_message(self, message_type, payload, data):
+        size = payload_size(payload) + payload_size(data)
+        now = time.time()
+        with self._lock:
+            stats = self._messages.get(message_type)
+            if stats is None:
+                stats = self._messages[message_type] = _MessageStats()
+                stats.first = now
+            stats.count += 1
+            stats.bytes += size
+            stats.last = now
+
+    def record_handler(self, message_type, elapsed, queued):
+        with self._lock:
+            stats = self._messages.get(message_type)
+            if stats is None:
+                # profiling got enabled while the message was in the queue
+                return
+            stats.handler_time += elapsed
+            if elapsed > stats.max_handler_time:
+                stats.max_handler_time = elapsed
+            stats.queue_time += queued
+
+    def report(self):
+        """ {'duration': seconds, 'apis': {api: {...}}, 'messages': {type: {...}}}
+
+        times are in milliseconds, sizes in bytes
+        """
+        with self._lock:
+            apis = {api: (stats.count, stats.errors, stats.total_time, stats.max_time,
+                          sorted(stats.samples), stats.args_bytes, stats.result_bytes)
+                    for api, stats in self._apis.items()}
+            messages = {message_type: (stats.count, stats.bytes, stats.handler_time, stats.max_handler_time,
+                                       stats.queue_time, stats.first, stats.last)
+                        for message_type, stats in self._messages.items()}
+            duration = time.time() - self._started
+
+        report = {'duration': duration, 'apis': {}, 'messages': {}}
+        for api, (count, errors, total, max_time, samples, args_bytes, result_bytes) in apis.items():
+            report['apis'][api] = {
+                'count': count,
+                'errors': errors,
+                'total': total * 1000,
+                'mean': total * 1000 / count,
+                'p50': percentile(samples, 50) * 1000,
+                'p95': percentile(samples, 95) * 1000,
+                'p99': percentile(samples, 99) * 1000,
+                'max': max_time * 1000,
+                'args_bytes': args_bytes,
+                'result_bytes': result_bytes
+            }
+        for message_type, (count, size, handler, max_handler, queued, first, last) in messages.items():
+            span = last - first
+            report['messages'][message_type] = {
+                'count': count,
+                'bytes': size,
+                # over the whole session when there is a single message
+                'rate': count / span if span > 0 else count / max(duration, 1e-6),
+                'handler': handler * 1000,
+                'handler_mean': handler * 1000 / count,
+                'handler_max': max_handler * 1000,
+                'queue_mean': queued * 1000 / count
+            }
+        return report
+
+    def dump(self, file_path):
+        with open(file_path, 'w') as f:
+            json.dump(self.report(), f, indent=2, sort_keys=True)
+
+
+def benchmark_api(dwarf, api, args=None, tid=0, calls=100):
+    """ seconds taken by calls dwarf_api(api, args, tid) in a row: {'calls', 'mean', 'p50', 'p95', 'max'}.
+    with tid of a breakpointed thread it measures the hand off to the thread parked in the agent api loop
+    """
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        dwarf.dwarf_api(api, args, tid=tid)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        'calls': calls,
+        'mean': sum(samples) / max(calls, 1),
+        'p50': percentile(samples, 50),
+        'p95': percentile(samples, 95),
+        'max': samples[-1] if samples else 0.0
+    }
+
+
+def save_messages(file_path, messages):
+    """ writes the [message, data] received from the agent, i.e. collected from Dwarf.onReceiveMessage
+    """
+    with open(file_path, 'w') as f:
+        json.dump([[message, data.hex() if data is not None else None] for message, data in messages], f)
+
+
+def load_messages(file_path):
+    with open(file_path, 'r') as f:
+        return [(message, bytes.fromhex(data) if data is not None else None) for message, data in json.load(f)]
+
+
+def _decode_legacy(message, version):
+    """ the envelope of a 'type:::json' message, parsed as the host did before the envelopes
+    """
+    payload = message['payload']
+    if isinstance(payload, str):
+        parts = payload.split(':::')
+        if len(parts) >= 2:
+            # the json could hold the delimiter, i.e. objc selectors
+            fields = json.loads(':::'.join(parts[1:]))
+            fields['v'] = version
+            fields['type'] = parts[0]
+            message['payload'] = fields
+    return message
+
+
+def _replay(dwarf, encoded, repeat, decode, dispatch):
+    size = sum(len(message) + (len(data) if data is not None else 0) for message, data in encoded)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for message, data in encoded:
+            message = decode(json.loads(message))
+            if dispatch:
+                dwarf._dispatch_message(message, data)
+    seconds = time.perf_counter() - start
+
+    count = len(encoded) * repeat
+    return {
+        'messages': count,
+        'bytes': size * repeat,
+        'seconds': seconds,
+        'rate': count / seconds if seconds > 0 else 0.0,
+        'bytes_rate': size * repeat / seconds if seconds > 0 else 0.0
+    }
+
+
+def benchmark_messages(dwarf, messages, repeat=50, rounds=3, dispatch=True):
+    """ replays the [message, data] received from the agent repeat times, through the json decoding done by frida
+    and the dwarf dispatch: {'legacy': {...}, 'envelope': {...}, 'speedup'}
+
+        legacy sends the same stream as the 'type:::json' strings used before the envelopes, split and parsed
+        again on the host. each gives {'messages', 'bytes', 'seconds', 'rate', 'bytes_rate'}, rates are per second,
+        the fastest of rounds runs taking turns. with dispatch the handlers run for real in both, replay on a dwarf
+        which isn't attached to anything. without, only the decoding is measured
+    """
+    version = dwarf.MESSAGE_VERSION
+    envelopes = [(json.dumps(message), data) for message, data in messages]
+    legacy = [(json.dumps(dwarf.legacy_message(message) if isinstance(message.get('payload'), dict) else message),
+               data) for message, data in messages]
+
+    ret = {}
+    for _ in range(max(1, rounds)):
+        for name, encoded, decode in (('legacy', legacy, lambda message: _decode_legacy(message, version)),
+                                      ('envelope', envelopes, lambda message: message)):
+            result = _replay(dwarf, encoded, repeat, decode, dispatch)
+            if name not in ret or result['seconds'] < ret[name]['seconds']:
+                ret[name] = result
+    ret['speedup'] = ret['envelope']['rate'] / ret['legacy']['rate'] if ret['legacy']['rate'] else 0.0
+    return ret
@@ -0,0 +1,118 @@
+"""
+    Dwarf - Copyright (C) 2018-2022 Giovanni Rocca (iGio90)
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+import threading
+
+from PyQt5.QtCore import QObject, QTimer, Qt, pyqtSignal
+
+PENDING = 0
+FINISHED = 1
+FAILED = 2
+CANCELLED = 3
+
+
+class ApiFuture(QObject):
+    """ Result of a call running on the rpc workers, see Dwarf.dwarf_api_async
+
+        finished(result) or failed(error) is emitted once, on the thread which created the future.
+        connecting right after the call is safe, delivery always goes through the event loop
+    """
+    finished = pyqtSignal(object, name='finished')
+    failed = pyqtSignal(str, name='failed')
+
+    # internal, hops from the worker to the thread owning the future
+    _completed = pyqtSignal(name='_completed')
+
+    def __init__(self, name, timeout=None, on_done=None):
+        super(ApiFuture, self).__init__()
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._state = PENDING
+        self._result = None
+        self._error = ''
+        # executor task, lets cancel() drop calls which did not start yet
+        self._task = None
+        self._on_done = on_done
+
+        self._completed.connect(self._deliver, Qt.QueuedConnection)
+
+        if timeout:
+            QTimer.singleShot(int(timeout * 1000), self._on_timeout)
+
+    def done(self):
+        return self._state != PENDING
+
+    def cancelled(self):
+        return self._state == CANCELLED
+
+    @property
+    def error(self):
+        return self._error
+
+    def result(self, timeout=None):
+        """ blocks until the call is over. returns None if it failed, got cancelled or timed out
+        """
+        self._done.wait(timeout)
+        if self._state == FINISHED:
+            return self._result
+        return None
+
+    def cancel(self):
+        """ the agent can't be interrupted: a running call keeps going but its result is dropped
+        """
+        if self._task is not None:
+            self._task.cancel()
+        if not self._resolve(CANCELLED, error='cancelled'):
+            return False
+        # nothing will be emitted, just let the owner forget about us
+        if self._on_done is not None:
+            self._on_done(self)
+        return True
+
+    def set_task(self, task):
+        self._task = task
+
+    def set_result(self, result):
+        if self._resolve(FINISHED, result=result):
+            self._completed.emit()
+
+    def set_error(self, error):
+        if self._resolve(FAILED, error=str(error)):
+            self._completed.emit()
+
+    def _resolve(self, state, result=None, error=''):
+        with self._lock:
+            if self._state != PENDING:
+                return False
+            self._state = state
+            self._result = result
+            self._error = error
+        self._done.set()
+        return True
+
+    def _on_timeout(self):
+        self.set_error('%s timed out' % self.name)
+
+    def _deliver(self):
+        if self._state == FINISHED:
+            self.finished.emit(self._result)
+        elif self._state == FAILED:
+            self.failed.emit(self._error)
+
+        if self._on_done is not None:
+            self._on_done(self)
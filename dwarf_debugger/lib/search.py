@@ -0,0 +1,327 @@
+"""
+    Dwarf - Copyright (C) 2018-2022 Giovanni Rocca (iGio90)
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+import binascii
+import json
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+from dwarf_debugger.lib import utils
+
+PATTERN_BYTES = 'bytes'
+# value and mask, the bits out of the mask match anything
+PATTERN_MASKED = 'masked'
+PATTERN_REGEX = 'regex'
+
+# prefixes of the patterns typed by the user, hex bytes or an utf8 string otherwise
+PATTERN_PREFIXES = ['re:', 'u16:', 'u16be:', 'str:']
+
+
+def aho_corasick_available():
+    return ahocorasick is not None
+
+
+def parse_pattern(text):
+    """ pattern spec of the text typed by the user:
+
+        de ad ?? ef      hex bytes, ?? or a ? nibble match anything
+        deadbeef:ffff00ff hex bytes and their mask
+        re:\\x7fELF..     regex over the bytes
+        u16:text         utf16 (little endian, u16be: for big endian) string
+        str:text         utf8 string, as well as any text which isn't hex
+    """
+    if text.startswith('re:'):
+        return PATTERN_REGEX, text[3:].encode('utf8')
+    if text.startswith('u16:'):
+        return PATTERN_BYTES, text[4:].encode('utf-16-le')
+    if text.startswith('u16be:'):
+        return PATTERN_BYTES, text[6:].encode('utf-16-be')
+    if text.startswith('str:'):
+        return PATTERN_BYTES, text[4:].encode('utf8')
+
+    hex_str = text.replace(' ', '')
+    mask_str = None
+    if ':' in hex_str:
+        hex_str, mask_str = hex_str.split(':', 1)
+    if not hex_str or len(hex_str) % 2 or re.fullmatch('[0-9a-fA-F?]+', hex_str) is None:
+        return PATTERN_BYTES, text.encode('utf8')
+
+    value = binascii.unhexlify(re.sub('[?]', '0', hex_str))
+    mask = bytes(0 if c == '?' else 0xf for c in hex_str)
+    mask = bytes((mask[i] << 4) | mask[i + 1] for i in range(0, len(mask), 2))
+    if mask_str is not None:
+        if len(mask_str) != len(hex_str):
+            raise ValueError('the mask must be as long as the pattern')
+        mask = bytes(a & b for a, b in zip(mask, binascii.unhexlify(mask_str)))
+    if all(b == 0xff for b in mask):
+        return PATTERN_BYTES, value
+    return PATTERN_MASKED, value, mask
+
+
+def split_patterns(text):
+    """ the patterns separated by ; in text, \\; for a literal ;
+    """
+    patterns = [part.replace('\\;', ';').strip() for part in re.split(r'(?<!\\);', text)]
+    return [pattern for pattern in patterns if pattern]
+
+
+def parse_patterns(text):
+    return [parse_pattern(pattern) for pattern in split_patterns(text)]
+
+
+def _masked_regex(value, mask):
+    ret = b''
+    for byte, byte_mask in zip(value, mask):
+        if byte_mask == 0xff:
+            ret += re.escape(bytes([byte]))
+        elif byte_mask == 0:
+            ret += b'.'
+        else:
+            accepted = bytes(b for b in range(256) if b & byte_mask == byte & byte_mask)
+            ret += b'[' + b''.join(re.escape(bytes([b])) for b in accepted) + b']'
+    return ret
+
+
+class PatternSet(object):
+    """ Patterns compiled for a single pass over the data
+
+        many byte strings go to an Aho-Corasick automaton when pyahocorasick is installed,
+        the other patterns are regexes. byte strings and masked patterns report overlapping matches,
+        regexes the ones of finditer
+    """
+    # below this many byte strings, searching them one by one is as fast as the automaton
+    AHO_CORASICK_MIN = 32
+    # longest regex match found across the boundaries of the jobs
+    REGEX_WINDOW = 256
+
+    def __init__(self, specs):
+        self.specs = [tuple(spec) for spec in specs]
+
+        # (index, compiled regex, length or 0 for the regexes)
+        self._regexes = []
+        self._automaton = None
+
+        literals = [(i, spec[1]) for i, spec in enumerate(self.specs) if spec[0] == PATTERN_BYTES and spec[1]]
+        if ahocorasick is not None and len(literals) >= PatternSet.AHO_CORASICK_MIN:
+            self._automaton = ahocorasick.Automaton()
+            for i, literal in literals:
+                self._automaton.add_word(literal.decode('latin-1'), (i, len(literal)))
+            self._automaton.make_automaton()
+        else:
+            for i, literal in literals:
+                self._regexes.append((i, re.compile(re.escape(literal)), len(literal)))
+
+        for i, spec in enumerate(self.specs):
+            if spec[0] == PATTERN_MASKED:
+                self._regexes.append((i, re.compile(_masked_regex(spec[1], spec[2]), re.DOTALL), len(spec[1])))
+            elif spec[0] == PATTERN_REGEX:
+                self._regexes.append((i, re.compile(spec[1], re.DOTALL), 0))
+
+        # bytes after the end of a job needed by the matches starting before it
+        lengths = [len(spec[1]) for spec in self.specs if spec[0] != PATTERN_REGEX]
+        if any(spec[0] == PATTERN_REGEX for spec in self.specs):
+            lengths.append(PatternSet.REGEX_WINDOW)
+        self.overlap = max(lengths + [1]) - 1
+
+    def search(self, data, start=0, end=None):
+        """ sorted (offset, pattern index, length) of the matches starting in data[start:end],
+        data can go on after end for the ones crossing it
+        """
+        if end is None:
+            end = len(data)
+        stop = min(len(data), end + self.overlap)
+
+        matches = []
+        if self._automaton is not None:
+            text = str(data[start:stop], 'latin-1')
+            for last, (index, length) in self._automaton.iter(text):
+                offset = start + last - length + 1
+                if offset < end:
+                    matches.append((offset, index, length))
+
+        for index, regex, length in self._regexes:
+            if length:
+                # search again right after each match, so that they can overlap
+                match = regex.search(data, start, stop)
+                while match is not None and match.start() < end:
+                    matches.append((match.start(), index, length))
+                    match = regex.search(data, match.start() + 1, stop)
+            else:
+                for match in regex.finditer(data, start, stop):
+                    if match.start() >= end:
+                        break
+                    matches.append((match.start(), index, match.end() - match.start()))
+
+        matches.sort()
+        return matches
+
+
+# PatternSet of the last specs searched by a pool worker
+_worker_patterns = None
+
+
+def _search_job(specs, data, start, end):
+    global _worker_patterns
+    if _worker_patterns is None or _worker_patterns.specs != specs:
+        _worker_patterns = PatternSet(specs)
+    return _worker_patterns.search(data, start, end)
+
+
+class HostSearch(object):
+    """ Pattern search over data already on the host: the memory read (and cached) by dwarf.io or a snapshot
+
+        inputs larger than POOL_THRESHOLD are split in JOB_SIZE jobs searched by a process pool
+    """
+    JOB_SIZE = 8 * 1024 * 1024
+    POOL_THRESHOLD = 32 * 1024 * 1024
+    # bytes read at once from the memory or the snapshot
+    READ_SIZE = 64 * 1024 * 1024
+
+    _pool = None
+    _pool_lock = threading.Lock()
+
+    def __init__(self, specs, workers=None):
+        self.patterns = PatternSet(specs)
+        self.workers = workers or os.cpu_count() or 1
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    @classmethod
+    def pool(cls, workers):
+        with cls._pool_lock:
+            if cls._pool is None:
+                # no fork, the ui and frida threads don't survive it
+                cls._pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            return cls._pool
+
+    def search(self, data, base=0, holes=()):
+        """ sorted (address, pattern index, length) of the matches in data, read at base.
+        matches overlapping the (offset, length) holes, zero filled by the reader, are dropped
+        """
+        length = len(data)
+        if length < HostSearch.POOL_THRESHOLD or self.workers < 2:
+            matches = self.patterns.search(data)
+        else:
+            overlap = self.patterns.overlap
+            pool = HostSearch.pool(self.workers)
+            futures = []
+            for start in range(0, length, HostSearch.JOB_SIZE):
+                end = min(start + HostSearch.JOB_SIZE, length)
+                job = bytes(data[start:min(end + overlap, length)])
+                futures.append((start, pool.submit(_search_job, self.patterns.specs, job, 0, end - start)))
+            matches = []
+            for start, future in futures:
+                matches.extend((start + offset, index, size) for offset, index, size in future.result())
+
+        if holes:
+            matches = [match for match in matches
+                       if not any(match[0] < hole + hole_length and hole < match[0] + match[2]
+                                  for hole, hole_length in holes)]
+        return [(base + offset, index, size) for offset, index, size in matches]
+
+    def search_ranges(self, read, ranges, on_matches=None, progress=None, limit=0, read_size=None):
+        """ searches the ranges [(base, size)] read with read(address, length) -> (data, holes)
+        in read_size pieces, READ_SIZE by default. calls on_matches(range index, matches) and
+        progress(range index, done, size) after each piece. returns the number of matches
+        """
+        self.cancelled = False
+        count = 0
+        overlap = self.patterns.overlap
+        read_size = read_size or HostSearch.READ_SIZE
+        for i, (base, size) in enumerate(ranges):
+            base = utils.parse_ptr(base)
+            for offset in range(0, size, read_size):
+                if self.cancelled:
+                    return count
+                length = min(read_size, size - offset)
+                data, holes = read(base + offset, min(length + overlap, size - offset))
+                matches = [match for match in self.search(data, base + offset, holes)
+                           if match[0] < base + offset + length]
+                if limit:
+                    matches = matches[:limit - count]
+                count += len(matches)
+                if matches and on_matches is not None:
+                    on_matches(i, matches)
+                if progress is not None:
+                    progress(i, offset + length, size)
+                if limit and count >= limit:
+                    return count
+        return count
+
+    def search_memory(self, io, ranges, on_matches=None, progress=None, limit=0):
+        """ search_ranges over the target memory, the pages in the io cache aren't read again.
+        the pieces are small enough to go through the cache
+        """
+        read_size = min(HostSearch.READ_SIZE, io.cached_read_size(self.patterns.overlap))
+        return self.search_ranges(io.read_sparse, ranges, on_matches=on_matches, progress=progress, limit=limit,
+                                  read_size=read_size)
+
+    def search_snapshot(self, snapshot, ranges=None, on_matches=None, progress=None, limit=0):
+        """ search_ranges over a Snapshot, all of its ranges when ranges is None
+        """
+        if ranges is None:
+            ranges = [(int(_range['base'], 16), _range['size']) for _range in snapshot.ranges]
+        return self.search_ranges(snapshot.read_sparse, ranges, on_matches=on_matches, progress=progress,
+                                  limit=limit)
+
+
+def frida_pattern(spec):
+    """ the spec as a Memory.scan pattern, None for the regexes
+    """
+    if spec[0] == PATTERN_BYTES:
+        return ' '.join('%02x' % b for b in spec[1])
+    if spec[0] == PATTERN_MASKED:
+        return ' '.join('%02x' % b for b in spec[1]) + ' : ' + ' '.join('%02x' % b for b in spec[2])
+    return None
+
+
+def benchmark(dwarf, ranges, specs, workers=None):
+    """ seconds taken by the agent memoryScanList (one call per pattern, capped at 100 matches by the agent)
+    and by HostSearch over the same ranges [(base, size)], with an empty and a warm io cache.
+    regexes have no agent counterpart and are left out
+    """
+    ret = {}
+    ranges = [(utils.parse_ptr(base), size) for base, size in ranges]
+    specs = [spec for spec in specs if frida_pattern(spec) is not None]
+
+    scan_ranges = json.dumps([{'start': hex(base), 'size': size} for base, size in ranges])
+    start = time.perf_counter()
+    for spec in specs:
+        dwarf.dwarf_api('memoryScanList', [scan_ranges, frida_pattern(spec)])
+    ret['agent'] = time.perf_counter() - start
+
+    host_search = HostSearch(specs, workers=workers)
+    dwarf.io.clear_cache()
+    start = time.perf_counter()
+    ret['matches'] = host_search.search_memory(dwarf.io, ranges)
+    ret['host'] = time.perf_counter() - start
+
+    # served by the cache as long as it can hold the ranges
+    start = time.perf_counter()
+    host_search.search_memory(dwarf.io, ranges)
+    ret['host_cached'] = time.perf_counter() - start
+    return ret
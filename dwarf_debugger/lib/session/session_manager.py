@@ -14,8 +14,6 @@
     You should have received a copy of the GNU General Public License
     along with this program.  If not, see <https://www.gnu.org/licenses/>
 """
-import json
-
 from PyQt5.QtCore import QObject, pyqtSignal
 
 from dwarf_debugger.lib.session.android_session import AndroidSession
@@ -100,33 +98,6 @@ class SessionManager(QObject):
         if self._session is not None:
             self.sessionStopped.emit()
 
-    def _get_session_restore_ptr(self, breakpoint):
-        module = breakpoint['debugSymbols']['moduleName']
-        if module is not None and module != '':
-            name = breakpoint['debugSymbols']['name']
-        else:
-            return 0
-        add = 0
-        if name.startswith('0x'):
-            if '+' in name:
-                p = name.split('+')
-                name = int(p[0], 16)
-                add = int(p[1], 16)
-
-            module = self._app_window.dwarf.dwarf_api('findModule', module)
-            if module is not None:
-                module = json.loads(module)
-                return int(module['base'], 16) + name + add
-        else:
-            if '+' in name:
-                p = name.split('+')
-                name = p[0]
-                add = int(p[1], 16)
-            ptr = self._app_window.dwarf.dwarf_api('findExport', [name, module])
-            if ptr is not None:
-                return int(ptr, 16) + add
-        return 0
-
     def restore_session(self):
         if self._restored_session_data is not None:
             # restore user script
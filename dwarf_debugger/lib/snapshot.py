@@ -0,0 +1,439 @@
+"""
+    Dwarf - Copyright (C) 2018-2022 Giovanni Rocca (iGio90)
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+from bisect import bisect_right
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from dwarf_debugger.lib import utils
+from dwarf_debugger.lib.io import ChunkedRead
+
+# container layout:
+#   header     magic, page size, index offset and length
+#   blobs      page contents, each distinct page stored once, zlib compressed when it pays off
+#   tables     little endian arrays: page -> blob id, blob offsets, lengths, flags and hashes
+#   index      json: process infos, ranges and where the tables are
+MAGIC = b'DWSNAP\x00\x01'
+HEADER = struct.Struct('<8sIIQQ')
+
+# page table entry of a page which couldn't be read
+NO_BLOB = 0xFFFFFFFF
+
+# blob flags
+BLOB_COMPRESSED = 1
+# the blob lives in the parent snapshot, its offset is the parent blob id
+BLOB_PARENT = 2
+
+HASH_SIZE = 16
+
+
+def page_hash(data):
+    return hashlib.blake2b(data, digest_size=HASH_SIZE).digest()
+
+
+def _le_array(typecode, values=None):
+    ret = array(typecode)
+    if values is not None:
+        ret.frombytes(values)
+        if sys.byteorder == 'big':
+            ret.byteswap()
+    return ret
+
+
+def _le_bytes(values):
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+class SnapshotWriter(object):
+    """ Builds a snapshot container, ranges are added one after the other
+
+        identical pages are stored once. with a parent snapshot, pages whose hash is found in it
+        are stored as a reference to the parent blob
+    """
+
+    def __init__(self, file_path, page_size=0x1000, parent=None, compress=False):
+        self.file_path = file_path
+        self.page_size = page_size
+        self.parent = parent
+        self.compress = compress
+
+        self.ranges = []
+        self._pages = _le_array('I')
+        self._blob_offsets = _le_array('Q')
+        self._blob_lengths = _le_array('I')
+        self._blob_flags = _le_array('I')
+        self._blob_hashes = bytearray()
+        # page hash -> blob id
+        self._blobs = {}
+
+        self.stats = {'pages': 0, 'unreadable': 0, 'stored': 0, 'deduplicated': 0, 'from_parent': 0, 'bytes': 0}
+
+        self._file = open(file_path, 'wb')
+        self._file.write(HEADER.pack(MAGIC, page_size, 0, 0, 0))
+
+    def begin_range(self, range_info):
+        """ range_info: base, size, protection and file as returned by enumerateRanges
+        """
+        entry = {
+            'base': hex(utils.parse_ptr(range_info['base'])),
+            'size': range_info['size'],
+            'protection': range_info['protection'],
+            'first_page': len(self._pages)
+        }
+        if range_info.get('file'):
+            entry['file'] = range_info['file']
+        self.ranges.append(entry)
+
+    def add_pages(self, data, holes=()):
+        """ data: page aligned chunk of the current range, holes: (offset, length) which couldn't be read
+        """
+        view = memoryview(data)
+        unreadable = set()
+        for offset, length in holes:
+            unreadable.update(range(offset // self.page_size, (offset + length - 1) // self.page_size + 1))
+
+        for index, offset in enumerate(range(0, len(view), self.page_size)):
+            self.stats['pages'] += 1
+            if index in unreadable:
+                self.stats['unreadable'] += 1
+                self._pages.append(NO_BLOB)
+                continue
+            self._pages.append(self._add_blob(view[offset:offset + self.page_size]))
+
+    def _add_blob(self, page):
+        digest = page_hash(page)
+        blob = self._blobs.get(digest)
+        if blob is not None:
+            self.stats['deduplicated'] += 1
+            return blob
+
+        blob = len(self._blob_offsets)
+        parent_blob = self.parent.find_blob(digest) if self.parent is not None else None
+        if parent_blob is not None:
+            self.stats['from_parent'] += 1
+            self._blob_offsets.append(parent_blob)
+            self._blob_lengths.append(len(page))
+            self._blob_flags.append(BLOB_PARENT)
+        else:
+            flags = 0
+            if self.compress:
+                compressed = zlib.compress(page, 1)
+                if len(compressed) < len(page):
+                    page = compressed
+                    flags |= BLOB_COMPRESSED
+            self.stats['stored'] += 1
+            self.stats['bytes'] += len(page)
+            self._blob_offsets.append(self._file.tell())
+            self._blob_lengths.append(len(page))
+            self._blob_flags.append(flags)
+            self._file.write(page)
+
+        self._blob_hashes += digest
+        self._blobs[digest] = blob
+        return blob
+
+    def close(self, info=None):
+        """ writes the tables and the index. info: anything to keep along with the snapshot (pid, arch...)
+        """
+        tables = {}
+        for name, data in (('pages', _le_bytes(self._pages)), ('blob_offsets', _le_bytes(self._blob_offsets)),
+                           ('blob_lengths', _le_bytes(self._blob_lengths)),
+                           ('blob_flags', _le_bytes(self._blob_flags)), ('blob_hashes', bytes(self._blob_hashes))):
+            # keep the arrays aligned, casting the mapped file needs it
+            self._file.write(bytes(-self._file.tell() % 8))
+            tables[name] = [self._file.tell(), len(data)]
+            self._file.write(data)
+
+        parent = None
+        if self.parent is not None:
+            parent = os.path.relpath(self.parent.file_path, os.path.dirname(os.path.abspath(self.file_path)))
+
+        index = json.dumps({
+            'version': 1,
+            'time': time.time(),
+            'info': info or {},
+            'parent': parent,
+            'ranges': self.ranges,
+            'tables': tables,
+            'stats': self.stats
+        }).encode('utf8')
+        index_offset = self._file.tell()
+        self._file.write(index)
+
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, self.page_size, 0, index_offset, len(index)))
+        self._file.close()
+
+    def abort(self):
+        self._file.close()
+        os.remove(self.file_path)
+
+
+class Snapshot(object):
+    """ Read access to a snapshot container, the file is mapped and uncompressed pages are served without copies
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._file = open(file_path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+
+        magic, self.page_size, _, index_offset, index_length = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError('%s is not a dwarf snapshot' % file_path)
+
+        index = json.loads(bytes(self._view[index_offset:index_offset + index_length]).decode('utf8'))
+        self.time = index['time']
+        self.info = index['info']
+        self.stats = index['stats']
+        self.ranges = index['ranges']
+        # enumerateRanges gives them sorted
+        self.ranges.sort(key=lambda _range: int(_range['base'], 16))
+        self._bases = [int(_range['base'], 16) for _range in self.ranges]
+
+        self._pages = self._table(index['tables']['pages'], 'I')
+        self._blob_offsets = self._table(index['tables']['blob_offsets'], 'Q')
+        self._blob_lengths = self._table(index['tables']['blob_lengths'], 'I')
+        self._blob_flags = self._table(index['tables']['blob_flags'], 'I')
+        offset, length = index['tables']['blob_hashes']
+        self._blob_hashes = self._view[offset:offset + length]
+        # built on the first lookup, only children need it
+        self._hash_index = None
+
+        self._parent_path = index['parent']
+        self._parent = None
+
+    def _table(self, location, typecode):
+        offset, length = location
+        if sys.byteorder == 'big':
+            return _le_array(typecode, self._view[offset:offset + length])
+        return self._view[offset:offset + length].cast(typecode)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if self._parent is not None:
+            self._parent.close()
+            self._parent = None
+        for name in ('_pages', '_blob_offsets', '_blob_lengths', '_blob_flags', '_blob_hashes', '_view'):
+            view = getattr(self, name, None)
+            if isinstance(view, memoryview):
+                view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            # pages handed out are still around, the mapping goes away with them
+            pass
+        self._file.close()
+
+    @property
+    def parent(self):
+        if self._parent is None and self._parent_path is not None:
+            self._parent = Snapshot(os.path.join(os.path.dirname(os.path.abspath(self.file_path)), self._parent_path))
+        return self._parent
+
+    def find_range(self, address):
+        """ index of the range holding address, or -1
+        """
+        i = bisect_right(self._bases, address) - 1
+        if i >= 0 and address < self._bases[i] + self.ranges[i]['size']:
+            return i
+        return -1
+
+    def find_blob(self, digest):
+        if self._hash_index is None:
+            hashes = self._blob_hashes
+            self._hash_index = {bytes(hashes[i:i + HASH_SIZE]): i // HASH_SIZE
+                                for i in range(0, len(hashes), HASH_SIZE)}
+        return self._hash_index.get(digest)
+
+    def blob(self, blob):
+        """ content of a blob, a memoryview into the mapped file unless compressed
+        """
+        flags = self._blob_flags[blob]
+        if flags & BLOB_PARENT:
+            return self.parent.blob(self._blob_offsets[blob])
+        offset = self._blob_offsets[blob]
+        data = self._view[offset:offset + self._blob_lengths[blob]]
+        if flags & BLOB_COMPRESSED:
+            return zlib.decompress(data)
+        return data
+
+    def _page_blob(self, address):
+        i = self.find_range(address)
+        if i < 0:
+            return None
+        _range = self.ranges[i]
+        return self._pages[_range['first_page'] + (address - self._bases[i]) // self.page_size]
+
+    def page(self, address):
+        """ content of the page holding address, None if it wasn't captured
+        """
+        blob = self._page_blob(address)
+        if blob is None or blob == NO_BLOB:
+            return None
+        return self.blob(blob)
+
+    def page_hash(self, address):
+        blob = self._page_blob(address)
+        if blob is None or blob == NO_BLOB:
+            return None
+        return bytes(self._blob_hashes[blob * HASH_SIZE:(blob + 1) * HASH_SIZE])
+
+    def pages(self):
+        """ (address, hash) of every captured page, hash is None for the unreadable ones
+        """
+        for i, _range in enumerate(self.ranges):
+            first = _range['first_page']
+            for page in range(_range['size'] // self.page_size):
+                blob = self._pages[first + page]
+                address = self._bases[i] + page * self.page_size
+                if blob == NO_BLOB:
+                    yield address, None
+                else:
+                    yield address, bytes(self._blob_hashes[blob * HASH_SIZE:(blob + 1) * HASH_SIZE])
+
+    def read(self, address, length):
+        """ bytes at address, pages not captured read as zeros. None if address isn't in any range
+        """
+        if self.find_range(address) < 0:
+            return None
+        return bytes(self.read_sparse(address, length)[0])
+
+    def read_sparse(self, address, length):
+        """ memoryview over length bytes at address and the sorted (offset, length) of the holes, like IO.read_sparse.
+        holes are the pages not captured, zero filled
+        """
+        ret = bytearray(length)
+        holes = []
+        position = 0
+        while position < length:
+            current = address + position
+            offset = current % self.page_size
+            size = min(self.page_size - offset, length - position)
+            page = self.page(current)
+            if page is not None:
+                ret[position:position + size] = page[offset:offset + size]
+            elif holes and holes[-1][0] + holes[-1][1] == position:
+                holes[-1] = (holes[-1][0], holes[-1][1] + size)
+            else:
+                holes.append((position, size))
+            position += size
+        return memoryview(ret), holes
+
+    def diff(self, other):
+        """ addresses of the pages whose content differs from other, including the ones only one of them has
+        """
+        other_pages = dict(other.pages())
+        changed = []
+        for address, digest in self.pages():
+            if other_pages.pop(address, False) != digest:
+                changed.append(address)
+        changed.extend(other_pages.keys())
+        return sorted(changed)
+
+
+class Snapshotter(QThread):
+    """ Captures all the readable ranges of the target into a snapshot container
+
+        with parent set (path of a previous snapshot) only pages not found in it are stored
+    """
+    onProgress = pyqtSignal(int, int, float, name='onProgress')
+    onFinished = pyqtSignal(str, dict, name='onFinished')
+    onError = pyqtSignal(str, name='onError')
+
+    CHUNK_SIZE = 8 * 1024 * 1024
+
+    def __init__(self, dwarf, file_path, parent=None, compress=False):
+        super().__init__()
+
+        self.dwarf = dwarf
+        self.file_path = file_path
+        self.parent_path = parent
+        self.compress = compress
+        self.cancelled = False
+
+    def cancel(self):
+        """ stops after the chunk being read, the partial snapshot is removed
+        """
+        self.cancelled = True
+
+    def run(self):
+        ranges = self.dwarf.dwarf_api('enumerateRanges')
+        if not ranges:
+            self.onError.emit('unable to enumerate the ranges')
+            return
+        ranges = [_range for _range in ranges if _range['protection'][0] == 'r']
+        total = sum(_range['size'] for _range in ranges)
+
+        try:
+            parent = Snapshot(self.parent_path) if self.parent_path else None
+            writer = SnapshotWriter(self.file_path, parent=parent, compress=self.compress)
+        except (OSError, ValueError) as e:
+            self.onError.emit('unable to snapshot to %s: %s' % (self.file_path, str(e)))
+            return
+
+        start = time.time()
+        done = 0
+        try:
+            for _range in ranges:
+                writer.begin_range(_range)
+                base = utils.parse_ptr(_range['base'])
+                for offset in range(0, _range['size'], Snapshotter.CHUNK_SIZE):
+                    if self.cancelled:
+                        writer.abort()
+                        return
+                    length = min(Snapshotter.CHUNK_SIZE, _range['size'] - offset)
+                    read = ChunkedRead(self.dwarf, base + offset, length, workers=self.dwarf.io.read_workers)
+                    read.run()
+                    writer.add_pages(read.view, read.holes)
+                    done += length
+                    elapsed = time.time() - start
+                    self.onProgress.emit(done, total, done / elapsed if elapsed > 0 else 0.0)
+
+            writer.close({
+                'pid': self.dwarf.pid,
+                'arch': self.dwarf.arch,
+                'platform': self.dwarf.platform,
+                'pointer_size': self.dwarf.pointer_size
+            })
+        except OSError as e:
+            writer.abort()
+            self.onError.emit('unable to snapshot to %s: %s' % (self.file_path, str(e)))
+            return
+        finally:
+            if parent is not None:
+                parent.close()
+
+        self.onFinished.emit(self.file_path, writer.stats)
@@ -0,0 +1,380 @@
+"""
+    Dwarf - Copyright (C) 2018-2022 Giovanni Rocca (iGio90)
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+import hashlib
+import json
+import os
+import re
+from array import array
+from pathlib import Path
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from dwarf_debugger.lib import utils
+from dwarf_debugger.lib.search import HostSearch
+
+ENCODING_ASCII = 0
+ENCODING_UTF16 = 1
+ENCODINGS = ['ascii', 'utf-16le']
+
+# printable ascii and tab
+_PRINTABLE = b'\\t\\x20-\\x7e'
+
+
+def _regexes(min_length):
+    return [
+        re.compile(b'[' + _PRINTABLE + b']{%d,}' % min_length),
+        re.compile(b'(?:[' + _PRINTABLE + b']\\x00){%d,}' % min_length)
+    ]
+
+
+if numpy is not None:
+    _PRINTABLE_TABLE = numpy.zeros(256, dtype=bool)
+    _PRINTABLE_TABLE[0x20:0x7f] = True
+    _PRINTABLE_TABLE[ord('\t')] = True
+
+
+def _runs(mask, min_length):
+    """ (starts, ends) of the runs of True in mask at least min_length long
+    """
+    edges = numpy.diff(numpy.concatenate(([False], mask, [False])).view(numpy.int8))
+    starts = numpy.flatnonzero(edges == 1)
+    ends = numpy.flatnonzero(edges == -1)
+    keep = ends - starts >= min_length
+    return starts[keep].tolist(), ends[keep].tolist()
+
+
+def _extract_numpy(data, min_length, encodings, start, end):
+    raw = numpy.frombuffer(data, dtype=numpy.uint8)[start:]
+    text = str(bytes(data[start:]), 'latin-1')
+    printable = _PRINTABLE_TABLE[raw]
+    limit = end - start
+
+    strings = []
+    if ENCODING_ASCII in encodings:
+        for run_start, run_end in zip(*_runs(printable, min_length)):
+            if run_start >= limit:
+                break
+            strings.append((start + run_start, ENCODING_ASCII, run_end - run_start, text[run_start:run_end]))
+    if ENCODING_UTF16 in encodings:
+        # a printable byte followed by a zero, the chars of each alignment are two bytes apart
+        chars = printable[:-1] & (raw[1:] == 0)
+        for alignment in (0, 1):
+            for run_start, run_end in zip(*_runs(chars[alignment::2], min_length)):
+                offset = alignment + run_start * 2
+                if offset >= limit:
+                    break
+                strings.append((start + offset, ENCODING_UTF16, run_end - run_start,
+                                text[offset:alignment + run_end * 2:2]))
+    return strings
+
+
+def _extract_regex(data, min_length, encodings, start, end):
+    regexes = _regexes(min_length)
+    strings = []
+    for encoding in encodings:
+        for match in regexes[encoding].finditer(data, start):
+            if match.start() >= end:
+                break
+            if encoding == ENCODING_ASCII:
+                text = match.group().decode('ascii')
+            else:
+                text = match.group().decode('utf-16-le')
+            strings.append((match.start(), encoding, len(text), text))
+    return strings
+
+
+def _looks_like_text(text):
+    """ heuristic dropping the printable runs which are most likely data: mostly symbols or a repeated char
+    """
+    alnum = sum(1 for c in text if c.isalnum() or c == ' ')
+    return alnum * 2 >= len(text) and len(set(text)) > 2
+
+
+def extract_strings(data, min_length=4, encodings=(ENCODING_ASCII, ENCODING_UTF16), heuristics=False,
+                    start=0, end=None):
+    """ sorted (offset, encoding, length in chars, text) of the strings starting in data[start:end]
+
+        the ones running past end are read up to their terminator. numpy, when installed, finds the runs
+        of printable chars several times faster than the regexes
+    """
+    if end is None:
+        end = len(data)
+    if numpy is not None:
+        strings = _extract_numpy(data, min_length, encodings, start, end)
+    else:
+        strings = _extract_regex(data, min_length, encodings, start, end)
+    if heuristics:
+        strings = [string for string in strings if _looks_like_text(string[3])]
+    strings.sort()
+    return strings
+
+
+def _extract_owned(data, start, end, min_length, encodings, heuristics):
+    """ extract_strings over data[start:end], dropping the tails of the strings starting before start:
+    the search begins two bytes earlier, where a string going on is matched and recognised
+    """
+    lead = min(2, start)
+    strings = extract_strings(data, min_length, encodings, heuristics, start=start - lead, end=end)
+    return [string for string in strings if string[0] >= start]
+
+
+def _byte_length(string):
+    return string[2] * 2 if string[1] == ENCODING_UTF16 else string[2]
+
+
+class StringTable(object):
+    """ Strings found in a range or a module, column arrays indexed by row
+
+        filter() narrows the previous result when the text typed grows, as it does while typing
+    """
+
+    def __init__(self, addresses=None, encodings=None, lengths=None, texts=None):
+        self.addresses = addresses if addresses is not None else array('Q')
+        self.encodings = encodings if encodings is not None else bytearray()
+        self.lengths = lengths if lengths is not None else array('I')
+        self.texts = texts if texts is not None else []
+
+        self._lower = None
+        self._filter = ''
+        self._filtered = None
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def row(self, index):
+        return self.addresses[index], ENCODINGS[self.encodings[index]], self.lengths[index], self.texts[index]
+
+    def extend(self, strings, base=0):
+        """ adds the (offset, encoding, length, text) found at base
+        """
+        for offset, encoding, length, text in strings:
+            self.addresses.append(base + offset)
+            self.encodings.append(encoding)
+            self.lengths.append(length)
+            self.texts.append(text)
+        self._lower = None
+        self._filter = ''
+        self._filtered = None
+
+    def rebase(self, delta):
+        """ moves the strings of a module loaded delta bytes away from the table
+        """
+        if delta:
+            self.addresses = array('Q', (address + delta for address in self.addresses))
+
+    def filter(self, text):
+        """ rows of the strings containing text, case insensitive. None when text is empty
+        """
+        text = text.lower()
+        if not text:
+            self._filter = ''
+            self._filtered = None
+            return None
+
+        if self._lower is None:
+            self._lower = [string.lower() for string in self.texts]
+        lower = self._lower
+        if self._filtered is not None and text.startswith(self._filter):
+            rows = array('I', (row for row in self._filtered if text in lower[row]))
+        else:
+            rows = array('I', (row for row, string in enumerate(lower) if text in string))
+        self._filter = text
+        self._filtered = rows
+        return rows
+
+    def save(self, file_path, base=0):
+        """ writes the table with the addresses relative to base
+        """
+        offsets = array('Q', (address - base for address in self.addresses))
+        header = json.dumps({'version': StringCache.VERSION, 'count': len(self)}).encode('utf8')
+        with open(file_path, 'wb') as f:
+            f.write(header + b'\n')
+            f.write(offsets.tobytes())
+            f.write(bytes(self.encodings))
+            f.write(self.lengths.tobytes())
+            f.write('\x00'.join(self.texts).encode('utf8'))
+
+    @staticmethod
+    def load(file_path, base=0):
+        """ the table saved at file_path moved to base, None when it can't be used
+        """
+        try:
+            with open(file_path, 'rb') as f:
+                header = json.loads(f.readline())
+                if header.get('version') != StringCache.VERSION:
+                    return None
+                count = header['count']
+                addresses = array('Q')
+                addresses.frombytes(f.read(count * addresses.itemsize))
+                encodings = bytearray(f.read(count))
+                lengths = array('I')
+                lengths.frombytes(f.read(count * lengths.itemsize))
+                texts = f.read().decode('utf8').split('\x00') if count else []
+        except (OSError, ValueError, KeyError):
+            return None
+        if len(texts) != count or len(lengths) != count:
+            return None
+        table = StringTable(addresses, encodings, lengths, texts)
+        table.rebase(base)
+        return table
+
+
+class StringCache(object):
+    """ Tables of the modules on disk, one file per module path, build and extraction options
+
+        the build is told by the hash of the first page of the module, its headers
+    """
+    VERSION = 1
+    HEADER_SIZE = 0x1000
+
+    def __init__(self, path=None):
+        if path is None:
+            path = str(Path.home()) + os.sep + '.dwarf' + os.sep + 'strings'
+        self.path = path
+
+    @staticmethod
+    def build_id(dwarf, base, size):
+        data, holes = dwarf.io.read_sparse(base, min(size, StringCache.HEADER_SIZE))
+        if holes and holes[0][0] == 0:
+            return None
+        return hashlib.sha1(bytes(data)).hexdigest() + '-%x' % size
+
+    def file_path(self, module_path, build, options):
+        key = json.dumps([module_path, build, options]).encode('utf8')
+        return os.path.join(self.path, hashlib.sha1(key).hexdigest() + '.dwstr')
+
+    def get(self, module_path, build, options, base):
+        file_path = self.file_path(module_path, build, options)
+        if not os.path.exists(file_path):
+            return None
+        return StringTable.load(file_path, base)
+
+    def put(self, module_path, build, options, base, table):
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            file_path = self.file_path(module_path, build, options)
+            table.save(file_path + '.tmp', base)
+            os.replace(file_path + '.tmp', file_path)
+        except OSError:
+            pass
+
+
+class StringExtractor(object):
+    """ Finds the ascii and utf-16le strings of ranges read on the host
+
+        inputs larger than POOL_THRESHOLD are split in JOB_SIZE jobs, extracted by the process pool of HostSearch.
+        the tables of the modules are cached with StringCache
+    """
+    JOB_SIZE = 8 * 1024 * 1024
+    POOL_THRESHOLD = 32 * 1024 * 1024
+    READ_SIZE = 64 * 1024 * 1024
+    # bytes after the end of a job or a read, strings running longer than this are cut
+    MAX_STRING = 64 * 1024
+
+    def __init__(self, min_length=4, encodings=(ENCODING_ASCII, ENCODING_UTF16), heuristics=False, workers=None,
+                 cache=None):
+        self.min_length = max(1, min_length)
+        self.encodings = tuple(encodings)
+        self.heuristics = heuristics
+        self.workers = workers or os.cpu_count() or 1
+        self.cache = cache if cache is not None else StringCache()
+        self.cancelled = False
+
+    @property
+    def options(self):
+        return [self.min_length, list(self.encodings), self.heuristics]
+
+    def cancel(self):
+        self.cancelled = True
+
+    def extract(self, data, start=0, end=None):
+        """ strings starting in data[start:end], which are not the tail of a string starting before start
+        """
+        if end is None:
+            end = len(data)
+        if end - start < StringExtractor.POOL_THRESHOLD or self.workers < 2:
+            return _extract_owned(data, start, end, self.min_length, self.encodings, self.heuristics)
+
+        pool = HostSearch.pool(self.workers)
+        futures = []
+        for job_start in range(start, end, StringExtractor.JOB_SIZE):
+            job_end = min(job_start + StringExtractor.JOB_SIZE, end)
+            lead = min(2, job_start)
+            job = bytes(data[job_start - lead:min(job_end + StringExtractor.MAX_STRING, len(data))])
+            futures.append((job_start - lead, pool.submit(
+                _extract_owned, job, lead, lead + job_end - job_start,
+                self.min_length, self.encodings, self.heuristics)))
+        strings = []
+        for offset, future in futures:
+            strings.extend((offset + string[0],) + string[1:] for string in future.result())
+        return strings
+
+    def extract_ranges(self, read, ranges, progress=None, table=None, read_size=None):
+        """ StringTable of the ranges [(base, size)] read with read(address, length) -> (data, holes)
+        in read_size pieces, READ_SIZE by default. calls progress(done, total) after each piece
+        """
+        self.cancelled = False
+        if table is None:
+            table = StringTable()
+        read_size = read_size or StringExtractor.READ_SIZE
+        total = sum(size for _, size in ranges)
+        done = 0
+        for base, size in ranges:
+            base = utils.parse_ptr(base)
+            for offset in range(0, size, read_size):
+                if self.cancelled:
+                    return table
+                length = min(read_size, size - offset)
+                # the two bytes before the piece and the ones needed to end the strings crossing it
+                before = min(2, offset)
+                data, holes = read(base + offset - before,
+                                   min(before + length + StringExtractor.MAX_STRING, size - offset + before))
+                strings = self.extract(data, before, before + length)
+                if holes:
+                    strings = [string for string in strings if not any(
+                        string[0] < hole + hole_length and hole < string[0] + _byte_length(string)
+                        for hole, hole_length in holes)]
+                table.extend(strings, base + offset - before)
+                done += length
+                if progress is not None:
+                    progress(done, total)
+        return table
+
+    def extract_memory(self, io, ranges, progress=None):
+        # small enough pieces to go through the io cache, with the 2 bytes before and the string tail
+        read_size = min(StringExtractor.READ_SIZE, io.cached_read_size(2 + StringExtractor.MAX_STRING))
+        return self.extract_ranges(io.read_sparse, ranges, progress=progress, read_size=read_size)
+
+    def extract_module(self, dwarf, module_path, base, size, progress=None):
+        """ StringTable of the module loaded at base, from the cache when the same build was extracted before.
+        returns (table, cached)
+        """
+        base = utils.parse_ptr(base)
+        build = StringCache.build_id(dwarf, base, size) if module_path else None
+        if build is not None:
+            table = self.cache.get(module_path, build, self.options, base)
+            if table is not None:
+                return table, True
+
+        table = self.extract_memory(dwarf.io, [(base, size)], progress=progress)
+        if build is not None and not self.cancelled:
+            self.cache.put(module_path, build, self.options, base, table)
+        return table, False
+
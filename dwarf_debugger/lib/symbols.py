@@ -0,0 +1,186 @@
+"""
+    Dwarf - Copyright (C) 2018-2022 Giovanni Rocca (iGio90)
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+import bisect
+import json
+import sys
+import threading
+from array import array
+
+from dwarf_debugger.lib import utils
+
+
+def symbol_text(symbol):
+    """ name+0x10 of a (name, module name, offset) symbol
+    """
+    name, _, offset = symbol
+    if offset:
+        return '{0}+0x{1:x}'.format(name, offset)
+    return name
+
+
+class ModuleSymbols(object):
+    """ Exports and symbols of a module sorted by address, the names are interned
+    """
+    __slots__ = ('name', 'base', 'end', 'addresses', 'names')
+
+    def __init__(self, module_info):
+        self.name = sys.intern(module_info.name)
+        self.base = module_info.base
+        self.end = module_info.base + module_info.size
+
+        symbols = {}
+        # symbols first, the exports override them: they have the names people know
+        for symbol in list(module_info.symbols) + list(module_info.exports):
+            name = symbol.get('name')
+            address = symbol.get('address')
+            if name and address:
+                symbols[int(address, 16) if isinstance(address, str) else utils.parse_ptr(address)] = name
+        addresses = sorted(address for address in symbols if self.base <= address < self.end)
+        self.addresses = array('Q', addresses)
+        self.names = [sys.intern(symbols[address]) for address in addresses]
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def lookup(self, address):
+        """ (name, offset) of the closest symbol at or before address
+        """
+        index = bisect.bisect_right(self.addresses, address) - 1
+        if index < 0:
+            return None
+        return self.names[index], address - self.addresses[index]
+
+
+class SymbolResolver(object):
+    """ Symbols of addresses, resolved on the host from the exports and symbols of the modules in the database
+
+        symbols are (name, module name, offset) tuples. each module gets its own sorted addresses, searched with
+        bisect. the addresses the host can't resolve (out of the modules known, or in a module whose symbols
+        weren't enumerated) are asked to the agent in one getDebugSymbols batch and remembered, the symbols of those modules
+        are loaded meanwhile
+    """
+    # answers of the agent kept, cleared when full
+    MAX_REMOTE = 65536
+
+    def __init__(self, dwarf):
+        self.dwarf = dwarf
+
+        self._lock = threading.Lock()
+        # module base -> (ModuleInfo, number of exports and symbols, ModuleSymbols)
+        self._symbols = {}
+        # address -> symbol or None, answered by the agent
+        self._remote = {}
+        # bases of the modules whose symbols were asked to the agent
+        self._loading = set()
+
+    def reset(self):
+        """ forgets everything, for a new target
+        """
+        with self._lock:
+            self._symbols.clear()
+            self._remote.clear()
+            self._loading.clear()
+
+    def _module_symbols(self, module_info):
+        key = (len(module_info.exports), len(module_info.symbols))
+        cached = self._symbols.get(module_info.base)
+        if cached is None or cached[0] is not module_info or cached[1] != key:
+            cached = self._symbols[module_info.base] = (module_info, key, ModuleSymbols(module_info))
+        return cached[2]
+
+    def _resolve(self, address, module_info):
+        """ (known, symbol) of address in module_info: known is False when the agent has to be asked
+        """
+        with self._lock:
+            if address in self._remote:
+                return True, self._remote[address]
+            if module_info is None:
+                return False, None
+            if not module_info.have_details and not module_info.symbols:
+                # exports only, the closest one could be far from the real symbol
+                return False, None
+            symbols = self._module_symbols(module_info)
+        if not len(symbols):
+            return False, None
+
+        found = symbols.lookup(address)
+        if found is None:
+            return True, None
+        return True, (found[0], symbols.name, found[1])
+
+    def resolve(self, address):
+        """ symbol of address if the host knows it, None otherwise
+        """
+        address = utils.parse_ptr(address)
+        return self._resolve(address, self.dwarf.database.get_module_info(address))[1]
+
+    def symbolize(self, addresses, callback=None):
+        """ {address: symbol} of the addresses, symbol is None when there isn't one.
+
+            the ones the host can't resolve are asked to the agent in one batch: without callback the call
+            blocks for them, i.e. on a worker thread. with callback they are left out and callback({address: symbol})
+            is called with them once the agent answered, with {} when the agent failed
+        """
+        ret = {}
+        missing = []
+        addresses = [utils.parse_ptr(address) for address in addresses]
+        for address, module_info in zip(addresses, self.dwarf.database.get_modules_info(addresses)):
+            known, symbol = self._resolve(address, module_info)
+            if known:
+                ret[address] = symbol
+                continue
+            missing.append(address)
+            if module_info is not None and callback is not None:
+                self._load_symbols(module_info)
+
+        missing = list(dict.fromkeys(missing))
+        if missing:
+            if callback is None:
+                ret.update(self._remember(missing, self.dwarf.dwarf_api('getDebugSymbols', json.dumps(missing))))
+            else:
+                future = self.dwarf.dwarf_api_async('getDebugSymbols', json.dumps(missing))
+                future.finished.connect(lambda symbols: callback(self._remember(missing, symbols)))
+                # the caller gets an answer either way, the misses are asked again next time
+                future.failed.connect(lambda error: callback({}))
+        return ret
+
+    def _remember(self, addresses, symbols):
+        ret = {}
+        if not isinstance(symbols, list):
+            return ret
+        for address, symbol in zip(addresses, symbols):
+            if symbol and symbol.get('name'):
+                ret[address] = (sys.intern(symbol['name']), sys.intern(symbol.get('moduleName') or '-'), 0)
+            else:
+                ret[address] = None
+        with self._lock:
+            if len(self._remote) + len(ret) > self.MAX_REMOTE:
+                self._remote.clear()
+            self._remote.update(ret)
+        return ret
+
+    def _load_symbols(self, module_info):
+        """ asks the exports and symbols of a module once
+        """
+        with self._lock:
+            if module_info.base in self._loading:
+                return
+            self._loading.add(module_info.base)
+
+        future = self.dwarf.dwarf_api_async('enumerateModuleInfo', module_info.name)
+        future.finished.connect(
+            lambda details: module_info.update_details(self.dwarf, {'name': module_info.name}, details=details))
@@ -14,62 +14,187 @@
     You should have received a copy of the GNU General Public License
     along with this program.  If not, see <https://www.gnu.org/licenses/>
 """
-from capstone import CS_GRP_CALL, CS_GRP_JUMP, CS_OP_IMM, CS_OP_REG, CS_OP_MEM
-from capstone.arm_const import ARM_GRP_THUMB, ARM_GRP_THUMB2, ARM_GRP_THUMB1ONLY, ARM_GRP_THUMB2DSP
+import sys
+import threading
+from collections import OrderedDict
+
+from capstone import (Cs, CS_ARCH_ARM, CS_ARCH_ARM64, CS_ARCH_X86, CS_MODE_THUMB, CS_GRP_CALL, CS_GRP_JUMP,
+                      CS_OP_IMM, CS_OP_REG, CS_OP_MEM)
 
 EXCHANGE_INSTRUCTION_SET = ['bx', 'blx']
 
+# what a call or a jump can start with, the others are never decoded with details
+BRANCH_PREFIXES = {
+    CS_ARCH_X86: ('j', 'call', 'lcall', 'ljmp', 'xbegin'),
+    CS_ARCH_ARM: ('b', 'cb', 'tb'),
+    CS_ARCH_ARM64: ('b', 'cb', 'tb')
+}
+# mnemonic of the bytes skipped as data
+DATA_MNEMONIC = '.byte'
+ARM_CONDITIONS = ('eq', 'ne', 'hs', 'lo', 'mi', 'pl', 'vs', 'vc', 'hi', 'ls', 'ge', 'lt', 'gt', 'le', 'al')
+
+# details decoded last, kept per thread with the capstone of each (arch, mode)
+DETAILS_CACHE_SIZE = 1024
+_details = threading.local()
+
+
+def _decode_details(arch, mode, address, data):
+    """ capstone instruction with details at address, from its bytes
+    """
+    if not hasattr(_details, 'cache'):
+        _details.cache = OrderedDict()
+        _details.capstones = {}
+    key = (arch, mode, address, data)
+    if key in _details.cache:
+        _details.cache.move_to_end(key)
+        return _details.cache[key]
+
+    capstone = _details.capstones.get((arch, mode))
+    if capstone is None:
+        capstone = _details.capstones[(arch, mode)] = Cs(arch, mode)
+        capstone.detail = True
+    instruction = next(capstone.disasm(data, address, 1), None)
+    _details.cache[key] = instruction
+    while len(_details.cache) > DETAILS_CACHE_SIZE:
+        _details.cache.popitem(last=False)
+    return instruction
+
+
+def is_branch_candidate(arch, mnemonic):
+    """ False when the mnemonic can't be a call or a jump, True when the details have to tell
+    """
+    prefixes = BRANCH_PREFIXES.get(arch)
+    if prefixes is None:
+        return True
+    # bnd jmp, notrack call
+    return mnemonic.rsplit(' ', 1)[-1].startswith(prefixes)
+
+
+def direct_branch(arch, mnemonic, op_str):
+    """ (is_call, is_jump, target) of a call or a jump to an immediate told from its text, None when the details
+    have to tell: other operands, or a mnemonic which could be anything. arm calls are jumps too, like for capstone
+    """
+    name = mnemonic.rsplit(' ', 1)[-1]
+    if arch == CS_ARCH_X86:
+        if name == 'call':
+            is_call, is_jump = True, False
+        elif name[0] == 'j':
+            is_call, is_jump = False, True
+        else:
+            return None
+    elif arch in (CS_ARCH_ARM, CS_ARCH_ARM64):
+        if not op_str.startswith('#'):
+            return None
+        op_str = op_str[1:]
+        # b.w, bne.n, b.eq
+        name = name.split('.', 1)[0]
+        if name in ('bl', 'blx') or (len(name) in (4, 5) and name[:-2] in ('bl', 'blx') and
+                                     name[-2:] in ARM_CONDITIONS):
+            is_call, is_jump = True, True
+        elif name == 'b' or (len(name) == 3 and name[1:] in ARM_CONDITIONS):
+            is_call, is_jump = False, True
+        else:
+            return None
+    else:
+        return None
+    try:
+        return is_call, is_jump, int(op_str, 0)
+    except ValueError:
+        return None
+
 
 class Instruction(object):
-    def __init__(self, dwarf, instruction, context=None):
+    """ A decoded instruction: address, bytes, mnemonic, op string and branch target
+
+        the capstone details (groups, operands, implicit regs) aren't kept. they are decoded from the bytes for
+        the instructions whose mnemonic could be a call or a jump, and for the others when asked for.
+        the last ones are cached
+    """
+    __slots__ = ('_id', 'address', 'size', 'bytes', 'op_str', 'mnemonic', 'arch', 'mode', 'is_data', 'thumb',
+                 'is_call', 'is_jump', 'call_address', 'jump_address', 'should_change_arm_instruction_set',
+                 'symbol_name', 'symbol_module', 'string')
+
+    def __init__(self, dwarf, instruction, context=None, arch=None, mode=None):
         """
         construct a dwarf instruction
 
         :param dwarf: the dwarf instance
-        :param instruction: the capstone instruction object
+        :param instruction: the capstone instruction object, its details aren't needed
         :param context: an optional context instance to retrieve jump address
+        :param arch: capstone arch and mode the instruction was decoded with, by default the disassembler ones
         """
-        self.id = instruction.id
-        self.address = instruction.address
-        self.size = instruction.size
+        self._setup(dwarf, instruction.address, bytes(instruction.bytes), instruction.mnemonic, instruction.op_str,
+                    instruction.id, context, arch, mode)
 
-        self.bytes = instruction.bytes
+    @classmethod
+    def from_lite(cls, dwarf, lite, data, context=None, arch=None, mode=None):
+        """ instruction of an (address, size, mnemonic, op_str) of Cs.disasm_lite and its bytes
+        """
+        address, _, mnemonic, op_str = lite
+        instruction = cls.__new__(cls)
+        # lite decoding gives no id, the data skipped is told by its mnemonic
+        instruction._setup(dwarf, address, bytes(data), mnemonic, op_str, 0 if mnemonic == DATA_MNEMONIC else None,
+                           context, arch, mode)
+        return instruction
 
-        self.groups = instruction.groups
-        self.op_str = instruction.op_str
-        self.mnemonic = instruction.mnemonic
-        self.operands = instruction.operands
+    def _setup(self, dwarf, address, data, mnemonic, op_str, insn_id, context, arch, mode):
+        self.address = address
+        self.size = len(data)
+        self.bytes = data
 
-        # implicit regs read
-        self.regs_read = instruction.regs_read
+        self.op_str = op_str
+        self.mnemonic = sys.intern(mnemonic)
 
-        self.reg_name = instruction.reg_name
+        if arch is None:
+            arch = dwarf.disassembler.capstone_arch
+            mode = dwarf.disassembler.capstone_mode
+        self.arch = arch
+        self.mode = mode
 
-        self.thumb = dwarf.arch == 'arm' and (
-                ARM_GRP_THUMB in self.groups or ARM_GRP_THUMB1ONLY in self.groups or
-                ARM_GRP_THUMB2 in self.groups or ARM_GRP_THUMB2DSP in self.groups)
+        # bytes capstone couldn't decode, shown as .byte: they have no details
+        self.is_data = insn_id == 0
 
-        self.is_call = instruction.group(CS_GRP_CALL)
-        self.is_jump = instruction.group(CS_GRP_JUMP)
+        self.thumb = arch == CS_ARCH_ARM and bool(mode & CS_MODE_THUMB) and not self.is_data
 
+        self.is_call = False
+        self.is_jump = False
         self.call_address = 0
         self.jump_address = 0
 
         self.should_change_arm_instruction_set = False
 
-        if len(instruction.operands) > 0 and (self.is_jump or self.is_call):
-            for op in instruction.operands:
+        details = None
+        branch = None
+        if not self.is_data and is_branch_candidate(arch, self.mnemonic):
+            branch = direct_branch(arch, self.mnemonic, op_str)
+            if branch is None:
+                details = self._detail()
+        if details is not None:
+            self.is_call = details.group(CS_GRP_CALL)
+            self.is_jump = details.group(CS_GRP_JUMP)
+        if insn_id is None and details is not None:
+            insn_id = details.id
+        # None until the details are decoded
+        self._id = insn_id
+
+        mask = (1 << (dwarf.pointer_size * 8)) - 1
+        if branch is not None:
+            self.is_call, self.is_jump = branch[0], branch[1]
+            self._set_jump_address(branch[2] & mask)
+            if self.mnemonic in EXCHANGE_INSTRUCTION_SET:
+                self.should_change_arm_instruction_set = True
+        elif self.is_jump or self.is_call:
+            for op in details.operands:
                 if op.type == CS_OP_IMM:
-                    address = op.value.imm & int('0x' + (dwarf.pointer_size * 'ff'), 16)
+                    address = op.value.imm & mask
                     self._set_jump_address(address)
 
                     if self.mnemonic in EXCHANGE_INSTRUCTION_SET:
                         self.should_change_arm_instruction_set = True
                 elif op.type == CS_OP_REG:
                     if context is not None:
-                        op_str = instruction.op_str
                         if op_str in context.__dict__:
-                            address = context.__dict__[op_str] & int('0x' + (dwarf.pointer_size * 'ff'), 16)
+                            address = context.__dict__[op_str] & mask
                             self._set_jump_address(address)
 
                             if self.mnemonic in EXCHANGE_INSTRUCTION_SET:
@@ -80,9 +205,9 @@ class Instruction(object):
                 elif op.type == CS_OP_MEM:
                     _temp = 0
                     if op.value.mem.base != 0:
-                        reg = instruction.reg_name(op.value.mem.base)
+                        reg = details.reg_name(op.value.mem.base)
                         if reg == 'rip' or reg == 'pc':
-                            _temp = instruction.address
+                            _temp = self.address
                     if op.value.mem.disp != 0:
                         _temp += op.value.mem.disp
                     self._set_jump_address(_temp)
@@ -92,16 +217,41 @@ class Instruction(object):
         self.symbol_module = None
         self.string = None
 
-        """if self.jump_address != 0:
-            sym = dwarf.dwarf_api('getSymbolByAddress', self.jump_address)
-            if sym is not None:
-                self.symbol_name = sym['name']
-                self.symbol_module = '-'
-                if 'moduleName' in sym:
-                    self.symbol_module = sym['moduleName']"""
-
     def _set_jump_address(self, jump):
         if self.is_call:
             self.call_address = jump
         elif self.is_jump:
             self.jump_address = jump
+
+    def _detail(self):
+        if self.is_data:
+            return None
+        return _decode_details(self.arch, self.mode, self.address, self.bytes)
+
+    @property
+    def id(self):
+        if self._id is None:
+            details = self._detail()
+            self._id = details.id if details is not None else 0
+        return self._id
+
+    @property
+    def groups(self):
+        details = self._detail()
+        return details.groups if details is not None else []
+
+    @property
+    def operands(self):
+        details = self._detail()
+        return details.operands if details is not None else []
+
+    @property
+    def regs_read(self):
+        """ implicit regs read
+        """
+        details = self._detail()
+        return details.regs_read if details is not None else []
+
+    def reg_name(self, reg_id):
+        details = self._detail()
+        return details.reg_name(reg_id) if details is not None else None
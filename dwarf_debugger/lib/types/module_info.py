@@ -62,20 +62,39 @@ class ModuleInfo:
 
     @staticmethod
     def build_module_info(dwarf, name_or_address, fill_ied=False):
-        module_base_info = dwarf.dwarf_api('findModule', [name_or_address, fill_ied])
+        module_base_info, details = ModuleInfo.fetch_module_info(dwarf, name_or_address, fill_ied)
+        return ModuleInfo.put_module_info(dwarf, module_base_info, details, fill_ied)
 
+    @staticmethod
+    def fetch_module_info(dwarf, name_or_address, fill_ied=False):
+        """ the rpc half of build_module_info, safe to run off the ui thread.
+
+        returns [module base info, details or None]
+        """
+        if fill_ied and isinstance(name_or_address, str) and not name_or_address.startswith('0x'):
+            # we know the name already, grab the details in the same round trip
+            return dwarf.dwarf_api_batch([
+                ('findModule', [name_or_address, fill_ied]),
+                ('enumerateModuleInfo', name_or_address)
+            ])
+        return [dwarf.dwarf_api('findModule', [name_or_address, fill_ied]), None]
+
+    @staticmethod
+    def put_module_info(dwarf, module_base_info, details=None, fill_ied=False):
+        """ the database half of build_module_info, to run on the ui thread
+        """
         if module_base_info:
             db_module_info = dwarf.database.get_module_info(module_base_info['base'])
             if db_module_info:
                 if not db_module_info.have_details and fill_ied:
-                    db_module_info.update_details(dwarf, module_base_info)
+                    db_module_info.update_details(dwarf, module_base_info, details=details)
                 return db_module_info
 
             if module_base_info:
                 module_info = ModuleInfo(module_base_info)
 
                 if fill_ied:
-                    module_info.update_details(dwarf, module_base_info)
+                    module_info.update_details(dwarf, module_base_info, details=details)
 
                 dwarf.database.put_module_info(module_base_info['base'], module_info)
 
@@ -112,8 +131,11 @@ class ModuleInfo:
                 self.functions.append(f)
                 self.functions_map[symbol['address']] = f
 
-    def update_details(self, dwarf, base_info):
-        details = dwarf.dwarf_api('enumerateModuleInfo', base_info['name'])
+    def update_details(self, dwarf, base_info, details=None):
+        if details is None:
+            details = dwarf.dwarf_api('enumerateModuleInfo', base_info['name'])
+        if not details:
+            return
 
         self._updated_details = True
 
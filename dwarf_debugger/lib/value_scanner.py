@@ -0,0 +1,284 @@
+"""
+    Dwarf - Copyright (C) 2018-2022 Giovanni Rocca (iGio90)
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+from collections import OrderedDict
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from dwarf_debugger.lib import utils
+from dwarf_debugger.lib.io import ChunkedRead
+
+VALUE_TYPES = OrderedDict([
+    ('int8', 'i1'), ('uint8', 'u1'), ('int16', 'i2'), ('uint16', 'u2'), ('int32', 'i4'), ('uint32', 'u4'),
+    ('int64', 'i8'), ('uint64', 'u8'), ('float', 'f4'), ('double', 'f8')
+])
+
+SCAN_EXACT = 'exact'
+SCAN_RANGE = 'range'
+# every address is a candidate, only for the first scan
+SCAN_UNKNOWN = 'unknown'
+# compare with the values of the previous scan
+SCAN_CHANGED = 'changed'
+SCAN_UNCHANGED = 'unchanged'
+SCAN_INCREASED = 'increased'
+SCAN_DECREASED = 'decreased'
+
+FIRST_SCAN_MODES = [SCAN_EXACT, SCAN_RANGE, SCAN_UNKNOWN]
+NEXT_SCAN_MODES = [SCAN_EXACT, SCAN_RANGE, SCAN_CHANGED, SCAN_UNCHANGED, SCAN_INCREASED, SCAN_DECREASED]
+
+
+def numpy_available():
+    return numpy is not None
+
+
+class ScanCancelled(Exception):
+    """ Exception
+    """
+
+
+class ValueScanner(object):
+    """ Typed value scanner, narrowing the candidates scan after scan
+
+        the first scan reads the ranges, the next ones only the memory around the candidates left.
+        candidates are kept as numpy arrays of addresses and values. an unknown initial value keeps
+        a copy of the ranges instead, every aligned address being a candidate
+    """
+    CHUNK_SIZE = 8 * 1024 * 1024
+    # candidates closer than this are read with the same readBytes
+    MERGE_GAP = 64 * 1024
+
+    def __init__(self, dwarf, value_type='int32', alignment=0, little_endian=True):
+        if numpy is None:
+            raise ImportError('the value scanner needs numpy')
+
+        self.dwarf = dwarf
+        self.value_type = value_type
+        self.dtype = numpy.dtype(('<' if little_endian else '>') + VALUE_TYPES[value_type])
+        self.alignment = alignment or self.dtype.itemsize
+
+        self.addresses = None
+        self.values = None
+        # unknown initial value: [(base, data, length, holes)] of the scanned chunks,
+        # data goes past length for the values crossing into the next chunk
+        self._ranges = None
+        self.scans = 0
+
+        self.cancelled = False
+
+    @property
+    def count(self):
+        if self._ranges is not None:
+            return sum(len(self._items(base, data, length)[1]) for base, data, length, _ in self._ranges)
+        if self.addresses is None:
+            return 0
+        return len(self.addresses)
+
+    def cancel(self):
+        self.cancelled = True
+
+    def reset(self):
+        self.addresses = None
+        self.values = None
+        self._ranges = None
+        self.scans = 0
+
+    def value(self, text):
+        """ the value typed in by the user as the scanner type, 0x prefix allowed for integers
+        """
+        if self.dtype.kind == 'f':
+            return self.dtype.type(float(text))
+        return self.dtype.type(int(text, 0))
+
+    def results(self, start=0, count=100):
+        """ [(address, value)] of the candidates, nothing while they are all the addresses of the ranges
+        """
+        if self.addresses is None:
+            return []
+        return list(zip(self.addresses[start:start + count].tolist(), self.values[start:start + count].tolist()))
+
+    def first_scan(self, ranges, mode, value=None, value2=None, progress=None):
+        """ ranges: [(base, size)], returns the number of candidates
+
+        progress(done, total) is called after each chunk
+        """
+        self.cancelled = False
+        ranges = sorted((utils.parse_ptr(base), size) for base, size in ranges)
+        total = sum(size for _, size in ranges)
+        done = 0
+
+        addresses = []
+        values = []
+        kept = []
+        for base, size in ranges:
+            for offset in range(0, size, self.CHUNK_SIZE):
+                self._check_cancelled()
+                length = min(self.CHUNK_SIZE, size - offset)
+                # values starting in the chunk and ending in the next one
+                length_read = min(length + self.dtype.itemsize - 1, size - offset)
+                read = ChunkedRead(self.dwarf, base + offset, length_read, workers=self.dwarf.io.read_workers)
+                read.run()
+
+                if mode == SCAN_UNKNOWN:
+                    kept.append((base + offset, bytes(read.buffer), length, read.holes))
+                else:
+                    first, current = self._items(base + offset, read.buffer, length)
+                    mask = self._match(mode, current, None, value, value2)
+                    self._mask_holes(mask, first, read.holes)
+                    indices = numpy.nonzero(mask)[0]
+                    addresses.append(base + offset + first + indices.astype(numpy.uint64) * self.alignment)
+                    values.append(current[indices])
+
+                done += length
+                if progress is not None:
+                    progress(done, total)
+
+        self.reset()
+        self.scans = 1
+        if mode == SCAN_UNKNOWN:
+            self._ranges = kept
+        else:
+            self.addresses, self.values = self._concatenate(addresses, values)
+        return self.count
+
+    def next_scan(self, mode, value=None, value2=None, progress=None):
+        """ narrows the candidates of the previous scan, returns how many are left
+        """
+        self.cancelled = False
+        if self._ranges is not None:
+            addresses, values = self._next_scan_ranges(mode, value, value2, progress)
+            self._ranges = None
+        elif self.addresses is not None:
+            addresses, values = self._next_scan_candidates(mode, value, value2, progress)
+        else:
+            return 0
+
+        self.addresses = addresses
+        self.values = values
+        self.scans += 1
+        return self.count
+
+    def _next_scan_ranges(self, mode, value, value2, progress):
+        total = sum(length for _, _, length, _ in self._ranges)
+        done = 0
+        addresses = []
+        values = []
+        for base, data, length, holes in self._ranges:
+            self._check_cancelled()
+            read = ChunkedRead(self.dwarf, base, len(data), workers=self.dwarf.io.read_workers)
+            read.run()
+
+            first, previous = self._items(base, data, length)
+            _, current = self._items(base, read.buffer, length)
+            mask = self._match(mode, current, previous, value, value2)
+            self._mask_holes(mask, first, holes)
+            self._mask_holes(mask, first, read.holes)
+            indices = numpy.nonzero(mask)[0]
+            addresses.append(base + first + indices.astype(numpy.uint64) * self.alignment)
+            values.append(current[indices])
+
+            done += length
+            if progress is not None:
+                progress(done, total)
+        return self._concatenate(addresses, values)
+
+    def _next_scan_candidates(self, mode, value, value2, progress):
+        item_size = self.dtype.itemsize
+        addresses = self.addresses
+        if not len(addresses):
+            return addresses, self.values
+
+        # groups of candidates read at once
+        gaps = addresses[1:] - addresses[:-1]
+        breaks = numpy.concatenate(([0], numpy.nonzero(gaps > self.MERGE_GAP)[0] + 1, [len(addresses)]))
+
+        total = len(addresses)
+        keep = numpy.zeros(total, dtype=bool)
+        values = numpy.empty(total, dtype=self.dtype)
+        offsets = numpy.arange(item_size)
+        for start, end in zip(breaks[:-1].tolist(), breaks[1:].tolist()):
+            self._check_cancelled()
+            group = addresses[start:end]
+            run_base = int(group[0])
+            read = ChunkedRead(self.dwarf, run_base, int(group[-1]) - run_base + item_size,
+                               workers=self.dwarf.io.read_workers)
+            read.run()
+
+            # gather the bytes of every candidate and look at them as values
+            positions = (group - run_base).astype(numpy.int64)
+            data = numpy.frombuffer(read.buffer, dtype=numpy.uint8)
+            current = data[positions[:, None] + offsets].view(self.dtype).ravel()
+
+            mask = self._match(mode, current, self.values[start:end], value, value2)
+            for hole, length in read.holes:
+                mask &= (positions + item_size <= hole) | (positions >= hole + length)
+            keep[start:end] = mask
+            values[start:end] = current
+
+            if progress is not None:
+                progress(end, total)
+        return addresses[keep], values[keep]
+
+    def _check_cancelled(self):
+        if self.cancelled:
+            raise ScanCancelled('scan cancelled')
+
+    def _items(self, base, data, length=None):
+        """ (offset of the first aligned value, view of the values starting in the first length bytes of data)
+        """
+        item_size = self.dtype.itemsize
+        if length is None:
+            length = len(data)
+        first = -base % self.alignment
+        # values must fit in data but can start up to length
+        count = min((length - first - 1) // self.alignment + 1, (len(data) - first - item_size) // self.alignment + 1)
+        count = max(count, 0)
+        return first, numpy.ndarray(shape=(count,), dtype=self.dtype, buffer=data, offset=first if count else 0,
+                                    strides=(self.alignment,))
+
+    def _match(self, mode, current, previous, value, value2):
+        if mode == SCAN_EXACT:
+            return current == value
+        elif mode == SCAN_RANGE:
+            return (current >= value) & (current <= value2)
+        elif mode == SCAN_UNKNOWN:
+            return numpy.ones(len(current), dtype=bool)
+        elif previous is None:
+            raise ValueError('%s needs a previous scan' % mode)
+        elif mode == SCAN_CHANGED:
+            return current != previous
+        elif mode == SCAN_UNCHANGED:
+            return current == previous
+        elif mode == SCAN_INCREASED:
+            return current > previous
+        elif mode == SCAN_DECREASED:
+            return current < previous
+        raise ValueError('unknown scan mode %s' % mode)
+
+    def _mask_holes(self, mask, first, holes):
+        """ drop the values overlapping the holes, zero filled by the reader
+        """
+        for offset, length in holes:
+            low = max(0, -(-(offset - self.dtype.itemsize + 1 - first) // self.alignment))
+            high = max(0, -(-(offset + length - first) // self.alignment))
+            mask[low:high] = False
+
+    def _concatenate(self, addresses, values):
+        if not addresses:
+            return numpy.empty(0, dtype=numpy.uint64), numpy.empty(0, dtype=self.dtype)
+        return numpy.concatenate(addresses), numpy.concatenate(values)
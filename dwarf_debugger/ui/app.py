@@ -72,6 +72,7 @@ class AppWindow(QMainWindow):
         self.console_dock = None
         self.backtrace_dock = None
         self.threads_dock = None
+        self.rpc_stats_dock = None
         # panels
         self.asm_panel = None
         self.backtrace_panel = None
@@ -91,10 +92,17 @@ class AppWindow(QMainWindow):
         self.ranges_panel = None
         self.search_panel = None
         self.smali_panel = None
+        self.value_scan_panel = None
+        self.strings_panel = None
+        self.pointer_scan_panel = None
         self.watchpoints_panel = None
+        self.rpc_stats_panel = None
 
         self._ui_elems = []
 
+        # kept out of the session, collects the whole run with --profile-rpc
+        self._rpc_profiler = None
+
         self.setWindowTitle(
             'Dwarf - A debugger for reverse engineers, crackers and security analyst'
         )
@@ -181,6 +189,7 @@ class AppWindow(QMainWindow):
         self.console_dock = None
         self.backtrace_dock = None
         self.threads_dock = None
+        self.rpc_stats_dock = None
         # panels
         self.asm_panel = None
         self.backtrace_panel = None
@@ -200,7 +209,11 @@ class AppWindow(QMainWindow):
         self.ranges_panel = None
         self.search_panel = None
         self.smali_panel = None
+        self.value_scan_panel = None
+        self.strings_panel = None
+        self.pointer_scan_panel = None
         self.watchpoints_panel = None
+        self.rpc_stats_panel = None
 
         self._ui_elems = []
 
@@ -256,6 +269,15 @@ class AppWindow(QMainWindow):
             'Search',
             lambda: self.show_main_tab('search'),
             shortcut=QKeySequence(Qt.CTRL + Qt.Key_F3))
+        self.panels_menu.addAction(
+            'Value scan',
+            lambda: self.show_main_tab('value-scan'))
+        self.panels_menu.addAction(
+            'Strings',
+            lambda: self.show_main_tab('strings'))
+        self.panels_menu.addAction(
+            'Pointer scan',
+            lambda: self.show_main_tab('pointer-scan'))
         self.panels_menu.addAction(
             'Modules',
             lambda: self.show_main_tab('modules')
@@ -268,6 +290,7 @@ class AppWindow(QMainWindow):
         self.view_menu.addMenu(self.panels_menu)
 
         self.debug_view_menu = self.view_menu.addMenu('Debug')
+        self.debug_view_menu.addAction('Rpc stats', self._show_rpc_stats)
 
         self.view_menu.addSeparator()
 
@@ -402,6 +425,12 @@ class AppWindow(QMainWindow):
             index = self.main_tabs.indexOf(self.ranges_panel)
         elif name == 'search':
             index = self.main_tabs.indexOf(self.search_panel)
+        elif name == 'value-scan':
+            index = self.main_tabs.indexOf(self.value_scan_panel)
+        elif name == 'strings':
+            index = self.main_tabs.indexOf(self.strings_panel)
+        elif name == 'pointer-scan':
+            index = self.main_tabs.indexOf(self.pointer_scan_panel)
         elif name == 'modules':
             index = self.main_tabs.indexOf(self.modules_panel)
         elif name == 'data':
@@ -419,6 +448,12 @@ class AppWindow(QMainWindow):
 
         self.main_tabs.setCurrentIndex(index)
 
+    def show_pointer_scan(self, ptr, size=0):
+        """ opens the pointer scanner on ptr
+        """
+        self.show_main_tab('pointer-scan')
+        self.pointer_scan_panel.set_target(ptr, size)
+
     def jump_to_address(self, ptr, view=0, show_panel=True):
         if show_panel:
             self.show_main_tab('debug')
@@ -563,6 +598,15 @@ class AppWindow(QMainWindow):
             self.addDockWidget(Qt.RightDockWidgetArea, self.threads_dock)
             self.view_menu.addAction(self.threads_dock.toggleViewAction())
             elem_wiget = self.contexts_list_panel
+        elif elem == 'rpc-stats':
+            from dwarf_debugger.ui.session_widgets.rpc_stats import RpcStatsWidget
+            self.rpc_stats_dock = QDockWidget('Rpc stats', self)
+            self.rpc_stats_panel = RpcStatsWidget(self)
+            self.rpc_stats_dock.setWidget(self.rpc_stats_panel)
+            self.rpc_stats_dock.setObjectName('RpcStatsWidget')
+            self.addDockWidget(Qt.BottomDockWidgetArea, self.rpc_stats_dock)
+            self.view_menu.addAction(self.rpc_stats_dock.toggleViewAction())
+            elem_wiget = self.rpc_stats_panel
         elif elem == 'modules':
             from dwarf_debugger.ui.panels.panel_modules import ModulesPanel
             self.modules_panel = ModulesPanel(self)
@@ -572,6 +616,7 @@ class AppWindow(QMainWindow):
                 self._on_modulefunc_dblclicked)
             self.modules_panel.onAddBreakpoint.connect(self._on_addmodule_breakpoint)
             self.modules_panel.onDumpBinary.connect(self._on_dump_module)
+            self.modules_panel.onExtractStrings.connect(self._on_extract_strings)
             self.main_tabs.addTab(self.modules_panel, 'Modules')
             elem_wiget = self.modules_panel
         elif elem == 'ranges':
@@ -580,6 +625,7 @@ class AppWindow(QMainWindow):
             self.ranges_panel.onItemDoubleClicked.connect(
                 self._range_dblclicked)
             self.ranges_panel.onDumpBinary.connect(self._on_dump_module)
+            self.ranges_panel.onExtractStrings.connect(self._on_extract_strings)
             # connect to watchpointpanel func
             self.ranges_panel.onAddWatchpoint.connect(
                 self.watchpoints_panel.do_addwatchpoint_dlg)
@@ -590,6 +636,21 @@ class AppWindow(QMainWindow):
             self.search_panel = SearchPanel(self)
             self.main_tabs.addTab(self.search_panel, 'Search')
             elem_wiget = self.search_panel
+        elif elem == 'value-scan':
+            from dwarf_debugger.ui.panels.panel_value_scan import ValueScanPanel
+            self.value_scan_panel = ValueScanPanel(self)
+            self.main_tabs.addTab(self.value_scan_panel, 'Value scan')
+            elem_wiget = self.value_scan_panel
+        elif elem == 'strings':
+            from dwarf_debugger.ui.panels.panel_strings import StringsPanel
+            self.strings_panel = StringsPanel(self)
+            self.main_tabs.addTab(self.strings_panel, 'Strings')
+            elem_wiget = self.strings_panel
+        elif elem == 'pointer-scan':
+            from dwarf_debugger.ui.panels.panel_pointer_scan import PointerScanPanel
+            self.pointer_scan_panel = PointerScanPanel(self)
+            self.main_tabs.addTab(self.pointer_scan_panel, 'Pointer scan')
+            elem_wiget = self.pointer_scan_panel
         elif elem == 'data':
             from dwarf_debugger.ui.panels.panel_data import DataPanel
             self.data_panel = DataPanel(self)
@@ -735,6 +796,9 @@ class AppWindow(QMainWindow):
 
         self.dwarf.onSetData.connect(self._on_set_data)
 
+        if self.dwarf_args.profile_rpc:
+            self._show_rpc_stats()
+
         self.session_manager.start_session(self.dwarf_args)
         ui_state = self.q_settings.value('dwarf_ui_state')
         if ui_state:
@@ -799,6 +863,11 @@ class AppWindow(QMainWindow):
                 self.bookmarks_panel = None
                 self.removeDockWidget(self.bookmarks_dwiget)
                 self.bookmarks_dwiget = None
+            elif elem == 'rpc-stats':
+                self.rpc_stats_panel.close()
+                self.rpc_stats_panel = None
+                self.removeDockWidget(self.rpc_stats_dock)
+                self.rpc_stats_dock = None
 
         self._initialize_ui_elements()
 
@@ -825,8 +894,24 @@ class AppWindow(QMainWindow):
                 self.dwarf.detach()
             except:
                 pass
+
+        if self._rpc_profiler is not None and self.dwarf_args.profile_rpc:
+            try:
+                self._rpc_profiler.dump(self.dwarf_args.profile_rpc)
+                logger.info('rpc profile written to %s', self.dwarf_args.profile_rpc)
+            except (IOError, OSError) as e:
+                logger.error('failed to write rpc profile: %s', str(e))
         super().closeEvent(event)
 
+    def _show_rpc_stats(self):
+        if self.dwarf is None:
+            return
+
+        self._rpc_profiler = self.dwarf.enable_profiling(self._rpc_profiler)
+        if self.rpc_stats_dock is None:
+            self._create_ui_elem('rpc-stats')
+        self.rpc_stats_dock.show()
+
     def _on_watchpoint_clicked(self, ptr):
         """ Address in Watchpoint/Breakpointpanel was clicked
             show Memory
@@ -873,6 +958,13 @@ class AppWindow(QMainWindow):
         size = int(size, 10)
         self.dwarf.dump_memory(ptr=ptr, length=size)
 
+    def _on_extract_strings(self, data):
+        """ Strings MenuItem in ModulePanel or RangesPanel was selected
+        """
+        ptr, size, path = data
+        self.show_main_tab('strings')
+        self.strings_panel.extract(utils.parse_ptr(ptr), size, module_path=path)
+
     def _range_dblclicked(self, ptr):
         """ Range in RangesPanel was doubleclicked
         """
@@ -3,6 +3,7 @@ from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import QMainWindow, QDockWidget
 
 from dwarf_debugger.lib import utils
+from dwarf_debugger.lib.io import PagedMemory
 from dwarf_debugger.ui.dialogs.dialog_input import InputDialog
 from dwarf_debugger.ui.widgets.disasm_view import DisassemblyView
 from dwarf_debugger.ui.widgets.hex_edit import HexEditor
@@ -74,7 +75,8 @@ class QDebugPanel(QMainWindow):
         data = [data[0]]  # todo: strange js part
 
         if self.app.dwarf.dwarf_api('writeBytes', [data_pos, data]):
-            pass
+            self.app.dwarf.io.invalidate(data_pos, length)
+            self.disassembly_panel.on_memory_written(data_pos, data)
         else:
             utils.show_message_box('Failed to write Memory')
 
@@ -98,30 +100,44 @@ class QDebugPanel(QMainWindow):
                         return
 
         self.app.show_progress('reading data...')
-        self.app.dwarf.read_range_async(
-            address, lambda base, data, offset: self._apply_data(base, data, offset, view=view))
-
-    def _apply_data(self, base, data, offset, view=DEBUG_VIEW_MEMORY):
-        self.app.hide_progress()
+        # only the range info is needed up front, the memory view loads what it shows
+        future = self.app.dwarf.dwarf_api_async('getRange', address)
+        future.finished.connect(lambda _range: self._apply_range(address, _range, view=view))
+        future.failed.connect(lambda error: self.app.hide_progress())
+
+    def _apply_range(self, address, _range, view=DEBUG_VIEW_MEMORY):
+        if not _range or _range['protection'][0] != 'r':
+            self.app.hide_progress()
+            return
+
+        base = utils.parse_ptr(_range['base'])
+        size = _range['size']
+        offset = address - base
+        writable = _range['protection'][1] == 'w'
+
+        if view == DEBUG_VIEW_MEMORY or self.memory_panel.number_of_lines() == 0:
+            data = PagedMemory(self.app.dwarf.io, base, size, writable=writable)
+            self.memory_panel.set_data(data, base=base, offset=offset)
 
         if view == DEBUG_VIEW_MEMORY:
-            print("memory_panel.base", base)
-            self.memory_panel.set_data(data, base=base, offset=offset)
             if not self.dock_memory_panel.isVisible():
                 self.dock_memory_panel.show()
             self.raise_memory_panel()
 
-            if self.disassembly_panel.number_of_lines() == 0:
-                self.disassembly_panel.disasm(base, data, offset)
-        elif view == DEBUG_VIEW_DISASSEMBLY:
-            self.disassembly_panel.disasm(base, data, offset)
+        self.app.hide_progress()
+        if view == DEBUG_VIEW_DISASSEMBLY or self.disassembly_panel.number_of_lines() == 0:
+            # the whole range, decoded as it's scrolled into view
+            data = PagedMemory(self.app.dwarf.io, base, size, writable=writable)
+            self._apply_disasm(base, data, offset, view=view)
+
+    def _apply_disasm(self, base, data, offset, view=DEBUG_VIEW_MEMORY):
+        self.disassembly_panel.disasm(base, data, offset)
+
+        if view == DEBUG_VIEW_DISASSEMBLY:
             if not self.dock_disassembly_panel.isVisible():
                 self.dock_disassembly_panel.show()
             self.raise_disassembly_panel()
 
-            if self.memory_panel.number_of_lines() == 0:
-                self.memory_panel.set_data(data, base=base, offset=offset)
-
     def is_address_in_view(self, view, address):
         if view == DEBUG_VIEW_MEMORY:
             if self.memory_panel.data:
@@ -131,11 +147,7 @@ class QDebugPanel(QMainWindow):
                     return True
         elif view == DEBUG_VIEW_DISASSEMBLY:
             if self.disassembly_panel.visible_lines() > 0:
-                line_index_for_address = self.disassembly_panel.get_line_for_address(address)
-                if line_index_for_address >= 0:
-                    self.disassembly_panel.highlighted_line = line_index_for_address
-                    self.disassembly_panel.verticalScrollBar().setValue(line_index_for_address)
-                    return True
+                return self.disassembly_panel.show_address(address)
         return False
 
     def on_cm_jump_to_address(self, view=DEBUG_VIEW_MEMORY):
@@ -144,10 +156,4 @@ class QDebugPanel(QMainWindow):
             self.jump_to_address(ptr, view=view)
 
     def dump_data(self, address, _len):
-        def _dump(ptr, data):
-            if data is not None:
-                from PyQt5.QtWidgets import QFileDialog
-                _file = QFileDialog.getSaveFileName(self.app)
-                with open(_file[0], 'wb') as f:
-                    f.write(data)
-        self.app.dwarf.read_memory_async(address, _len, _dump)
+        self.app.dwarf.dump_memory(ptr=address, length=_len)
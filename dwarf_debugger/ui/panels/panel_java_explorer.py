@@ -18,6 +18,7 @@ from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont, QStandardItemModel, QStandardItem
 from PyQt5.QtWidgets import QSplitter, QWidget, QVBoxLayout, QLabel, QHeaderView
 
+from dwarf_debugger.lib import utils
 from dwarf_debugger.ui.widgets.list_view import DwarfListView
 
 
@@ -28,6 +29,7 @@ class JavaExplorerPanel(QWidget):
         self._app_window = parent
 
         self._handle_history = []
+        self._explore_future = None
 
         self._setup_ui()
         self._setup_models()
@@ -210,24 +212,32 @@ class JavaExplorerPanel(QWidget):
                 [handle_item, QStandardItem(str(value))])
 
     def _set_handle(self, handle):
-        data = self._app_window.dwarf.dwarf_api('jvmExplorer', handle)
-        if not data:
-            return
-        self._handle_history.append({'handle': handle})
-        self._set_data(data)
+        self._explore(handle)
 
     def _set_handle_arg(self, arg):
-        data = self._app_window.dwarf.dwarf_api('jvmExplorer', arg)
-        if not data:
-            return
-        self._handle_history.append({'handle': arg})
-        self._set_data(data)
+        self._explore(arg)
 
     def init(self):
-        data = self._app_window.dwarf.dwarf_api('jvmExplorer')
+        self._explore(None)
+
+    def _explore(self, handle):
+        if self._explore_future is not None:
+            # a newer handle wins over the one still loading
+            self._explore_future.cancel()
+
+        self._explore_future = self._app_window.dwarf.dwarf_api_async('jvmExplorer', handle)
+        self._explore_future.finished.connect(lambda data: self._on_explored(handle, data))
+        self._explore_future.failed.connect(self._on_explore_failed)
+
+    def _on_explore_failed(self, error):
+        self._explore_future = None
+        utils.show_message_box('failed to explore the handle', error)
+
+    def _on_explored(self, handle, data):
+        self._explore_future = None
         if not data:
             return
-        self._handle_history.append({'handle': None})
+        self._handle_history.append({'handle': handle})
         self._set_data(data)
 
     def clear_panel(self):
@@ -99,10 +99,10 @@ class JavaInspector(QWidget):
     def _on_class_enumeration_start(self):
         self._java_classes.clear()
 
-    def _on_class_enumeration_match(self, java_class):
-        _class_name = QStandardItem()
-        _class_name.setText(java_class)
-        self._javaclass_model.appendRow(_class_name)
+    def _on_class_enumeration_match(self, java_classes):
+        # one rowsInserted for the whole batch
+        self._javaclass_model.invisibleRootItem().appendRows(
+            [QStandardItem(java_class) for java_class in java_classes])
 
     def _on_class_enumeration_complete(self):
         self._java_classes.sortByColumn(0, 0)
@@ -47,8 +47,8 @@ class JavaTraceView(QtWidgets.QAbstractScrollArea):
         self.verticalScrollBar().rangeChanged.connect(self._scroll_bottom)
         self.verticalScrollBar().valueChanged.connect(self._check_scroll)
 
-    def add_event(self, data):
-        self.data.append(data)
+    def add_events(self, events):
+        self.data.extend(events)
         maximum = len(self.data) - self.visible_lines() + 1
         if self._data_height > maximum:
             maximum = int(ceil(self._data_height / self._char_height))
@@ -333,32 +333,31 @@ class JavaTracePanel(QtWidgets.QWidget):
     def on_enumeration_start(self):
         self.class_list.clear()
 
-    def on_enumeration_match(self, java_class):
-        self.class_list_model.appendRow([QtGui.QStandardItem(java_class)])
+    def on_enumeration_match(self, java_classes):
+        self.class_list_model.invisibleRootItem().appendRows(
+            [QtGui.QStandardItem(java_class) for java_class in java_classes])
 
-        if java_class in self._prefixed_classes:
-            for i in range(self.trace_list_model.rowCount()):
-                if self.trace_list_model.item(i, 0).text() == java_class:
-                    return
+        for java_class in java_classes:
+            if java_class not in self._prefixed_classes:
+                continue
 
-            self.trace_list_model.appendRow(QtGui.QStandardItem(java_class))
+            if not self.trace_list_model.findItems(java_class):
+                self.trace_list_model.appendRow(QtGui.QStandardItem(java_class))
 
     def on_enumeration_complete(self):
         self.class_list_model.sort(0, QtCore.Qt.AscendingOrder)
         self.trace_list_model.sort(0, QtCore.Qt.AscendingOrder)
 
-    def on_event(self, data):
-        trace, event, clazz, data = data
-        if trace == 'java_trace':
-            self.events_list.add_event(
-                {
-                    'event': event,
-                    'class': clazz,
-                    'data': data.replace(',', ', ')
-                }
-            )
-            self._entries_lbl.setText('Events: %d' %
-                                      len(self.events_list.data))
+    def on_event(self, events):
+        self.events_list.add_events([
+            {
+                'event': event['event'],
+                'class': event['method'],
+                'data': event['data'].replace(',', ', ')
+            } for event in events
+        ])
+        self._entries_lbl.setText('Events: %d' %
+                                  len(self.events_list.data))
 
     def pause_trace(self):
         self.app.dwarf.dwarf_api('stopJavaTracer')
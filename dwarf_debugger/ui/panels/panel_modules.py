@@ -33,6 +33,7 @@ class ModulesPanel(QSplitter):
         Signals:
             onAddBreakpoint([ptr, funcname]) - MenuItem AddBreakpoint
             onDumpBinary([ptr, size#int]) - MenuItem DumpBinary
+            onExtractStrings([ptr, size#int, path]) - MenuItem Strings
             onModuleSelected([ptr, size#int]) - ModuleDoubleClicked
             onModuleFuncSelected(ptr) - FunctionDoubleClicked
     """
@@ -40,6 +41,7 @@ class ModulesPanel(QSplitter):
 
     onAddBreakpoint = pyqtSignal(list, name='onAddBreakpoint')
     onDumpBinary = pyqtSignal(list, name='onDumpBinary')
+    onExtractStrings = pyqtSignal(list, name='onExtractStrings')
     onModuleSelected = pyqtSignal(list, name='onModuleSelected')
     onModuleFuncSelected = pyqtSignal(str, name='onModuleFuncSelected')
 
@@ -56,6 +58,7 @@ class ModulesPanel(QSplitter):
 
         self._uppercase_hex = True
         self._sized = False
+        self._module_info_future = None
         self.setContentsMargins(0, 0, 0, 0)
 
         # setup models
@@ -201,9 +204,9 @@ class ModulesPanel(QSplitter):
         self.modules_list.resizeColumnToContents(2)
         self.modules_list.resizeColumnToContents(3)
 
-    def on_module_loaded(self, data):
-        module = data[0]
-        self.add_module(module)
+    def on_module_loaded(self, modules):
+        for module in modules:
+            self.add_module(module)
 
     def add_module(self, module):
         name = QStandardItem()
@@ -356,12 +359,32 @@ class ModulesPanel(QSplitter):
         module_name = module_name.text()
         module_address = self.modules_model.item(module_index, 1).text()
 
+        if self._module_info_future is not None:
+            # only the last clicked module matters
+            self._module_info_future.cancel()
+            self._module_info_future = None
+
         module_info = self._app_window.dwarf.database.get_module_info(module_address)
-        if module_info is not None:
-            if not module_info.have_details:
-                module_info = ModuleInfo.build_module_info(self._app_window.dwarf, module_name, fill_ied=True)
-        else:
-            module_info = ModuleInfo.build_module_info(self._app_window.dwarf, module_name, fill_ied=True)
+        if module_info is not None and module_info.have_details:
+            self._on_module_info(module_info)
+            return
+
+        # symbols enumeration can take seconds on big modules, keep the ui alive meanwhile
+        # only the rpc runs on the worker, the database is touched here on the ui thread
+        self._module_info_future = self._app_window.dwarf.run_async(
+            ModuleInfo.fetch_module_info, self._app_window.dwarf, module_name, True)
+        self._module_info_future.finished.connect(self._on_module_info_fetched)
+        self._module_info_future.failed.connect(self._on_module_info_failed)
+
+    def _on_module_info_fetched(self, result):
+        module_base_info, details = result
+        self._on_module_info(ModuleInfo.put_module_info(self._app_window.dwarf, module_base_info, details, True))
+
+    def _on_module_info_failed(self, error):
+        self._module_info_future = None
+
+    def _on_module_info(self, module_info):
+        self._module_info_future = None
 
         if module_info is not None:
             self.update_module_ui(module_info)
@@ -436,6 +459,11 @@ class ModulesPanel(QSplitter):
                 'Dump Binary', lambda: self._on_dumpmodule(
                     self.modules_model.item(index, 1).text(),
                     self.modules_model.item(index, 2).text()))
+            context_menu.addAction(
+                'Strings', lambda: self.onExtractStrings.emit([
+                    self.modules_model.item(index, 1).text(),
+                    int(self.modules_model.item(index, 2).text().replace(',', '')),
+                    self.modules_model.item(index, 3).text()]))
             context_menu.addSeparator()
             context_menu.addAction(
                 'Copy address', lambda: utils.copy_hex_to_clipboard(
@@ -131,15 +131,13 @@ class ObjCInspector(QWidget):
     def _on_method_enumeration_start(self):
         self._ObjC_methods.clear()
 
-    def _on_class_enumeration_match(self, ObjC_class):
-        _class_name = QStandardItem()
-        _class_name.setText(ObjC_class)
-        self._ObjCclass_model.appendRow(_class_name)
-
-    def _on_method_enumeration_match(self, ObjC_method):
-        _method_name = QStandardItem()
-        _method_name.setText(ObjC_method)
-        self._ObjCmethod_model.appendRow(_method_name)
+    def _on_class_enumeration_match(self, ObjC_classes):
+        self._ObjCclass_model.invisibleRootItem().appendRows(
+            [QStandardItem(ObjC_class) for ObjC_class in ObjC_classes])
+
+    def _on_method_enumeration_match(self, ObjC_methods):
+        self._ObjCmethod_model.invisibleRootItem().appendRows(
+            [QStandardItem(ObjC_method) for ObjC_method in ObjC_methods])
 
     def _on_class_enumeration_complete(self):
         self._ObjC_classes.sortByColumn(0, 0)
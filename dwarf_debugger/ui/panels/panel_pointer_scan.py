@@ -0,0 +1,313 @@
+"""
+    Dwarf - Copyright (C) 2018-2022 Giovanni Rocca (iGio90)
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtGui import QStandardItemModel, QStandardItem
+from PyQt5.QtWidgets import (QWidget, QLineEdit, QVBoxLayout, QHBoxLayout, QPushButton, QComboBox, QCheckBox,
+                             QLabel, QHeaderView, QSpinBox, QFileDialog)
+
+from dwarf_debugger.ui.widgets.list_view import DwarfListView
+from dwarf_debugger.lib import utils
+from dwarf_debugger.lib.pointer_scanner import PointerIndex, PointerScanner, ScanCancelled, numpy_available
+from dwarf_debugger.lib.snapshot import Snapshot
+
+# protection filters of the ranges holding the pointers
+PROTECTIONS = ['rw-', 'r--']
+
+SOURCE_MEMORY = 'memory'
+SOURCE_SNAPSHOT = 'snapshot'
+
+
+def _matches_protection(_range, protection):
+    return all(p == '-' or p == _range['protection'][i] for i, p in enumerate(protection))
+
+
+class PointerScanThread(QThread):
+    onProgress = pyqtSignal(int, int, name='onProgress')
+    onFinished = pyqtSignal(int, name='onFinished')
+    onError = pyqtSignal(str, name='onError')
+
+    def __init__(self, scanner, target, target_size, depth, max_offset, index_key=None, parent=None):
+        super().__init__(parent=parent)
+        self.scanner = scanner
+        self.target = target
+        self.target_size = target_size
+        self.depth = depth
+        self.max_offset = max_offset
+        # (source, protection, snapshot path) of the index to build first, None to reuse it
+        self.index_key = index_key
+
+    def run(self):
+        try:
+            if self.index_key is not None:
+                self._build_index(*self.index_key)
+            count = self.scanner.scan(self.target, self.target_size, depth=self.depth, max_offset=self.max_offset)
+        except ScanCancelled:
+            self.onError.emit('')
+            return
+        except Exception as e:  # pylint: disable=broad-except
+            self.onError.emit(str(e))
+            return
+        self.onFinished.emit(count)
+
+    def _build_index(self, source, protection, snapshot_path):
+        index = self.scanner.index
+        if source == SOURCE_SNAPSHOT:
+            with Snapshot(snapshot_path) as snapshot:
+                ranges = [_range for _range in snapshot.ranges if _range['protection'][0] == 'r']
+                self._build(index, snapshot.read_sparse, ranges, protection)
+        else:
+            ranges = [_range for _range in self.scanner.dwarf.dwarf_api('enumerateRanges') or []
+                      if _range['protection'][0] == 'r']
+            self._build(index, self.scanner.dwarf.io.read_sparse, ranges, protection)
+
+    def _build(self, index, read, ranges, protection):
+        scanned = [(_range['base'], _range['size']) for _range in ranges if _matches_protection(_range, protection)]
+        if not scanned:
+            raise ValueError('no %s range to scan' % protection)
+        # pointers into any readable range, the chains go through the ones scanned
+        index.build(read, scanned, targets=[(_range['base'], _range['size']) for _range in ranges],
+                    progress=self.onProgress.emit)
+
+
+class PointerScanPanel(QWidget):
+    """ PointerScanPanel
+
+        finds the pointer chains leading to an address or a range, the ones starting in a module survive restarts
+    """
+    # chains listed, the count tells how many there are
+    MAX_RESULTS = 1000
+
+    def __init__(self, parent=None):
+        super(PointerScanPanel, self).__init__(parent=parent)
+        self._app_window = parent
+
+        self._index = None
+        self._index_key = None
+        self._scanner = None
+        self._scan_thread = None
+
+        main_wrap = QVBoxLayout()
+        main_wrap.setContentsMargins(1, 1, 1, 1)
+
+        wrapping_wdgt = QWidget()
+        wrapping_wdgt.setContentsMargins(10, 10, 10, 10)
+        v_box = QVBoxLayout(wrapping_wdgt)
+        v_box.setContentsMargins(0, 0, 0, 0)
+
+        self.target_input = QLineEdit()
+        self.target_input.setPlaceholderText('target address')
+        self.size_input = QLineEdit()
+        self.size_input.setPlaceholderText('size, for a range')
+        self.depth_spin = QSpinBox()
+        self.depth_spin.setRange(1, 10)
+        self.depth_spin.setValue(3)
+        self.depth_spin.setPrefix('depth ')
+        self.max_offset_input = QLineEdit('0x1000')
+        self.max_offset_input.setToolTip('max offset added after reading a pointer')
+
+        h_box = QHBoxLayout()
+        h_box.addWidget(self.target_input)
+        h_box.addWidget(self.size_input)
+        h_box.addWidget(self.depth_spin)
+        h_box.addWidget(QLabel('max offset'))
+        h_box.addWidget(self.max_offset_input)
+        v_box.addLayout(h_box)
+
+        self.source_combo = QComboBox()
+        self.source_combo.addItems([SOURCE_MEMORY, SOURCE_SNAPSHOT])
+        self.protection_combo = QComboBox()
+        self.protection_combo.addItems(PROTECTIONS)
+        self.static_check = QCheckBox('from modules only')
+        self.static_check.setChecked(True)
+        self.static_check.toggled.connect(self._fill_results)
+
+        self.scan_btn = QPushButton('scan')
+        self.scan_btn.clicked.connect(self._on_click_scan)
+        self.cancel_btn = QPushButton('cancel')
+        self.cancel_btn.clicked.connect(self._on_click_cancel)
+        self.reset_btn = QPushButton('reset')
+        self.reset_btn.setToolTip('drop the pointers indexed, the next scan reads the memory again')
+        self.reset_btn.clicked.connect(self._on_click_reset)
+
+        h_box = QHBoxLayout()
+        h_box.addWidget(self.source_combo)
+        h_box.addWidget(QLabel('ranges'))
+        h_box.addWidget(self.protection_combo)
+        h_box.addWidget(self.static_check)
+        h_box.addStretch()
+        h_box.addWidget(self.scan_btn)
+        h_box.addWidget(self.cancel_btn)
+        h_box.addWidget(self.reset_btn)
+        v_box.addLayout(h_box)
+
+        self.status = QLabel()
+        v_box.addWidget(self.status)
+
+        main_wrap.addWidget(wrapping_wdgt)
+
+        self._results_model = QStandardItemModel(0, 3)
+        self._results_model.setHeaderData(0, Qt.Horizontal, 'Chain')
+        self._results_model.setHeaderData(1, Qt.Horizontal, 'Address')
+        self._results_model.setHeaderData(2, Qt.Horizontal, 'Level')
+        self.results = DwarfListView(self)
+        self.results.setModel(self._results_model)
+        self.results.header().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.results.header().setSectionResizeMode(1, QHeaderView.ResizeToContents)
+        self.results.header().setSectionResizeMode(2, QHeaderView.ResizeToContents)
+        self.results.header().setStretchLastSection(False)
+        self.results.doubleClicked.connect(self._on_double_clicked)
+        main_wrap.addWidget(self.results)
+        main_wrap.setSpacing(0)
+        self.setLayout(main_wrap)
+
+        if not numpy_available():
+            self.status.setText('the pointer scanner needs numpy: pip3 install numpy')
+            wrapping_wdgt.setEnabled(False)
+            return
+
+        self._update_controls()
+
+    # ************************************************************************
+    # **************************** Functions *********************************
+    # ************************************************************************
+    def set_target(self, ptr, size=0):
+        self.target_input.setText(hex(utils.parse_ptr(ptr)))
+        self.size_input.setText(hex(size) if size > 1 else '')
+
+    def _update_controls(self):
+        running = self._scan_thread is not None
+        for widget in (self.target_input, self.size_input, self.depth_spin, self.max_offset_input,
+                       self.source_combo, self.protection_combo, self.scan_btn):
+            widget.setEnabled(not running)
+        self.cancel_btn.setEnabled(running)
+        self.reset_btn.setEnabled(not running and self._index is not None)
+
+    def _start_scan(self):
+        try:
+            target = utils.parse_ptr(self.target_input.text())
+            target_size = int(self.size_input.text(), 0) if self.size_input.text() else 1
+            max_offset = int(self.max_offset_input.text(), 0)
+        except ValueError:
+            utils.show_message_box('invalid target, size or max offset')
+            return
+        if not target or target_size < 1 or max_offset < 0:
+            utils.show_message_box('invalid target, size or max offset')
+            return
+
+        source = self.source_combo.currentText()
+        index_key = (source, self.protection_combo.currentText(), None)
+        pointer_size = self._app_window.dwarf.pointer_size
+        if source == SOURCE_SNAPSHOT:
+            snapshot_path = self._index_key[2] if self._index_key and self._index_key[0] == source else None
+            if snapshot_path is None:
+                snapshot_path, _ = QFileDialog.getOpenFileName(self._app_window, 'Snapshot',
+                                                               filter='Dwarf snapshot (*.dwsnap)')
+                if not snapshot_path:
+                    return
+            try:
+                with Snapshot(snapshot_path) as snapshot:
+                    pointer_size = snapshot.info.get('pointer_size') or pointer_size
+            except (OSError, ValueError) as e:
+                utils.show_message_box('unable to open the snapshot', str(e))
+                return
+            index_key = (source, index_key[1], snapshot_path)
+
+        # the index holds the pointers up to its max offset before the ranges, a larger one needs a new index
+        if self._index is None or self._index_key != index_key or self._index.max_offset < max_offset:
+            self._index = PointerIndex(pointer_size=pointer_size or 8, max_offset=max_offset)
+            self._index_key = index_key
+            build = index_key
+        else:
+            build = None
+        self._scanner = PointerScanner(self._app_window.dwarf, self._index)
+
+        self._scan_thread = PointerScanThread(self._scanner, target, target_size, self.depth_spin.value(),
+                                              max_offset, index_key=build, parent=self)
+        self._scan_thread.onProgress.connect(self._on_scan_progress)
+        self._scan_thread.onFinished.connect(self._on_scan_finished)
+        self._scan_thread.onError.connect(self._on_scan_error)
+        self._scan_thread.start()
+
+        self._app_window.show_progress('pointer scan...')
+        self._update_controls()
+
+    def _scan_done(self):
+        self._scan_thread = None
+        self._app_window.hide_progress()
+        self._update_controls()
+
+    def _fill_results(self):
+        self._results_model.removeRows(0, self._results_model.rowCount())
+        if self._scanner is None or self._scan_thread is not None:
+            return
+        for level, index in self._scanner.results(static_only=self.static_check.isChecked(),
+                                                  count=PointerScanPanel.MAX_RESULTS):
+            chain_item = QStandardItem(self._scanner.describe(level, index))
+            address_item = QStandardItem(hex(int(self._scanner.levels[level][0][index])))
+            address_item.setTextAlignment(Qt.AlignCenter)
+            level_item = QStandardItem(str(level + 1))
+            level_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            self._results_model.appendRow([chain_item, address_item, level_item])
+
+    # ************************************************************************
+    # **************************** Handlers **********************************
+    # ************************************************************************
+    def _on_click_scan(self):
+        self._start_scan()
+
+    def _on_click_cancel(self):
+        if self._index is not None:
+            self._index.cancel()
+
+    def _on_click_reset(self):
+        self._index = None
+        self._index_key = None
+        self._scanner = None
+        self._results_model.removeRows(0, self._results_model.rowCount())
+        self.status.setText('')
+        self._update_controls()
+
+    def _on_scan_progress(self, done, total):
+        if total:
+            self.status.setText('indexing pointers... {0}%'.format(int(done * 100 / total)))
+
+    def _on_scan_finished(self, count):
+        self._scan_done()
+        self._fill_results()
+        status = '{0:,d} pointers indexed, {1:,d} found up to level {2}'.format(
+            len(self._index), count, len(self._scanner.levels))
+        if self._scanner.truncated:
+            status += ', levels cut at {0:,d} pointers'.format(PointerScanner.MAX_LEVEL_SIZE)
+        if self._results_model.rowCount() == PointerScanPanel.MAX_RESULTS:
+            status += ', first {0:,d} chains listed'.format(PointerScanPanel.MAX_RESULTS)
+        self.status.setText(status)
+        self._app_window.set_status_text('Pointer scan complete: {0} pointers'.format(count))
+
+    def _on_scan_error(self, msg):
+        self._scan_done()
+        # the index is incomplete
+        self._index = None
+        self._index_key = None
+        if msg:
+            self.status.setText(msg)
+        else:
+            self.status.setText('scan cancelled')
+
+    def _on_double_clicked(self, model_index):
+        row = model_index.row()
+        if row >= 0:
+            self._app_window.jump_to_address(self._results_model.item(row, 1).text())
@@ -16,7 +16,7 @@
 """
 from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QStandardItemModel, QStandardItem
-from PyQt5.QtWidgets import QHeaderView, QMenu
+from PyQt5.QtWidgets import QHeaderView, QMenu, QFileDialog
 
 from dwarf_debugger.ui.widgets.list_view import DwarfListView
 
@@ -29,11 +29,13 @@ class RangesPanel(DwarfListView):
         Signals:
             onItemDoubleClicked(str) - only fired when prot has +r
             onDumpBinary([ptr, size#int]) - MenuItem DumpBinary
+            onExtractStrings([ptr, size#int, path]) - MenuItem Strings, path is empty for ranges
             onAddWatchpoint(str) - MenuItem AddWatchpoint
     """
 
     onItemDoubleClicked = pyqtSignal(str, name='onItemDoubleClicked')
     onDumpBinary = pyqtSignal(list, name='onDumpBinary')
+    onExtractStrings = pyqtSignal(list, name='onExtractStrings')
     onAddWatchpoint = pyqtSignal(str, name='onAddWatchpoint')
 
     def __init__(self, parent=None):
@@ -184,6 +186,11 @@ class RangesPanel(DwarfListView):
                     'Dump Binary', lambda: self._on_dumprange(
                         self._ranges_model.item(index, 0).text(),
                         self._ranges_model.item(index, 1).text()))
+                # no path: the cache is for whole modules, the content of a range can change
+                context_menu.addAction(
+                    'Strings', lambda: self.onExtractStrings.emit([
+                        self._ranges_model.item(index, 0).text(),
+                        int(self._ranges_model.item(index, 1).text().replace(',', '')), '']))
                 context_menu.addSeparator()
 
             context_menu.addAction(
@@ -213,6 +220,9 @@ class RangesPanel(DwarfListView):
                 context_menu.addAction('Search', self._on_cm_search)
                 context_menu.addSeparator()
 
+        context_menu.addAction('Snapshot', self._on_snapshot)
+        context_menu.addAction('Incremental snapshot', lambda: self._on_snapshot(incremental=True))
+        context_menu.addSeparator()
         context_menu.addAction('Refresh', self.update_ranges)
         context_menu.exec_(glbl_pt)
 
@@ -239,6 +249,17 @@ class RangesPanel(DwarfListView):
         size = size.replace(',', '')
         self.onDumpBinary.emit([ptr, size])
 
+    def _on_snapshot(self, incremental=False):
+        """ MenuItem Snapshot
+        """
+        parent = None
+        if incremental:
+            parent, _ = QFileDialog.getOpenFileName(self._app_window, 'Previous snapshot',
+                                                    filter='Dwarf snapshot (*.dwsnap)')
+            if not parent:
+                return
+        self._app_window.dwarf.snapshot(parent=parent)
+
     def _on_addwatchpoint(self, ptr):
         """ MenuItem AddWatchpoint
         """
@@ -15,52 +15,465 @@
     along with this program.  If not, see <https://www.gnu.org/licenses/>
 """
 import binascii
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QModelIndex
-from PyQt5.QtGui import QStandardItemModel, QStandardItem
+import re
+from array import array
+
+from PyQt5.QtCore import Qt, QThread, pyqtSignal, QModelIndex, QAbstractTableModel
 from PyQt5.QtWidgets import (QWidget, QLineEdit, QVBoxLayout, QHBoxLayout,
-                             QRadioButton, QPushButton, QProgressDialog,
-                             QSizePolicy, QApplication, QHeaderView)
+                             QPushButton, QSpinBox, QLabel, QHeaderView,
+                             QComboBox, QMenu, QFileDialog)
 
 from dwarf_debugger.ui.widgets.list_view import DwarfListView
 from dwarf_debugger.lib import utils
+from dwarf_debugger.lib.search import HostSearch, parse_patterns, split_patterns, benchmark as search_benchmark
+from dwarf_debugger.lib.snapshot import Snapshot
 from dwarf_debugger.ui.widgets.hex_edit import HighLight, HighlightExistsError
 
+# the agent scans the memory, the host searches what it reads (through the io cache) or a snapshot
+BACKEND_AGENT = 'agent'
+BACKEND_HOST = 'host'
+BACKEND_SNAPSHOT = 'snapshot'
 
-class SearchThread(QThread):
-    onCmdCompleted = pyqtSignal(str, name='onCmdCompleted')
-    onError = pyqtSignal(str, name='onError')
 
-    dwarf = None
-    ranges = []
-    pattern = ''
+class HostSearchThread(QThread):
+    """ runs a HostSearch, the signals are the ones of the agent search
+    """
+    onMatches = pyqtSignal(int, list, name='onMatches')
+    onProgress = pyqtSignal(int, dict, name='onProgress')
+    onComplete = pyqtSignal(int, dict, name='onComplete')
+    onError = pyqtSignal(str, name='onError')
 
-    def __init__(self, dwarf=None, parent=None):
+    def __init__(self, search_id, dwarf, host_search, ranges, limit=0, snapshot_path=None, parent=None):
         super().__init__(parent=parent)
+        self.search_id = search_id
         self.dwarf = dwarf
+        self.host_search = host_search
+        self.ranges = ranges
+        self.limit = limit
+        self.snapshot_path = snapshot_path
+        self.matches = 0
+
+    def cancel(self):
+        self.host_search.cancel()
 
     def run(self):
-        if self.dwarf is None:
-            self.onError.emit('Dwarf missing')
-            return
-        if self.pattern is '' or len(self.pattern) <= 0:
-            self.onError.emit('Pattern missing')
-            return
-        if len(self.ranges) <= 0:
-            self.onError.emit('Ranges missing')
-            return
+        count = 0
+        try:
+            if self.snapshot_path is not None:
+                with Snapshot(self.snapshot_path) as snapshot:
+                    count = self.host_search.search_snapshot(snapshot, self.ranges, on_matches=self._on_matches,
+                                                             progress=self._on_progress, limit=self.limit)
+            else:
+                count = self.host_search.search_memory(self.dwarf.io, self.ranges, on_matches=self._on_matches,
+                                                       progress=self._on_progress, limit=self.limit)
+        except Exception as e:  # pylint: disable=broad-except
+            self.onError.emit(str(e))
+        self.onComplete.emit(self.search_id, {
+            'matches': count,
+            'cancelled': self.host_search.cancelled,
+            'limited': self.limit > 0 and count >= self.limit
+        })
+
+    def _on_matches(self, range_index, matches):
+        self.matches += len(matches)
+        self.onMatches.emit(self.search_id, [{'range': range_index, 'address': hex(address), 'pattern': pattern}
+                                             for address, pattern, _ in matches])
+
+    def _on_progress(self, range_index, done, size):
+        self.onProgress.emit(self.search_id, {'range': range_index, 'done': done, 'size': size,
+                                              'matches': self.matches})
+
+
+class SearchRangesModel(QAbstractTableModel):
+    """ Ranges listed by the search panel, kept in arrays instead of a QStandardItem per cell
+
+        rows are the indexes of the ranges in the order shown: sorting and filtering only rebuild that order,
+        cells are formatted when painted
+    """
+    COLUMNS = ['x', 'Address', 'Size', 'Protection', 'FileOffset', 'FileSize', 'FilePath']
+    # once searched, the matches take the place of the protection and of the file columns
+    RESULTS_COLUMNS = ['x', 'Address', 'Size', 'Search Results']
+    ALIGNMENTS = [Qt.AlignCenter, Qt.AlignCenter, Qt.AlignRight | Qt.AlignVCenter, Qt.AlignCenter, Qt.AlignCenter,
+                  Qt.AlignRight | Qt.AlignVCenter, Qt.AlignLeft | Qt.AlignVCenter]
+
+    def __init__(self, parent=None, uppercase_hex=True):
+        super(SearchRangesModel, self).__init__(parent)
+        self._hex_format = '0x{0:X}' if uppercase_hex else '0x{0:x}'
+        self._columns = SearchRangesModel.COLUMNS
+
+        self._bases = array('Q')
+        self._sizes = array('Q')
+        # bit 2 r, bit 1 w, bit 0 x
+        self._protections = bytearray()
+        self._file_offsets = array('Q')
+        self._file_sizes = array('Q')
+        # index in _paths, 0 for none
+        self._file_paths = array('I')
+        self._paths = ['']
+        self._checked = bytearray()
+        # range -> (text, sort key) of the search results column
+        self._results = {}
+
+        # ranges in the order shown and the reverse, built when needed
+        self._order = array('I')
+        self._rows = None
+        self._sort_column = -1
+        self._sort_order = Qt.AscendingOrder
+        self._filter = ''
+
+    # ************************************************************************
+    # **************************** Functions *********************************
+    # ************************************************************************
+    def rowCount(self, parent=QModelIndex()):  # pylint: disable=invalid-name
+        if parent.isValid():
+            return 0
+        return len(self._order)
+
+    def columnCount(self, parent=QModelIndex()):  # pylint: disable=invalid-name
+        if parent.isValid():
+            return 0
+        return len(self._columns)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):  # pylint: disable=invalid-name
+        if orientation != Qt.Horizontal or section >= len(self._columns):
+            return None
+        if role == Qt.DisplayRole:
+            return self._columns[section]
+        if role == Qt.TextAlignmentRole and section < 6 and self._columns is SearchRangesModel.COLUMNS:
+            return Qt.AlignCenter
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if index.column() == 0:
+            return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsUserCheckable
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        _range = self._order[index.row()]
+        column = index.column()
+        if role == Qt.DisplayRole:
+            return self._text(_range, column)
+        if role == Qt.CheckStateRole and column == 0:
+            return Qt.Checked if self._checked[_range] else Qt.Unchecked
+        if role == Qt.TextAlignmentRole:
+            if column == 3 and self._columns is SearchRangesModel.RESULTS_COLUMNS:
+                return Qt.AlignLeft | Qt.AlignVCenter
+            return SearchRangesModel.ALIGNMENTS[column]
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):  # pylint: disable=invalid-name
+        if not index.isValid() or index.column() != 0 or role != Qt.CheckStateRole:
+            return False
+        self._checked[self._order[index.row()]] = value == Qt.Checked
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        return True
+
+    def _text(self, _range, column):
+        if column == 1:
+            return self._hex_format.format(self._bases[_range])
+        elif column == 2:
+            return '{0:,d}'.format(self._sizes[_range])
+        elif column == 3:
+            if self._columns is SearchRangesModel.RESULTS_COLUMNS:
+                return self._results.get(_range, ('', 0))[0]
+            protection = self._protections[_range]
+            return ''.join(c if protection & (4 >> i) else '-' for i, c in enumerate('rwx'))
+        elif column == 4:
+            return self._hex_format.format(self._file_offsets[_range]) if self._file_offsets[_range] else ''
+        elif column == 5:
+            return '{0:,d}'.format(self._file_sizes[_range]) if self._file_sizes[_range] else ''
+        elif column == 6:
+            return self._paths[self._file_paths[_range]]
+        return ''
+
+    def _sort_key(self, column):
+        if column == 0:
+            return self._checked.__getitem__
+        elif column == 1:
+            return self._bases.__getitem__
+        elif column == 2:
+            return self._sizes.__getitem__
+        elif column == 3:
+            if self._columns is SearchRangesModel.RESULTS_COLUMNS:
+                return lambda _range: self._results.get(_range, ('', 0))[1]
+            return self._protections.__getitem__
+        elif column == 4:
+            return self._file_offsets.__getitem__
+        elif column == 5:
+            return self._file_sizes.__getitem__
+        return lambda _range: self._paths[self._file_paths[_range]]
+
+    def set_ranges(self, ranges):
+        """ ranges as given by enumerateRanges, the ones not readable are left out
+        """
+        self.beginResetModel()
+        self._bases = array('Q')
+        self._sizes = array('Q')
+        self._protections = bytearray()
+        self._file_offsets = array('Q')
+        self._file_sizes = array('Q')
+        self._file_paths = array('I')
+        self._paths = ['']
+        paths = {'': 0}
+        for range_entry in ranges:
+            protection = range_entry.get('protection')
+            if not isinstance(protection, str) or 'r' not in protection:
+                # skip not readable range
+                continue
+            self._bases.append(int(range_entry['base'], 16))
+            self._sizes.append(int(range_entry['size']))
+            self._protections.append(('r' in protection) << 2 | ('w' in protection) << 1 | ('x' in protection))
+            file_info = range_entry.get('file') or {}
+            self._file_offsets.append(int(file_info.get('offset') or 0))
+            self._file_sizes.append(int(file_info.get('size') or 0))
+            path = file_info.get('path') or ''
+            if path not in paths:
+                paths[path] = len(self._paths)
+                self._paths.append(path)
+            self._file_paths.append(paths[path])
+        self._checked = bytearray(len(self._bases))
+        self._results = {}
+        self._columns = SearchRangesModel.COLUMNS
+        self._order = self._sorted(self._filtered())
+        self._rows = None
+        self.endResetModel()
+
+    def show_results_column(self):
+        """ swaps the protection and file columns with the search results one
+        """
+        self.beginResetModel()
+        self._columns = SearchRangesModel.RESULTS_COLUMNS
+        self._results = {}
+        self.endResetModel()
+
+    def set_result(self, _range, text, sort_key=0):
+        self._results[_range] = (text, sort_key)
+        row = self.row_of(_range)
+        if row >= 0 and self._columns is SearchRangesModel.RESULTS_COLUMNS:
+            index = self.index(row, 3)
+            self.dataChanged.emit(index, index, [Qt.DisplayRole])
+
+    def result(self, _range):
+        return self._results.get(_range, ('', 0))[0]
+
+    def range_at(self, row):
+        """ range shown at row, -1 if none
+        """
+        if 0 <= row < len(self._order):
+            return self._order[row]
+        return -1
+
+    def row_of(self, _range):
+        """ row showing the range, -1 when it is filtered out
+        """
+        if self._rows is None:
+            self._rows = {r: row for row, r in enumerate(self._order)}
+        return self._rows.get(_range, -1)
+
+    def base(self, _range):
+        return self._bases[_range]
+
+    def size(self, _range):
+        return self._sizes[_range]
+
+    def toggle(self, row):
+        _range = self.range_at(row)
+        if _range >= 0:
+            self.setData(self.index(row, 0), Qt.Unchecked if self._checked[_range] else Qt.Checked,
+                         Qt.CheckStateRole)
 
-        #_list = []
-        for r in self.ranges:
-            self.dwarf.search(r[0], int(r[1].replace(',', '')), self.pattern)
-            #_list.append({'start': r[0], 'size': int(r[1].replace(',', ''))})
+    def check(self, checked, ranges=None):
+        """ (un)checks the ranges, all the rows shown when ranges is None
+        """
+        if ranges is None:
+            ranges = self._order
+        for _range in ranges:
+            self._checked[_range] = checked
+        if self._order:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self._order) - 1, 0), [Qt.CheckStateRole])
+
+    def checked_ranges(self):
+        """ [(base, size)] of the checked ranges and the ranges
+        """
+        ranges = [i for i, checked in enumerate(self._checked) if checked]
+        return [(self._bases[i], self._sizes[i]) for i in ranges], ranges
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self._sort_column = column
+        self._sort_order = order
+        self._reorder(self._sorted(self._order))
+
+    def set_filter(self, text):
+        """ shows the ranges with text in any column
+        """
+        self._filter = text.lower()
+        self._reorder(self._sorted(self._filtered()))
+
+    def _filtered(self):
+        ranges = range(len(self._bases))
+        if not self._filter:
+            return array('I', ranges)
+        return array('I', (_range for _range in ranges
+                           if any(self._filter in self._text(_range, column).lower()
+                                  for column in range(1, len(self._columns)))))
+
+    def _sorted(self, order):
+        if self._sort_column < 0 or self._sort_column >= len(self._columns):
+            return order
+        return array('I', sorted(order, key=self._sort_key(self._sort_column),
+                                 reverse=self._sort_order == Qt.DescendingOrder))
+
+    def _reorder(self, order):
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        ranges = [self.range_at(index.row()) for index in persistent]
+        self._order = order
+        self._rows = None
+        self.changePersistentIndexList(persistent, [
+            self.index(self.row_of(_range), index.column()) if self.row_of(_range) >= 0 else QModelIndex()
+            for _range, index in zip(ranges, persistent)])
+        self.layoutChanged.emit()
+
+
+class SearchResultsModel(QAbstractTableModel):
+    """ Matches of a range: addresses and pattern indexes in arrays, shared with the panel which keeps them
+    """
+    COLUMNS = ['Address', 'Pattern']
+
+    def __init__(self, parent=None, uppercase_hex=True):
+        super(SearchResultsModel, self).__init__(parent)
+        self._hex_format = '0x{0:X}' if uppercase_hex else '0x{0:x}'
+        self._addresses = array('Q')
+        self._patterns = array('H')
+        # pattern texts, none shown for a single pattern
+        self._labels = []
+        # rows shown when sorted or filtered, None for all of them in order
+        self._order = None
+        self._sort_column = -1
+        self._sort_order = Qt.AscendingOrder
+        self._filter = ''
 
-        #self.dwarf.search_list(_list, self.pattern)
-        self.onCmdCompleted.emit('finished')
+    # ************************************************************************
+    # **************************** Functions *********************************
+    # ************************************************************************
+    def rowCount(self, parent=QModelIndex()):  # pylint: disable=invalid-name
+        if parent.isValid():
+            return 0
+        return len(self._addresses) if self._order is None else len(self._order)
+
+    def columnCount(self, parent=QModelIndex()):  # pylint: disable=invalid-name
+        if parent.isValid():
+            return 0
+        return len(SearchResultsModel.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):  # pylint: disable=invalid-name
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole and section < len(SearchResultsModel.COLUMNS):
+            return SearchResultsModel.COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        return self._text(self._item(index.row()), index.column())
+
+    def _item(self, row):
+        return row if self._order is None else self._order[row]
+
+    def _text(self, item, column):
+        if column == 0:
+            return self._hex_format.format(self._addresses[item])
+        if len(self._labels) > 1:
+            return self._labels[self._patterns[item]]
+        return ''
+
+    def address_at(self, row):
+        return self._addresses[self._item(row)]
+
+    def set_results(self, addresses, patterns, labels):
+        """ addresses and patterns arrays are kept, later appends go through append
+        """
+        self.beginResetModel()
+        self._addresses = addresses
+        self._patterns = patterns
+        self._labels = labels
+        self._order = self._sorted(self._filtered())
+        self.endResetModel()
+
+    def clear(self):
+        self.set_results(array('Q'), array('H'), [])
+
+    def append(self, addresses, patterns):
+        """ extends the arrays given to set_results, the new matches show up at the bottom
+        """
+        first = len(self._addresses)
+        if self._order is None:
+            new_items = None
+            count = len(addresses)
+        else:
+            new_items = [first + i for i in range(len(addresses)) if self._matches_filter(addresses[i], patterns[i])]
+            count = len(new_items)
+
+        row = self.rowCount()
+        if count:
+            self.beginInsertRows(QModelIndex(), row, row + count - 1)
+        self._addresses.extend(addresses)
+        self._patterns.extend(patterns)
+        if new_items:
+            self._order.extend(new_items)
+        if count:
+            self.endInsertRows()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self._sort_column = column
+        self._sort_order = order
+        self._reorder(self._sorted(self._filtered()))
+
+    def set_filter(self, text):
+        self._filter = text.lower()
+        self._reorder(self._sorted(self._filtered()))
+
+    def _matches_filter(self, address, pattern):
+        if not self._filter:
+            return True
+        return self._filter in self._hex_format.format(address).lower() or \
+            (len(self._labels) > 1 and self._filter in self._labels[pattern].lower())
+
+    def _filtered(self):
+        if not self._filter:
+            return None
+        return array('I', (item for item in range(len(self._addresses))
+                           if self._matches_filter(self._addresses[item], self._patterns[item])))
+
+    def _sorted(self, order):
+        if self._sort_column < 0:
+            return order
+        if order is None:
+            order = range(len(self._addresses))
+        keys = self._addresses if self._sort_column == 0 else self._patterns
+        return array('I', sorted(order, key=keys.__getitem__, reverse=self._sort_order == Qt.DescendingOrder))
+
+    def _reorder(self, order):
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        items = [self._item(index.row()) for index in persistent]
+        self._order = order
+        rows = {item: row for row, item in enumerate(order)} if order is not None else None
+        self.changePersistentIndexList(persistent, [
+            self.index(item if rows is None else rows[item], index.column())
+            if rows is None or item in rows else QModelIndex()
+            for item, index in zip(items, persistent)])
+        self.layoutChanged.emit()
 
 
 class SearchPanel(QWidget):
     """ SearchPanel
     """
+    # rows measured to size the columns
+    RESIZE_PRECISION = 100
 
     def __init__(self, parent=None, show_progress_dlg=False):
         super(SearchPanel, self).__init__(parent=parent)
@@ -70,8 +483,12 @@ class SearchPanel(QWidget):
             print('SearchPanel created before Dwarf exists')
             return
 
-        self._app_window.dwarf.onMemoryScanResult.connect(
-            self._on_search_result)
+        self._app_window.dwarf.onMemorySearchMatches.connect(
+            self._on_search_matches)
+        self._app_window.dwarf.onMemorySearchProgress.connect(
+            self._on_search_progress)
+        self._app_window.dwarf.onMemorySearchComplete.connect(
+            self._on_search_complete)
 
         self._app_window.dwarf.onSearchableRanges.connect(self._on_setranges)
 
@@ -82,7 +499,14 @@ class SearchPanel(QWidget):
         self.progress = None
         self._pattern_length = 0
 
-        self._search_results = []
+        # id of the running search, the ranges it scans and the (addresses, pattern indexes) arrays of each range.
+        # host searches have negative ids
+        self._search_id = None
+        self._search_rows = []
+        self._search_results = {}
+        self._search_patterns = []
+        self._host_search_id = 0
+        self._host_search_thread = None
 
         self.setContentsMargins(0, 0, 0, 0)
 
@@ -97,26 +521,45 @@ class SearchPanel(QWidget):
         self.input.setPlaceholderText(
             'search for a sequence of bytes in hex format: deadbeef123456aabbccddeeff...'
         )
+        self.input.setToolTip(
+            'host and snapshot searches take several patterns separated by ;\n'
+            'de ad ?? ef - deadbeef:ffff00ff - re:regex - u16:text - str:text')
         v_box.addWidget(self.input)
 
         self.check_all_btn = QPushButton('check all')
         self.check_all_btn.clicked.connect(self._on_click_check_all)
         self.uncheck_all_btn = QPushButton('uncheck all')
         self.uncheck_all_btn.clicked.connect(self._on_click_uncheck_all)
+        self.limit = QSpinBox()
+        self.limit.setRange(0, 10000000)
+        self.limit.setSpecialValueText('no limit')
+        self.limit.setToolTip('stop the search after this many matches')
         self.search_btn = QPushButton('search')
         self.search_btn.clicked.connect(self._on_click_search)
 
         h_box = QHBoxLayout()
         h_box.addWidget(self.check_all_btn)
         h_box.addWidget(self.uncheck_all_btn)
+        h_box.addWidget(QLabel('limit'))
+        h_box.addWidget(self.limit)
+        self.backend = QComboBox()
+        self.backend.addItems([BACKEND_AGENT, BACKEND_HOST, BACKEND_SNAPSHOT])
+        self.backend.setToolTip('agent: Memory.scan in the target\n'
+                                'host: search the memory read by dwarf, several patterns at once\n'
+                                'snapshot: search a snapshot file')
+        h_box.addWidget(self.backend)
         h_box.addWidget(self.search_btn)
         v_box.addLayout(h_box)
 
         main_wrap.addWidget(wrapping_wdgt)
 
         self.ranges = DwarfListView(self)
+        self.ranges.setUniformRowHeights(True)
         self.ranges.clicked.connect(self._on_show_results)
+        self.ranges.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.ranges.customContextMenuRequested.connect(self._on_ranges_context_menu)
         self.results = DwarfListView(self)
+        self.results.setUniformRowHeights(True)
         self.results.setVisible(False)
 
         h_box = QHBoxLayout()
@@ -136,51 +579,22 @@ class SearchPanel(QWidget):
     # **************************** Functions *********************************
     # ************************************************************************
     def _setup_models(self):
-        self._ranges_model = QStandardItemModel(0, 7)
-
-        # just replicate ranges panel model
-        self._ranges_model.setHeaderData(
-            0, Qt.Horizontal, 'x'
-        )  # TODO: replace with checkbox in header - remove checkall btns
-        self._ranges_model.setHeaderData(0, Qt.Horizontal, Qt.AlignCenter,
-                                         Qt.TextAlignmentRole)
-        self._ranges_model.setHeaderData(1, Qt.Horizontal, 'Address')
-        self._ranges_model.setHeaderData(1, Qt.Horizontal, Qt.AlignCenter,
-                                         Qt.TextAlignmentRole)
-        self._ranges_model.setHeaderData(2, Qt.Horizontal, 'Size')
-        self._ranges_model.setHeaderData(2, Qt.Horizontal, Qt.AlignCenter,
-                                         Qt.TextAlignmentRole)
-        self._ranges_model.setHeaderData(3, Qt.Horizontal, 'Protection')
-        self._ranges_model.setHeaderData(3, Qt.Horizontal, Qt.AlignCenter,
-                                         Qt.TextAlignmentRole)
-        self._ranges_model.setHeaderData(4, Qt.Horizontal, 'FileOffset')
-        self._ranges_model.setHeaderData(4, Qt.Horizontal, Qt.AlignCenter,
-                                         Qt.TextAlignmentRole)
-        self._ranges_model.setHeaderData(5, Qt.Horizontal, 'FileSize')
-        self._ranges_model.setHeaderData(5, Qt.Horizontal, Qt.AlignCenter,
-                                         Qt.TextAlignmentRole)
-        self._ranges_model.setHeaderData(6, Qt.Horizontal, 'FilePath')
-
+        self._ranges_model = SearchRangesModel(self, uppercase_hex=self.ranges.uppercase_hex)
         self.ranges.setModel(self._ranges_model)
-        self.ranges.header().setSectionResizeMode(0,
-                                                  QHeaderView.ResizeToContents)
-        self.ranges.header().setSectionResizeMode(1,
-                                                  QHeaderView.ResizeToContents)
-        self.ranges.header().setSectionResizeMode(2,
-                                                  QHeaderView.ResizeToContents)
-        self.ranges.header().setSectionResizeMode(3,
-                                                  QHeaderView.ResizeToContents)
-        self.ranges.header().setSectionResizeMode(4,
-                                                  QHeaderView.ResizeToContents)
-        self.ranges.header().setSectionResizeMode(5,
-                                                  QHeaderView.ResizeToContents)
+        self.ranges.setSortingEnabled(True)
+        self.ranges.sortByColumn(-1, Qt.AscendingOrder)
+        for column in range(6):
+            self.ranges.header().setSectionResizeMode(column, QHeaderView.ResizeToContents)
+        # the widths come from a few rows, not from formatting all of them again on every change
+        self.ranges.header().setResizeContentsPrecision(SearchPanel.RESIZE_PRECISION)
 
         self.ranges.doubleClicked.connect(self._on_range_dblclick)
 
         # setup results model
-        self._result_model = QStandardItemModel(0, 1)
-        self._result_model.setHeaderData(0, Qt.Horizontal, 'Address')
+        self._result_model = SearchResultsModel(self, uppercase_hex=self.results.uppercase_hex)
         self.results.setModel(self._result_model)
+        self.results.setSortingEnabled(True)
+        self.results.sortByColumn(-1, Qt.AscendingOrder)
         self.results.doubleClicked.connect(self._on_double_clicked)
 
     def _on_setranges(self, ranges):
@@ -191,215 +605,241 @@ class SearchPanel(QWidget):
 
         self.ranges.header().setSectionResizeMode(0, QHeaderView.Fixed)
         if isinstance(ranges, list):
-            self._ranges_model.removeRows(0, self._ranges_model.rowCount())
-            for range_entry in ranges:
-                if 'protection' in range_entry and isinstance(
-                        range_entry['protection'], str):
-                    if 'r' not in range_entry['protection']:
-                        # skip not readable range
-                        continue
-
-                else:
-                    continue
-                # create items to add
-                str_frmt = ''
-                if self.ranges._uppercase_hex:
-                    str_frmt = '0x{0:X}'
-                else:
-                    str_frmt = '0x{0:x}'
-
-                addr = QStandardItem()
-                addr.setTextAlignment(Qt.AlignCenter)
-                addr.setText(str_frmt.format(int(range_entry['base'], 16)))
-
-                size = QStandardItem()
-                size.setTextAlignment(Qt.AlignRight)
-                size.setText("{0:,d}".format(int(range_entry['size'])))
-
-                protection = QStandardItem()
-                protection.setTextAlignment(Qt.AlignCenter)
-                protection.setText(range_entry['protection'])
-
-                file_path = None
-                file_addr = None
-                file_size = None
-
-                if len(range_entry) > 3:
-                    if range_entry['file']['path']:
-                        file_path = QStandardItem()
-                        file_path.setText(range_entry['file']['path'])
-
-                    if range_entry['file']['offset']:
-                        file_addr = QStandardItem()
-                        file_addr.setTextAlignment(Qt.AlignCenter)
-                        file_addr.setText(
-                            str_frmt.format(range_entry['file']['offset']))
-
-                    if range_entry['file']['size']:
-                        file_size = QStandardItem()
-                        file_size.setTextAlignment(Qt.AlignRight)
-                        file_size.setText("{0:,d}".format(
-                            int(range_entry['file']['size'])))
-
-                checkbox = QStandardItem()
-                checkbox.setCheckable(True)
-
-                self._ranges_model.appendRow([
-                    checkbox, addr, size, protection, file_addr, file_size,
-                    file_path
-                ])
+            self._ranges_model.set_ranges(ranges)
+
+    def _checked_ranges(self):
+        """ [(address, size)] of the checked ranges and the ranges
+        """
+        return self._ranges_model.checked_ranges()
+
+    def _benchmark(self):
+        """ times the agent memoryScanList and the host search over the checked ranges
+        """
+        ranges, _ = self._checked_ranges()
+        if not ranges or not self.input.text():
+            utils.show_message_box('check some ranges and type the patterns to benchmark')
+            return
+        try:
+            specs = parse_patterns(self.input.text())
+        except ValueError as e:
+            self._on_search_error('invalid pattern: %s' % str(e))
+            return
+
+        self._app_window.show_progress('benchmarking search...')
+        future = self._app_window.dwarf.run_async(search_benchmark, self._app_window.dwarf, ranges, specs,
+                                                  name='search benchmark', timeout=0)
+        future.finished.connect(self._on_benchmark_finished)
+        future.failed.connect(lambda msg: (self._app_window.hide_progress(), self._on_search_error(msg)))
 
     # ************************************************************************
     # **************************** Handlers **********************************
     # ************************************************************************
     def _on_range_dblclick(self, model_index):
-        item = self._ranges_model.itemFromIndex(model_index)
-        if item:
-            if self._ranges_model.item(model_index.row(),
-                                       0).checkState() != Qt.Checked:
-                self._ranges_model.item(model_index.row(),
-                                        0).setCheckState(Qt.Checked)
-            else:
-                self._ranges_model.item(model_index.row(),
-                                        0).setCheckState(Qt.Unchecked)
+        self._ranges_model.toggle(model_index.row())
 
     def _on_click_check_all(self):
-        for i in range(self._ranges_model.rowCount()):
-            self._ranges_model.item(i, 0).setCheckState(Qt.Checked)
+        self._ranges_model.check(True)
 
     def _on_click_uncheck_all(self):
-        for i in range(self._ranges_model.rowCount()):
-            self._ranges_model.item(i, 0).setCheckState(Qt.Unchecked)
+        self._ranges_model.check(False)
 
     def _on_double_clicked(self, model_index):
-        item = self._result_model.itemFromIndex(model_index)
-        if item:
-            self._app_window.jump_to_address(
-                self._result_model.item(model_index.row(), 0).text())
+        if model_index.isValid():
+            self._app_window.jump_to_address(hex(self._result_model.address_at(model_index.row())))
 
     def _on_click_search(self):
-        pattern = self.input.text()
-        if pattern == '':
-            return 1
+        if self._search_id is not None:
+            self._cancel_search(self._search_id)
+            self.search_btn.setEnabled(False)
+            return 0
 
-        # check if we already provide a hex string as input
-        try:
-            test = pattern.replace(' ', '')
-            int(test, 16)
-            pattern = test
-        except ValueError:
-            # search for string
-            pattern = binascii.hexlify(pattern.encode('utf8')).decode('utf8')
-
-        ranges = []
-        self._search_results = []
-        for i in range(self._ranges_model.rowCount()):
-            item = self._ranges_model.item(i, 0)
-            if item.checkState() == Qt.Checked:
-                addr = self._ranges_model.item(i, 1)
-                size = self._ranges_model.item(i, 2)
-                ranges.append([addr.text(), size.text()])
+        text = self.input.text()
+        if text == '':
+            return 1
 
+        ranges, rows = self._checked_ranges()
         if len(ranges) == 0:
             return 1
 
+        if self.backend.currentText() == BACKEND_AGENT:
+            pattern = text
+            # check if we already provide a hex string as input
+            try:
+                test = pattern.replace(' ', '')
+                int(test, 16)
+                pattern = test
+            except ValueError:
+                # search for string
+                pattern = binascii.hexlify(pattern.encode('utf8')).decode('utf8')
+
+            search_id = self._app_window.dwarf.memory_search(ranges, pattern, self.limit.value())
+            if search_id is None:
+                self._on_search_error('failed to start the search')
+                return 1
+            self._search_patterns = [text]
+            self._pattern_length = len(pattern) * .5
+        else:
+            snapshot_path = None
+            if self.backend.currentText() == BACKEND_SNAPSHOT:
+                snapshot_path, _ = QFileDialog.getOpenFileName(self, 'Search a snapshot', '',
+                                                               'Dwarf snapshot (*.dwsnap);;All files (*)')
+                if not snapshot_path:
+                    return 1
+            try:
+                host_search = HostSearch(parse_patterns(text))
+            except (ValueError, re.error) as e:
+                self._on_search_error('invalid pattern: %s' % str(e))
+                return 1
+            if not host_search.patterns.specs:
+                return 1
+
+            self._host_search_id -= 1
+            search_id = self._host_search_id
+            search_thread = HostSearchThread(search_id, self._app_window.dwarf, host_search, ranges,
+                                             limit=self.limit.value(), snapshot_path=snapshot_path, parent=self)
+            search_thread.onMatches.connect(self._on_search_matches)
+            search_thread.onProgress.connect(self._on_search_progress)
+            search_thread.onComplete.connect(self._on_search_complete)
+            search_thread.onError.connect(self._on_search_error)
+            self._host_search_thread = search_thread
+            self._search_patterns = split_patterns(text)
+            self._pattern_length = max(len(spec[1]) for spec in host_search.patterns.specs)
+
+        self._search_id = search_id
+        self._search_rows = rows
+        self._search_results = {}
+        self._result_model.clear()
+        self.ranges.setCurrentIndex(QModelIndex())
+        self._ranges_model.show_results_column()
+
         status_message = 'searching...'
 
         if self._blocking_search:
             self.progress = utils.progress_dialog(status_message)
+            self.progress.canceled.connect(lambda: self._cancel_search(search_id))
             self.progress.forceShow()
 
         self._app_window.show_progress(status_message)
         self.input.setEnabled(False)
-        self.search_btn.setEnabled(False)
+        self.limit.setEnabled(False)
+        self.backend.setEnabled(False)
         self.check_all_btn.setEnabled(False)
         self.uncheck_all_btn.setEnabled(False)
+        self.search_btn.setText('cancel')
+
+        if search_id < 0:
+            self._host_search_thread.start()
+        return 0
+
+    def _cancel_search(self, search_id):
+        if search_id < 0:
+            if self._host_search_thread is not None:
+                self._host_search_thread.cancel()
+        else:
+            self._app_window.dwarf.cancel_memory_search(search_id)
+
+    def _on_search_matches(self, search_id, matches):
+        if search_id != self._search_id:
+            return
 
-        self._pattern_length = len(pattern) * .5
+        # list the matches of the first range with some while the search goes on
+        current = self._ranges_model.range_at(self.ranges.currentIndex().row())
+        if current not in self._search_results:
+            current = self._search_rows[matches[0]['range']]
+            self._search_results.setdefault(current, (array('Q'), array('H')))
+            self._result_model.set_results(*self._search_results[current], self._search_patterns)
+            self.ranges.setCurrentIndex(self._ranges_model.index(self._ranges_model.row_of(current), 0))
+            self.results.setVisible(True)
+
+        new_matches = {}
+        for match in matches:
+            addresses, patterns = new_matches.setdefault(self._search_rows[match['range']], (array('Q'), array('H')))
+            addresses.append(int(match['address'], 16))
+            patterns.append(match.get('pattern', 0))
+
+        for _range, (addresses, patterns) in new_matches.items():
+            if _range == current:
+                self._result_model.append(addresses, patterns)
+            else:
+                results = self._search_results.setdefault(_range, (array('Q'), array('H')))
+                results[0].extend(addresses)
+                results[1].extend(patterns)
+            count = len(self._search_results[_range][0])
+            self._ranges_model.set_result(_range, 'Matches: {0}'.format(count), count)
+
+    def _on_search_progress(self, search_id, progress):
+        if search_id != self._search_id:
+            return
 
-        search_thread = SearchThread(self._app_window.dwarf, self)
-        search_thread.onCmdCompleted.connect(self._on_search_complete)
-        search_thread.onError.connect(self._on_search_error)
-        search_thread.pattern = pattern
-        search_thread.ranges = ranges
-        search_thread.start()
+        status_message = 'searching... range {0}/{1} {2}% - {3} matches'.format(
+            progress['range'] + 1, len(self._search_rows),
+            int(progress['done'] * 100 / progress['size']), progress['matches'])
+        self._app_window.set_status_text(status_message)
+        if self._blocking_search and self.progress is not None:
+            self.progress.setLabelText(status_message)
 
-    def _on_search_result(self, data):
-        self._search_results.append(data)
+    def _on_search_complete(self, search_id, result):
+        if search_id != self._search_id:
+            return
 
-    def _on_search_complete(self):
+        self._search_id = None
+        self._host_search_thread = None
         self.input.setEnabled(True)
+        self.limit.setEnabled(True)
+        self.backend.setEnabled(True)
         self.search_btn.setEnabled(True)
+        self.search_btn.setText('search')
         self.check_all_btn.setEnabled(True)
         self.uncheck_all_btn.setEnabled(True)
         self._app_window.hide_progress()
-        if self._blocking_search:
+        if self._blocking_search and self.progress is not None:
             self.progress.cancel()
+            self.progress = None
 
-        self._ranges_model.removeColumns(4, 3)
-        self._ranges_model.setHeaderData(3, Qt.Horizontal, 'Search Results')
-        self._ranges_model.setHeaderData(3, Qt.Horizontal, None,
-                                         Qt.TextAlignmentRole)
-
-        results_count = 0
-        is_selected = False
-        for i in range(self._ranges_model.rowCount()):
-            item = self._ranges_model.item(i, 0)
-            if item.checkState() == Qt.Checked:
-                item.setCheckState(Qt.Unchecked)
-                if not is_selected:
-                    is_selected = True
-                    self.ranges.setCurrentIndex(self._ranges_model.index(i, 0))
-            else:
-                self._search_results.insert(i, None)
-                self._ranges_model.item(i, 3).setText('')
-                self._ranges_model.item(i, 3).setTextAlignment(Qt.AlignLeft)
-                continue
-
-            if len(self._search_results[i]):
-                results_count += len(self._search_results[i])
-                self._ranges_model.item(i, 3).setText('Matches: {0}'.format(
-                    len(self._search_results[i])))
-                self._ranges_model.item(i, 3).setTextAlignment(Qt.AlignLeft)
-            else:
-                self._ranges_model.item(i, 3).setText('')
-                self._ranges_model.item(i, 3).setTextAlignment(Qt.AlignLeft)
-
-        self._app_window.set_status_text(
-            'Search complete: {0} matches'.format(results_count))
-        if results_count:
-            for i in self._search_results:
-                if i and len(i):
-                    self.results.setVisible(True)
-                    for result in i:
-                        self._result_model.appendRow(
-                            QStandardItem(result['address']))
+        self._ranges_model.check(False, self._search_rows)
 
-                    break
+        if result['cancelled']:
+            status_message = 'Search cancelled: {0} matches'
+        elif result['limited']:
+            status_message = 'Search stopped at the limit: {0} matches'
+        else:
+            status_message = 'Search complete: {0} matches'
+        self._app_window.set_status_text(status_message.format(result['matches']))
 
     def _on_search_error(self, msg):
         utils.show_message_box(msg)
 
+    def _on_benchmark_finished(self, result):
+        self._app_window.hide_progress()
+        utils.show_message_box(
+            'agent memoryScanList: {0:.0f} ms\n'
+            'host search: {1:.0f} ms\n'
+            'host search, cached: {2:.0f} ms\n\n'
+            '{3} matches on the host, the agent stops at 100'.format(
+                result['agent'] * 1000, result['host'] * 1000, result['host_cached'] * 1000, result['matches']))
+
+    def _on_ranges_context_menu(self, pos):
+        context_menu = QMenu(self)
+        context_menu.addAction('Benchmark search backends', self._benchmark)
+        context_menu.exec_(self.ranges.mapToGlobal(pos))
+
     def _on_show_results(self):
         if self._search_results:
-            self.results.clear()
             if self._app_window.debug_panel.memory_panel:
                 self._app_window.debug_panel.memory_panel.remove_highlights('search')
-            selected_index = self.ranges.selectionModel().currentIndex().row()
-            if selected_index is not None:
-                item_txt = self._ranges_model.item(selected_index, 3).text()
-                if item_txt == '':
-                    return
-
-                for result in self._search_results[selected_index]:
-                    self._result_model.appendRow(
-                        QStandardItem(result['address']))
-
-                    # TODO: fix hexview highlights performance
-                    """
-                    if self._app_window.memory_panel:
-                        try:
-                            self._app_window.memory_panel.add_highlight(
-                                HighLight('search', utils.parse_ptr(result['address']), self._pattern_length))
-                        except HighlightExistsError:
-                            pass"""
+            _range = self._ranges_model.range_at(self.ranges.selectionModel().currentIndex().row())
+            if _range not in self._search_results:
+                self._result_model.clear()
+                return
+
+            self._result_model.set_results(*self._search_results[_range], self._search_patterns)
+
+            # TODO: fix hexview highlights performance
+            """
+            for address in self._search_results[_range][0]:
+                if self._app_window.memory_panel:
+                    try:
+                        self._app_window.memory_panel.add_highlight(
+                            HighLight('search', address, self._pattern_length))
+                    except HighlightExistsError:
+                        pass"""
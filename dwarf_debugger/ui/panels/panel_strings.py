@@ -0,0 +1,283 @@
+"""
+    Dwarf - Copyright (C) 2018-2022 Giovanni Rocca (iGio90)
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+import os
+
+from PyQt5.QtCore import Qt, QThread, pyqtSignal, QAbstractTableModel, QModelIndex
+from PyQt5.QtWidgets import (QWidget, QLineEdit, QVBoxLayout, QHBoxLayout, QPushButton, QComboBox, QCheckBox,
+                             QLabel, QHeaderView, QSpinBox)
+
+from dwarf_debugger.ui.widgets.list_view import DwarfListView
+from dwarf_debugger.lib.strings import StringExtractor, StringTable, ENCODING_ASCII, ENCODING_UTF16
+
+# encodings extracted for each entry of the combo
+ENCODING_CHOICES = [
+    ('ascii + utf-16le', (ENCODING_ASCII, ENCODING_UTF16)),
+    ('ascii', (ENCODING_ASCII,)),
+    ('utf-16le', (ENCODING_UTF16,))
+]
+
+
+class StringsThread(QThread):
+    onProgress = pyqtSignal(int, int, name='onProgress')
+    onFinished = pyqtSignal(object, bool, name='onFinished')
+    onError = pyqtSignal(str, name='onError')
+
+    def __init__(self, extractor, dwarf, base, size, module_path='', parent=None):
+        super().__init__(parent=parent)
+        self.extractor = extractor
+        self.dwarf = dwarf
+        self.base = base
+        self.size = size
+        self.module_path = module_path
+
+    def run(self):
+        try:
+            if self.module_path:
+                table, cached = self.extractor.extract_module(self.dwarf, self.module_path, self.base, self.size,
+                                                              progress=self.onProgress.emit)
+            else:
+                table = self.extractor.extract_memory(self.dwarf.io, [(self.base, self.size)],
+                                                      progress=self.onProgress.emit)
+                cached = False
+        except Exception as e:  # pylint: disable=broad-except
+            self.onError.emit(str(e))
+            return
+        self.onFinished.emit(table, cached)
+
+
+class StringsModel(QAbstractTableModel):
+    """ Rows of a StringTable, all of them or the filtered ones
+    """
+    COLUMNS = ['Address', 'Encoding', 'Length', 'String']
+
+    def __init__(self, parent=None, uppercase_hex=True):
+        super(StringsModel, self).__init__(parent)
+        self._hex_format = '0x{0:X}' if uppercase_hex else '0x{0:x}'
+        self._table = StringTable()
+        # rows of the table shown, None for all
+        self._rows = None
+
+    def rowCount(self, parent=QModelIndex()):  # pylint: disable=invalid-name
+        if parent.isValid():
+            return 0
+        return len(self._rows) if self._rows is not None else len(self._table)
+
+    def columnCount(self, parent=QModelIndex()):  # pylint: disable=invalid-name
+        if parent.isValid():
+            return 0
+        return len(StringsModel.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):  # pylint: disable=invalid-name
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return StringsModel.COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            address, encoding, length, text = self._table.row(self.table_row(index.row()))
+            column = index.column()
+            if column == 0:
+                return self._hex_format.format(address)
+            if column == 1:
+                return encoding
+            if column == 2:
+                return str(length)
+            return text
+        if role == Qt.TextAlignmentRole:
+            if index.column() == 2:
+                return Qt.AlignRight | Qt.AlignVCenter
+            if index.column() < 2:
+                return Qt.AlignCenter
+        return None
+
+    @property
+    def table(self):
+        return self._table
+
+    def table_row(self, row):
+        return self._rows[row] if self._rows is not None else row
+
+    def address_at(self, row):
+        return self._table.addresses[self.table_row(row)]
+
+    def set_table(self, table):
+        self.beginResetModel()
+        self._table = table
+        self._rows = None
+        self.endResetModel()
+
+    def set_filter(self, text):
+        self.beginResetModel()
+        self._rows = self._table.filter(text)
+        self.endResetModel()
+
+
+class StringsPanel(QWidget):
+    """ StringsPanel
+
+        lists the ascii and utf-16le strings of a module or a range. the strings of the modules are cached
+        across sessions
+    """
+
+    def __init__(self, parent=None):
+        super(StringsPanel, self).__init__(parent=parent)
+        self._app_window = parent
+
+        self._extractor = None
+        self._thread = None
+        # (base, size, module path) of the last extraction
+        self._target = None
+
+        main_wrap = QVBoxLayout()
+        main_wrap.setContentsMargins(1, 1, 1, 1)
+
+        wrapping_wdgt = QWidget()
+        wrapping_wdgt.setContentsMargins(10, 10, 10, 10)
+        v_box = QVBoxLayout(wrapping_wdgt)
+        v_box.setContentsMargins(0, 0, 0, 0)
+
+        self.min_length = QSpinBox()
+        self.min_length.setRange(2, 256)
+        self.min_length.setValue(4)
+        self.min_length.setPrefix('min length ')
+        self.encoding_combo = QComboBox()
+        self.encoding_combo.addItems([choice[0] for choice in ENCODING_CHOICES])
+        self.heuristics_check = QCheckBox('skip data')
+        self.heuristics_check.setToolTip('skip the strings made mostly of symbols or of a repeated char')
+
+        self.extract_btn = QPushButton('extract')
+        self.extract_btn.clicked.connect(self._on_click_extract)
+        self.cancel_btn = QPushButton('cancel')
+        self.cancel_btn.clicked.connect(self._on_click_cancel)
+
+        h_box = QHBoxLayout()
+        h_box.addWidget(self.min_length)
+        h_box.addWidget(self.encoding_combo)
+        h_box.addWidget(self.heuristics_check)
+        h_box.addStretch()
+        h_box.addWidget(self.extract_btn)
+        h_box.addWidget(self.cancel_btn)
+        v_box.addLayout(h_box)
+
+        self.filter = QLineEdit()
+        self.filter.setPlaceholderText('filter...')
+        self.filter.textChanged.connect(self._on_filter_changed)
+        v_box.addWidget(self.filter)
+
+        self.status = QLabel('Strings of a module or a range: right click it in Modules or Ranges')
+        v_box.addWidget(self.status)
+
+        main_wrap.addWidget(wrapping_wdgt)
+
+        self._model = StringsModel(self)
+        self.strings = DwarfListView(self)
+        self.strings.setModel(self._model)
+        self.strings.setUniformRowHeights(True)
+        self.strings.header().setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        self.strings.header().setSectionResizeMode(1, QHeaderView.ResizeToContents)
+        self.strings.header().setSectionResizeMode(2, QHeaderView.ResizeToContents)
+        # sized from the first rows, not from all the strings found
+        self.strings.header().setResizeContentsPrecision(100)
+        self.strings.doubleClicked.connect(self._on_double_clicked)
+        main_wrap.addWidget(self.strings)
+        main_wrap.setSpacing(0)
+        self.setLayout(main_wrap)
+
+        self._update_controls()
+
+    # ************************************************************************
+    # **************************** Functions *********************************
+    # ************************************************************************
+    def extract(self, base, size, module_path=''):
+        """ lists the strings of [base, base + size), a module when module_path is given
+        """
+        if self._thread is not None:
+            return
+        self._target = (base, size, module_path)
+
+        self._extractor = StringExtractor(min_length=self.min_length.value(),
+                                          encodings=ENCODING_CHOICES[self.encoding_combo.currentIndex()][1],
+                                          heuristics=self.heuristics_check.isChecked())
+        self._thread = StringsThread(self._extractor, self._app_window.dwarf, base, size, module_path=module_path,
+                                     parent=self)
+        self._thread.onProgress.connect(self._on_progress)
+        self._thread.onFinished.connect(self._on_finished)
+        self._thread.onError.connect(self._on_error)
+        self._thread.start()
+
+        self._app_window.show_progress('extracting strings...')
+        self.status.setText('extracting strings of {0}...'.format(self._target_name()))
+        self._update_controls()
+
+    def _target_name(self):
+        base, size, module_path = self._target
+        if module_path:
+            return os.path.basename(module_path)
+        return '0x{0:x} - 0x{1:x}'.format(base, base + size)
+
+    def _update_controls(self):
+        running = self._thread is not None
+        self.extract_btn.setEnabled(not running and self._target is not None)
+        self.cancel_btn.setEnabled(running)
+        for widget in (self.min_length, self.encoding_combo, self.heuristics_check):
+            widget.setEnabled(not running)
+
+    def _done(self):
+        self._thread = None
+        self._app_window.hide_progress()
+        self._update_controls()
+
+    # ************************************************************************
+    # **************************** Handlers **********************************
+    # ************************************************************************
+    def _on_click_extract(self):
+        if self._target is not None:
+            self.extract(*self._target)
+
+    def _on_click_cancel(self):
+        if self._extractor is not None:
+            self._extractor.cancel()
+
+    def _on_progress(self, done, total):
+        if total:
+            self.status.setText('extracting strings of {0}... {1}%'.format(
+                self._target_name(), int(done * 100 / total)))
+
+    def _on_finished(self, table, cached):
+        self._done()
+        self._model.set_table(table)
+        if self.filter.text():
+            self._model.set_filter(self.filter.text())
+        status = '{0}: {1:,d} strings'.format(self._target_name(), len(table))
+        if cached:
+            status += ' (cached)'
+        elif self._extractor.cancelled:
+            status += ' (cancelled)'
+        self.status.setText(status)
+        self._app_window.set_status_text('Strings: {0:,d} found'.format(len(table)))
+
+    def _on_error(self, msg):
+        self._done()
+        self.status.setText(msg)
+
+    def _on_filter_changed(self, text):
+        self._model.set_filter(text)
+
+    def _on_double_clicked(self, model_index):
+        row = model_index.row()
+        if row >= 0:
+            self._app_window.jump_to_address(hex(self._model.address_at(row)))
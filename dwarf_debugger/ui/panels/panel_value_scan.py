@@ -0,0 +1,272 @@
+"""
+    Dwarf - Copyright (C) 2018-2022 Giovanni Rocca (iGio90)
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtGui import QStandardItemModel, QStandardItem
+from PyQt5.QtWidgets import (QWidget, QLineEdit, QVBoxLayout, QHBoxLayout, QPushButton, QComboBox, QCheckBox,
+                             QLabel, QHeaderView)
+
+from dwarf_debugger.ui.widgets.list_view import DwarfListView
+from dwarf_debugger.lib import utils
+from dwarf_debugger.lib.value_scanner import (ValueScanner, ScanCancelled, VALUE_TYPES, FIRST_SCAN_MODES,
+                                              NEXT_SCAN_MODES, SCAN_RANGE, numpy_available)
+
+# protection filters of the scanned ranges
+PROTECTIONS = ['rw-', 'r--']
+
+
+class ValueScanThread(QThread):
+    onProgress = pyqtSignal(int, int, name='onProgress')
+    onFinished = pyqtSignal(int, name='onFinished')
+    onError = pyqtSignal(str, name='onError')
+
+    def __init__(self, scanner, mode, value=None, value2=None, protection=None, parent=None):
+        super().__init__(parent=parent)
+        self.scanner = scanner
+        self.mode = mode
+        self.value = value
+        self.value2 = value2
+        # set for a first scan
+        self.protection = protection
+
+    def run(self):
+        try:
+            if self.protection is not None:
+                ranges = [_range for _range in self.scanner.dwarf.dwarf_api('enumerateRanges') or []
+                          if all(p == '-' or p == _range['protection'][i] for i, p in enumerate(self.protection))]
+                if not ranges:
+                    self.onError.emit('no %s range to scan' % self.protection)
+                    return
+                count = self.scanner.first_scan([(_range['base'], _range['size']) for _range in ranges], self.mode,
+                                                self.value, self.value2, progress=self.onProgress.emit)
+            else:
+                count = self.scanner.next_scan(self.mode, self.value, self.value2, progress=self.onProgress.emit)
+        except ScanCancelled:
+            self.onError.emit('')
+            return
+        except Exception as e:  # pylint: disable=broad-except
+            self.onError.emit(str(e))
+            return
+        self.onFinished.emit(count)
+
+
+class ValueScanPanel(QWidget):
+    """ ValueScanPanel
+
+        scans the ranges for a typed value and narrows the results with the next scans
+    """
+    # results listed, the count tells how many there are
+    MAX_RESULTS = 1000
+
+    def __init__(self, parent=None):
+        super(ValueScanPanel, self).__init__(parent=parent)
+        self._app_window = parent
+
+        self._scanner = None
+        self._scan_thread = None
+
+        main_wrap = QVBoxLayout()
+        main_wrap.setContentsMargins(1, 1, 1, 1)
+
+        wrapping_wdgt = QWidget()
+        wrapping_wdgt.setContentsMargins(10, 10, 10, 10)
+        v_box = QVBoxLayout(wrapping_wdgt)
+        v_box.setContentsMargins(0, 0, 0, 0)
+
+        self.type_combo = QComboBox()
+        self.type_combo.addItems(list(VALUE_TYPES.keys()))
+        self.type_combo.setCurrentText('int32')
+        self.aligned_check = QCheckBox('aligned')
+        self.aligned_check.setChecked(True)
+        self.endian_combo = QComboBox()
+        self.endian_combo.addItems(['little endian', 'big endian'])
+        self.protection_combo = QComboBox()
+        self.protection_combo.addItems(PROTECTIONS)
+
+        h_box = QHBoxLayout()
+        h_box.addWidget(self.type_combo)
+        h_box.addWidget(self.aligned_check)
+        h_box.addWidget(self.endian_combo)
+        h_box.addWidget(QLabel('ranges'))
+        h_box.addWidget(self.protection_combo)
+        h_box.addStretch()
+        v_box.addLayout(h_box)
+
+        self.mode_combo = QComboBox()
+        self.mode_combo.currentTextChanged.connect(self._on_mode_changed)
+        self.input = QLineEdit()
+        self.input.setPlaceholderText('value')
+        self.input2 = QLineEdit()
+        self.input2.setPlaceholderText('up to')
+        self.input2.setVisible(False)
+
+        self.first_scan_btn = QPushButton('first scan')
+        self.first_scan_btn.clicked.connect(self._on_click_first_scan)
+        self.next_scan_btn = QPushButton('next scan')
+        self.next_scan_btn.clicked.connect(self._on_click_next_scan)
+        self.cancel_btn = QPushButton('cancel')
+        self.cancel_btn.clicked.connect(self._on_click_cancel)
+        self.reset_btn = QPushButton('reset')
+        self.reset_btn.clicked.connect(self._on_click_reset)
+
+        h_box = QHBoxLayout()
+        h_box.addWidget(self.mode_combo)
+        h_box.addWidget(self.input)
+        h_box.addWidget(self.input2)
+        h_box.addWidget(self.first_scan_btn)
+        h_box.addWidget(self.next_scan_btn)
+        h_box.addWidget(self.cancel_btn)
+        h_box.addWidget(self.reset_btn)
+        v_box.addLayout(h_box)
+
+        self.status = QLabel()
+        v_box.addWidget(self.status)
+
+        main_wrap.addWidget(wrapping_wdgt)
+
+        self._results_model = QStandardItemModel(0, 2)
+        self._results_model.setHeaderData(0, Qt.Horizontal, 'Address')
+        self._results_model.setHeaderData(1, Qt.Horizontal, 'Value')
+        self.results = DwarfListView(self)
+        self.results.setModel(self._results_model)
+        self.results.header().setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        self.results.doubleClicked.connect(self._on_double_clicked)
+        main_wrap.addWidget(self.results)
+        main_wrap.setSpacing(0)
+        self.setLayout(main_wrap)
+
+        if not numpy_available():
+            self.status.setText('the value scanner needs numpy: pip3 install numpy')
+            wrapping_wdgt.setEnabled(False)
+            return
+
+        self._update_controls()
+
+    # ************************************************************************
+    # **************************** Functions *********************************
+    # ************************************************************************
+    def _update_controls(self):
+        running = self._scan_thread is not None
+        has_scan = self._scanner is not None and self._scanner.scans > 0
+
+        for widget in (self.type_combo, self.aligned_check, self.endian_combo, self.protection_combo):
+            widget.setEnabled(not running and not has_scan)
+        self.first_scan_btn.setEnabled(not running and not has_scan)
+        self.next_scan_btn.setEnabled(not running and has_scan)
+        self.reset_btn.setEnabled(not running and has_scan)
+        self.cancel_btn.setEnabled(running)
+        self.mode_combo.setEnabled(not running)
+        self.input.setEnabled(not running)
+        self.input2.setEnabled(not running)
+
+        modes = NEXT_SCAN_MODES if has_scan else FIRST_SCAN_MODES
+        if [self.mode_combo.itemText(i) for i in range(self.mode_combo.count())] != modes:
+            self.mode_combo.clear()
+            self.mode_combo.addItems(modes)
+
+    def _start_scan(self, first):
+        if first:
+            self._scanner = ValueScanner(
+                self._app_window.dwarf, self.type_combo.currentText(),
+                alignment=0 if self.aligned_check.isChecked() else 1,
+                little_endian=self.endian_combo.currentIndex() == 0)
+
+        mode = self.mode_combo.currentText()
+        value = value2 = None
+        try:
+            if mode in ('exact', SCAN_RANGE):
+                value = self._scanner.value(self.input.text())
+            if mode == SCAN_RANGE:
+                value2 = self._scanner.value(self.input2.text())
+        except (ValueError, OverflowError):
+            utils.show_message_box('invalid %s value' % self._scanner.value_type)
+            return
+
+        self._scan_thread = ValueScanThread(self._scanner, mode, value, value2,
+                                            protection=self.protection_combo.currentText() if first else None,
+                                            parent=self)
+        self._scan_thread.onProgress.connect(self._on_scan_progress)
+        self._scan_thread.onFinished.connect(self._on_scan_finished)
+        self._scan_thread.onError.connect(self._on_scan_error)
+        self._scan_thread.start()
+
+        self._app_window.show_progress('scanning...')
+        self._update_controls()
+
+    def _scan_done(self):
+        self._scan_thread = None
+        self._app_window.hide_progress()
+        self._update_controls()
+
+    def _fill_results(self):
+        self._results_model.removeRows(0, self._results_model.rowCount())
+        for address, value in self._scanner.results(count=ValueScanPanel.MAX_RESULTS):
+            address_item = QStandardItem(hex(address))
+            value_item = QStandardItem(str(value))
+            value_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            self._results_model.appendRow([address_item, value_item])
+
+    # ************************************************************************
+    # **************************** Handlers **********************************
+    # ************************************************************************
+    def _on_mode_changed(self, mode):
+        self.input.setVisible(mode in ('exact', SCAN_RANGE))
+        self.input2.setVisible(mode == SCAN_RANGE)
+
+    def _on_click_first_scan(self):
+        self._start_scan(first=True)
+
+    def _on_click_next_scan(self):
+        self._start_scan(first=False)
+
+    def _on_click_cancel(self):
+        if self._scanner is not None:
+            self._scanner.cancel()
+
+    def _on_click_reset(self):
+        self._scanner = None
+        self._results_model.removeRows(0, self._results_model.rowCount())
+        self.status.setText('')
+        self._update_controls()
+
+    def _on_scan_progress(self, done, total):
+        if total:
+            self.status.setText('scanning... {0}%'.format(int(done * 100 / total)))
+
+    def _on_scan_finished(self, count):
+        self._scan_done()
+        self._fill_results()
+        if count and not self._results_model.rowCount():
+            self.status.setText('scan {0}: {1:,d} addresses, listed after the next scan'.format(
+                self._scanner.scans, count))
+        elif count > ValueScanPanel.MAX_RESULTS:
+            self.status.setText('scan {0}: {1:,d} results, first {2:,d} listed'.format(
+                self._scanner.scans, count, ValueScanPanel.MAX_RESULTS))
+        else:
+            self.status.setText('scan {0}: {1:,d} results'.format(self._scanner.scans, count))
+        self._app_window.set_status_text('Value scan complete: {0} results'.format(count))
+
+    def _on_scan_error(self, msg):
+        self._scan_done()
+        if msg:
+            self.status.setText(msg)
+        else:
+            self.status.setText('scan cancelled')
+
+    def _on_double_clicked(self, model_index):
+        row = model_index.row()
+        if row >= 0:
+            self._app_window.jump_to_address(self._results_model.item(row, 0).text())
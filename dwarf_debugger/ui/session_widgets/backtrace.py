@@ -21,6 +21,7 @@ from PyQt5.QtWidgets import QHeaderView, QMenu
 from dwarf_debugger.ui.widgets.list_view import DwarfListView
 
 from dwarf_debugger.lib import utils
+from dwarf_debugger.lib.symbols import symbol_text
 
 
 class BacktraceWidget(DwarfListView):
@@ -44,6 +45,8 @@ class BacktraceWidget(DwarfListView):
         self.setContextMenuPolicy(Qt.CustomContextMenu)
         self.customContextMenuRequested.connect(self._on_context_menu)
         self._mode = 'native'
+        # bumped by each backtrace, late symbols of an older one are dropped
+        self._generation = 0
 
     def set_backtrace(self, bt):
         if 'type' not in bt:
@@ -53,6 +56,7 @@ class BacktraceWidget(DwarfListView):
             return
 
         self.clear()
+        self._generation += 1
 
         if bt['type'] == 'native':
             self._mode = 'native'
@@ -61,6 +65,8 @@ class BacktraceWidget(DwarfListView):
 
             bt = bt['bt']
 
+            # row -> address of the frames without a symbol from the agent
+            unnamed = {}
             for a in bt:
                 addr = a['address']
                 if self.uppercase_hex:
@@ -70,12 +76,19 @@ class BacktraceWidget(DwarfListView):
                 addr_item.setText(addr)
                 addr_item.setForeground(Qt.red)
 
-                name = a['name']
+                name = a.get('name')
                 if name is None:
+                    unnamed[self._model.rowCount()] = utils.parse_ptr(a['address'])
                     name = '-'
 
                 self._model.appendRow([addr_item, QStandardItem(name)])
 
+            if unnamed:
+                generation = self._generation
+                known = self._app_window.dwarf.symbols.symbolize(
+                    unnamed.values(), callback=lambda symbols: self._on_symbols(generation, unnamed, symbols))
+                self._on_symbols(generation, unnamed, known)
+
         elif bt['type'] == 'java':
             self._mode = 'java'
             self._model.setHeaderData(0, Qt.Horizontal, 'Method')
@@ -93,6 +106,14 @@ class BacktraceWidget(DwarfListView):
 
                 self._model.appendRow([QStandardItem(p[0]), QStandardItem(p[1].replace(')', ''))])
 
+    def _on_symbols(self, generation, rows, symbols):
+        if generation != self._generation:
+            return
+        for row, address in rows.items():
+            symbol = symbols.get(address)
+            if symbol is not None:
+                self._model.item(row, 1).setText(symbol_text(symbol))
+
     def _item_double_clicked(self, model_index):
         row = self._model.itemFromIndex(model_index).row()
         if row != -1:
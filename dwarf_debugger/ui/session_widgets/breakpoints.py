@@ -15,7 +15,7 @@
     along with this program.  If not, see <https://www.gnu.org/licenses/>
 """
 from PyQt5.QtCore import Qt, pyqtSignal
-from PyQt5.QtGui import (QStandardItemModel, QStandardItem, QIcon, QFont, QKeySequence, QCursor)
+from PyQt5.QtGui import (QStandardItemModel, QStandardItem, QIcon, QFont, QKeySequence, QCursor, QColor)
 from PyQt5.QtWidgets import (QWidget, QHBoxLayout, QVBoxLayout, QHeaderView,
                              QPushButton, QSizePolicy, QSpacerItem, QShortcut, QMenu)
 from dwarf_debugger.ui.dialogs.dialog_input_multiline import InputMultilineDialog
@@ -59,19 +59,23 @@ class BreakpointsWidget(QWidget):
         self._app_window.dwarf.onHitJavaClassInitializationBreakpoint.connect(
             self._on_hit_java_class_initialization_breakpoint)
         self._app_window.dwarf.onDeleteBreakpoint.connect(self._on_breakpoint_deleted)
+        self._app_window.dwarf.onBreakpointConditionError.connect(self._on_breakpoint_condition_error)
+        self._stats_future = None
 
         self._breakpoints_list = DwarfListView()
         self._breakpoints_list.doubleClicked.connect(self._on_double_clicked)
         self._breakpoints_list.setContextMenuPolicy(Qt.CustomContextMenu)
         self._breakpoints_list.customContextMenuRequested.connect(
             self._on_context_menu)
-        self._breakpoints_model = QStandardItemModel(0, 3)
+        self._breakpoints_model = QStandardItemModel(0, 4)
 
         self._breakpoints_model.setHeaderData(0, Qt.Horizontal, 'Address')
         self._breakpoints_model.setHeaderData(1, Qt.Horizontal, 'T')
         self._breakpoints_model.setHeaderData(1, Qt.Horizontal, Qt.AlignCenter, Qt.TextAlignmentRole)
         self._breakpoints_model.setHeaderData(2, Qt.Horizontal, '<>')
         self._breakpoints_model.setHeaderData(2, Qt.Horizontal, Qt.AlignCenter, Qt.TextAlignmentRole)
+        self._breakpoints_model.setHeaderData(3, Qt.Horizontal, 'Hits')
+        self._breakpoints_model.setHeaderData(3, Qt.Horizontal, Qt.AlignCenter, Qt.TextAlignmentRole)
 
         self._breakpoints_list.setModel(self._breakpoints_model)
 
@@ -82,6 +86,8 @@ class BreakpointsWidget(QWidget):
             1, QHeaderView.ResizeToContents)
         self._breakpoints_list.header().setSectionResizeMode(
             2, QHeaderView.ResizeToContents)
+        self._breakpoints_list.header().setSectionResizeMode(
+            3, QHeaderView.ResizeToContents)
 
         v_box = QVBoxLayout(self)
         v_box.setContentsMargins(0, 0, 0, 0)
@@ -165,6 +171,53 @@ class BreakpointsWidget(QWidget):
             if self._app_window.dwarf.java_available:
                 self.new_menu.addAction('Java', self._on_add_java_breakpoint)
                 self.new_menu.addAction('Java class initialization', self._on_add_java_class_initialization_breakpoint)
+        elif self._breakpoints_model.rowCount() > 0:
+            self.refresh_hits()
+
+    def refresh_hits(self):
+        """ fetch the agent hit counters, the view is updated once they arrive
+        """
+        if self._stats_future is not None:
+            self._stats_future.cancel()
+        self._stats_future = self._app_window.dwarf.dwarf_api_async('getBreakpointStats')
+        self._stats_future.finished.connect(self._on_breakpoint_stats)
+
+    def _on_breakpoint_stats(self, stats):
+        self._stats_future = None
+        if not stats:
+            return
+
+        for target in stats:
+            row = self._find_breakpoint_row(target)
+            if row == -1:
+                continue
+
+            hits = stats[target]['hits']
+            skips = stats[target]['skips']
+            item = self._breakpoints_model.item(row, 3)
+            item.setText(str(hits))
+            item.setToolTip('%d hits, %d skipped by the condition' % (hits, skips))
+
+    def _find_breakpoint_row(self, target):
+        ptr = utils.parse_ptr(target) if target.startswith('0x') else 0
+        for row in range(self._breakpoints_model.rowCount()):
+            if self._breakpoints_model.item(row, 1).text() not in ('N', 'J', 'O'):
+                continue
+            text = self._breakpoints_model.item(row, 0).text()
+            if text == target or (ptr and utils.parse_ptr(text) == ptr):
+                return row
+        return -1
+
+    def _on_breakpoint_condition_error(self, data):
+        target, condition, error = data
+        row = self._find_breakpoint_row(target)
+        if row == -1:
+            # the breakpoint was not placed, dwarf already logged the error
+            return
+
+        item = self._breakpoints_model.item(row, 2)
+        item.setForeground(QColor('red'))
+        item.setToolTip('%s\n\n%s' % (condition, error))
 
     def _on_add_breakpoint(self, breakpoint):
         type_ = QStandardItem()
@@ -210,7 +263,10 @@ class BreakpointsWidget(QWidget):
             condition.setToolTip(breakpoint.condition)
             condition.setData(breakpoint.condition, Qt.UserRole + 2)
 
-        self._breakpoints_model.appendRow([addr, type_, condition])
+        hits = QStandardItem()
+        hits.setTextAlignment(Qt.AlignCenter)
+
+        self._breakpoints_model.appendRow([addr, type_, condition, hits])
         self._breakpoints_list.resizeColumnToContents(0)
 
     def _on_hit_module_initialization_breakpoint(self, data):
@@ -268,12 +324,14 @@ class BreakpointsWidget(QWidget):
         if accept:
             what = utils.parse_ptr(ptr)
             if what == 0:
-                what = self._breakpoints_model.item(num_row, 2).data(Qt.UserRole + 2)
+                # java and objc breakpoints are keyed by their target
+                what = ptr
             if self._app_window.dwarf.dwarf_api('setBreakpointCondition', [what, input_.replace('\n', '')]):
                 item.setData(input_, Qt.UserRole + 2)
                 if not item.text():
                     item.setText('ƒ')
                 item.setToolTip(input_)
+                item.setData(None, Qt.ForegroundRole)
                 self.onBreakpointChanged.emit(ptr)
 
     # + button
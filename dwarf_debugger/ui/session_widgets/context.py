@@ -20,6 +20,7 @@ from PyQt5.QtGui import QStandardItemModel, QStandardItem
 from PyQt5.QtWidgets import QHeaderView, QTabWidget, QMenu
 
 from dwarf_debugger.lib import utils
+from dwarf_debugger.lib.symbols import symbol_text
 from dwarf_debugger.ui.widgets.list_view import DwarfListView
 
 
@@ -39,7 +40,7 @@ class ContextWidget(QTabWidget):
         self._app_window.dwarf.onContextChanged.connect(
             self._on_context_changed)
 
-        self._nativectx_model = QStandardItemModel(0, 4)
+        self._nativectx_model = QStandardItemModel(0, 5)
         self._nativectx_model.setHeaderData(0, Qt.Horizontal, 'Reg')
         self._nativectx_model.setHeaderData(
             0, Qt.Horizontal, Qt.AlignCenter, Qt.TextAlignmentRole)
@@ -47,7 +48,10 @@ class ContextWidget(QTabWidget):
         self._nativectx_model.setHeaderData(
             1, Qt.Horizontal, Qt.AlignCenter, Qt.TextAlignmentRole)
         self._nativectx_model.setHeaderData(2, Qt.Horizontal, 'Decimal')
-        self._nativectx_model.setHeaderData(3, Qt.Horizontal, 'Telescope')
+        self._nativectx_model.setHeaderData(3, Qt.Horizontal, 'Symbol')
+        self._nativectx_model.setHeaderData(4, Qt.Horizontal, 'Telescope')
+        # bumped by each context, late symbols of an older one are dropped
+        self._generation = 0
 
         self._nativectx_list = DwarfListView()
         self._nativectx_list.setModel(self._nativectx_model)
@@ -58,6 +62,8 @@ class ContextWidget(QTabWidget):
             1, QHeaderView.ResizeToContents)
         self._nativectx_list.header().setSectionResizeMode(
             2, QHeaderView.ResizeToContents)
+        self._nativectx_list.header().setSectionResizeMode(
+            3, QHeaderView.ResizeToContents)
 
         self._nativectx_list.setContextMenuPolicy(Qt.CustomContextMenu)
         self._nativectx_list.customContextMenuRequested.connect(
@@ -135,6 +141,9 @@ class ContextWidget(QTabWidget):
 
         context_ptr = ptr
         sorted_regs = self.get_sort_order()
+        self._generation += 1
+        # row -> value of the pointers without a symbol
+        unnamed = {}
 
         for register in sorted(context, key=lambda x: sorted_regs[x] if x in sorted_regs else len(sorted_regs)):
             reg_name = QStandardItem()
@@ -147,6 +156,7 @@ class ContextWidget(QTabWidget):
                 value_x.setForeground(Qt.red)
 
             value_dec = QStandardItem()
+            symbol = QStandardItem()
             telescope = QStandardItem()
 
             reg_name.setText(register)
@@ -163,6 +173,11 @@ class ContextWidget(QTabWidget):
                     int(context[register]['value'], 16)))
 
                 if context[register]['isValidPointer']:
+                    if context[register].get('symbol') and context[register]['symbol'].get('name'):
+                        symbol.setText(context[register]['symbol']['name'])
+                    else:
+                        unnamed[self._nativectx_model.rowCount()] = int(context[register]['value'], 16)
+
                     if 'telescope' in context[register] and context[register][
                             'telescope'] is not None:
                         telescope = QStandardItem()
@@ -186,9 +201,15 @@ class ContextWidget(QTabWidget):
                             telescope.setForeground(Qt.darkGray)
 
             self._nativectx_model.appendRow(
-                [reg_name, value_x, value_dec, telescope])
+                [reg_name, value_x, value_dec, symbol, telescope])
             self._nativectx_list.resizeColumnToContents(0)
 
+        if unnamed:
+            generation = self._generation
+            known = self._app_window.dwarf.symbols.symbolize(
+                unnamed.values(), callback=lambda symbols: self._on_symbols(generation, unnamed, symbols))
+            self._on_symbols(generation, unnamed, known)
+
     def _set_java_context(self, ptr, context):
         if self.indexOf(self._javactx_list) == -1:
             self.addTab(self._javactx_list, 'Java')
@@ -266,6 +287,14 @@ class ContextWidget(QTabWidget):
     # ************************************************************************
     # **************************** Handlers **********************************
     # ************************************************************************
+    def _on_symbols(self, generation, rows, symbols):
+        if generation != self._generation:
+            return
+        for row, address in rows.items():
+            symbol = symbols.get(address)
+            if symbol is not None:
+                self._nativectx_model.item(row, 3).setText(symbol_text(symbol))
+
     def _on_native_contextmenu(self, pos):
         index = self._nativectx_list.indexAt(pos).row()
         glbl_pt = self._nativectx_list.mapToGlobal(pos)
@@ -273,7 +302,8 @@ class ContextWidget(QTabWidget):
         if index != -1:
             item = self._nativectx_model.item(index, 1)
             dec = self._nativectx_model.item(index, 2)
-            telescope = self._nativectx_model.item(index, 3)
+            symbol = self._nativectx_model.item(index, 3)
+            telescope = self._nativectx_model.item(index, 4)
             # show contextmenu
             if self._nativectx_model.item(index, 0).data(Qt.UserRole + 1):
                 context_menu.addAction('Jump to {0}'.format(
@@ -286,6 +316,9 @@ class ContextWidget(QTabWidget):
             if dec.text():
                 context_sub_menu.addAction(
                     'Decimal', lambda: utils.copy_str_to_clipboard(dec.text()))
+            if symbol.text():
+                context_sub_menu.addAction(
+                    'Symbol', lambda: utils.copy_str_to_clipboard(symbol.text()))
             if telescope.text():
                 context_sub_menu.addAction(
                     'Telescope', lambda: utils.copy_str_to_clipboard(telescope.text()))
@@ -359,7 +392,10 @@ class ContextWidget(QTabWidget):
                         find_result[0], 1).setText(value_x)
                     self._nativectx_model.item(
                         find_result[0], 2).setText(value_dec)
-                    self._nativectx_model.item(find_result[0], 3).setText("")
+                    symbol = self._app_window.dwarf.symbols.resolve(reg_val)
+                    self._nativectx_model.item(find_result[0], 3).setText(
+                        symbol_text(symbol) if symbol is not None else "")
+                    self._nativectx_model.item(find_result[0], 4).setText("")
 
     def _on_java_context_selection_changed(self):
         if not self._javactx_list.hasFocus():
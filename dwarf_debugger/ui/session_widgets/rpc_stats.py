@@ -0,0 +1,137 @@
+"""
+    Dwarf - Copyright (C) 2018-2022 Giovanni Rocca (iGio90)
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QStandardItem, QStandardItemModel
+from PyQt5.QtWidgets import QHeaderView, QMenu, QSplitter, QFileDialog
+
+from dwarf_debugger.ui.widgets.list_view import DwarfListView
+
+API_COLUMNS = ['Api', 'Calls', 'Errors', 'p50 ms', 'p95 ms', 'p99 ms', 'Max ms', 'Args', 'Results']
+MESSAGE_COLUMNS = ['Message', 'Count', 'Rate/s', 'Bytes', 'Handler ms', 'Mean ms', 'Max ms', 'Queued ms']
+
+
+class RpcStatsWidget(QSplitter):
+    """ Api round trips and agent messages recorded by Dwarf.profiler
+    """
+
+    # ms between refreshes while visible
+    REFRESH_INTERVAL = 1000
+
+    def __init__(self, parent=None):
+        super(RpcStatsWidget, self).__init__(Qt.Vertical, parent)
+        self._app_window = parent
+
+        self._apis_model = QStandardItemModel(0, len(API_COLUMNS))
+        self._apis_list = self._create_list(self._apis_model, API_COLUMNS)
+        self._messages_model = QStandardItemModel(0, len(MESSAGE_COLUMNS))
+        self._messages_list = self._create_list(self._messages_model, MESSAGE_COLUMNS)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.REFRESH_INTERVAL)
+        self._timer.timeout.connect(self.refresh)
+
+    def _create_list(self, model, columns):
+        for i, column in enumerate(columns):
+            model.setHeaderData(i, Qt.Horizontal, column)
+            if i > 0:
+                model.setHeaderData(i, Qt.Horizontal, Qt.AlignRight, Qt.TextAlignmentRole)
+
+        list_view = DwarfListView(self, search_enabled=False)
+        list_view.setModel(model)
+        list_view.setSortingEnabled(True)
+        list_view.header().setSectionResizeMode(QHeaderView.ResizeToContents)
+        list_view.setContextMenuPolicy(Qt.CustomContextMenu)
+        list_view.customContextMenuRequested.connect(self._on_context_menu)
+        self.addWidget(list_view)
+        return list_view
+
+    # ************************************************************************
+    # **************************** Functions *********************************
+    # ************************************************************************
+    def showEvent(self, event):
+        self.refresh()
+        self._timer.start()
+        super(RpcStatsWidget, self).showEvent(event)
+
+    def hideEvent(self, event):
+        self._timer.stop()
+        super(RpcStatsWidget, self).hideEvent(event)
+
+    def refresh(self):
+        dwarf = self._app_window.dwarf
+        report = dwarf.profile_report() if dwarf is not None else None
+        if report is None:
+            report = {'apis': {}, 'messages': {}}
+
+        self._fill(self._apis_list, self._apis_model, [
+            [api, stats['count'], stats['errors'], stats['p50'], stats['p95'], stats['p99'], stats['max'],
+             stats['args_bytes'], stats['result_bytes']]
+            for api, stats in report['apis'].items()])
+        self._fill(self._messages_list, self._messages_model, [
+            [message_type, stats['count'], stats['rate'], stats['bytes'], stats['handler'],
+             stats['handler_mean'], stats['handler_max'], stats['queue_mean']]
+            for message_type, stats in report['messages'].items()])
+
+    def _fill(self, list_view, model, rows):
+        header = list_view.header()
+        sort_column = header.sortIndicatorSection()
+        sort_order = header.sortIndicatorOrder()
+
+        list_view.setSortingEnabled(False)
+        model.removeRows(0, model.rowCount())
+        for row in rows:
+            items = []
+            for value in row:
+                item = QStandardItem()
+                if isinstance(value, float):
+                    item.setText('{0:.2f}'.format(value))
+                else:
+                    item.setText(str(value))
+                if not isinstance(value, str):
+                    # sort by value, not by text
+                    item.setData(value, Qt.UserRole + 1)
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                items.append(item)
+            model.appendRow(items)
+        model.setSortRole(Qt.UserRole + 1)
+        list_view.setSortingEnabled(True)
+        list_view.sortByColumn(sort_column, sort_order)
+
+    def _reset(self):
+        dwarf = self._app_window.dwarf
+        if dwarf is not None and dwarf.profiler is not None:
+            dwarf.profiler.reset()
+        self.refresh()
+
+    def _save(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, 'Save rpc profile', 'dwarf-rpc-profile.json')
+        if file_path:
+            self._app_window.dwarf.dump_profile(file_path)
+
+    def _on_context_menu(self, pos):
+        dwarf = self._app_window.dwarf
+        if dwarf is None:
+            return
+
+        context_menu = QMenu(self)
+        if dwarf.profiler is None:
+            context_menu.addAction('Start profiling', lambda: (dwarf.enable_profiling(), self.refresh()))
+        else:
+            context_menu.addAction('Stop profiling', dwarf.disable_profiling)
+            context_menu.addAction('Reset', self._reset)
+            context_menu.addAction('Save report', self._save)
+        context_menu.exec_(self.sender().mapToGlobal(pos))
@@ -21,6 +21,7 @@ from PyQt5.QtWidgets import *
 
 from dwarf_debugger.lib.disassembler import *
 from dwarf_debugger.lib import utils
+from dwarf_debugger.lib.io import PagedMemory
 from dwarf_debugger.lib.types.instruction import Instruction
 
 from dwarf_debugger.lib.prefs import Prefs
@@ -59,9 +60,15 @@ class DisassemblyView(QAbstractScrollArea):
         self._base_line = self.fontMetrics().ascent()
 
         self._history = []
+        # LinearDisassembly of the range shown, the visible instructions from the top address
+        self._model = None
+        self._top = 0
         self._lines = []
         self._longest_bytes = 0
         self._longest_mnemonic = 0
+        # scroll bar values are offsets in the range shifted right by this
+        self._scroll_shift = 0
+        self._wheel_lines = 0.0
 
         self._ctrl_colors = {
             'background': QColor('#181818'),
@@ -88,12 +95,13 @@ class DisassemblyView(QAbstractScrollArea):
         self.setMouseTracking(True)
         self.current_jump = -1
         self._current_line = -1
-        self._highlighted_line = -1
+        self._highlighted_address = -1
 
         self._display_jumps = True
         self._follow_jumps = True
 
-        self.pos = 0
+        self.verticalScrollBar().actionTriggered.connect(self._on_scroll_action)
+        self.verticalScrollBar().valueChanged.connect(self._on_scroll_value)
 
     # ************************************************************************
     # **************************** Properties ********************************
@@ -101,12 +109,15 @@ class DisassemblyView(QAbstractScrollArea):
 
     @property
     def highlighted_line(self):
-        return self._highlighted_line
+        return self.get_line_for_address(self._highlighted_address)
 
     @highlighted_line.setter
     def highlighted_line(self, value):
         if isinstance(value, int):
-            self._highlighted_line = value
+            if 0 <= value < len(self._lines):
+                self._highlighted_address = self._lines[value].address
+            else:
+                self._highlighted_address = -1
             self.viewport().update()
 
     @property
@@ -185,32 +196,156 @@ class DisassemblyView(QAbstractScrollArea):
 
     def add_instruction(self, instruction):
         self._lines.append(instruction)
-        self.adjust()
-
-    def disasm(self, base, data, offset, num_instructions=0):
-        self._app_window.show_progress('disassembling...')
-
-        self._lines.clear()
+        self._longest_bytes = max(self._longest_bytes, len(instruction.bytes))
+        self._longest_mnemonic = max(self._longest_mnemonic, len(instruction.mnemonic))
         self.viewport().update()
 
-        h = base + offset
-        if len(self._history) == 0 or self._history[len(self._history) - 1] != h:
-            self._history.append(h)
+    def disasm(self, base, data, offset):
+        """ shows the instructions of data, a PagedMemory of the whole range or its bytes, from base + offset.
+        they are decoded as they are scrolled into view
+        """
+        address = base + offset
+        model = self._app_window.dwarf.disassembler.linear(base, data, sync_points=[address])
+        if (model is None or model.data is not data) and isinstance(data, PagedMemory):
+            # not needed, the range was cached already
+            data.close()
+        if model is None:
+            return
+
+        if model is not self._model:
+            self._close_model()
+            self._model = model
+            if isinstance(model.data, PagedMemory):
+                model.data.pagesLoaded.connect(self._on_pages_loaded)
+
+        self._scroll_shift = 0
+        while (len(model.data) >> self._scroll_shift) > 0x7fffffff:
+            self._scroll_shift += 1
+        self.verticalScrollBar().blockSignals(True)
+        self.verticalScrollBar().setRange(0, max(0, len(model.data) - 1) >> self._scroll_shift)
+        self.verticalScrollBar().blockSignals(False)
+
+        self._push_history(address)
+        self._highlighted_address = address
+        self._top = address
+        self.refresh()
+
+    def show_address(self, address):
+        """ highlights address, scrolling to it when it isn't visible. False if it's out of the range disassembled
+        """
+        disassembler = self._app_window.dwarf.disassembler
+        if self._model is None or address not in self._model or \
+                (self._model.arch, self._model.mode) != (disassembler.capstone_arch, disassembler.capstone_mode):
+            return False
+
+        self._push_history(address)
+        self._highlighted_address = address
+        if not 0 <= self.get_line_for_address(address) < self.visible_lines() - 1:
+            self._model.add_sync_point(address)
+            self._top = address
+        self.refresh()
+        return True
+
+    def _push_history(self, address):
+        if len(self._history) == 0 or self._history[len(self._history) - 1] != address:
+            self._history.append(address)
             if len(self._history) > 25:
                 self._history.pop(0)
 
-        self._longest_bytes = 0
+    def _close_model(self):
+        if self._model is not None:
+            if isinstance(self._model.data, PagedMemory):
+                self._model.data.pagesLoaded.disconnect(self._on_pages_loaded)
+            # kept for the history, unless the cache dropped it meanwhile
+            if self._model not in self._app_window.dwarf.disassembler.cache:
+                self._model.close()
+        self._model = None
+
+    def refresh(self, update_scroll_bar=True):
+        """ decodes the lines visible from the top address
+        """
+        if self._model is None:
+            self._lines = []
+            self.viewport().update()
+            return
 
-        self._app_window.dwarf.disassembler.disasm(
-            base, data, offset, self._on_disasm_finished, num_instructions=num_instructions)
+        self._lines = self._model.lines(self._top, self.visible_lines())
+        self._longest_bytes = self._model.longest_bytes
+        self._longest_mnemonic = self._model.longest_mnemonic
+        self._request_symbols()
+
+        scroll_bar = self.verticalScrollBar()
+        scroll_bar.blockSignals(True)
+        if self._lines:
+            span = self._lines[-1].address + self._lines[-1].size - self._top
+            scroll_bar.setPageStep(max(1, span >> self._scroll_shift))
+        if update_scroll_bar:
+            scroll_bar.setValue((self._top - self._model.base) >> self._scroll_shift)
+        scroll_bar.blockSignals(False)
+        self.viewport().update()
 
-    def _on_disasm_finished(self, instructions):
-        if isinstance(instructions, list):
-            self._lines = instructions
-            self.adjust()
+    def _request_symbols(self):
+        missing = self._model.missing_symbols(self._lines)
+        if missing:
+            model = self._model
+            known = self._app_window.dwarf.symbols.symbolize(
+                missing, callback=lambda symbols: self._on_symbols(model, symbols, missing))
+            if known:
+                self._on_symbols(model, known)
+
+    def _on_symbols(self, model, symbols, requested=()):
+        model.put_symbols(symbols, requested=requested)
+        if model is self._model:
+            self.viewport().update()
 
-        self._running_disasm = False
-        self._app_window.hide_progress()
+    def scroll_lines(self, count):
+        """ moves the top line count instructions down, up when count is negative
+        """
+        if self._model is None or not count:
+            return
+        if count > 0:
+            lines = self._model.lines(self._top, count + 1)
+            if lines:
+                self._top = lines[min(count, len(lines) - 1)].address
+        else:
+            self._top = self._model.previous(self._top, -count)
+        self.refresh()
+
+    def _on_scroll_action(self, action):
+        if self._model is None:
+            return
+        if action == QAbstractSlider.SliderSingleStepAdd:
+            self.scroll_lines(1)
+        elif action == QAbstractSlider.SliderSingleStepSub:
+            self.scroll_lines(-1)
+        elif action == QAbstractSlider.SliderPageStepAdd:
+            self.scroll_lines(max(1, self.visible_lines() - 2))
+        elif action == QAbstractSlider.SliderPageStepSub:
+            self.scroll_lines(-max(1, self.visible_lines() - 2))
+        else:
+            return
+        # the position applied once the action is done
+        self.verticalScrollBar().setSliderPosition(self.verticalScrollBar().value())
+
+    def _on_scroll_value(self, value):
+        # dragged: the offset is aligned on the instruction covering it
+        if self._model is None:
+            return
+        self._top = self._model.align(self._model.base + (value << self._scroll_shift))
+        self.refresh(update_scroll_bar=not self.verticalScrollBar().isSliderDown())
+
+    def _on_pages_loaded(self, offset, length):
+        # the model dropped what it decoded there already
+        self.refresh(update_scroll_bar=False)
+
+    def on_memory_written(self, address, data):
+        """ the bytes at address were patched
+        """
+        if self._model is not None and address in self._model:
+            if isinstance(self._model.data, PagedMemory):
+                self._model.data.write(address - self._model.base, data)
+            self._model.invalidate(address, len(data))
+            self.refresh()
 
     def get_line_for_address(self, ptr):
         ptr = utils.parse_ptr(ptr)
@@ -221,18 +356,14 @@ class DisassemblyView(QAbstractScrollArea):
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
-        self.adjust()
-
-    def adjust(self):
-        for line in self._lines:
-            if line:
-                if len(line.bytes) > self._longest_bytes:
-                    self._longest_bytes = len(line.bytes)
-                if len(line.mnemonic) > self._longest_mnemonic:
-                    self._longest_mnemonic = len(line.mnemonic)
-        self.verticalScrollBar().setRange(0, len(self._lines) - self.visible_lines() + 1)
-        self.verticalScrollBar().setPageStep(self.visible_lines())
-        self.viewport().update()
+        self.refresh()
+
+    def wheelEvent(self, event):
+        self._wheel_lines -= event.angleDelta().y() / 120 * QApplication.wheelScrollLines()
+        lines = int(self._wheel_lines)
+        self._wheel_lines -= lines
+        self.scroll_lines(lines)
+        event.accept()
 
     def number_of_lines(self):
         return len(self._lines)
@@ -270,12 +401,12 @@ class DisassemblyView(QAbstractScrollArea):
     def paint_jumps(self, painter):
         # TODO: order by distance
         painter.setRenderHint(QPainter.HighQualityAntialiasing)
-        jump_list = [x.address for x in self._lines[self.pos:self.pos + self.visible_lines()] if x.is_jump or x.is_call]
-        #jump_targets = [x.jump_address for x in self._lines[self.pos:self.pos + self.visible_lines()] if x.address in jump_list]
+        jump_list = [x.address for x in self._lines if x.is_jump or x.is_call]
+        #jump_targets = [x.jump_address for x in self._lines if x.address in jump_list]
 
         jump_targets = []
 
-        for x in self._lines[self.pos:self.pos + self.visible_lines()]:
+        for x in self._lines:
             if x.address in jump_list:
                 if x.is_call:
                     jump_targets.append(x.call_address)
@@ -284,7 +415,7 @@ class DisassemblyView(QAbstractScrollArea):
 
         drawing_pos_x = self._jumps_width - 10
 
-        for index, line in enumerate(self._lines[self.pos:self.pos + self.visible_lines()]):
+        for index, line in enumerate(self._lines):
             if line.address in jump_list:  # or line.address in jump_targets:
                 if line.address == self.current_jump:
                     self._solid_pen.setColor(self._ctrl_colors['jump_arrows_hover'])
@@ -375,7 +506,8 @@ class DisassemblyView(QAbstractScrollArea):
                     break
 
     def paint_line(self, painter, num_line, line):
-        if num_line - 1 == self._highlighted_line:
+        highlighted = bool(line) and line.address == self._highlighted_address
+        if highlighted:
             painter.setPen(self._ctrl_colors['selection_fg'])
         else:
             painter.setPen(self._ctrl_colors['foreground'])
@@ -430,7 +562,7 @@ class DisassemblyView(QAbstractScrollArea):
             self._char_width)
         drawing_pos_x += (len(str_fmt.format(line.address)) * int(self._char_width))
 
-        if num_line - 1 == self._highlighted_line:
+        if highlighted:
             painter.setPen(self._ctrl_colors['selection_fg'])
         else:
             painter.setPen(QColor('#444'))
@@ -443,7 +575,7 @@ class DisassemblyView(QAbstractScrollArea):
                 (self._app_window.dwarf.pointer_size * 2) * int(self._char_width)) + (self._longest_bytes + 2) * (
                                 int(self._char_width) * 3)
         painter.setPen(QColor('#39c'))
-        if num_line - 1 == self._highlighted_line:
+        if highlighted:
             painter.setPen(self._ctrl_colors['selection_fg'])
         painter.drawText(drawing_pos_x, drawing_pos_y, line.mnemonic)
         if line.is_jump or line.is_call:
@@ -451,14 +583,16 @@ class DisassemblyView(QAbstractScrollArea):
         else:
             painter.setPen(self._ctrl_colors['foreground'])
 
-        if num_line - 1 == self._highlighted_line:
+        if highlighted:
             painter.setPen(self._ctrl_colors['selection_fg'])
 
         drawing_pos_x += (self._longest_mnemonic + 1) * int(self._char_width)
-        if line.operands and not line.is_jump and not line.is_call:
-            ops_str = line.op_str.split(', ', len(line.operands) - 1)
+        operands = line.operands if not line.is_jump and not line.is_call else None
+        if operands:
+            ops_str = line.op_str.split(', ', len(operands) - 1)
             a = 0
-            for op in line.operands:
+            # implicit operands aren't written out
+            for op in operands[:len(ops_str)]:
                 if op.type == CS_OP_IMM:
                     painter.setPen(QColor('#ff5500'))
                 elif op.type == 1:
@@ -466,15 +600,15 @@ class DisassemblyView(QAbstractScrollArea):
                 else:
                     painter.setPen(self._ctrl_colors['foreground'])
 
-                if num_line - 1 == self._highlighted_line:
+                if highlighted:
                     painter.setPen(self._ctrl_colors['selection_fg'])
 
                 painter.drawText(drawing_pos_x, drawing_pos_y, ops_str[a])
                 drawing_pos_x += len(ops_str[a] * int(self._char_width))
 
-                if len(line.operands) > 1 and a < len(line.operands) - 1:
+                if len(ops_str) > 1 and a < len(ops_str) - 1:
                     painter.setPen(self._ctrl_colors['foreground'])
-                    if num_line - 1 == self._highlighted_line:
+                    if highlighted:
                         painter.setPen(self._ctrl_colors['selection_fg'])
                     painter.drawText(drawing_pos_x, drawing_pos_y, ', ')
                     drawing_pos_x += 2 * int(self._char_width)
@@ -502,7 +636,7 @@ class DisassemblyView(QAbstractScrollArea):
             drawing_pos_x += (len(line.symbol_name) + 1) * int(self._char_width)
 
         if line.string and not line.is_jump and not line.is_call:
-            if num_line - 1 == self._highlighted_line:
+            if highlighted:
                 painter.setPen(self._ctrl_colors['selection_fg'])
             else:
                 painter.setPen(QColor('#aaa'))
@@ -544,8 +678,6 @@ class DisassemblyView(QAbstractScrollArea):
         if not self._lines:
             return
 
-        self.pos = self.verticalScrollBar().value()
-
         # fill background
         painter.fillRect(0, 0, self.viewport().width(), self.viewport().height(), self._ctrl_colors['background'])
 
@@ -556,11 +688,12 @@ class DisassemblyView(QAbstractScrollArea):
             painter.fillRect(drawing_pos_x, 0, self._breakpoint_linewidth, self.viewport().height(),
                              self._ctrl_colors['jump_arrows'])
 
-        for i, line in enumerate(self._lines[self.pos:self.pos + self.visible_lines()]):
+        for i, line in enumerate(self._lines):
             if i > self.visible_lines():
                 break
 
-            if i == self._current_line and i != self._highlighted_line:
+            highlighted = line.address == self._highlighted_address
+            if i == self._current_line and not highlighted:
                 y_pos = self._header_height + (i * (self._char_height + self._ver_spacing))
                 y_pos += (self._char_height * 0.5)
                 y_pos -= self._ver_spacing
@@ -568,7 +701,7 @@ class DisassemblyView(QAbstractScrollArea):
                 painter.fillRect(self._jumps_width + self._breakpoint_linewidth, y_pos - 1, self.viewport().width(),
                                  self._char_height + 2, self._ctrl_colors['line'])
 
-            if i == self._highlighted_line:
+            if highlighted:
                 y_pos = self._header_height + (i * (self._char_height + self._ver_spacing))
                 y_pos += (self._char_height * 0.5)
                 y_pos -= self._ver_spacing
@@ -591,13 +724,13 @@ class DisassemblyView(QAbstractScrollArea):
 
         index = self.pixel_to_line(loc_x, loc_y)
         if 0 <= index < self.visible_lines():
-            if index + self.pos >= len(self._lines):
+            if index >= len(self._lines):
                 return
             left_side = self._breakpoint_linewidth + self._jumps_width
             addr_width = ((self._app_window.dwarf.pointer_size * 2) * int(self._char_width))
 
             # get instruction
-            _instruction = self._lines[index + self.pos]
+            _instruction = self._lines[index]
             if not _instruction or not isinstance(_instruction, Instruction):
                 return
 
@@ -634,11 +767,11 @@ class DisassemblyView(QAbstractScrollArea):
 
             if 0 <= index < self.visible_lines():
                 self._current_line = index
-                if index + self.pos < len(self._lines):
-                    if isinstance(self._lines[index + self.pos], Instruction):
-                        _instruction = self._lines[index + self.pos]
+                if index < len(self._lines):
+                    if isinstance(self._lines[index], Instruction):
+                        _instruction = self._lines[index]
                         if _instruction.is_jump or _instruction.is_call:
-                            self.current_jump = self._lines[index + self.pos].address
+                            self.current_jump = self._lines[index].address
 
             # self.viewport().update(0, 0, self._breakpoint_linewidth + self._jumps_width, self.viewport().height())
             y_pos = self._header_height + (index * (self._char_height + self._ver_spacing))
@@ -699,9 +832,9 @@ class DisassemblyView(QAbstractScrollArea):
         index = self.pixel_to_line(loc_x, loc_y)
         address = -1
         if 0 <= index < self.visible_lines():
-            if index + self.pos < len(self._lines):
-                if isinstance(self._lines[index + self.pos], Instruction):
-                    address = self._lines[index + self.pos].address
+            if index < len(self._lines):
+                if isinstance(self._lines[index], Instruction):
+                    address = self._lines[index].address
                     addr_str = hex(address)
 
                     context_menu.addAction(addr_str)
@@ -740,4 +873,4 @@ class DisassemblyView(QAbstractScrollArea):
             else:
                 self._app_window.dwarf.disassembler.capstone_mode = CS_MODE_ARM
 
-            self.debug_panel.jump_to_address(self._current_line, 1, True)
+            self.debug_panel.jump_to_address(self._top, 1, True)
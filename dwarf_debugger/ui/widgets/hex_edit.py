@@ -28,6 +28,7 @@ from PyQt5.QtWidgets import (QAbstractScrollArea, QMenu)
 
 from dwarf_debugger.ui.dialogs.dialog_input import InputDialog
 from dwarf_debugger.lib import utils
+from dwarf_debugger.lib.io import PagedMemory
 
 from dwarf_debugger.ui.widgets.utils.caret import Caret
 from dwarf_debugger.ui.widgets.utils.selection import Selection
@@ -135,6 +136,8 @@ class HexEditor(QAbstractScrollArea):
 
         self.debug_panel = debug_panel
         self.data = None
+        # data is a PagedMemory loading chunks on demand instead of bytes
+        self._paged = False
 
         self.base = 0
 
@@ -637,13 +640,24 @@ class HexEditor(QAbstractScrollArea):
         ptr_size = self.app.dwarf.pointer_size
         start = self.caret.position
         end = self.caret.position + ptr_size
-        ptr = int.from_bytes(self.data[start:end], sys.byteorder)
+        data = self.read_data(start, end)
+        if data is None or len(data) < ptr_size:
+            return None
+        ptr = int.from_bytes(data, sys.byteorder)
         is_valid_ptr = self.app.dwarf.dwarf_api('isValidPointer', ptr)
         if ptr > 0 and is_valid_ptr:
             return ptr
 
         return None
 
+    def read_data(self, start, end):
+        """ bytes of [start, end) of data, the chunks of a PagedMemory not loaded yet are read first.
+        None when they can't be read
+        """
+        if isinstance(self.data, PagedMemory):
+            return self.data.read(start, end - start)
+        return bytes(self.data[start:end])
+
     def modify_data(self, text):
         """ change data
         """
@@ -670,9 +684,7 @@ class HexEditor(QAbstractScrollArea):
             return
 
         # change byte in data
-        data_bt = bytearray(self.data)
-        data_bt[self.caret.position] = _byte
-        self.data = bytes(data_bt)
+        self._write_data(self.caret.position, bytes([_byte]))
 
         # emit datachanged
         self.dataChanged.emit(self.caret.position, 1)
@@ -695,6 +707,14 @@ class HexEditor(QAbstractScrollArea):
             self.caret.move_right(len(self.data))
         self._force_repaint(True)
 
+    def _write_data(self, position, data):
+        if self._paged:
+            self.data.write(position, data)
+        else:
+            data_bt = bytearray(self.data)
+            data_bt[position:position + len(data)] = data
+            self.data = bytes(data_bt)
+
     def get_highlight(self, address):
         """ Checks if given pos is already colored
             returns False or highlighttype
@@ -802,6 +822,10 @@ class HexEditor(QAbstractScrollArea):
     def make_c_array(self, start, end):
         """ makes an c array from data used by copy as c code
         """
+        data = self.read_data(start, end)
+        if data is None:
+            return None
+
         c_code = '// generated by dwarf\nunsigned char rawData[{0}] = '.format(
             end - start)
         c_code += '{\n\t'
@@ -812,9 +836,9 @@ class HexEditor(QAbstractScrollArea):
                 c_code += '\n\t'  # next line
 
             if self._hex_style == 'upper':
-                c_code += '0x{0:02X}, '.format(self.data[i])
+                c_code += '0x{0:02X}, '.format(data[i - start])
             else:
-                c_code += '0x{0:02x}, '.format(self.data[i])
+                c_code += '0x{0:02x}, '.format(data[i - start])
 
         # remove last ', '
         c_code = c_code[0:-2]
@@ -825,6 +849,10 @@ class HexEditor(QAbstractScrollArea):
     def make_py_array(self, start, end):
         """ makes python array from data
         """
+        data = self.read_data(start, end)
+        if data is None:
+            return None
+
         py_code = '# generated by dwarf\nraw_data = [\n\t'
 
         for i in range(start, end):
@@ -833,9 +861,9 @@ class HexEditor(QAbstractScrollArea):
                 py_code += '\n\t'  # next line
 
             if self._hex_style == 'upper':
-                py_code += '0x{0:02X}, '.format(self.data[i])
+                py_code += '0x{0:02X}, '.format(data[i - start])
             else:
-                py_code += '0x{0:02x}, '.format(self.data[i])
+                py_code += '0x{0:02x}, '.format(data[i - start])
 
         # remove last ', '
         py_code = py_code[0:-2]
@@ -846,6 +874,10 @@ class HexEditor(QAbstractScrollArea):
     def make_js_array(self, start, end):
         """ makes js array from data
         """
+        data = self.read_data(start, end)
+        if data is None:
+            return None
+
         js_code = '// generated by dwarf\nvar rawData = [\n\t'
 
         for i in range(start, end):
@@ -854,9 +886,9 @@ class HexEditor(QAbstractScrollArea):
                 js_code += '\n\t'  # next line
 
             if self._hex_style == 'upper':
-                js_code += '0x{0:02X}, '.format(self.data[i])
+                js_code += '0x{0:02X}, '.format(data[i - start])
             else:
-                js_code += '0x{0:02x}, '.format(self.data[i])
+                js_code += '0x{0:02x}, '.format(data[i - start])
 
         # remove last ', '
         js_code = js_code[0:-2]
@@ -866,8 +898,17 @@ class HexEditor(QAbstractScrollArea):
 
     def set_data(self, data, base=0, offset=None):
         """ Set new Data
+
+            data can be bytes or a PagedMemory, which is painted as it gets loaded
         """
+        if self._paged and data is not self.data:
+            self.data.pagesLoaded.disconnect(self._on_pages_loaded)
+            self.data.close()
+
         self.data = data
+        self._paged = isinstance(data, PagedMemory)
+        if self._paged:
+            self.data.pagesLoaded.connect(self._on_pages_loaded)
         self.base = base
         self.adjust()
 
@@ -1101,6 +1142,11 @@ class HexEditor(QAbstractScrollArea):
 
         self._force_repaint()
 
+    def _on_pages_loaded(self, offset, length):
+        visible = self.visible_lines() * self.bytes_per_line
+        if offset < self.pos + visible and offset + length > self.pos:
+            self.viewport().update()
+
     def _clear_error(self):
         """ resets error
         """
@@ -1157,6 +1203,8 @@ class HexEditor(QAbstractScrollArea):
 
                 context_menu.addAction(
                     "Follow &pointer", self.on_cm_follow_pointer)
+                context_menu.addAction(
+                    "Find pointers to", lambda: self.app.show_pointer_scan(address))
                 context_menu.addSeparator()
 
                 if self.app.watchpoints_panel:
@@ -1248,7 +1296,7 @@ class HexEditor(QAbstractScrollArea):
             self.display_error('Invalid length provided')
             _len = 0
         if _len > 0:
-            self.debug_panel.dump_data(self.caret.position, _len)
+            self.debug_panel.dump_data(self.base + self.caret.position, _len)
 
     def on_cm_copy(self):
         """ copy as plain ascii/hex
@@ -1259,11 +1307,14 @@ class HexEditor(QAbstractScrollArea):
         if start == end:
             return
 
+        data = self.read_data(start, end)
+        if data is None:
+            self.display_error('Unable to read the selected memory.')
+            return
+
         if self.caret.mode == 'ascii':
-            data = self.data[start:end]
             pyperclip.copy(self.to_ascii(data))
         else:
-            data = self.data[start:end]
             data_str = "".join(['{:02x} '.format(x) for x in data])
             pyperclip.copy(data_str)
 
@@ -1280,11 +1331,18 @@ class HexEditor(QAbstractScrollArea):
         what = menu.text()
 
         if what == 'C Source':
-            pyperclip.copy(self.make_c_array(start, end))
+            code = self.make_c_array(start, end)
         elif what == 'Python Source':
-            pyperclip.copy(self.make_py_array(start, end))
+            code = self.make_py_array(start, end)
         elif what == 'JS Source':
-            pyperclip.copy(self.make_js_array(start, end))
+            code = self.make_js_array(start, end)
+        else:
+            return
+
+        if code is None:
+            self.display_error('Unable to read the selected memory.')
+            return
+        pyperclip.copy(code)
 
     def on_cm_paste(self):
         """ paste plain ascii or hex
@@ -1337,12 +1395,7 @@ class HexEditor(QAbstractScrollArea):
         else:
             start_loc = start
 
-        data_bt = bytearray(self.data)
-
-        for i in range(start_loc, start_loc + count):
-            data_bt[i] = byte
-
-        self.data = bytes(data_bt)
+        self._write_data(start_loc, bytes([byte]) * count)
         self.add_highlight(HighLight('edited', start_loc + self.base, count))
         self.dataChanged.emit(start_loc, count)
         self.viewChanged.emit()
@@ -1674,6 +1727,11 @@ class HexEditor(QAbstractScrollArea):
 
         self.pos = self.verticalScrollBar().value() * self.bytes_per_line
 
+        if self._paged:
+            # visible window plus one screen above and below, scrolling won't show placeholders
+            visible = self.visible_lines() * self.bytes_per_line
+            self.data.prefetch(self.pos - visible, visible * 3)
+
         # set pos_y
         drawing_pos_y = self._header_height + self._char_height + self._ver_spacing
 
@@ -1700,6 +1758,7 @@ class HexEditor(QAbstractScrollArea):
             # get data
             (address, length, ascii_) = line
             data = self.data[address:address + length]
+            is_loaded = not self._paged or self.data.is_loaded(address, length)
 
             # fixup offset
             address += self.base
@@ -1758,7 +1817,9 @@ class HexEditor(QAbstractScrollArea):
                     painter.setPen(self._highlight_colors[highlight])
 
                 # paint hex
-                if self._hex_style == 'upper':
+                if not is_loaded:
+                    painter.drawText(drawing_pos_x, drawing_pos_y, '?? ')
+                elif self._hex_style == 'upper':
                     painter.drawText(drawing_pos_x, drawing_pos_y,
                                      "{:02X} ".format(byte))
                 else:
@@ -1772,6 +1833,9 @@ class HexEditor(QAbstractScrollArea):
             else:
                 painter.setPen(self._ctrl_colors['foreground'])
 
+            if not is_loaded:
+                ascii_ = ' ' * length
+
             # draw whole ascii if no highlight
             if not has_highlight and not is_in_selection:
                 painter.drawText(self._ascii_start, drawing_pos_y, ascii_)
@@ -1819,7 +1883,11 @@ class HexEditor(QAbstractScrollArea):
         self._addr_width_changed()
 
     def on_script_destroyed(self):
-        self.data = None
+        self.clear_panel()
 
     def clear_panel(self):
+        if self._paged:
+            self.data.pagesLoaded.disconnect(self._on_pages_loaded)
+            self.data.close()
+            self._paged = False
         self.data = None
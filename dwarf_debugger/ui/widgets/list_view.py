@@ -240,6 +240,12 @@ class DwarfListView(QTreeView):
         accept, input_ = InputDialog.input(
             self, hint='Search something in this list', placeholder='search...', input_content=self._current_search)
 
+        if accept and hasattr(self.model(), 'set_filter'):
+            # models filtering their rows themselves
+            self._current_search = input_
+            self.model().set_filter(input_)
+            return
+
         if accept and not input_:
             # reset search
             self._current_search = ''
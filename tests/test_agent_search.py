@@ -0,0 +1,112 @@
+""" memorySearch of the agent, against a live child process. skipped without frida or when attaching isn't allowed
+"""
+import subprocess
+import sys
+import time
+
+import pytest
+
+frida = pytest.importorskip('frida')
+
+from dwarf_debugger.lib import utils  # noqa: E402
+from dwarf_debugger.lib.core import Dwarf  # noqa: E402
+
+MB = 1024 * 1024
+SIZE = 12 * MB
+PATTERN = 'deadbeef1337'
+# an unreadable page in the second chunk of the search
+HOLE = 6 * MB
+PLANTED = [0x100, 4 * MB - 3, HOLE - 0x10, HOLE + 0x1020, 10 * MB + 5]
+
+CHILD = '''
+import ctypes, mmap, sys
+m = mmap.mmap(-1, %d)
+address = ctypes.addressof(ctypes.c_char.from_buffer(m))
+for offset in %r:
+    m[offset:offset + 6] = bytes.fromhex(%r)
+ctypes.CDLL(None).mprotect(ctypes.c_void_p(address + %d), 0x1000, 0)
+print(hex(address), flush=True)
+sys.stdin.read()
+''' % (SIZE, PLANTED, PATTERN, HOLE)
+
+
+@pytest.fixture(scope='module')
+def target():
+    if not sys.platform.startswith('linux'):
+        pytest.skip('the target child process needs linux')
+    child = subprocess.Popen([sys.executable, '-c', CHILD], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    address = int(child.stdout.readline(), 16)
+    try:
+        session = frida.attach(child.pid)
+    except frida.InvalidOperationError as e:
+        child.kill()
+        pytest.skip('unable to attach: %s' % str(e))
+    except frida.PermissionDeniedError as e:
+        child.kill()
+        pytest.skip('unable to attach: %s' % str(e))
+    yield child, session, address
+    session.detach()
+    child.kill()
+    child.wait()
+
+
+@pytest.fixture
+def dwarf(qapp, target):
+    child, session, address = target
+    dwarf = Dwarf()
+    dwarf._process = session
+    dwarf._pid = child.pid
+    with open(utils.resource_path('lib/core.js'), 'r') as f:
+        dwarf._script = session.create_script(f.read(), runtime='v8')
+    dwarf._script.on('message', dwarf._on_message)
+    dwarf._script.load()
+    dwarf._script.exports.init(False, False, False, True)
+    yield dwarf
+    dwarf._script.unload()
+
+
+def search(qapp, dwarf, ranges, limit=0, on_progress=None):
+    events = {'matches': [], 'progress': [], 'complete': None}
+    dwarf.onMemorySearchMatches.connect(lambda search_id, items: events['matches'].extend(items))
+    dwarf.onMemorySearchProgress.connect(lambda search_id, progress: events['progress'].append(progress))
+    dwarf.onMemorySearchComplete.connect(lambda search_id, complete: events.update(complete=complete))
+    if on_progress is not None:
+        dwarf.onMemorySearchProgress.connect(on_progress)
+
+    search_id = dwarf.memory_search(ranges, PATTERN, limit=limit)
+    deadline = time.time() + 30
+    while events['complete'] is None and time.time() < deadline:
+        qapp.processEvents()
+        time.sleep(0.005)
+    assert events['complete'] is not None
+    assert all(item['id'] == search_id for item in events['matches'])
+    return events
+
+
+def test_matches_stream_around_chunks_and_holes(qapp, dwarf, target):
+    address = target[2]
+    events = search(qapp, dwarf, [(address, SIZE)])
+
+    assert sorted(int(item['address'], 16) - address for item in events['matches']) == PLANTED
+    assert events['complete']['matches'] == len(PLANTED)
+    assert not events['complete']['cancelled'] and not events['complete']['limited']
+    done = [progress['done'] for progress in events['progress']]
+    assert done == sorted(done) and done[-1] == SIZE
+
+
+def test_limit(qapp, dwarf, target):
+    address = target[2]
+    events = search(qapp, dwarf, [(address, SIZE)], limit=2)
+
+    assert len(events['matches']) == 2
+    assert events['complete']['limited'] and events['complete']['matches'] == 2
+
+
+def test_cancel(qapp, dwarf, target):
+    address = target[2]
+    events = search(qapp, dwarf, [(address, SIZE)],
+                    on_progress=lambda search_id, progress: dwarf.cancel_memory_search(search_id))
+
+    assert events['complete']['cancelled']
+    assert len(events['matches']) < len(PLANTED)
+    assert events['progress'][-1]['done'] < SIZE
@@ -0,0 +1,100 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from dwarf_debugger.lib import io as dwarf_io
+from dwarf_debugger.lib.io import ChunkedRead
+
+BASE = 0x10000000
+MB = 1024 * 1024
+
+
+class FakeDwarf(object):
+    """ readBytes of address & 0xff, None when touching an unreadable page
+    """
+
+    def __init__(self, unreadable=()):
+        self.unreadable = set(unreadable)
+        self.reads = []
+        self._lock = threading.Lock()
+
+    def dwarf_api(self, api, args):
+        assert api == 'readBytes'
+        ptr, length = args
+        with self._lock:
+            self.reads.append((ptr, length))
+        if any(page in self.unreadable for page in range(ptr - ptr % 0x1000, ptr + length, 0x1000)):
+            return None
+        return pattern(ptr, length)
+
+
+def pattern(ptr, length):
+    return (bytes(range(256)) * (length // 256 + 2))[ptr & 0xff:(ptr & 0xff) + length]
+
+
+def expected(ptr, length, unreadable=()):
+    data = bytearray(pattern(ptr, length))
+    for page in unreadable:
+        start, end = max(page, ptr), min(page + 0x1000, ptr + length)
+        if start < end:
+            data[start - ptr:end - ptr] = bytes(end - start)
+    return data
+
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_read(workers):
+    dwarf = FakeDwarf()
+    read = ChunkedRead(dwarf, BASE + 3, 3 * MB + 5, workers=workers, chunk_size=ChunkedRead.MIN_CHUNK).run()
+
+    assert read.buffer == expected(BASE + 3, 3 * MB + 5)
+    assert read.holes == [] and read.unreadable == 0
+    # no byte read twice
+    assert sum(length for _, length in dwarf.reads) == 3 * MB + 5
+
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_holes_are_split_down_to_pages_and_merged(workers):
+    unreadable = {BASE + 0x5000, BASE + 0x6000, BASE + 0x100000}
+    dwarf = FakeDwarf(unreadable)
+    read = ChunkedRead(dwarf, BASE + 0x10, 2 * MB, workers=workers, chunk_size=ChunkedRead.MIN_CHUNK).run()
+
+    assert read.buffer == expected(BASE + 0x10, 2 * MB, unreadable)
+    assert read.holes == [(0x5000 - 0x10, 0x2000), (0x100000 - 0x10, 0x1000)]
+    assert read.unreadable == 0x3000
+
+
+def test_unreadable_head_and_tail():
+    unreadable = {BASE, BASE + 0x3000}
+    read = ChunkedRead(FakeDwarf(unreadable), BASE + 0x800, 0x3000).run()
+
+    assert read.holes == [(0, 0x800), (0x2800, 0x800)]
+    assert read.buffer == expected(BASE + 0x800, 0x3000, unreadable)
+
+
+def test_nothing_readable():
+    read = ChunkedRead(FakeDwarf({BASE + page for page in range(0, 0x10000, 0x1000)}), BASE, 0x10000).run()
+    assert read.holes == [(0, 0x10000)]
+
+
+def test_chunk_size_follows_the_round_trips(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(dwarf_io, 'time', SimpleNamespace(perf_counter=lambda: clock[0]))
+    read = ChunkedRead(FakeDwarf(), BASE, 4 * MB, workers=1, chunk_size=ChunkedRead.MIN_CHUNK)
+
+    # instant reads, doubled after each full chunk: 256k, 512k, 1m, 2m and the last 256k
+    read.run()
+    assert read.chunk_size == 4 * MB
+
+    # slow ones shrink it again
+    dwarf = FakeDwarf()
+    read = ChunkedRead(dwarf, BASE, 16 * MB, workers=1, chunk_size=ChunkedRead.MAX_CHUNK)
+    dwarf_api = dwarf.dwarf_api
+
+    def slow(api, args):
+        clock[0] += ChunkedRead.TARGET_TIME * 3
+        return dwarf_api(api, args)
+    dwarf.dwarf_api = slow
+    read.run()
+    assert read.chunk_size == ChunkedRead.MIN_CHUNK
+    assert dwarf.reads[0][1] == ChunkedRead.MAX_CHUNK and dwarf.reads[1][1] == ChunkedRead.MAX_CHUNK // 2
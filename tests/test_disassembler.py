@@ -0,0 +1,169 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+capstone = pytest.importorskip('capstone')
+
+from capstone import CS_ARCH_ARM64, CS_ARCH_X86, CS_MODE_64, CS_MODE_ARM  # noqa: E402
+
+from dwarf_debugger.lib.disassembler import DisassemblyCache, LinearDisassembly  # noqa: E402
+from dwarf_debugger.lib.io import PageCache  # noqa: E402
+
+BASE = 0x10000
+# nop; push rbp; mov rbp, rsp; ret
+CODE = b'\x90\x55\x48\x89\xe5\xc3' * 0x100
+
+
+def fake_dwarf():
+    return SimpleNamespace(pointer_size=8, symbols=SimpleNamespace(resolve=lambda target: None))
+
+
+def model(base=BASE, data=CODE):
+    return LinearDisassembly(fake_dwarf(), CS_ARCH_X86, CS_MODE_64, base, data)
+
+
+def test_hit_and_miss():
+    cache = DisassemblyCache()
+    key = DisassemblyCache.key(CS_ARCH_X86, CS_MODE_64, BASE, CODE)
+    assert cache.get(key) is None
+
+    cached = model()
+    cache.put(key, cached)
+    assert cache.get(DisassemblyCache.key(CS_ARCH_X86, CS_MODE_64, BASE, bytes(CODE))) is cached
+    assert cached in cache
+
+    # other bytes, base or mode are other models
+    assert cache.get(DisassemblyCache.key(CS_ARCH_X86, CS_MODE_64, BASE, b'\xcc' + CODE[1:])) is None
+    assert cache.get(DisassemblyCache.key(CS_ARCH_X86, CS_MODE_64, BASE + 1, CODE)) is None
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_write_drops_the_overlapping_models():
+    page_cache = PageCache()
+    cache = DisassemblyCache()
+    page_cache.add_listener(cache.invalidate)
+
+    first, second = model(), model(BASE + 0x10000)
+    cache.put('first', first)
+    cache.put('second', second)
+
+    # only writable pages went away, code stays
+    page_cache.invalidate(writable_only=True)
+    assert first in cache and second in cache
+
+    page_cache.invalidate(BASE + len(CODE) - 1, 4)
+    assert first not in cache and second in cache
+    assert cache.get('first') is None
+
+    page_cache.clear()
+    assert second not in cache
+
+
+def test_eviction_follows_the_budget():
+    models = [model(BASE + i * 0x10000) for i in range(4)]
+    for cached in models:
+        cached.lines(cached.base, 64)
+    size = models[0].approximate_size
+    assert size > len(CODE)
+
+    cache = DisassemblyCache(budget=size * 2)
+    for i, cached in enumerate(models[:3]):
+        cache.put(i, cached)
+        if i == 1:
+            # the first one is the most recent now
+            cache.get(0)
+    assert models[0] in cache and models[1] not in cache and models[2] in cache
+    assert cache.evictions == 1
+    assert cache.size == size * 2
+
+    # one larger than the budget is still kept, it's the one shown
+    cache = DisassemblyCache(budget=size // 2)
+    cache.put(0, models[3])
+    assert models[3] in cache
+
+
+def x86_code(count, seed=3):
+    """ random x64 instructions of 1 to 10 bytes, and where each one starts
+    """
+    rand = random.Random(seed)
+    encodings = [
+        lambda: b'\x90',  # nop
+        lambda: b'\x55',  # push rbp
+        lambda: b'\x48\x89\xe5',  # mov rbp, rsp
+        lambda: b'\xb8' + rand.randbytes(4),  # mov eax, imm32
+        lambda: b'\x48\xb8' + rand.randbytes(8),  # movabs rax, imm64
+        lambda: b'\x48\x8d\x05' + rand.randbytes(4),  # lea rax, [rip + disp32]
+        lambda: b'\x83\xc0' + rand.randbytes(1),  # add eax, imm8
+    ]
+    code = bytearray()
+    starts = []
+    for _ in range(count):
+        starts.append(BASE + len(code))
+        code += rand.choice(encodings)()
+    return bytes(code), starts
+
+
+def test_backward_sweep_from_a_sync_point():
+    code, starts = x86_code(600)
+    linear = model(data=code)
+    assert len(code) < LinearDisassembly.SYNC_DISTANCE
+
+    # the start of the range is a sync point, going back lands on the real instructions
+    for index in (1, 5, 100, 599):
+        for count in (1, 3, 40):
+            assert linear.previous(starts[index], count) == starts[max(0, index - count)]
+    assert linear.previous(BASE, 5) == BASE
+
+
+def test_backward_sweep_without_sync_point():
+    code, starts = x86_code(6000)
+    assert starts[-1] - BASE > 2 * LinearDisassembly.SYNC_DISTANCE
+
+    for index in (3000, 5000, 5999):
+        linear = model(data=code)
+        address = starts[index]
+        previous = linear.previous(address, 10)
+        assert address - 10 * 15 <= previous < address
+        # the sweep falls in step with the real instructions before reaching the address
+        lines = linear.lines(previous, 20)
+        assert address in [line.address for line in lines]
+
+        # a known function is a sync point again
+        linear = model(data=code)
+        linear.add_sync_point(starts[index - 200])
+        assert linear.previous(address, 10) == starts[index - 10]
+
+
+def test_forward_lines_are_linked_back():
+    code, starts = x86_code(100)
+    linear = model(data=code)
+    assert [line.address for line in linear.lines(BASE, 50)] == starts[:50]
+
+    linear._sweep = None
+    # known from the lines decoded, no sweep needed
+    assert linear.previous(starts[49], 20) == starts[29]
+
+    linear.invalidate(starts[40], 1)
+    assert starts[41] not in linear._previous
+
+
+def test_align():
+    code, starts = x86_code(300)
+    linear = model(data=code)
+    long_ones = [start for start, end in zip(starts, starts[1:]) if end - start >= 5]
+    for start in long_ones[:20]:
+        assert linear.align(start) == start
+        assert linear.align(start + 3) == start
+    # clamped to the range
+    assert linear.align(BASE - 10) == BASE
+    assert linear.align(BASE + len(code) + 10) == linear.align(BASE + len(code) - 1)
+
+
+def test_fixed_size_instructions():
+    # arm64 nops
+    linear = LinearDisassembly(fake_dwarf(), CS_ARCH_ARM64, CS_MODE_ARM, BASE, b'\x1f\x20\x03\xd5' * 0x100)
+    assert linear.previous(BASE + 0x40, 3) == BASE + 0x34
+    assert linear.previous(BASE + 0x8, 5) == BASE
+    assert linear.align(BASE + 0x42) == BASE + 0x40
+    assert [line.address for line in linear.lines(BASE + 0x3f8, 10)] == [BASE + 0x3f8, BASE + 0x3fc]
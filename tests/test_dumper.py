@@ -0,0 +1,133 @@
+import json
+import os
+
+import pytest
+
+from dwarf_debugger.lib import io as dwarf_io
+from dwarf_debugger.lib.io import Dumper
+
+CHUNK = 0x4000
+BASE = 0x100000
+LENGTH = 3 * CHUNK
+
+
+class FakeDwarf(object):
+    """ readBytes of address & 0xff, None on the unreadable pages
+    """
+
+    def __init__(self, unreadable=()):
+        self.unreadable = set(unreadable)
+
+    def dwarf_api(self, api, args):
+        assert api == 'readBytes'
+        ptr, length = args
+        pages = range(ptr - ptr % 0x1000, ptr + length, 0x1000)
+        if any(page in self.unreadable for page in pages):
+            return None
+        return bytes((address & 0xff) for address in range(ptr, ptr + length))
+
+
+class FakeIO(object):
+    read_workers = 1
+
+    def __init__(self, unreadable=()):
+        self.dwarf = FakeDwarf(unreadable)
+
+
+def memory(unreadable=()):
+    return bytes(0 if address - address % 0x1000 in unreadable else address & 0xff
+                 for address in range(BASE, BASE + LENGTH))
+
+
+def dump(io, file_path, resume=False, cancel_after=None):
+    dumper = Dumper(io, BASE, LENGTH, file_path, resume=resume)
+    events = {'finished': None, 'errors': []}
+    dumper.onFinished.connect(lambda path, holes: events.update(finished=holes))
+    dumper.onError.connect(events['errors'].append)
+    if cancel_after is not None:
+        dumper.onProgress.connect(lambda written, total, rate: written >= cancel_after and dumper.cancel())
+    dumper.run()
+    return dumper, events
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(Dumper, 'CHUNK_SIZE', CHUNK)
+
+
+def test_dump_without_holes_removes_the_index(qapp, tmp_path):
+    path = str(tmp_path / 'dump.bin')
+    _, events = dump(FakeIO(), path)
+
+    assert events['finished'] == []
+    assert not events['errors']
+    with open(path, 'rb') as f:
+        assert f.read() == memory()
+    assert not os.path.exists(path + Dumper.INDEX_SUFFIX)
+
+
+def test_holes_are_zero_filled_and_kept_in_the_index(qapp, tmp_path):
+    path = str(tmp_path / 'dump.bin')
+    unreadable = {BASE + CHUNK + 0x1000}
+    _, events = dump(FakeIO(unreadable), path)
+
+    assert events['finished'] == [(CHUNK + 0x1000, 0x1000)]
+    with open(path, 'rb') as f:
+        assert f.read() == memory(unreadable)
+    index = Dumper.read_index(path)
+    assert index['complete']
+    assert index['holes'] == [[CHUNK + 0x1000, 0x1000]]
+
+
+def test_cancelled_dump_resumes(qapp, tmp_path):
+    path = str(tmp_path / 'dump.bin')
+    unreadable = {BASE + 0x2000}
+    dumper, events = dump(FakeIO(unreadable), path, cancel_after=CHUNK)
+
+    assert dumper.written == CHUNK
+    assert events['finished'] is None
+    index = Dumper.read_index(path)
+    assert not index['complete'] and index['written'] == CHUNK
+    assert Dumper.can_resume(path, BASE, LENGTH)
+    assert not Dumper.can_resume(path, BASE, LENGTH + CHUNK)
+
+    # garbage past what the index says was written is dropped
+    with open(path, 'ab') as f:
+        f.write(b'\xff' * 0x100)
+
+    reads = []
+    io = FakeIO(unreadable)
+    dwarf_api = io.dwarf.dwarf_api
+    io.dwarf.dwarf_api = lambda api, args: reads.append(args[0]) or dwarf_api(api, args)
+    _, events = dump(io, path, resume=True)
+
+    assert min(reads) == BASE + CHUNK
+    assert events['finished'] == [(0x2000, 0x1000)]
+    with open(path, 'rb') as f:
+        assert f.read() == memory(unreadable)
+
+
+def test_resume_without_index_starts_over(qapp, tmp_path):
+    path = str(tmp_path / 'dump.bin')
+    with open(path, 'wb') as f:
+        f.write(b'\xff' * LENGTH)
+
+    _, events = dump(FakeIO(), path, resume=True)
+
+    assert events['finished'] == []
+    with open(path, 'rb') as f:
+        assert f.read() == memory()
+
+
+def test_failing_to_finish_the_index_reports_an_error(qapp, tmp_path, monkeypatch):
+    path = str(tmp_path / 'dump.bin')
+
+    def remove(path):
+        raise OSError('read-only file system')
+    monkeypatch.setattr(dwarf_io.os, 'remove', remove)
+    _, events = dump(FakeIO(), path)
+
+    assert events['finished'] is None
+    assert len(events['errors']) == 1 and 'read-only file system' in events['errors'][0]
+    with open(path + Dumper.INDEX_SUFFIX, 'r') as f:
+        assert json.load(f)['written'] == LENGTH
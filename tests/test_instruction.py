@@ -0,0 +1,81 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+capstone = pytest.importorskip('capstone')
+
+from capstone import (Cs, CS_ARCH_ARM, CS_ARCH_ARM64, CS_ARCH_X86, CS_GRP_CALL, CS_GRP_JUMP,  # noqa: E402
+                      CS_MODE_32, CS_MODE_64, CS_MODE_ARM, CS_MODE_THUMB, CS_OP_IMM, CS_OP_MEM)
+
+from dwarf_debugger.lib.types.instruction import Instruction, direct_branch  # noqa: E402
+
+BASE = 0x10000
+
+ARCHS = [
+    ('x86', CS_ARCH_X86, CS_MODE_32, 4),
+    ('x64', CS_ARCH_X86, CS_MODE_64, 8),
+    ('arm', CS_ARCH_ARM, CS_MODE_ARM, 4),
+    ('thumb', CS_ARCH_ARM, CS_MODE_THUMB, 4),
+    ('arm64', CS_ARCH_ARM64, CS_MODE_ARM, 8),
+]
+
+
+def reference(instruction, pointer_size):
+    """ (is_call, is_jump, target) told by the capstone details
+    """
+    is_call = instruction.group(CS_GRP_CALL)
+    is_jump = instruction.group(CS_GRP_JUMP)
+    target = 0
+    if is_call or is_jump:
+        for op in instruction.operands:
+            if op.type == CS_OP_IMM:
+                target = op.value.imm & ((1 << pointer_size * 8) - 1)
+            elif op.type == CS_OP_MEM:
+                base = op.value.mem.base
+                target = instruction.address if base and instruction.reg_name(base) in ('rip', 'pc') else 0
+                target += op.value.mem.disp
+    return is_call, is_jump, target
+
+
+@pytest.mark.parametrize('name, arch, mode, pointer_size', ARCHS, ids=[arch[0] for arch in ARCHS])
+def test_lite_decoding_matches_the_details(name, arch, mode, pointer_size):
+    data = bytes(random.Random(name).randrange(256) for _ in range(0x4000))
+    dwarf = SimpleNamespace(pointer_size=pointer_size)
+
+    detailed = Cs(arch, mode)
+    detailed.detail = True
+    detailed.skipdata = True
+    lite = Cs(arch, mode)
+    lite.skipdata = True
+
+    count = 0
+    for expected, insn in zip(detailed.disasm(data, BASE), lite.disasm_lite(data, BASE)):
+        count += 1
+        instruction = Instruction.from_lite(dwarf, insn, data[insn[0] - BASE:insn[0] - BASE + insn[1]],
+                                            arch=arch, mode=mode)
+        assert (instruction.address, instruction.size, instruction.mnemonic) == \
+            (expected.address, expected.size, expected.mnemonic)
+        if expected.id == 0:
+            assert instruction.is_data
+            assert not instruction.is_call and not instruction.is_jump
+            continue
+
+        assert instruction.id == expected.id
+        assert instruction.thumb == (mode == CS_MODE_THUMB)
+        is_call, is_jump, target = reference(expected, pointer_size)
+        assert (instruction.is_call, instruction.is_jump) == (is_call, is_jump), expected
+        assert (instruction.call_address or instruction.jump_address) == target, expected
+    assert count > 500
+
+
+def test_direct_branch():
+    assert direct_branch(CS_ARCH_X86, 'call', '0x1000') == (True, False, 0x1000)
+    assert direct_branch(CS_ARCH_X86, 'bnd jmp', '0x1000') == (False, True, 0x1000)
+    assert direct_branch(CS_ARCH_X86, 'call', 'rax') is None
+    assert direct_branch(CS_ARCH_X86, 'ret', '') is None
+    assert direct_branch(CS_ARCH_ARM, 'blne', '#0x100') == (True, True, 0x100)
+    assert direct_branch(CS_ARCH_ARM, 'b.w', '#0x100') == (False, True, 0x100)
+    assert direct_branch(CS_ARCH_ARM, 'bx', 'lr') is None
+    assert direct_branch(CS_ARCH_ARM64, 'b.eq', '#0x100') == (False, True, 0x100)
+    assert direct_branch(CS_ARCH_ARM64, 'bic', '#0x100') is None
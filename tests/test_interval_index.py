@@ -0,0 +1,96 @@
+import random
+
+import pytest
+
+from dwarf_debugger.lib import database
+from dwarf_debugger.lib.database import IntervalIndex
+
+
+@pytest.fixture(params=['numpy', 'bisect'])
+def bulk(request, monkeypatch):
+    """ find_many through numpy and through the plain bisect fallback
+    """
+    if request.param == 'bisect':
+        monkeypatch.setattr(database, 'numpy', None)
+    elif database.numpy is None:
+        pytest.skip('numpy not installed')
+    return request.param
+
+
+def test_find_bounds():
+    index = IntervalIndex()
+    index.add(0x1000, 0x1000, 'a')
+    index.add(0x3000, 0x10, 'b')
+
+    assert index.find(0xfff) is None
+    assert index.find(0x1000) == 'a'
+    assert index.find(0x1fff) == 'a'
+    assert index.find(0x2000) is None
+    assert index.find(0x300f) == 'b'
+    assert index.find(0x3010) is None
+
+
+def test_add_replaces_overlapping_intervals():
+    index = IntervalIndex()
+    index.add(0x1000, 0x1000, 'a')
+    index.add(0x2000, 0x1000, 'b')
+    index.add(0x4000, 0x1000, 'c')
+
+    # ends inside b, starts inside a
+    assert index.add(0x1800, 0x1000, 'd') == ['a', 'b']
+    assert index.values() == ['d', 'c']
+    assert index.find(0x1000) is None
+    assert index.find(0x1800) == 'd'
+    # touching intervals don't overlap
+    assert index.add(0x3000, 0x1000, 'e') == []
+    assert index.values() == ['d', 'e', 'c']
+
+
+def test_remove():
+    index = IntervalIndex()
+    index.add(0x1000, 0x1000, 'a')
+    index.add(0x2000, 0x1000, 'b')
+
+    assert index.remove(0x1800) is None
+    assert index.remove(0x1000) == 'a'
+    assert index.find(0x1000) is None
+    assert index.find(0x2000) == 'b'
+    assert len(index) == 1
+
+
+def test_find_many(bulk):
+    index = IntervalIndex()
+    assert index.find_many([0, 0x1000]) == [None, None]
+
+    index.add(0x1000, 0x1000, 'a')
+    # above 2 ** 63, has to stay unsigned
+    index.add(0xffffff8000000000, 0x1000, 'high')
+    assert index.find_many([0, 0x1000, 0x1fff, 0x2000, 0xffffff8000000fff, 0xffffff8000001000]) == \
+        [None, 'a', 'a', None, 'high', None]
+
+    # the numpy arrays are rebuilt after a change
+    index.remove(0x1000)
+    assert index.find_many([0x1000]) == [None]
+
+
+def test_lookups_match_brute_force(bulk):
+    rand = random.Random(25)
+    intervals = []
+    address = 0
+    for i in range(500):
+        address += rand.randrange(0, 1 << 20, 0x1000)
+        size = rand.randrange(1, 1 << 20)
+        intervals.append((address, address + size, i))
+        address += size
+    index = IntervalIndex()
+    for start, end, value in rand.sample(intervals, len(intervals)):
+        index.add(start, end - start, value)
+
+    addresses = [rand.randrange(0, address + 0x1000) for _ in range(2000)]
+    # the bounds are where off by ones show up
+    addresses += [bound + delta for start, end, _ in intervals for bound in (start, end) for delta in (-1, 0)
+                  if bound + delta >= 0]
+    expected = [next((value for start, end, value in intervals if start <= address < end), None)
+                for address in addresses]
+    assert [index.find(address) for address in addresses] == expected
+    assert index.find_many(addresses) == expected
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from dwarf_debugger.lib.core import Dwarf
+
+
+@pytest.fixture
+def dwarf(qapp):
+    return Dwarf()
+
+
+def envelope(message_type, **fields):
+    fields.update({'v': Dwarf.MESSAGE_VERSION, 'type': message_type})
+    return {'type': 'send', 'payload': fields}
+
+
+def test_envelopes_reach_their_handler(dwarf):
+    backtraces = []
+    dwarf.onBackTrace.connect(backtraces.append)
+    dwarf._dispatch_message(envelope('backtrace', backtrace={'bt': []}), None)
+    # other versions are left alone
+    dwarf._dispatch_message({'type': 'send', 'payload': {'v': Dwarf.MESSAGE_VERSION + 1, 'type': 'backtrace',
+                                                         'backtrace': {}}}, None)
+    assert backtraces == [{'bt': []}]
+
+
+def test_plugin_signals(dwarf):
+    messages = []
+    commands = []
+    dwarf.onReceiveMessage.connect(messages.append)
+    dwarf.onReceiveCmd.connect(commands.append)
+
+    message = envelope('plugin_event', tid=1, name='a:::b')
+    dwarf._dispatch_message(message, b'\x00')
+    dwarf._dispatch_message({'type': 'send', 'payload': 'r2 seek'}, None)
+
+    assert messages == [[message, b'\x00'], [{'type': 'send', 'payload': 'r2 seek'}, None]]
+    assert commands[0][0]['payload'] == 'plugin_event:::{"tid": 1, "name": "a:::b"}'
+    assert commands[0][1] == b'\x00'
+    assert commands[1] == [{'type': 'send', 'payload': 'r2 seek'}, None]
+    # untouched for the other receivers
+    assert message['payload']['type'] == 'plugin_event'
+
+
+def test_batch_results_with_bytes(dwarf, monkeypatch):
+    # as Api._batch packs them: [json length, u32 le][json][bytes of the results, in order]
+    header = json.dumps([{'bytes': 2}, {'result': 'é'}, {'error': 'boom'}, {'bytes': 3}]).encode('utf8')
+    packed = len(header).to_bytes(4, 'little') + header + b'\x01\x02' + b'\x03\x04\x05'
+    monkeypatch.setattr(dwarf, 'dwarf_api', lambda api, args, tid=0: packed)
+
+    assert dwarf.dwarf_api_batch([('readBytes', [0, 2]), ('evaluate', '"é"'), ('evaluate', 'boom'),
+                                  ('readBytes', [0, 3])]) == [b'\x01\x02', 'é', None, b'\x03\x04\x05']
+
+    monkeypatch.setattr(dwarf, 'dwarf_api', lambda api, args, tid=0: [{'result': 1}])
+    assert dwarf.dwarf_api_batch([('evaluate', '1')]) == [1]
@@ -0,0 +1,77 @@
+from dwarf_debugger.lib.io import PageCache
+
+PAGE = PageCache.PAGE_SIZE
+
+
+def pages(count, fill=0):
+    return bytes((fill + i) & 0xff for i in range(count) for _ in range(PAGE))
+
+
+def test_put_splits_in_pages_and_get_counts():
+    cache = PageCache(budget=16 * PAGE)
+    stored = cache.put(0x10000, pages(3))
+    assert sorted(stored) == [0x10000, 0x11000, 0x12000]
+
+    got = cache.get(0x10000, 0x13000)
+    assert sorted(got) == [0x10000, 0x11000, 0x12000]
+    assert got[0x11000] == bytes([1]) * PAGE
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_budget_evicts_least_recently_used():
+    cache = PageCache(budget=2 * PAGE)
+    cache.put(0x1000, pages(1))
+    cache.put(0x2000, pages(1))
+    # touched, 0x2000 becomes the oldest
+    cache.get(0x1000, 0x1000)
+    cache.put(0x3000, pages(1))
+
+    assert sorted(cache.get(0x1000, 0x3000)) == [0x1000, 0x3000]
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['size'] == 2 * PAGE
+
+
+def test_invalidate_drops_overlapping_pages_only():
+    cache = PageCache()
+    cache.put(0x1000, pages(4))
+    # one byte past the second page touches the third one too
+    cache.invalidate(0x2fff, 2)
+
+    assert sorted(cache.get(0x1000, 0x4000)) == [0x1000, 0x4000]
+    assert cache.stats()['size'] == 2 * PAGE
+
+
+def test_invalidate_writable_only_keeps_read_only_pages():
+    cache = PageCache()
+    cache.put(0x1000, pages(2), writable=False)
+    cache.put(0x3000, pages(2), writable=True)
+
+    cache.invalidate(writable_only=True)
+    assert sorted(cache.get(0x1000, 0x4000)) == [0x1000, 0x2000]
+
+    cache.invalidate(0x1000, 2 * PAGE, writable_only=True)
+    assert sorted(cache.get(0x1000, 0x2000)) == [0x1000, 0x2000]
+
+    cache.invalidate()
+    assert cache.get(0x1000, 0x4000) == {}
+    assert cache.stats()['size'] == 0
+
+
+def test_put_replaces_page_without_leaking_size():
+    cache = PageCache()
+    cache.put(0x1000, pages(1, fill=1))
+    cache.put(0x1000, pages(1, fill=2))
+
+    assert cache.get(0x1000, 0x1000)[0x1000] == bytes([2]) * PAGE
+    assert cache.stats()['size'] == PAGE
+
+
+def test_listeners_get_invalidations_and_clear():
+    cache = PageCache()
+    calls = []
+    cache.add_listener(lambda ptr, length, writable_only: calls.append((ptr, length, writable_only)))
+
+    cache.invalidate(0x1000, 16)
+    cache.invalidate(writable_only=True)
+    cache.clear()
+    assert calls == [(0x1000, 16, False), (None, 0, True), (None, 0, False)]
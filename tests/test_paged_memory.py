@@ -0,0 +1,133 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from dwarf_debugger.lib.io import PagedMemory
+
+CHUNK = PagedMemory.CHUNK_SIZE
+BASE = 0x100000
+
+
+class Future(QObject):
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, args):
+        super().__init__()
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class FakeDwarf(QObject):
+    onThreadResumed = pyqtSignal()
+
+    def __init__(self):
+        super().__init__()
+        self.futures = []
+
+    def run_async(self, fn, *args, name=None):
+        future = Future(args)
+        self.futures.append(future)
+        return future
+
+
+class FakeIO(object):
+    """ memory of address & 0xff, empty reads past unreadable
+    """
+
+    def __init__(self, unreadable=None):
+        self.dwarf = FakeDwarf()
+        self.unreadable = unreadable
+        self.reads = []
+
+    def read(self, ptr, length, writable=True):
+        self.reads.append((ptr, length))
+        if self.unreadable is not None and ptr >= self.unreadable:
+            return ptr, bytes()
+        return ptr, bytes((ptr + i) & 0xff for i in range(length))
+
+
+def expected(offset, length):
+    return bytes((BASE + offset + i) & 0xff for i in range(length))
+
+
+def test_indexing_never_blocks(qapp):
+    io = FakeIO()
+    memory = PagedMemory(io, BASE, 3 * CHUNK)
+    loaded = []
+    memory.pagesLoaded.connect(lambda offset, length: loaded.append((offset, length)))
+
+    # placeholders until the chunk arrives
+    assert memory[CHUNK - 2:CHUNK + 2] == bytes(4)
+    assert not memory.is_loaded(CHUNK - 2, 4)
+    assert [future.args[:2] for future in io.dwarf.futures] == [(BASE, CHUNK), (BASE + CHUNK, CHUNK)]
+
+    for future in io.dwarf.futures:
+        future.finished.emit(io.read(*future.args))
+    assert loaded == [(0, CHUNK), (CHUNK, CHUNK)]
+    assert memory[CHUNK - 2:CHUNK + 2] == expected(CHUNK - 2, 4)
+    assert memory.is_loaded(CHUNK - 2, 4)
+
+
+def test_read_loads_missing_chunks(qapp):
+    io = FakeIO()
+    memory = PagedMemory(io, BASE, 3 * CHUNK)
+    # pending, replaced by the blocking read
+    memory.prefetch(0, 1)
+    pending = io.dwarf.futures[0]
+
+    assert memory.read(CHUNK - 8, CHUNK + 16) == expected(CHUNK - 8, CHUNK + 16)
+    assert pending.cancelled
+    assert memory.is_loaded(0, 2 * CHUNK + 8)
+    # cut at the end of the range
+    assert memory.read(3 * CHUNK - 4, 16) == expected(3 * CHUNK - 4, 4)
+
+    reads = len(io.reads)
+    memory.read(0, 2 * CHUNK)
+    assert len(io.reads) == reads
+
+
+def test_read_of_unreadable_chunks(qapp):
+    io = FakeIO(unreadable=BASE + CHUNK)
+    memory = PagedMemory(io, BASE, 2 * CHUNK)
+    assert memory.read(CHUNK - 4, 8) is None
+    assert memory.read(0, 4) == expected(0, 4)
+
+
+def test_failed_chunks_are_asked_again(qapp):
+    io = FakeIO(unreadable=BASE + CHUNK)
+    memory = PagedMemory(io, BASE, 2 * CHUNK)
+
+    memory[0]
+    io.dwarf.futures[-1].failed.emit('timed out')
+    # not cached, asked again once RETRY_DELAY is over
+    memory[0]
+    assert len(io.dwarf.futures) == 1
+    memory._failed[0] -= PagedMemory.RETRY_DELAY
+    memory[0]
+    assert len(io.dwarf.futures) == 2
+    io.dwarf.futures[-1].finished.emit(io.read(*io.dwarf.futures[-1].args))
+    assert memory.is_loaded(0)
+
+    # reported unreadable by the agent, kept as such
+    memory[CHUNK]
+    io.dwarf.futures[-1].finished.emit(io.read(*io.dwarf.futures[-1].args))
+    memory[CHUNK]
+    assert len(io.dwarf.futures) == 3
+    assert not memory.is_loaded(CHUNK)
+
+
+def test_resume_drops_writable_chunks(qapp):
+    io = FakeIO()
+    memory = PagedMemory(io, BASE, CHUNK)
+    memory.read(0, 4)
+    io.dwarf.onThreadResumed.emit()
+    assert not memory.is_loaded(0)
+
+    code = PagedMemory(io, BASE, CHUNK, writable=False)
+    code.read(0, 4)
+    io.dwarf.onThreadResumed.emit()
+    assert code.is_loaded(0)
+    memory.close()
+    code.close()
@@ -0,0 +1,155 @@
+import random
+import struct
+from types import SimpleNamespace
+
+import pytest
+
+from dwarf_debugger.lib import pointer_scanner
+from dwarf_debugger.lib.database import Database
+
+if not pointer_scanner.numpy_available():
+    pytest.skip('the pointer scanner needs numpy', allow_module_level=True)
+
+from dwarf_debugger.lib.pointer_scanner import PointerIndex, PointerScanner  # noqa: E402
+
+MODULE = 0x400000
+HEAP = 0x10000000
+
+
+class Memory(object):
+    """ ranges of bytes read like IO.read_sparse, holes are (address, length)
+    """
+
+    def __init__(self, ranges, holes=()):
+        self.ranges = ranges
+        self.holes = holes
+
+    def put(self, address, value):
+        for base, data in self.ranges.items():
+            if base <= address < base + len(data):
+                data[address - base:address - base + 8] = struct.pack('<Q', value)
+                return
+        raise ValueError(hex(address))
+
+    def read(self, address, length):
+        for base, data in self.ranges.items():
+            if base <= address < base + len(data):
+                holes = [(max(hole, address) - address, min(hole + size, address + length) - max(hole, address))
+                         for hole, size in self.holes if hole < address + length and address < hole + size]
+                return memoryview(data)[address - base:address - base + length], holes
+        raise ValueError(hex(address))
+
+    def sizes(self):
+        return [(base, len(data)) for base, data in self.ranges.items()]
+
+
+def scanner_for(memory, max_offset, chunk_size=None, monkeypatch=None):
+    if chunk_size is not None:
+        monkeypatch.setattr(PointerIndex, 'CHUNK_SIZE', chunk_size)
+    index = PointerIndex(max_offset=max_offset)
+    index.build(memory.read, memory.sizes())
+    database = Database()
+    database.put_module_info(MODULE, SimpleNamespace(name='libtest.so', base=MODULE, size=0x1000))
+    return PointerScanner(SimpleNamespace(database=database, dwarf_api=lambda *args: None), index)
+
+
+def chain_memory():
+    """ libtest.so+0x100 -> heap+0x1000, +0x10 -> heap+0x3000, +0x8 -> target at heap+0x5008.
+    heap+0x6000 is a list node pointing to itself and to the second pointer
+    """
+    memory = Memory({MODULE: bytearray(0x1000), HEAP: bytearray(0x8000)})
+    memory.put(HEAP + 0x3000, HEAP + 0x5000)
+    memory.put(HEAP + 0x1000, HEAP + 0x2ff0)
+    memory.put(MODULE + 0x100, HEAP + 0x1000)
+    memory.put(HEAP + 0x6000, HEAP + 0x6000)
+    memory.put(HEAP + 0x6008, HEAP + 0x3000)
+    return memory
+
+
+def test_index_keeps_pointers_into_the_ranges():
+    memory = chain_memory()
+    # not pointing anywhere scanned
+    memory.put(HEAP + 0x10, 0x12345678)
+    # right past the end of the heap
+    memory.put(HEAP + 0x18, HEAP + 0x8000)
+    index = PointerIndex(max_offset=0x10)
+    assert index.build(memory.read, memory.sizes()) == 5
+
+    addresses, values = index.references(HEAP + 0x3000, HEAP + 0x3000)
+    assert sorted(addresses.tolist()) == [HEAP + 0x6008]
+    assert sorted(index.references(HEAP, HEAP + 0x8000)[0].tolist()) == \
+        [MODULE + 0x100, HEAP + 0x1000, HEAP + 0x3000, HEAP + 0x6000, HEAP + 0x6008]
+
+
+def test_holes_and_misaligned_ranges():
+    memory = chain_memory()
+    memory.holes = [(MODULE + 0x104, 2)]
+    index = PointerIndex()
+    index.build(memory.read, memory.sizes())
+    assert MODULE + 0x100 not in index.addresses.tolist()
+
+    # a range starting off the pointer alignment is read from its first aligned address
+    data = bytearray(0x40)
+    data[7:15] = struct.pack('<Q', 0x1001)
+    unaligned = Memory({0x1001: data})
+    index = PointerIndex()
+    assert index.build(unaligned.read, unaligned.sizes()) == 1
+    assert index.addresses.tolist() == [0x1008]
+
+
+@pytest.mark.parametrize('chunk_size', [None, 0x18, 0x1000])
+def test_multi_level_chain(chunk_size, monkeypatch):
+    scanner = scanner_for(chain_memory(), 0x10, chunk_size, monkeypatch)
+    assert scanner.scan(HEAP + 0x5008, depth=5, max_offset=0x10) == 5
+
+    assert [sorted(level[0].tolist()) for level in scanner.levels] == [
+        [HEAP + 0x3000],
+        [HEAP + 0x1000, HEAP + 0x6008],
+        # the node pointing to itself is not found again
+        [MODULE + 0x100, HEAP + 0x6000],
+    ]
+
+    static = scanner.results()
+    assert len(static) == 1
+    level, index = static[0]
+    assert scanner.chain(level, index) == [(MODULE + 0x100, 0), (HEAP + 0x1000, 0x10), (HEAP + 0x3000, 0x8)]
+    assert scanner.describe(level, index) == '[[[libtest.so+0x100]]+0x10]+0x8'
+    assert len(scanner.results(static_only=False)) == 5
+
+
+def test_levels_match_brute_force():
+    rand = random.Random(20)
+    memory = Memory({MODULE: bytearray(0x1000), HEAP: bytearray(0x10000)})
+    slots = rand.sample(range(0, 0x11000, 8), 600)
+    for slot in slots:
+        address = MODULE + slot if slot < 0x1000 else HEAP + slot - 0x1000
+        memory.put(address, HEAP + rand.randrange(0, 0x10000))
+    pointers = {}
+    for base, data in memory.ranges.items():
+        for offset in range(0, len(data), 8):
+            value = struct.unpack_from('<Q', data, offset)[0]
+            if value:
+                pointers[base + offset] = value
+
+    max_offset = 0x40
+    target = HEAP + 0x8000
+    scanner = scanner_for(memory, max_offset)
+    scanner.scan(target, target_size=0x100, depth=4, max_offset=max_offset)
+
+    seen = set()
+    level = {address for address, value in pointers.items() if target - max_offset <= value < target + 0x100}
+    expected = []
+    while level and len(expected) < 4:
+        expected.append(sorted(level))
+        seen |= level
+        level = {address for address, value in pointers.items()
+                 if address not in seen and any(pointed - max_offset <= value <= pointed for pointed in level)}
+    assert [sorted(found[0].tolist()) for found in scanner.levels] == expected
+
+    # every chain leads to the target
+    for level, index in scanner.results(static_only=False, count=100000):
+        chain = scanner.chain(level, index)
+        address = chain[0][0]
+        for _, offset in chain:
+            address = pointers[address] + offset
+        assert target <= address < target + 0x100
@@ -0,0 +1,109 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from dwarf_debugger.lib import io as dwarf_io
+from dwarf_debugger.lib.rpc import ApiFuture
+
+BASE = 0x1000
+SIZE = 0x1000
+
+
+class FakeDwarf(object):
+    """ run_async on a thread pool, getRange of a single range
+    """
+
+    def __init__(self, protection='rw-'):
+        self.protection = protection
+        self.executor = ThreadPoolExecutor(4)
+        # alive until delivered, as Dwarf does
+        self.futures = set()
+
+    def run_async(self, fn, *args, name=None, timeout=None):
+        future = ApiFuture(name, on_done=self.futures.discard)
+        self.futures.add(future)
+
+        def work():
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:  # pylint: disable=broad-except
+                future.set_error(e)
+        self.executor.submit(work)
+        return future
+
+    def dwarf_api(self, api, ptr):
+        if BASE <= ptr < BASE + SIZE:
+            return {'base': hex(BASE), 'size': SIZE, 'protection': self.protection}
+        return None
+
+
+class GatedReader(object):
+    """ Reader blocking until released, then reading 'x' or failing
+    """
+    gate = threading.Event()
+    result = b'x' * SIZE
+
+    def __init__(self, io, ptr, length):
+        pass
+
+    def read_data(self, writable=True):
+        GatedReader.gate.wait()
+        if isinstance(GatedReader.result, Exception):
+            raise GatedReader.result
+        return GatedReader.result
+
+
+@pytest.fixture
+def io(monkeypatch):
+    monkeypatch.setattr(dwarf_io, 'Reader', GatedReader)
+    GatedReader.gate.clear()
+    GatedReader.result = b'x' * SIZE
+    ret = dwarf_io.IO.__new__(dwarf_io.IO)
+    ret.dwarf = FakeDwarf()
+    ret._range_reads = {}
+    ret._range_reads_lock = threading.Lock()
+    ret._range_joiners = set()
+    yield ret
+    GatedReader.gate.set()
+
+
+def wait(qapp, results, count):
+    deadline = time.time() + 5
+    while len(results) < count and time.time() < deadline:
+        qapp.processEvents()
+    return sorted(results)
+
+
+def read_twice(qapp, io):
+    """ a second request joining the first one, results as (ptr, base, data, offset)
+    """
+    results = []
+    first = io.read_range_async(BASE + 0x10, lambda *result: results.append((BASE + 0x10,) + result))
+    while not io._range_reads:
+        time.sleep(0.001)
+    second = io.read_range_async(BASE + 0x20, lambda *result: results.append((BASE + 0x20,) + result))
+    assert isinstance(second, ApiFuture) and second is not first
+    # the callers don't have to keep the futures around
+    del first, second
+    GatedReader.gate.set()
+    return wait(qapp, results, 2)
+
+
+def test_joined_reads_share_the_data(qapp, io):
+    assert read_twice(qapp, io) == [(BASE + 0x10, BASE, b'x' * SIZE, 0x10), (BASE + 0x20, BASE, b'x' * SIZE, 0x20)]
+
+
+@pytest.mark.parametrize('result', [Exception('agent gone'), bytes()], ids=['failed', 'unreadable'])
+def test_failures_reach_every_caller(qapp, io, result):
+    GatedReader.result = result
+    assert [(ptr, data) for ptr, _, data, _ in read_twice(qapp, io)] == [(BASE + 0x10, None), (BASE + 0x20, None)]
+
+
+def test_ranges_which_are_not_readable(qapp, io):
+    io.dwarf.protection = '---'
+    results = []
+    io.read_range_async(BASE, lambda *result: results.append(result))
+    io.read_range_async(0x10, lambda *result: results.append(result))
+    assert wait(qapp, results, 2) == [(0, None, 0x10), (0, None, BASE)]
@@ -0,0 +1,141 @@
+import random
+
+import pytest
+
+from dwarf_debugger.lib import search
+from dwarf_debugger.lib.io import IO, PageCache
+from dwarf_debugger.lib.search import PATTERN_BYTES, PATTERN_MASKED, PATTERN_REGEX, HostSearch, PatternSet, \
+    parse_pattern, parse_patterns
+
+SPECS = [parse_pattern(text) for text in ('deadbeef1337', 'de ad ?? ef', 'str:hello', 'u16:hi', 'aaaa')]
+
+
+def sample(size=200000, seed=17):
+    """ random bytes with the patterns of SPECS planted, some of them overlapping
+    """
+    rand = random.Random(seed)
+    data = bytearray(rand.randrange(256) for _ in range(size))
+    for _ in range(400):
+        planted = rand.choice([b'\xde\xad\xbe\xef\x13\x37', b'\xde\xad\x00\xef', b'hello', 'hi'.encode('utf-16-le'),
+                               b'\xaa' * rand.randint(2, 6)])
+        offset = rand.randrange(size - len(planted))
+        data[offset:offset + len(planted)] = planted
+    return bytes(data)
+
+
+def brute_force(specs, data):
+    """ every (offset, pattern index, length) where a bytes or masked spec matches
+    """
+    matches = []
+    for index, spec in enumerate(specs):
+        value = spec[1]
+        mask = spec[2] if spec[0] == PATTERN_MASKED else b'\xff' * len(value)
+        for offset in range(len(data) - len(value) + 1):
+            if all(data[offset + i] & mask[i] == value[i] & mask[i] for i in range(len(value))):
+                matches.append((offset, index, len(value)))
+    return sorted(matches)
+
+
+@pytest.fixture(scope='module')
+def data():
+    return sample()
+
+
+@pytest.fixture(scope='module')
+def expected(data):
+    return brute_force(SPECS, data)
+
+
+def test_parse_pattern():
+    assert parse_pattern('de ad be ef') == (PATTERN_BYTES, b'\xde\xad\xbe\xef')
+    assert parse_pattern('de a? ef') == (PATTERN_MASKED, b'\xde\xa0\xef', b'\xff\xf0\xff')
+    assert parse_pattern('dead:ff0f') == (PATTERN_MASKED, b'\xde\xad', b'\xff\x0f')
+    assert parse_pattern('re:\\x7fELF') == (PATTERN_REGEX, b'\\x7fELF')
+    assert parse_pattern('u16:ab') == (PATTERN_BYTES, b'a\x00b\x00')
+    assert parse_pattern('u16be:ab') == (PATTERN_BYTES, b'\x00a\x00b')
+    # not hex
+    assert parse_pattern('hello') == (PATTERN_BYTES, b'hello')
+    assert parse_patterns('aa; bb\\;cc') == [(PATTERN_BYTES, b'\xaa'), (PATTERN_BYTES, b'bb;cc')]
+    with pytest.raises(ValueError):
+        parse_pattern('dead:ff')
+
+
+def test_pattern_set_finds_overlapping_matches(data, expected):
+    assert PatternSet(SPECS).search(data) == expected
+
+
+def test_pattern_set_automaton(data, expected, monkeypatch):
+    if not search.aho_corasick_available():
+        pytest.skip('pyahocorasick not installed')
+    monkeypatch.setattr(PatternSet, 'AHO_CORASICK_MIN', 1)
+    assert PatternSet(SPECS).search(data) == expected
+
+
+def test_regex_matches():
+    patterns = PatternSet([(PATTERN_REGEX, b'\\x7fELF.')])
+    assert patterns.search(b'..\x7fELF\x02..\x7fELF') == [(2, 0, 5)]
+    assert patterns.overlap == PatternSet.REGEX_WINDOW - 1
+
+
+@pytest.mark.parametrize('read_size', [3, 4096, 65537])
+def test_pieces_find_each_match_once(data, expected, read_size):
+    """ matches crossing the end of a piece are reported by the piece they start in
+    """
+    base = 0x400000
+    if read_size < 16:
+        data = data[:5000]
+        expected = [match for match in expected if match[0] + match[2] <= len(data)]
+
+    def read(address, length):
+        return memoryview(data)[address - base:address - base + length], []
+
+    found = []
+    count = HostSearch(SPECS, workers=1).search_ranges(read, [(base, len(data))],
+                                                       on_matches=lambda i, matches: found.extend(matches),
+                                                       read_size=read_size)
+    assert count == len(expected)
+    assert found == [(base + offset, index, length) for offset, index, length in expected]
+
+
+def test_limit_and_holes(data, expected):
+    def read(address, length):
+        return memoryview(data)[address:address + length], []
+
+    found = []
+    HostSearch(SPECS, workers=1).search_ranges(read, [(0, len(data))], read_size=4096, limit=10,
+                                               on_matches=lambda i, matches: found.extend(matches))
+    assert found == expected[:10]
+
+    first = expected[0]
+    holes = [(first[0] + first[2] - 1, 1)]
+    assert first not in HostSearch(SPECS, workers=1).search(data, holes=holes)
+
+
+def test_pool_jobs_match_single_search(data, expected, monkeypatch):
+    monkeypatch.setattr(HostSearch, 'POOL_THRESHOLD', 1 << 12)
+    monkeypatch.setattr(HostSearch, 'JOB_SIZE', 10007)
+    assert HostSearch(SPECS, workers=2).search(data) == expected
+
+
+class FakeIO(object):
+    """ read_sparse over bytes, with the piece sizing of IO
+    """
+    cached_read_size = IO.cached_read_size
+
+    def __init__(self, data, budget):
+        self.data = data
+        self.cache = PageCache(budget=budget)
+        self.lengths = []
+
+    def read_sparse(self, address, length):
+        self.lengths.append(length)
+        return memoryview(self.data)[address:address + length], []
+
+
+def test_memory_is_read_in_pieces_the_cache_keeps(data, expected):
+    io = FakeIO(data, 16 * PageCache.PAGE_SIZE)
+    found = []
+    HostSearch(SPECS, workers=1).search_memory(io, [(0, len(data))],
+                                               on_matches=lambda i, matches: found.extend(matches))
+    assert found == expected
+    assert max(io.lengths) <= io.cache.budget // 2
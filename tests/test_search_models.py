@@ -0,0 +1,155 @@
+from array import array
+
+import pytest
+from PyQt5.QtCore import QModelIndex, QPersistentModelIndex, Qt
+from PyQt5.QtTest import QAbstractItemModelTester
+
+from dwarf_debugger.ui.panels.panel_search import SearchRangesModel, SearchResultsModel
+
+RANGES = [
+    {'base': '0x3000', 'size': 0x1000, 'protection': 'rw-'},
+    {'base': '0x1000', 'size': 0x2000, 'protection': 'r-x', 'file': {'path': '/lib/libc.so', 'offset': 0x1000,
+                                                                      'size': 0x2000}},
+    {'base': '0x8000', 'size': 0x1000, 'protection': '---'},
+    {'base': '0x5000', 'size': 0x3000, 'protection': 'rwx', 'file': {'path': '/lib/libc.so', 'offset': 0,
+                                                                      'size': 0x1000}},
+    {'base': '0x9000', 'size': 0x1000},
+]
+
+
+def texts(model, column):
+    return [model.data(model.index(row, column)) for row in range(model.rowCount())]
+
+
+@pytest.fixture
+def ranges_model(qapp):
+    model = SearchRangesModel(uppercase_hex=False)
+    model.tester = QAbstractItemModelTester(model, QAbstractItemModelTester.FailureReportingMode.Fatal)
+    model.set_ranges(RANGES)
+    return model
+
+
+@pytest.fixture
+def results_model(qapp):
+    model = SearchResultsModel(uppercase_hex=False)
+    model.tester = QAbstractItemModelTester(model, QAbstractItemModelTester.FailureReportingMode.Fatal)
+    return model
+
+
+def test_ranges(ranges_model):
+    # the ones not readable are left out
+    assert ranges_model.rowCount() == 3
+    assert texts(ranges_model, 1) == ['0x3000', '0x1000', '0x5000']
+    assert texts(ranges_model, 2) == ['4,096', '8,192', '12,288']
+    assert texts(ranges_model, 3) == ['rw-', 'r-x', 'rwx']
+    assert texts(ranges_model, 4) == ['', '0x1000', '']
+    assert texts(ranges_model, 6) == ['', '/lib/libc.so', '/lib/libc.so']
+
+
+def test_ranges_sort_and_filter(ranges_model):
+    ranges_model.sort(1, Qt.DescendingOrder)
+    assert texts(ranges_model, 1) == ['0x5000', '0x3000', '0x1000']
+    ranges_model.sort(2)
+    assert texts(ranges_model, 1) == ['0x3000', '0x1000', '0x5000']
+
+    # the order is kept while filtering
+    ranges_model.set_filter('LIBC')
+    assert texts(ranges_model, 1) == ['0x1000', '0x5000']
+    assert ranges_model.row_of(0) == -1
+    assert ranges_model.range_at(0) == 1 and ranges_model.row_of(1) == 0
+    ranges_model.set_filter('')
+    assert ranges_model.rowCount() == 3
+
+
+def test_persistent_indexes_follow_their_range(ranges_model):
+    persistent = QPersistentModelIndex(ranges_model.index(2, 1))
+    assert persistent.data() == '0x5000'
+    ranges_model.sort(1)
+    assert persistent.row() == 2
+    ranges_model.sort(1, Qt.DescendingOrder)
+    assert persistent.row() == 0 and persistent.data() == '0x5000'
+    ranges_model.set_filter('rw-')
+    assert not persistent.isValid()
+
+
+def test_checks(ranges_model):
+    ranges_model.toggle(1)
+    assert ranges_model.data(ranges_model.index(1, 0), Qt.CheckStateRole) == Qt.Checked
+    assert ranges_model.checked_ranges() == ([(0x1000, 0x2000)], [1])
+
+    ranges_model.set_filter('libc')
+    ranges_model.check(True)
+    assert ranges_model.checked_ranges() == ([(0x1000, 0x2000), (0x5000, 0x3000)], [1, 2])
+    ranges_model.set_filter('')
+    ranges_model.check(False, [1])
+    assert ranges_model.checked_ranges()[1] == [2]
+
+    # checked first
+    ranges_model.sort(0, Qt.DescendingOrder)
+    assert ranges_model.range_at(0) == 2
+
+
+def test_results_column(ranges_model):
+    ranges_model.show_results_column()
+    assert ranges_model.columnCount() == 4
+    assert texts(ranges_model, 3) == ['', '', '']
+
+    changed = []
+    ranges_model.dataChanged.connect(lambda top_left, bottom_right, roles: changed.append(top_left.row()))
+    ranges_model.set_result(2, '12 matches', 12)
+    ranges_model.set_result(0, '3 matches', 3)
+    assert changed == [2, 0]
+    assert texts(ranges_model, 3) == ['3 matches', '', '12 matches']
+    assert ranges_model.result(2) == '12 matches'
+
+    ranges_model.sort(3, Qt.DescendingOrder)
+    assert texts(ranges_model, 3) == ['12 matches', '3 matches', '']
+
+    # new ranges, back to the protection and file columns
+    ranges_model.set_ranges(RANGES[:2])
+    assert ranges_model.columnCount() == len(SearchRangesModel.COLUMNS)
+    # still sorted by the fourth column, the protection now
+    assert texts(ranges_model, 3) == ['rw-', 'r-x']
+
+
+def test_results(results_model):
+    addresses = array('Q', [0x30, 0x10])
+    patterns = array('H', [1, 0])
+    results_model.set_results(addresses, patterns, ['aa', 'bb'])
+    assert texts(results_model, 0) == ['0x30', '0x10']
+    assert texts(results_model, 1) == ['bb', 'aa']
+
+    inserted = []
+    results_model.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+    results_model.append(array('Q', [0x20, 0x40]), array('H', [0, 1]))
+    assert inserted == [(2, 3)]
+    # the arrays of the panel are the ones extended
+    assert list(addresses) == [0x30, 0x10, 0x20, 0x40]
+    assert results_model.address_at(3) == 0x40
+
+    results_model.sort(0)
+    assert texts(results_model, 0) == ['0x10', '0x20', '0x30', '0x40']
+    results_model.sort(1, Qt.DescendingOrder)
+    assert set(texts(results_model, 0)[:2]) == {'0x30', '0x40'}
+
+
+def test_results_filter_and_append(results_model):
+    results_model.set_results(array('Q', [0x100, 0x200]), array('H', [0, 0]), ['aa'])
+    # no pattern column for a single pattern
+    assert texts(results_model, 1) == ['', '']
+
+    results_model.set_filter('0x2')
+    assert texts(results_model, 0) == ['0x200']
+    inserted = []
+    results_model.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+    results_model.append(array('Q', [0x300, 0x201]), array('H', [0, 0]))
+    # only what passes the filter shows up
+    assert inserted == [(1, 1)]
+    assert texts(results_model, 0) == ['0x200', '0x201']
+
+    results_model.set_filter('')
+    assert results_model.rowCount() == 4
+    results_model.clear()
+    assert results_model.rowCount() == 0
+    assert results_model.rowCount(results_model.index(0, 0)) == 0
+    assert results_model.data(QModelIndex()) is None
@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+from dwarf_debugger.lib.snapshot import Snapshot, SnapshotWriter
+
+PAGE = 0x1000
+
+
+def memory(seed=13):
+    """ {base: bytearray} of two ranges, with repeated and zero pages
+    """
+    rand = random.Random(seed)
+    first = bytearray(rand.randrange(256) for _ in range(8 * PAGE))
+    # same content as page 0, and a zero page
+    first[3 * PAGE:4 * PAGE] = first[0:PAGE]
+    first[5 * PAGE:6 * PAGE] = bytes(PAGE)
+    second = bytearray(rand.randrange(256) for _ in range(4 * PAGE))
+    return {0x10000: first, 0x40000: second}
+
+
+def write(file_path, ranges, parent=None, compress=False, holes=None, chunk=3 * PAGE):
+    holes = holes or {}
+    writer = SnapshotWriter(str(file_path), parent=parent, compress=compress)
+    for base, data in sorted(ranges.items()):
+        writer.begin_range({'base': hex(base), 'size': len(data), 'protection': 'rw-'})
+        for offset in range(0, len(data), chunk):
+            piece = data[offset:offset + chunk]
+            piece_holes = [(hole - offset, length) for hole, length in holes.get(base, [])
+                           if offset <= hole < offset + len(piece)]
+            writer.add_pages(piece, piece_holes)
+    writer.close({'pid': 1})
+    return writer.stats
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_round_trip(tmp_path, compress):
+    ranges = memory()
+    stats = write(tmp_path / 'a.dwsnap', ranges, compress=compress, holes={0x40000: [(PAGE, PAGE)]})
+    assert stats['pages'] == 12
+    assert stats['unreadable'] == 1
+    assert stats['deduplicated'] == 1
+    assert stats['stored'] == 10
+
+    with Snapshot(str(tmp_path / 'a.dwsnap')) as snapshot:
+        assert snapshot.info == {'pid': 1}
+        assert bytes(snapshot.page(0x13000)) == bytes(ranges[0x10000][0:PAGE])
+        assert snapshot.page(0x41000) is None
+        assert snapshot.read(0x10000 + 10, 5 * PAGE) == bytes(ranges[0x10000][10:10 + 5 * PAGE])
+        assert snapshot.read(0x30000, 4) is None
+
+        # past the end of the first range and over the hole of the second
+        data, holes = snapshot.read_sparse(0x40000 + PAGE - 4, PAGE + 8)
+        assert holes == [(4, PAGE)]
+        assert bytes(data[:4]) == bytes(ranges[0x40000][PAGE - 4:PAGE])
+        assert bytes(data[-4:]) == bytes(ranges[0x40000][2 * PAGE:2 * PAGE + 4])
+        data, holes = snapshot.read_sparse(0x18000 - 2, 4)
+        assert holes == [(2, 2)]
+
+
+def test_find_range(tmp_path):
+    write(tmp_path / 'a.dwsnap', memory())
+    with Snapshot(str(tmp_path / 'a.dwsnap')) as snapshot:
+        assert snapshot.find_range(0xffff) == -1
+        assert snapshot.find_range(0x10000) == 0
+        assert snapshot.find_range(0x17fff) == 0
+        assert snapshot.find_range(0x18000) == -1
+        assert snapshot.find_range(0x43fff) == 1
+        assert snapshot.find_range(0x44000) == -1
+
+
+def test_incremental_snapshots_read_through_their_parents(tmp_path):
+    ranges = memory()
+    write(tmp_path / 'a.dwsnap', ranges)
+
+    changed = {base: bytearray(data) for base, data in ranges.items()}
+    changed[0x10000][PAGE + 5] ^= 0xff
+    with Snapshot(str(tmp_path / 'a.dwsnap')) as parent:
+        stats = write(tmp_path / 'b.dwsnap', changed, parent=parent, compress=True)
+    assert stats['stored'] == 1
+    assert stats['from_parent'] == 10
+
+    # a third one on top, changing the second range only
+    changed_again = {base: bytearray(data) for base, data in changed.items()}
+    changed_again[0x40000][0:4] = b'\x00\x01\x02\x03'
+    with Snapshot(str(tmp_path / 'b.dwsnap')) as parent:
+        stats = write(tmp_path / 'c.dwsnap', changed_again, parent=parent)
+    assert stats['stored'] == 1
+
+    for name, expected in (('a', ranges), ('b', changed), ('c', changed_again)):
+        with Snapshot(str(tmp_path / (name + '.dwsnap'))) as snapshot:
+            for base, data in expected.items():
+                assert snapshot.read(base, len(data)) == bytes(data)
+
+    with Snapshot(str(tmp_path / 'a.dwsnap')) as first, Snapshot(str(tmp_path / 'c.dwsnap')) as last:
+        assert last.diff(first) == [0x11000, 0x40000]
+        assert first.diff(first) == []
@@ -0,0 +1,106 @@
+import random
+
+import pytest
+
+from dwarf_debugger.lib import strings
+from dwarf_debugger.lib.strings import ENCODING_ASCII, ENCODING_UTF16, StringCache, StringExtractor, \
+    StringTable, extract_strings
+
+
+def sample(count=3000, seed=19):
+    """ ascii and utf-16le strings of any alignment mixed with random bytes
+    """
+    rand = random.Random(seed)
+    parts = []
+    for i in range(count):
+        kind = rand.random()
+        if kind < 0.3:
+            parts.append(('hello_%d world' % i).encode())
+        elif kind < 0.45:
+            parts.append(('wide%d' % i).encode('utf-16-le'))
+        elif kind < 0.5:
+            parts.append(b'x' * rand.randint(1, 5))
+        else:
+            parts.append(bytes(rand.randrange(256) for _ in range(rand.randint(1, 30))))
+    return b''.join(parts)
+
+
+def rows(table, base=0):
+    return [(address - base, encoding, length, text) for address, encoding, length, text in
+            zip(table.addresses, table.encodings, table.lengths, table.texts)]
+
+
+@pytest.fixture(scope='module')
+def data():
+    return sample()
+
+
+@pytest.fixture
+def extractor(tmp_path):
+    return StringExtractor(workers=1, cache=StringCache(str(tmp_path)))
+
+
+def test_extract_strings():
+    data = b'\x01abc\x00hello\x00\x00w\x00i\x00d\x00e\x00\x00\x00tab\there'
+    assert extract_strings(data) == [
+        (5, ENCODING_ASCII, 5, 'hello'),
+        (12, ENCODING_UTF16, 4, 'wide'),
+        (22, ENCODING_ASCII, 8, 'tab\there'),
+    ]
+    assert extract_strings(data, min_length=3, encodings=(ENCODING_ASCII,))[0] == (1, ENCODING_ASCII, 3, 'abc')
+
+
+def test_numpy_and_regexes_agree(data, monkeypatch):
+    if strings.numpy is None:
+        pytest.skip('numpy not installed')
+    expected = extract_strings(data)
+    monkeypatch.setattr(strings, 'numpy', None)
+    assert extract_strings(data) == expected
+
+
+@pytest.mark.parametrize('read_size', [1, 7, 4096, 100003])
+def test_pieces_find_the_same_strings(data, extractor, read_size):
+    """ strings crossing the end of a piece are found once, from the piece they start in
+    """
+    base = 0x10000
+
+    def read(address, length):
+        return memoryview(data)[address - base:address - base + length], []
+
+    if read_size < 16:
+        data = data[:4000]
+    table = extractor.extract_ranges(read, [(base, len(data))], read_size=read_size)
+    assert rows(table, base) == extract_strings(data)
+
+
+def test_holes_drop_the_strings_overlapping_them(extractor):
+    data = b'first string\x00\x00second string\x00third string'
+    hole = (data.index(b'second') + 3, 4)
+
+    def read(address, length):
+        return memoryview(data)[address:address + length], [(hole[0] - address, hole[1])]
+
+    table = extractor.extract_ranges(read, [(0, len(data))])
+    assert [string[3] for string in rows(table)] == ['first string', 'third string']
+
+
+def test_pool_jobs_match_single_extraction(data, tmp_path, monkeypatch):
+    monkeypatch.setattr(StringExtractor, 'POOL_THRESHOLD', 1 << 12)
+    monkeypatch.setattr(StringExtractor, 'JOB_SIZE', 12345)
+    extractor = StringExtractor(workers=2, cache=StringCache(str(tmp_path)))
+    assert extractor.extract(data) == extract_strings(data)
+
+
+def test_table_save_load_and_filter(tmp_path):
+    table = StringTable()
+    table.extend([(0, ENCODING_ASCII, 5, 'Hello'), (8, ENCODING_UTF16, 5, 'world'), (20, ENCODING_ASCII, 4, 'help')],
+                 base=0x1000)
+    file_path = str(tmp_path / 'table.dwstr')
+    table.save(file_path, base=0x1000)
+
+    loaded = StringTable.load(file_path, base=0x5000)
+    assert rows(loaded, 0x5000) == rows(table, 0x1000)
+    assert list(loaded.filter('hel')) == [0, 2]
+    # narrowed from the previous result
+    assert list(loaded.filter('hell')) == [0]
+    assert loaded.filter('') is None
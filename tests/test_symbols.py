@@ -0,0 +1,139 @@
+import json
+import time
+
+from dwarf_debugger.lib.database import Database
+from dwarf_debugger.lib.rpc import ApiFuture
+from dwarf_debugger.lib.symbols import SymbolResolver
+from dwarf_debugger.lib.types.module_info import ModuleInfo
+
+FOO = 0x400000
+BARE = 0x500000
+OUTSIDE = 0x900000
+
+
+class FakeDwarf(object):
+    """ a database with libfoo, its symbols known, and libbare, exports only. the agent answers from answers
+    """
+
+    def __init__(self):
+        self.database = Database()
+        self.database.put_module_info(FOO, ModuleInfo({
+            'name': 'libfoo.so', 'base': hex(FOO), 'size': 0x10000, 'path': '/lib/libfoo.so',
+            'exports': [{'type': 'function', 'name': 'foo', 'address': hex(FOO + 0x1000)}],
+            'symbols': [{'type': 'function', 'name': 'bar', 'address': hex(FOO + 0x2000)}]}))
+        self.database.put_module_info(BARE, ModuleInfo({
+            'name': 'libbare.so', 'base': hex(BARE), 'size': 0x10000, 'path': '/lib/libbare.so',
+            'exports': [{'type': 'function', 'name': 'bare', 'address': hex(BARE + 0x1000)}]}))
+
+        # api -> result, or an Exception failing the call
+        self.answers = {}
+        self.calls = []
+        # alive until delivered, as Dwarf does
+        self.futures = set()
+
+    def dwarf_api(self, api, args=None):
+        self.calls.append((api, args))
+        answer = self.answers.get(api)
+        if isinstance(answer, Exception):
+            return None
+        return answer
+
+    def dwarf_api_async(self, api, args=None):
+        self.calls.append((api, args))
+        future = ApiFuture(api, on_done=self.futures.discard)
+        self.futures.add(future)
+        answer = self.answers.get(api)
+        if isinstance(answer, Exception):
+            future.set_error(answer)
+        else:
+            future.set_result(answer)
+        return future
+
+
+def asked(dwarf, api='getDebugSymbols'):
+    return [json.loads(args) if api == 'getDebugSymbols' else args for name, args in dwarf.calls if name == api]
+
+
+def wait(qapp, dwarf):
+    deadline = time.time() + 5
+    while dwarf.futures and time.time() < deadline:
+        qapp.processEvents()
+    assert not dwarf.futures
+
+
+def test_host_hits():
+    dwarf = FakeDwarf()
+    resolver = SymbolResolver(dwarf)
+
+    assert resolver.symbolize([FOO + 0x1010, hex(FOO + 0x2000), FOO + 0x10]) == {
+        FOO + 0x1010: ('foo', 'libfoo.so', 0x10),
+        FOO + 0x2000: ('bar', 'libfoo.so', 0),
+        # before the first symbol of the module
+        FOO + 0x10: None,
+    }
+    assert resolver.resolve(FOO + 0x2004) == ('bar', 'libfoo.so', 4)
+    assert dwarf.calls == []
+
+
+def test_agent_misses_are_remembered():
+    dwarf = FakeDwarf()
+    dwarf.answers['getDebugSymbols'] = [{'name': 'baz', 'moduleName': 'libbare.so'}, {'name': None}]
+    resolver = SymbolResolver(dwarf)
+
+    # the ones out of the modules, or in a module with exports only
+    addresses = [BARE + 0x1004, FOO + 0x1000, OUTSIDE, BARE + 0x1004]
+    assert resolver.symbolize(addresses) == {
+        BARE + 0x1004: ('baz', 'libbare.so', 0),
+        FOO + 0x1000: ('foo', 'libfoo.so', 0),
+        OUTSIDE: None,
+    }
+    # a single batch, without duplicates
+    assert asked(dwarf) == [[BARE + 0x1004, OUTSIDE]]
+
+    assert resolver.symbolize([OUTSIDE, BARE + 0x1004]) == {OUTSIDE: None, BARE + 0x1004: ('baz', 'libbare.so', 0)}
+    assert resolver.resolve(BARE + 0x1004) == ('baz', 'libbare.so', 0)
+    assert len(asked(dwarf)) == 1
+
+    resolver.reset()
+    assert resolver.resolve(BARE + 0x1004) is None
+
+
+def test_agent_misses_with_callback(qapp):
+    dwarf = FakeDwarf()
+    dwarf.answers['getDebugSymbols'] = [{'name': 'baz', 'moduleName': 'libbare.so'}]
+    dwarf.answers['enumerateModuleInfo'] = {
+        'symbols': [{'type': 'function', 'name': 'baz', 'address': hex(BARE + 0x2000)}]}
+    resolver = SymbolResolver(dwarf)
+    answered = []
+
+    # the host hits right away, the misses later
+    assert resolver.symbolize([FOO + 0x1000, BARE + 0x1004], callback=answered.append) == {
+        FOO + 0x1000: ('foo', 'libfoo.so', 0)}
+    wait(qapp, dwarf)
+    assert answered == [{BARE + 0x1004: ('baz', 'libbare.so', 0)}]
+
+    # the symbols of libbare were loaded meanwhile, once
+    assert asked(dwarf, 'enumerateModuleInfo') == ['libbare.so']
+    assert resolver.symbolize([BARE + 0x1010, BARE + 0x2010], callback=answered.append) == {
+        BARE + 0x1010: ('bare', 'libbare.so', 0x10), BARE + 0x2010: ('baz', 'libbare.so', 0x10)}
+    assert len(asked(dwarf)) == 1
+
+
+def test_failed_batch(qapp):
+    dwarf = FakeDwarf()
+    dwarf.answers['getDebugSymbols'] = Exception('getDebugSymbols timed out')
+    resolver = SymbolResolver(dwarf)
+
+    # the misses are left out
+    assert resolver.symbolize([FOO + 0x1000, OUTSIDE]) == {FOO + 0x1000: ('foo', 'libfoo.so', 0)}
+
+    # the caller gets an answer anyway
+    answered = []
+    assert resolver.symbolize([OUTSIDE], callback=answered.append) == {}
+    wait(qapp, dwarf)
+    assert answered == [{}]
+
+    # nothing was remembered, they are asked again
+    dwarf.answers['getDebugSymbols'] = [{'name': 'main', 'moduleName': 'target'}]
+    assert resolver.symbolize([OUTSIDE]) == {OUTSIDE: ('main', 'target', 0)}
+    assert asked(dwarf) == [[OUTSIDE]] * 3
@@ -0,0 +1,170 @@
+import struct
+from types import SimpleNamespace
+
+import pytest
+
+from dwarf_debugger.lib import value_scanner
+
+if not value_scanner.numpy_available():
+    pytest.skip('the value scanner needs numpy', allow_module_level=True)
+
+from dwarf_debugger.lib.value_scanner import (ScanCancelled, ValueScanner, VALUE_TYPES, SCAN_CHANGED,  # noqa: E402
+                                              SCAN_DECREASED, SCAN_EXACT, SCAN_INCREASED, SCAN_RANGE,
+                                              SCAN_UNCHANGED, SCAN_UNKNOWN)
+
+BASE = 0x100000
+SIZE = 0x4000
+
+FORMATS = {'int8': 'b', 'uint8': 'B', 'int16': 'h', 'uint16': 'H', 'int32': 'i', 'uint32': 'I',
+           'int64': 'q', 'uint64': 'Q', 'float': 'f', 'double': 'd'}
+
+
+class FakeDwarf(object):
+    """ readBytes of a single range, None on the unreadable pages
+    """
+
+    def __init__(self, unreadable=()):
+        self.memory = bytearray(SIZE)
+        self.unreadable = set(unreadable)
+        self.io = SimpleNamespace(read_workers=1)
+
+    def put(self, address, value_type, value, little_endian=True):
+        data = struct.pack(('<' if little_endian else '>') + FORMATS[value_type], value)
+        self.memory[address - BASE:address - BASE + len(data)] = data
+
+    def dwarf_api(self, api, args):
+        ptr, length = args
+        if any(page in self.unreadable for page in range(ptr - ptr % 0x1000, ptr + length, 0x1000)):
+            return None
+        return bytes(self.memory[ptr - BASE:ptr - BASE + length])
+
+
+@pytest.mark.parametrize('little_endian', [True, False], ids=['le', 'be'])
+@pytest.mark.parametrize('value_type', list(VALUE_TYPES.keys()))
+def test_types_and_endianness(value_type, little_endian):
+    dwarf = FakeDwarf()
+    value = 1.5 if value_type in ('float', 'double') else 0x5a
+    dwarf.put(BASE + 0x100, value_type, value, little_endian)
+
+    scanner = ValueScanner(dwarf, value_type, little_endian=little_endian)
+    assert scanner.first_scan([(BASE, SIZE)], SCAN_EXACT, scanner.value(str(value))) == 1
+    assert scanner.results() == [(BASE + 0x100, value)]
+
+    # the other byte order doesn't read the same value
+    other = ValueScanner(dwarf, value_type, little_endian=not little_endian)
+    if VALUE_TYPES[value_type][1] != '1':
+        assert other.first_scan([(BASE, SIZE)], SCAN_EXACT, other.value(str(value))) == 0
+
+
+def test_value_parsing():
+    assert ValueScanner(FakeDwarf(), 'uint16').value('0x10') == 16
+    assert ValueScanner(FakeDwarf(), 'double').value('-2.5') == -2.5
+
+
+def test_alignment():
+    dwarf = FakeDwarf()
+    dwarf.put(BASE + 0x101, 'int32', 1234)
+
+    assert ValueScanner(dwarf, 'int32').first_scan([(BASE, SIZE)], SCAN_EXACT, 1234) == 0
+
+    scanner = ValueScanner(dwarf, 'int32', alignment=1)
+    assert scanner.first_scan([(BASE, SIZE)], SCAN_EXACT, 1234) == 1
+    assert scanner.results() == [(BASE + 0x101, 1234)]
+
+    # the ones of a range which isn't aligned itself
+    scanner = ValueScanner(dwarf, 'int32', alignment=2)
+    assert scanner.first_scan([(BASE + 1, SIZE - 1)], SCAN_EXACT, 1234) == 0
+    dwarf.put(BASE + 0x202, 'int32', 1234)
+    assert scanner.first_scan([(BASE + 1, SIZE - 1)], SCAN_EXACT, 1234) == 1
+    assert scanner.results() == [(BASE + 0x202, 1234)]
+
+
+@pytest.mark.parametrize('mode', [SCAN_EXACT, SCAN_UNKNOWN])
+def test_value_straddling_chunks(monkeypatch, mode):
+    monkeypatch.setattr(ValueScanner, 'CHUNK_SIZE', 0x1000)
+    dwarf = FakeDwarf()
+    address = BASE + 0x1000 - 2
+    dwarf.put(address, 'int32', 0x11223344)
+
+    scanner = ValueScanner(dwarf, 'int32', alignment=1)
+    scanner.first_scan([(BASE, SIZE)], mode, 0x11223344)
+    if mode == SCAN_UNKNOWN:
+        assert scanner.count == SIZE - 3
+        dwarf.put(address, 'int32', 0x11223345)
+        assert scanner.next_scan(SCAN_CHANGED) > 0
+        assert scanner.next_scan(SCAN_EXACT, 0x11223345) == 1
+    assert [address for address, _ in scanner.results()] == [address]
+
+
+def test_unreadable_pages_are_skipped():
+    dwarf = FakeDwarf(unreadable={BASE + 0x2000})
+    dwarf.put(BASE + 0x1ffe, 'int32', 7)
+    dwarf.put(BASE + 0x2100, 'int32', 0)
+
+    scanner = ValueScanner(dwarf, 'int32', alignment=1)
+    # the zeros of the unreadable page and the value crossing into it aren't candidates
+    scanner.first_scan([(BASE, SIZE)], SCAN_EXACT, 0)
+    assert all(not BASE + 0x2000 - 4 < address < BASE + 0x3000 for address, _ in scanner.results(count=SIZE))
+    assert scanner.first_scan([(BASE, SIZE)], SCAN_EXACT, 7) == 0
+
+
+def test_narrowing():
+    dwarf = FakeDwarf()
+    addresses = [BASE + 0x10 * i for i in range(6)]
+    for i, address in enumerate(addresses):
+        dwarf.put(address, 'int32', 100 + i)
+
+    scanner = ValueScanner(dwarf, 'int32')
+    assert scanner.first_scan([(BASE, SIZE)], SCAN_RANGE, 100, 105) == 6
+    assert scanner.next_scan(SCAN_UNCHANGED) == 6
+
+    dwarf.put(addresses[0], 'int32', 200)
+    dwarf.put(addresses[1], 'int32', 50)
+    assert scanner.next_scan(SCAN_CHANGED) == 2
+    assert scanner.results() == [(addresses[0], 200), (addresses[1], 50)]
+
+    dwarf.put(addresses[0], 'int32', 300)
+    dwarf.put(addresses[1], 'int32', 60)
+    assert scanner.next_scan(SCAN_INCREASED) == 2
+    dwarf.put(addresses[1], 'int32', 10)
+    assert scanner.next_scan(SCAN_DECREASED) == 1
+    assert scanner.results() == [(addresses[1], 10)]
+    assert scanner.next_scan(SCAN_EXACT, 11) == 0
+    assert scanner.scans == 6
+
+
+def test_unknown_first_scan(monkeypatch):
+    # far apart candidates are read separately
+    monkeypatch.setattr(ValueScanner, 'MERGE_GAP', 0x100)
+    dwarf = FakeDwarf()
+    scanner = ValueScanner(dwarf, 'uint16')
+    assert scanner.first_scan([(BASE, SIZE)], SCAN_UNKNOWN) == SIZE // 2
+    assert scanner.results() == []
+    assert scanner.next_scan(SCAN_UNCHANGED) == SIZE // 2
+
+    dwarf.put(BASE + 0x10, 'uint16', 1)
+    dwarf.put(BASE + 0x3000, 'uint16', 2)
+    assert scanner.next_scan(SCAN_INCREASED) == 2
+    dwarf.put(BASE + 0x3000, 'uint16', 3)
+    assert scanner.next_scan(SCAN_RANGE, 2, 3) == 1
+    assert scanner.results() == [(BASE + 0x3000, 3)]
+
+
+def test_previous_scan_needed():
+    scanner = ValueScanner(FakeDwarf(), 'int32')
+    assert scanner.next_scan(SCAN_CHANGED) == 0
+    with pytest.raises(ValueError):
+        scanner.first_scan([(BASE, SIZE)], SCAN_CHANGED)
+
+
+def test_cancel(monkeypatch):
+    monkeypatch.setattr(ValueScanner, 'CHUNK_SIZE', 0x1000)
+    scanner = ValueScanner(FakeDwarf(), 'int32')
+    progress = []
+
+    def on_progress(done, total):
+        progress.append(done)
+        scanner.cancel()
+    with pytest.raises(ScanCancelled):
+        scanner.first_scan([(BASE, SIZE)], SCAN_EXACT, 0, progress=on_progress)
+    assert progress == [0x1000]